@@ -5,6 +5,7 @@
 from library.highlighter_factory import HighlighterFactory
 from library.logger import get_logger, shutdown_logger
 from library.api import Settings
+from library.theme_registry import get_theme_registry
 from library.multi_file_editor import MultiFileEditor
 from library.editor_operations import EditorOperations
 from library.file_handle_manager import get_file_manager, shutdown_file_manager
@@ -23,26 +24,17 @@ from i18n import t
 
 from library.py_executable_check import is_conda
 
-# 检查是否是支持的系统类型
-import platform
-if platform.system() not in ["Windows"]:
-    messagebox.showwarning("警告", "当前系统不支持，仅在Windows上运行")
-
-# 检查是否在conda环境中
-if is_conda():
-    messagebox.showwarning("警告", "当前环境为conda环境，可能会导致一些问题，建议在普通环境中运行\n如果仍要运行，请注释 app.py 中的检查部分。")
-    exit(1)
-
-# 导入并执行第一次启动操作
-from library.startup import first_startup_operations
-first_startup_operations()
-
-logger = get_logger()
 highlighter_factory = HighlighterFactory()
 file_path = "temp_script.txt"
 
-# 记录程序启动信息
-logger.info("程序启动")
+# 以下全局变量由 startup() 设置。工作区检查进程池以 spawn 启动工作进程，
+# 工作进程会以 __mp_main__ 的名字重新导入本模块，启动操作不能在导入时执行
+logger = None
+settings = None
+dark_themes = None
+dark_terminal_theme = None
+light_terminal_theme = None
+
 
 # 添加全局异常处理，确保崩溃时导出日志
 def handle_global_exception(exctype, value, traceback):
@@ -68,23 +60,50 @@ def handle_global_exception(exctype, value, traceback):
     import sys
     sys.__excepthook__(exctype, value, traceback)
 
-# 设置全局异常处理器
-import sys
-sys.excepthook = handle_global_exception
-
-# 加载设置
-with open(f"{Path.cwd() / 'asset' / 'settings.json'}", "r", encoding="utf-8") as fp:
-    settings = json.load(fp)
-
-# 加载主题数据
-with open(f"{Path.cwd() / 'asset' / 'packages' / 'themes.dark.json'}", "r", encoding="utf-8") as fp:
-    dark_themes = json.load(fp)
 
-with open(f"{Path.cwd() / 'asset' / 'theme' / 'terminalTheme' / 'dark.json'}", "r", encoding="utf-8") as fp:
-    dark_terminal_theme = json.load(fp)
-
-with open(f"{Path.cwd() / 'asset' / 'theme' / 'terminalTheme' / 'light.json'}", "r", encoding="utf-8") as fp:
-    light_terminal_theme = json.load(fp)
+def startup():
+    """
+    执行程序启动前的检查和初始化：检查运行环境、执行第一次启动操作、
+    启动日志记录器、设置全局异常处理器并加载设置和主题数据
+    """
+    global logger, settings, dark_themes, dark_terminal_theme, light_terminal_theme
+    
+    # 检查是否是支持的系统类型
+    import platform
+    if platform.system() not in ["Windows"]:
+        messagebox.showwarning("警告", "当前系统不支持，仅在Windows上运行")
+    
+    # 检查是否在conda环境中
+    if is_conda():
+        messagebox.showwarning("警告", "当前环境为conda环境，可能会导致一些问题，建议在普通环境中运行\n如果仍要运行，请注释 app.py 中的检查部分。")
+        exit(1)
+    
+    # 导入并执行第一次启动操作
+    from library.startup import first_startup_operations
+    first_startup_operations()
+    
+    logger = get_logger()
+    
+    # 记录程序启动信息
+    logger.info("程序启动")
+    
+    # 设置全局异常处理器
+    import sys
+    sys.excepthook = handle_global_exception
+    
+    # 加载设置
+    with open(f"{Path.cwd() / 'asset' / 'settings.json'}", "r", encoding="utf-8") as fp:
+        settings = json.load(fp)
+    
+    # 加载主题数据
+    with open(f"{Path.cwd() / 'asset' / 'packages' / 'themes.dark.json'}", "r", encoding="utf-8") as fp:
+        dark_themes = json.load(fp)
+    
+    with open(f"{Path.cwd() / 'asset' / 'theme' / 'terminalTheme' / 'dark.json'}", "r", encoding="utf-8") as fp:
+        dark_terminal_theme = json.load(fp)
+    
+    with open(f"{Path.cwd() / 'asset' / 'theme' / 'terminalTheme' / 'light.json'}", "r", encoding="utf-8") as fp:
+        light_terminal_theme = json.load(fp)
 
 
 class App:
@@ -111,6 +130,7 @@ class App:
         # 创建多文件编辑器 - 需要在文件浏览器之前创建
         logger.info("创建多文件编辑器")
         self.multi_editor = MultiFileEditor(self.root.editor_frame, self.root.flake8_tree, None, None)
+        self.multi_editor.set_status_label(self.root.highlight_status_label)
         
         # 创建文件浏览器 - 现在可以安全访问multi_editor
         logger.info("创建文件浏览器")
@@ -223,12 +243,9 @@ class App:
             
             # 加载主题
             theme_name = Settings.Highlighter.syntax_highlighting()["theme"]
-            theme_file = f"{Path.cwd() / 'asset' / 'theme' / theme_name}.json"
-            if os.path.exists(theme_file):
-                with open(theme_file, "r", encoding="utf-8") as f:
-                    theme_data = json.load(f)
-            else:
-                logger.warning(f"主题文件不存在: {theme_file}, 使用默认主题")
+            theme_data = get_theme_registry().get(theme_name)
+            if theme_data is None:
+                logger.warning(f"主题文件不存在: {theme_name}, 使用默认主题")
                 # 使用内置默认主题
                 theme_data = {
                     "base": {
@@ -327,7 +344,10 @@ class App:
 if __name__ == "__main__":
     import sys
     import traceback
-    import os
+    import multiprocessing
+    
+    # 打包后的程序中，工作区检查进程池的工作进程从这里启动
+    multiprocessing.freeze_support()
     
     # 打印基本信息
     print("="*50)
@@ -342,6 +362,8 @@ if __name__ == "__main__":
     print("="*50)
     print("开始启动代码编辑器...")
     
+    startup()
+    
     try:
         app = App()
         app.run()
@@ -139,6 +139,10 @@ class EditorConfig:
         """获取滚动条显示设置"""
         return self._config.get("editor.scrollbar", True)
     
+    def tail_retained_lines(self) -> int:
+        """获取跟踪日志时最多保留的行数，0 表示不限制"""
+        return self._config.get("editor.tail-retained-lines", 100000)
+    
     def change(self, key: str, value: Any) -> None:
         """更改编辑器设置"""
         self._config.set(f"editor.{key}", value)
@@ -276,6 +280,14 @@ class AdvancedConfig:
         """获取调试模式设置"""
         return self._config.get("advanced.debug-mode", False)
     
+    def lint_cache_dir(self) -> Optional[str]:
+        """获取检查结果缓存目录，设为空字符串时只缓存在内存中"""
+        return self._config.get("advanced.lint-cache-dir", "./cache/lint") or None
+    
+    def workspace_lint_workers(self) -> int:
+        """获取检查工作区的进程数，0 表示与 CPU 核数相同"""
+        return self._config.get("advanced.workspace-lint-workers", 0)
+    
     def change(self, key: str, value: Any) -> None:
         """更改高级设置"""
         self._config.set(f"advanced.{key}", value)
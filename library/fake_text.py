@@ -0,0 +1,575 @@
+"""
+内存中的 Tk Text 替身
+实现高亮器、静态检查管理器和多文件编辑器用到的 Text 接口，
+不需要显示器即可运行，并统计每个方法的调用次数。
+真实组件上的每次调用都是一次 Tcl 往返，调用次数可以作为性能指标。
+供单元测试和 tools/benchmark_highlighters.py 使用。
+"""
+
+import bisect
+import re
+from collections import Counter
+from tkinter import TclError
+
+# 索引的基准部分，例如 3.4、3.end、end、insert、sel.first
+_BASE_PATTERN = re.compile(r'\s*(?:(\d+)\.(\d+|end)|(\w+)\.(first|last)|(\w+))')
+# 索引的修饰部分，例如 -1c、+ 2 lines、linestart
+_MODIFIER_PATTERN = re.compile(
+    r'\s*(?:([+-])\s*(\d+)\s*(chars|char|c|indices|i|lines|line|l)\b'
+    r'|(linestart|lineend|wordstart|wordend))'
+)
+_WORD_PATTERN = re.compile(r'\w')
+
+
+class FakeText:
+    """
+    Tk Text 的内存实现
+
+    文本末尾总有一个换行符，与 Tk 一致。标签区间以字符偏移保存，
+    插入和删除时按 Tk 的规则移动。``after`` 安排的回调不会自动运行，
+    由 ``run_after`` 或 ``run_idle`` 手动执行。
+    """
+
+    def __init__(self, master=None, text: str = "", height: int = 40, **options):
+        """
+        初始化文本组件
+
+        Args:
+            master: 父组件（忽略）
+            text: 初始文本
+            height: 可见行数，用于模拟 yview
+            **options: 组件选项，可由 cget 读取
+        """
+        self.calls = Counter()
+        self.tag_ranges_added = 0
+        self.height = height
+        self._options = dict(options)
+        self._text = "\n"
+        self._line_starts = [0]
+        self._tags = {}          # {标签: [起始, 结束, 起始, 结束, ...]}
+        self._tag_options = {}   # {标签: 选项}
+        self._tag_bindings = {}  # {(标签, 事件): 回调}
+        self._marks = {"insert": 0, "current": 0}
+        self._bindings = {}      # {事件: [回调]}
+        self._after = {}         # {ID: (延迟, 回调, 参数)}
+        self._after_count = 0
+        self._modified = False
+        self._top_line = 0
+        if text:
+            self._insert_at(0, text)
+            self._modified = False
+
+    # ------------------------------------------------------------------
+    # 调用统计
+
+    def _count(self, name: str):
+        self.calls[name] += 1
+
+    @property
+    def round_trips(self) -> int:
+        """所有方法调用次数之和，对应真实组件的 Tcl 往返次数"""
+        return sum(self.calls.values())
+
+    def tag_operations(self) -> int:
+        """tag_add 与 tag_remove 的调用总数"""
+        return self.calls["tag_add"] + self.calls["tag_remove"]
+
+    def reset_calls(self):
+        """清空调用统计"""
+        self.calls.clear()
+        self.tag_ranges_added = 0
+
+    # ------------------------------------------------------------------
+    # 索引
+
+    @property
+    def text(self) -> str:
+        """不含末尾换行符的文本"""
+        return self._text[:-1]
+
+    def _rebuild_lines(self):
+        starts = [0]
+        find = self._text.find
+        pos = find("\n")
+        while pos != -1:
+            starts.append(pos + 1)
+            pos = find("\n", pos + 1)
+        # 最后一个换行符之后没有行
+        starts.pop()
+        self._line_starts = starts
+
+    def _line_of(self, offset: int) -> int:
+        return bisect.bisect_right(self._line_starts, offset) - 1
+
+    def _line_end(self, line: int) -> int:
+        """第 line 行（从0开始）换行符的偏移"""
+        if line + 1 < len(self._line_starts):
+            return self._line_starts[line + 1] - 1
+        return len(self._text) - 1
+
+    def _offset_of_position(self, line: int, column) -> int:
+        """1 起始的行号和列号转换为偏移，超出范围时与 Tk 一样截断"""
+        if line < 1:
+            return 0
+        if line > len(self._line_starts):
+            return len(self._text)
+        line -= 1
+        end = self._line_end(line)
+        if column == "end":
+            return end
+        return min(self._line_starts[line] + int(column), end)
+
+    def _offset(self, index) -> int:
+        """把 Tk 索引解析为字符偏移"""
+        index = str(index)
+        match = _BASE_PATTERN.match(index)
+        if match is None:
+            raise TclError(f'bad text index "{index}"')
+        line, column, tag, which, name = match.groups()
+        if line is not None:
+            offset = self._offset_of_position(int(line), column)
+        elif tag is not None:
+            ranges = self._tags.get(tag)
+            if not ranges:
+                raise TclError(f'text doesn\'t contain any characters tagged with "{tag}"')
+            offset = ranges[0] if which == "first" else ranges[-1]
+        elif name == "end":
+            offset = len(self._text)
+        elif name in self._marks:
+            offset = self._marks[name]
+        else:
+            raise TclError(f'bad text index "{index}"')
+
+        pos = match.end()
+        while pos < len(index):
+            modifier = _MODIFIER_PATTERN.match(index, pos)
+            if modifier is None:
+                if index[pos:].strip():
+                    raise TclError(f'bad text index "{index}"')
+                break
+            sign, count, unit, keyword = modifier.groups()
+            if keyword is not None:
+                offset = self._apply_keyword(offset, keyword)
+            elif unit[0] == "l":
+                if offset >= len(self._text):
+                    # end 位于最后一行之后的行首
+                    line, column = len(self._line_starts), 0
+                else:
+                    line = self._line_of(offset)
+                    column = offset - self._line_starts[line]
+                line += int(count) if sign == "+" else -int(count)
+                line = max(0, min(line, len(self._line_starts) - 1))
+                offset = min(self._line_starts[line] + column, self._line_end(line))
+            else:
+                offset += int(count) if sign == "+" else -int(count)
+            offset = max(0, min(offset, len(self._text)))
+            pos = modifier.end()
+        return offset
+
+    def _apply_keyword(self, offset: int, keyword: str) -> int:
+        line = self._line_of(min(offset, len(self._text) - 1))
+        if keyword == "linestart":
+            return self._line_starts[line]
+        if keyword == "lineend":
+            return self._line_end(line)
+        text = self._text
+        if keyword == "wordstart":
+            while offset > 0 and _WORD_PATTERN.match(text, offset - 1):
+                offset -= 1
+            return offset
+        while offset < len(text) and _WORD_PATTERN.match(text, offset):
+            offset += 1
+        return offset
+
+    def _index_of(self, offset: int) -> str:
+        line = self._line_of(min(offset, max(len(self._text) - 1, 0)))
+        if offset >= len(self._text):
+            # end 位于最后一行之后
+            return f"{len(self._line_starts) + 1}.0"
+        return f"{line + 1}.{offset - self._line_starts[line]}"
+
+    def index(self, index) -> str:
+        """返回规范化的 行.列 索引"""
+        self._count("index")
+        return self._index_of(self._offset(index))
+
+    def compare(self, index1, op: str, index2) -> bool:
+        """比较两个索引"""
+        self._count("compare")
+        a, b = self._offset(index1), self._offset(index2)
+        return {"<": a < b, "<=": a <= b, "==": a == b, ">=": a >= b, ">": a > b, "!=": a != b}[op]
+
+    # ------------------------------------------------------------------
+    # 文本
+
+    def get(self, index1, index2=None) -> str:
+        """获取文本，与 Tk 一样 ``end`` 包含末尾的换行符"""
+        self._count("get")
+        start = self._offset(index1)
+        if index2 is None:
+            return self._text[start:start + 1]
+        end = self._offset(index2)
+        return self._text[start:end] if end > start else ""
+
+    def insert(self, index, chars: str, *tags):
+        """在 index 处插入文本"""
+        self._count("insert")
+        if not chars:
+            return
+        # 文本总是插入在最后的换行符之前
+        offset = min(self._offset(index), len(self._text) - 1)
+        self._insert_at(offset, chars)
+        for tag in tags:
+            if isinstance(tag, str):
+                self._add_range(tag, offset, offset + len(chars))
+
+    def _insert_at(self, offset: int, chars: str):
+        length = len(chars)
+        self._text = self._text[:offset] + chars + self._text[offset:]
+        self._rebuild_lines()
+        for tag, ranges in self._tags.items():
+            for i in range(0, len(ranges), 2):
+                start, end = ranges[i], ranges[i + 1]
+                if offset <= start:
+                    ranges[i], ranges[i + 1] = start + length, end + length
+                elif offset < end:
+                    # 插入点两侧的字符都带有标签时，新文本也带有该标签
+                    ranges[i + 1] = end + length
+        for name, mark in self._marks.items():
+            # 标记默认右侧重力
+            if mark >= offset:
+                self._marks[name] = mark + length
+        self._modified = True
+
+    def delete(self, index1, index2=None):
+        """删除文本，最后的换行符不会被删除"""
+        self._count("delete")
+        start = self._offset(index1)
+        end = start + 1 if index2 is None else self._offset(index2)
+        end = min(end, len(self._text) - 1)
+        if end <= start:
+            return
+        length = end - start
+        self._text = self._text[:start] + self._text[end:]
+        self._rebuild_lines()
+
+        def shift(position):
+            if position <= start:
+                return position
+            if position >= end:
+                return position - length
+            return start
+
+        for tag in list(self._tags):
+            shifted = []
+            ranges = self._tags[tag]
+            for i in range(0, len(ranges), 2):
+                new_start, new_end = shift(ranges[i]), shift(ranges[i + 1])
+                if new_end > new_start:
+                    shifted.extend((new_start, new_end))
+            self._tags[tag] = []
+            for i in range(0, len(shifted), 2):
+                self._merge_range(self._tags[tag], shifted[i], shifted[i + 1])
+        for name, mark in self._marks.items():
+            self._marks[name] = shift(mark)
+        self._modified = True
+
+    # ------------------------------------------------------------------
+    # 标签
+
+    def _pairs(self, indices):
+        """把 tag_add/tag_remove 的索引参数转换为偏移区间"""
+        pairs = []
+        for i in range(0, len(indices), 2):
+            start = self._offset(indices[i])
+            if i + 1 < len(indices):
+                end = self._offset(indices[i + 1])
+            else:
+                end = start + 1
+            if end > start:
+                pairs.append((start, end))
+        return pairs
+
+    @staticmethod
+    def _merge_range(ranges, start: int, end: int):
+        """把区间并入有序且互不相交的区间列表"""
+        i = bisect.bisect_left(ranges, start)
+        if i % 2 == 1:
+            i -= 1
+        j = i
+        while j < len(ranges) and ranges[j] <= end:
+            start = min(start, ranges[j])
+            end = max(end, ranges[j + 1])
+            j += 2
+        ranges[i:j] = [start, end]
+
+    def _add_range(self, tag: str, start: int, end: int):
+        self._merge_range(self._tags.setdefault(tag, []), start, end)
+
+    def tag_add(self, tag: str, index1, *indices):
+        """为一个或多个区间添加标签"""
+        self._count("tag_add")
+        self._tag_options.setdefault(tag, {})
+        for start, end in self._pairs((index1,) + indices):
+            self.tag_ranges_added += 1
+            self._add_range(tag, start, end)
+
+    def tag_remove(self, tag: str, index1, *indices):
+        """移除一个或多个区间的标签"""
+        self._count("tag_remove")
+        ranges = self._tags.get(tag)
+        if not ranges:
+            return
+        for start, end in self._pairs((index1,) + indices):
+            kept = []
+            for i in range(0, len(ranges), 2):
+                range_start, range_end = ranges[i], ranges[i + 1]
+                if range_end <= start or range_start >= end:
+                    kept.extend((range_start, range_end))
+                    continue
+                if range_start < start:
+                    kept.extend((range_start, start))
+                if range_end > end:
+                    kept.extend((end, range_end))
+            ranges[:] = kept
+
+    def tag_ranges(self, tag: str) -> tuple:
+        """返回标签的所有区间，起止索引交替排列"""
+        self._count("tag_ranges")
+        return tuple(self._index_of(offset) for offset in self._tags.get(tag, ()))
+
+    def tag_names(self, index=None) -> tuple:
+        """返回所有标签，或 index 处字符的标签"""
+        self._count("tag_names")
+        if index is None:
+            return tuple(self._tag_options)
+        offset = self._offset(index)
+        names = []
+        for tag, ranges in self._tags.items():
+            i = bisect.bisect_right(ranges, offset)
+            if i % 2 == 1:
+                names.append(tag)
+        return tuple(names)
+
+    def tag_configure(self, tag: str, cnf=None, **options):
+        """设置或读取标签选项"""
+        self._count("tag_configure")
+        current = self._tag_options.setdefault(tag, {})
+        if cnf:
+            current.update(cnf)
+        current.update(options)
+        return dict(current)
+
+    tag_config = tag_configure
+
+    def tag_cget(self, tag: str, option: str):
+        """读取标签选项"""
+        self._count("tag_cget")
+        return self._tag_options.get(tag, {}).get(option, "")
+
+    def tag_delete(self, *tags):
+        """删除标签及其区间"""
+        self._count("tag_delete")
+        for tag in tags:
+            self._tags.pop(tag, None)
+            self._tag_options.pop(tag, None)
+
+    def tag_bind(self, tag: str, sequence: str, func=None, add=None):
+        """绑定标签事件"""
+        self._count("tag_bind")
+        self._tag_bindings[(tag, sequence)] = func
+
+    def tag_raise(self, *args):
+        self._count("tag_raise")
+
+    def tag_lower(self, *args):
+        self._count("tag_lower")
+
+    # ------------------------------------------------------------------
+    # 标记和视图
+
+    def mark_set(self, name: str, index):
+        """设置标记位置"""
+        self._count("mark_set")
+        self._marks[name] = min(self._offset(index), len(self._text) - 1)
+
+    def mark_unset(self, *names):
+        """删除标记"""
+        self._count("mark_unset")
+        for name in names:
+            self._marks.pop(name, None)
+
+    def see(self, index):
+        """滚动到 index 可见"""
+        self._count("see")
+        line = self._line_of(self._offset(index))
+        if line < self._top_line or line >= self._top_line + self.height:
+            self._top_line = max(0, line - self.height // 2)
+
+    def yview(self, *args):
+        """无参数时返回可见区域的比例，否则滚动"""
+        self._count("yview")
+        lines = len(self._line_starts)
+        if not args:
+            first = self._top_line / lines
+            return first, min(1.0, (self._top_line + self.height) / lines)
+        if args[0] == "moveto":
+            self._top_line = int(float(args[1]) * lines)
+        elif args[0] == "scroll":
+            step = int(args[1]) * (self.height if args[2].startswith("page") else 1)
+            self._top_line += step
+        else:
+            self._top_line = self._line_of(self._offset(args[0]))
+        self._top_line = max(0, min(self._top_line, max(0, lines - 1)))
+
+    def yview_moveto(self, fraction):
+        """滚动到比例位置"""
+        self._count("yview_moveto")
+        self._top_line = max(0, min(int(float(fraction) * len(self._line_starts)), len(self._line_starts) - 1))
+
+    def yview_scroll(self, number, what):
+        """按行或页滚动"""
+        self.yview("scroll", number, what)
+
+    # ------------------------------------------------------------------
+    # 事件和定时器
+
+    def edit_modified(self, arg=None):
+        """读取或设置修改标志"""
+        self._count("edit_modified")
+        if arg is None:
+            return self._modified
+        self._modified = bool(arg)
+
+    def bind(self, sequence=None, func=None, add=None):
+        """绑定事件，add 为真时追加"""
+        self._count("bind")
+        if func is None:
+            return self._bindings.get(sequence, [])
+        if add:
+            self._bindings.setdefault(sequence, []).append(func)
+        else:
+            self._bindings[sequence] = [func]
+        return f"bind{id(func)}"
+
+    def unbind(self, sequence, funcid=None):
+        self._count("unbind")
+        self._bindings.pop(sequence, None)
+
+    def event_generate(self, sequence: str, **kwargs):
+        """运行绑定到 sequence 的回调"""
+        self._count("event_generate")
+        event = type("Event", (), dict(kwargs, widget=self))()
+        for func in list(self._bindings.get(sequence, [])):
+            func(event)
+
+    def after(self, ms, func=None, *args):
+        """安排回调，返回可取消的 ID"""
+        self._count("after")
+        if func is None:
+            return None
+        self._after_count += 1
+        after_id = f"after#{self._after_count}"
+        self._after[after_id] = (int(ms), func, args)
+        return after_id
+
+    def after_idle(self, func, *args):
+        """安排空闲回调"""
+        self._count("after_idle")
+        self._after_count += 1
+        after_id = f"after#{self._after_count}"
+        self._after[after_id] = ("idle", func, args)
+        return after_id
+
+    def after_cancel(self, after_id):
+        """取消回调"""
+        self._count("after_cancel")
+        self._after.pop(after_id, None)
+
+    def pending_after(self) -> list:
+        """等待中的回调，按安排的顺序"""
+        return [(after_id, delay) for after_id, (delay, _, _) in self._after.items()]
+
+    def run_after(self, max_rounds: int = 1000) -> int:
+        """
+        按安排顺序运行所有等待中的回调，包括运行时新安排的回调
+
+        Args:
+            max_rounds: 最多运行的回调数，防止轮询回调无限重复
+
+        Returns:
+            运行的回调数
+        """
+        ran = 0
+        while self._after and ran < max_rounds:
+            after_id = next(iter(self._after))
+            _, func, args = self._after.pop(after_id)
+            func(*args)
+            ran += 1
+        return ran
+
+    def run_idle(self) -> int:
+        """只运行空闲回调"""
+        ran = 0
+        while True:
+            idle = [after_id for after_id, (delay, _, _) in self._after.items() if delay == "idle"]
+            if not idle:
+                return ran
+            _, func, args = self._after.pop(idle[0])
+            func(*args)
+            ran += 1
+
+    # ------------------------------------------------------------------
+    # 其余组件方法
+
+    def configure(self, cnf=None, **options):
+        self._count("configure")
+        if cnf:
+            self._options.update(cnf)
+        self._options.update(options)
+
+    config = configure
+
+    def cget(self, option: str):
+        self._count("cget")
+        return self._options.get(option, "")
+
+    def __getitem__(self, option: str):
+        return self.cget(option)
+
+    def focus_set(self):
+        self._count("focus_set")
+
+    def update_idletasks(self):
+        self._count("update_idletasks")
+
+    def winfo_exists(self) -> bool:
+        return True
+
+    def winfo_height(self) -> int:
+        return self.height * 16
+
+    def winfo_width(self) -> int:
+        return 800
+
+    def pack(self, *args, **kwargs):
+        self._count("pack")
+
+    def destroy(self):
+        self._count("destroy")
+        self._after.clear()
+
+
+def drain_span_jobs(highlighter):
+    """
+    等待高亮器的后台词法分析完成，并在当前线程应用所有结果
+
+    ``_poll_span_jobs`` 本应由 ``after`` 定时器调用，这里直接调用，
+    不需要运行组件的定时器队列。
+
+    Args:
+        highlighter: 高亮器实例
+    """
+    while highlighter._span_jobs:
+        highlighter._span_jobs[-1][1].result()
+        highlighter._poll_span_jobs()
@@ -0,0 +1,149 @@
+"""
+大文件高亮策略
+根据文本大小、行数和最长行长度为每个缓冲区选择高亮级别
+"""
+
+from typing import List, Optional, Tuple
+
+# 高亮级别，从完整到关闭依次降级
+TIER_FULL = "full"          # 词法高亮加语法树语义高亮
+TIER_LEXICAL = "lexical"    # 只做词法高亮，不解析语法树
+TIER_VISIBLE = "visible"    # 只高亮可见区域，超长行不高亮
+TIER_OFF = "off"            # 不高亮
+
+TIERS = (TIER_FULL, TIER_LEXICAL, TIER_VISIBLE, TIER_OFF)
+
+# 各级别允许的最大 (字符数, 行数, 最长行长度)，None 表示不限制。
+# 超长行本身不高亮（见 DEFAULT_MAX_LINE_LENGTH），因此完整和词法级别不限制最长行
+DEFAULT_LIMITS = {
+    TIER_FULL: (1024 * 1024, 20000, None),
+    TIER_LEXICAL: (8 * 1024 * 1024, 200000, None),
+    TIER_VISIBLE: (64 * 1024 * 1024, None, 1024 * 1024),
+}
+
+# 超过这个长度的行不送入正则，显示为纯文本。
+# 行内的回溯（例如没有闭合的字符串）最坏与行长的平方成正比，这个上限也限制了它
+DEFAULT_MAX_LINE_LENGTH = 2000
+
+# 一次高亮的时间预算：基础秒数加上每 MiB 文本的秒数，超出时退回纯文本。
+# 按文本大小线性增长，只有超线性的回溯才会超出
+PASS_BUDGET_BASE = 2.0
+PASS_BUDGET_PER_MIB = 4.0
+
+# 升级时各项指标需低于限制的这个比例，避免在边界附近来回切换
+UPGRADE_MARGIN = 0.8
+
+_global_highlight_policy = None
+
+
+class HighlightPolicy:
+    """
+    高亮级别策略
+    每次高亮前重新评估，文本变大时降级，明显变小后才升级
+    """
+
+    def __init__(self, limits: Optional[dict] = None, max_line_length: int = DEFAULT_MAX_LINE_LENGTH):
+        """
+        初始化策略
+
+        Args:
+            limits: 各级别的 (字符数, 行数, 最长行长度) 上限，默认为 DEFAULT_LIMITS
+            max_line_length: 送入正则的单行最大长度
+        """
+        self.limits = dict(DEFAULT_LIMITS)
+        if limits:
+            self.limits.update(limits)
+        self.max_line_length = max_line_length
+
+    @staticmethod
+    def measure(text: str, lines: Optional[List[str]] = None) -> Tuple[int, int, int]:
+        """
+        统计文本的大小指标
+
+        Args:
+            text: 文本内容
+            lines: 已经拆分好的行，省去再次拆分
+
+        Returns:
+            (字符数, 行数, 最长行长度)
+        """
+        if lines is None:
+            lines = text.split('\n')
+        return len(text), len(lines), max(map(len, lines))
+
+    def tier_for(self, metrics: Tuple[int, int, int], scale: float = 1.0) -> str:
+        """
+        按指标选择级别
+
+        Args:
+            metrics: measure 返回的指标
+            scale: 上限的缩放比例
+
+        Returns:
+            满足所有上限的最高级别
+        """
+        for tier in TIERS[:-1]:
+            limits = self.limits.get(tier)
+            if limits is None:
+                continue
+            if all(limit is None or value <= limit * scale for value, limit in zip(metrics, limits)):
+                return tier
+        return TIER_OFF
+
+    def choose(self, text: str, lines: Optional[List[str]] = None, current: Optional[str] = None) -> str:
+        """
+        为文本选择高亮级别
+
+        Args:
+            text: 文本内容
+            lines: 已经拆分好的行（可选）
+            current: 缓冲区当前的级别（可选）
+
+        Returns:
+            高亮级别
+        """
+        return self.choose_for(self.measure(text, lines), current)
+
+    def choose_for(self, metrics: Tuple[int, int, int], current: Optional[str] = None) -> str:
+        """
+        按已统计的指标选择高亮级别，用于不读取整个文本的场合（例如只追加了几行）
+
+        Args:
+            metrics: measure 返回的指标
+            current: 缓冲区当前的级别（可选）
+
+        Returns:
+            高亮级别
+        """
+        tier = self.tier_for(metrics)
+        if current in TIERS and TIERS.index(tier) < TIERS.index(current):
+            # 升级需要留出余量，但不会因此比当前级别更低
+            upgrade = self.tier_for(metrics, UPGRADE_MARGIN)
+            tier = upgrade if TIERS.index(upgrade) < TIERS.index(current) else current
+        return tier
+
+    @staticmethod
+    def pass_budget(chars: int) -> float:
+        """
+        一次高亮的时间预算
+
+        Args:
+            chars: 本次高亮的字符数
+
+        Returns:
+            秒数
+        """
+        return PASS_BUDGET_BASE + PASS_BUDGET_PER_MIB * chars / (1024 * 1024)
+
+
+def get_highlight_policy() -> HighlightPolicy:
+    """
+    获取全局高亮策略实例
+
+    Returns:
+        高亮策略
+    """
+    global _global_highlight_policy
+    if _global_highlight_policy is None:
+        _global_highlight_policy = HighlightPolicy()
+    return _global_highlight_policy
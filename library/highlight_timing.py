@@ -0,0 +1,208 @@
+"""
+高亮分阶段计时
+记录每次高亮各阶段的耗时和生成的区间数，每个选项卡保留最近若干次，
+用于定位现场是哪种语言、哪个阶段慢
+"""
+
+import math
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+# 高亮的各个阶段
+PHASE_CLEAR = "clear"          # 清除旧标签
+PHASE_SNAPSHOT = "snapshot"    # 从组件读取文本
+PHASE_TOKENIZE = "tokenize"    # 词法分析（正则扫描或 tokenize）
+PHASE_PARSE = "parse"          # 解析语法树
+PHASE_VISIT = "visit"          # 遍历语法树节点
+PHASE_FLUSH = "flush"          # 把标签写入组件
+
+PHASES = (PHASE_CLEAR, PHASE_SNAPSHOT, PHASE_TOKENIZE, PHASE_PARSE, PHASE_VISIT, PHASE_FLUSH)
+
+# 每个选项卡保留的最近高亮次数
+HISTORY_SIZE = 64
+
+
+class PassTimer:
+    """
+    一次高亮的计时器
+    各阶段的耗时累加，同一阶段可以多次计时（例如分块补全的每一块）
+    """
+
+    def __init__(self, kind: str):
+        """
+        初始化计时器
+
+        Args:
+            kind: 高亮类型，例如 full、incremental、progressive、viewport
+        """
+        self.kind = kind
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.spans = 0
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        计时一个阶段
+
+        Args:
+            name: 阶段名称，见 PHASES
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] += time.perf_counter() - started
+
+    def add(self, name: str, seconds: float):
+        """
+        累加一个阶段的耗时
+
+        Args:
+            name: 阶段名称
+            seconds: 耗时（秒）
+        """
+        self.phases[name] += seconds
+
+    def merge(self, other: "PassTimer"):
+        """
+        合并另一个计时器（例如工作线程上的词法分析）的耗时和区间数
+
+        Args:
+            other: 计时器
+        """
+        for name, seconds in other.phases.items():
+            self.phases[name] += seconds
+        self.spans += other.spans
+
+    def total(self) -> float:
+        """
+        各阶段耗时之和
+
+        Returns:
+            秒数
+        """
+        return sum(self.phases.values())
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """
+    取最近秩百分位数
+
+    Args:
+        values: 已排序的数值
+        fraction: 0 到 1 之间的比例
+
+    Returns:
+        百分位数，values 为空时为 0
+    """
+    if not values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(values)))
+    return values[min(rank, len(values)) - 1]
+
+
+class HighlightTimings:
+    """
+    一个选项卡最近若干次高亮的分阶段耗时
+    环形缓冲区，记录和查询都只涉及最近 HISTORY_SIZE 次
+    """
+
+    def __init__(self, highlighter: str = "", size: int = HISTORY_SIZE):
+        """
+        初始化记录
+
+        Args:
+            highlighter: 高亮器名称，写入每条记录
+            size: 保留的记录数
+        """
+        self.highlighter = highlighter
+        self.records = deque(maxlen=size)
+        self.failures = 0
+        self.last_error = None
+
+    def record(self, timer: PassTimer) -> dict:
+        """
+        记录一次完成的高亮
+
+        Args:
+            timer: 该次高亮的计时器
+
+        Returns:
+            记录，耗时单位为毫秒
+        """
+        entry = {
+            "highlighter": self.highlighter,
+            "kind": timer.kind,
+            "phases": {name: round(seconds * 1000, 3) for name, seconds in timer.phases.items()},
+            "total_ms": round(timer.total() * 1000, 3),
+            "spans": timer.spans,
+        }
+        self.records.append(entry)
+        return entry
+
+    def record_failure(self, error: Exception):
+        """
+        记录一次失败的高亮
+
+        Args:
+            error: 异常
+        """
+        self.failures += 1
+        self.last_error = f"{type(error).__name__}: {error}"
+
+    def last(self) -> Optional[dict]:
+        """
+        最近一次高亮的记录
+
+        Returns:
+            记录，尚未高亮时为 None
+        """
+        return self.records[-1] if self.records else None
+
+    def _values(self, key: str) -> List[float]:
+        if key == "total":
+            values = [entry["total_ms"] for entry in self.records]
+        elif key == "spans":
+            values = [entry["spans"] for entry in self.records]
+        else:
+            values = [entry["phases"][key] for entry in self.records]
+        values.sort()
+        return values
+
+    def quantiles(self, key: str = "total") -> Dict[str, float]:
+        """
+        一个阶段的 p50、p95 和最大值
+
+        Args:
+            key: 阶段名称，或 total（总耗时）、spans（区间数）
+
+        Returns:
+            {"p50", "p95", "max"}
+        """
+        values = self._values(key)
+        return {
+            "p50": percentile(values, 0.5),
+            "p95": percentile(values, 0.95),
+            "max": values[-1] if values else 0,
+        }
+
+    def summary(self) -> dict:
+        """
+        所有阶段的统计，用于调试输出
+
+        Returns:
+            {"highlighter", "passes", "failures", "last_error", "total", "spans", 各阶段}
+        """
+        summary = {
+            "highlighter": self.highlighter,
+            "passes": len(self.records),
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "total": self.quantiles("total"),
+            "spans": self.quantiles("spans"),
+        }
+        for name in PHASES:
+            summary[name] = self.quantiles(name)
+        return summary
@@ -1,51 +1,49 @@
-from .python import CodeHighlighter as PythonHighlighter
-from .cpp import CodeHighlighter as CppHighlighter
-from .java import CodeHighlighter as JavaHighlighter
-from .rust import CodeHighlighter as RustHighlighter
-from .bash import CodeHighlighter as BashHighlighter
-from .html import CodeHighlighter as HtmlHighlighter
-from .css import CodeHighlighter as CssHighlighter
-from .javascript import CodeHighlighter as JavaScriptHighlighter
-from .ruby import CodeHighlighter as RubyHighlighter
-from .json import CodeHighlighter as JsonHighlighter
-from .c import CodeHighlighter as CHighlighter
-from .objc import CodeHighlighter as ObjCHighlighter
-from .markdown import CodeHighlighter as MarkdownHighlighter
-from .log import CodeHighlighter as LogHighlighter
-from .dart import CodeHighlighter as DartHighlighter
-from .scala import CodeHighlighter as ScalaHighlighter
-from .typescript import CodeHighlighter as TypeScriptHighlighter
-from .go import CodeHighlighter as GoHighlighter
-from .kotlin import CodeHighlighter as KotlinHighlighter
-from .php import CodeHighlighter as PHPHighlighter
-from .sql import CodeHighlighter as SqlHighlighter
-from .swift import CodeHighlighter as SwiftHighlighter
-from .lua import CodeHighlighter as LuaHighlighter
-
-
-
-__all__ = [
-    'PythonHighlighter',
-    'CppHighlighter',
-    'JavaHighlighter',
-    'RustHighlighter',
-    'BashHighlighter',
-    'HtmlHighlighter',
-    'CssHighlighter',
-    'JavaScriptHighlighter',
-    'RubyHighlighter',
-    'JsonHighlighter',
-    'CHighlighter',
-    'ObjCHighlighter',
-    'MarkdownHighlighter',
-    'LogHighlighter',
-    'DartHighlighter',
-    'ScalaHighlighter',
-    'TypeScriptHighlighter',
-    'GoHighlighter',
-    'KotlinHighlighter',
-    'PHPHighlighter',
-    'SqlHighlighter',
-    'SwiftHighlighter',
-    'LuaHighlighter'
-]
\ No newline at end of file
+"""Syntax highlighters, one module per language
+
+The language modules compile their patterns when imported, so they are only
+imported when a highlighter class is first looked up here or through
+``registry.highlighter_class``.
+"""
+
+import importlib
+
+_EXPORTS = {
+    'PythonHighlighter': 'python',
+    'CppHighlighter': 'cpp',
+    'JavaHighlighter': 'java',
+    'RustHighlighter': 'rust',
+    'BashHighlighter': 'bash',
+    'HtmlHighlighter': 'html',
+    'CssHighlighter': 'css',
+    'JavaScriptHighlighter': 'javascript',
+    'RubyHighlighter': 'ruby',
+    'JsonHighlighter': 'json',
+    'CHighlighter': 'c',
+    'ObjCHighlighter': 'objc',
+    'MarkdownHighlighter': 'markdown',
+    'LogHighlighter': 'log',
+    'DartHighlighter': 'dart',
+    'ScalaHighlighter': 'scala',
+    'TypeScriptHighlighter': 'typescript',
+    'GoHighlighter': 'go',
+    'KotlinHighlighter': 'kotlin',
+    'PHPHighlighter': 'php',
+    'SqlHighlighter': 'sql',
+    'SwiftHighlighter': 'swift',
+    'LuaHighlighter': 'lua',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    highlighter_class = importlib.import_module(f".{module_name}", __name__).CodeHighlighter
+    globals()[name] = highlighter_class
+    return highlighter_class
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,14 +1,190 @@
 import ast
+from array import array
 from typing import Tuple, Optional
 import tokenize
 import io
 import keyword
 import builtins
 import re
-import json
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+import bisect
+import threading
+import time
+
+from library.highlight_policy import TIER_FULL, TIER_VISIBLE, TIER_OFF, get_highlight_policy
+from library.highlight_timing import (
+    HighlightTimings, PassTimer,
+    PHASE_CLEAR, PHASE_SNAPSHOT, PHASE_TOKENIZE, PHASE_PARSE, PHASE_VISIT, PHASE_FLUSH,
+)
+from library.line_index import LineIndex
+from library.pass_scheduler import PassScheduler
+from library.regex_guard import PassBudget, PassBudgetExceeded, finditer_guarded
+from library.span_store import NO_SPANS, SPAN_FIELDS, get_tag_table, pack_spans, unpack_line, unpack_spans
+from library.parse_cache import get_parse_cache
+from library.theme_registry import Theme, get_theme_registry
+
+# Line state for Python: (open quote, bracket depth, backslash continued, after decorator)
+_PY_CLEAN_STATE = (None, 0, False, False)
+_PY_STATE_TOKEN_PATTERN = re.compile(r'"""|\'\'\'|["\'#()\[\]{}]')
+_PY_QUOTE_END_PATTERNS = {
+    quote: re.compile(r'(?:\\.|(?!' + re.escape(quote) + r')[^\\])*' + re.escape(quote))
+    for quote in ('"', "'", '"""', "\'\'\'")
+}
+_PY_CONTINUATION_PATTERN = re.compile(r'(?:else|elif|except|finally)\b')
+
+_PY_KEYWORDS = frozenset(keyword.kwlist)
+_PY_BUILTINS = frozenset(dir(builtins))
+
+# Definitions that open a scope for the AST visitor
+_SCOPE_NODE_TYPES = frozenset((ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda))
+
+# Alternatives for single-scan token patterns. Group names are tag names,
+# see BaseHighlighter.TOKEN_PATTERN
+# An unterminated block comment runs to the end of the text, like in the
+# line scanner; requiring the */ would rescan the rest of the text from
+# every later /*
+C_STYLE_COMMENT_RULE = r'(?P<comment>/\*[\s\S]*?(?:\*/|\Z)|//[^\n]*)'
+C_STYLE_STRING_RULE = r'(?P<string>"(?:[^"\\\n]|\\.)*"|\'(?:[^\'\\\n]|\\.)*\')'
+WORD_RULE = r'(?P<word>\b[A-Za-z_]\w*)'
+
+_BASIC_TOKEN_PATTERN = re.compile('|'.join((
+    r'(?P<comment>#[^\n]*)',
+    C_STYLE_STRING_RULE,
+    r'(?P<number>\b\d+(?:\.\d+)?\b)',
+    WORD_RULE,
+)))
+
+_global_span_executor = None
+
+
+def get_span_executor():
+    """Return the worker thread shared by all highlighters"""
+    global _global_span_executor
+    if _global_span_executor is None:
+        _global_span_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="highlighter")
+    return _global_span_executor
+
+
+def _spans_by_line(spans, lines):
+    """Group offset spans by start line, packed per line
+    
+    Each line is an ``array('I')`` of ``(col, line_count, end_col, tag_id)``
+    runs, see library.span_store, or NO_SPANS when nothing starts on it.
+    """
+    line_starts = LineIndex.from_lines(lines).line_starts
+    intern = get_tag_table().intern
+    by_line = [None] * len(lines)
+    for tag, start, end in spans:
+        start_line = bisect.bisect_right(line_starts, start) - 1
+        end_line = bisect.bisect_right(line_starts, end) - 1
+        runs = by_line[start_line]
+        if runs is None:
+            runs = by_line[start_line] = array('I')
+        runs.extend((start - line_starts[start_line], end_line - start_line,
+                     end - line_starts[end_line], intern(tag)))
+    return [NO_SPANS if runs is None else runs for runs in by_line]
+
+
+def _tk_index(position) -> str:
+    """Convert a 0-based ``(line, col)`` pair to a Tk index"""
+    return f"{position[0] + 1}.{position[1]}"
+
+
+def _blank_long_lines(text: str, lines, cap: int):
+    """Replace lines longer than ``cap`` with empty lines
+    
+    Returns ``(text, lines, source_index)`` where ``source_index`` is the
+    LineIndex of the original lines, or None when no line was replaced.
+    """
+    if all(len(line) <= cap for line in lines):
+        return text, lines, None
+    source_index = LineIndex.from_lines(lines)
+    lines = [line if len(line) <= cap else '' for line in lines]
+    return '\n'.join(lines), lines, source_index
+
+
+def _map_offsets(spans, lexed_index, source_index):
+    """Map span offsets into the blanked text back to the original text"""
+    lexed_starts = lexed_index.line_starts
+    source_starts = source_index.line_starts
+    mapped = []
+    for tag, start, end in spans:
+        start_line = bisect.bisect_right(lexed_starts, start) - 1
+        end_line = bisect.bisect_right(lexed_starts, end) - 1
+        mapped.append((
+            tag,
+            source_starts[start_line] + start - lexed_starts[start_line],
+            source_starts[end_line] + end - lexed_starts[end_line],
+        ))
+    return mapped
+
+
+# Index pairs per tag_add call, keeps the Tcl command line reasonable
+_TAG_ADD_CHUNK = 2000
+
 
 class BaseHighlighter:
+    # Multi-line constructs as (open, close) pairs for the incremental line
+    # scanner; None selects the Python scanner. LINE_COMMENT stops the scan.
+    BLOCK_DELIMITERS = None
+    LINE_COMMENT = None
+    
+    # Lines feeding document-wide symbol tables; editing one of them
+    # forces a full pass since tags elsewhere may change
+    DOCUMENT_SYMBOL_PATTERN = re.compile(r'\s*(?:import|from|class)\b')
+    
+    # Single-scan lexer: one alternation whose named groups are tag names,
+    # matched left to right by _scan_tokens. ``word`` tokens are classified
+    # by _word_tag, groups listed in COMPOSITE_TOKENS go to _emit_token.
+    TOKEN_PATTERN = None
+    COMPOSITE_TOKENS = frozenset()
+    
+    # Incremental highlighting state
+    _snapshot_lines = None
+    _line_states = None
+    _pass_lines = None
+    _line_index = None
+    
+    # AST visitor state, see _process_ast
+    _current_node = None
+    _current_parent = None
+    _enclosing_class = None
+    _unresolved_names = None
+    _window_pass = False
+    _full_pass_digest = None
+    _span_sink = None
+    _line_spans = None
+    # (snapshot list, metrics) kept between appends, see highlight_appended
+    _tail_metrics = None
+    _fill_job = None
+    _fill_ranges = ()
+    _fill_active = False
+    _tag_colors = None
+    
+    # Size tier of the buffer, see library.highlight_policy. The listener
+    # is called as ``tier_listener(highlighter, tier)`` when it changes.
+    tier = TIER_FULL
+    tier_listener = None
+    _lexical_pass = False
+    _visible_lines = None
+    _viewport = None
+    _viewport_job = None
+    # Set by ``shutdown`` when the tab is closed, timers still queued in Tk
+    # return without touching the widget
+    _closed = False
+    
+    # Per-phase timing of the pass running on the Tk thread and of the
+    # lexing under _lex_lock. The listener is called as
+    # ``pass_listener(highlighter, record)`` after every recorded pass.
+    pass_listener = None
+    _pass_timer = None
+    _lex_timer = None
+    _fill_timer = None
+    
+    # Time budget of the lexing under _lex_lock, see library.regex_guard
+    _budget = None
+    
     def __init__(self, text_widget, theme_name="vscode-dark"):
         self.text_widget = text_widget
         self.theme_name = theme_name
@@ -52,6 +228,27 @@ class BaseHighlighter:
         self._highlight_delay = 50  # Lower delay
         self._last_content = ""     # Add content cache
         
+        # Adapts the delay to the measured pass cost and coalesces edit bursts
+        self.pass_scheduler = PassScheduler("highlight", self._highlight_delay, min_delay=20, max_delay=500)
+        self._measuring_pass = False
+        self._measured_jobs = 0
+        
+        # Recent passes of this tab with their phase timings, see library.highlight_timing
+        self.timings = HighlightTimings(type(self).__name__)
+        
+        # Background fill config: lines per chunk
+        self._fill_chunk_lines = 200
+        
+        # Visible-region-only tier: how often the viewport is checked for scrolling
+        self._viewport_poll_ms = 150
+        
+        # Worker thread lexing: results of older passes are dropped by generation
+        self._lex_lock = threading.Lock()
+        self._edit_generation = 0
+        self._span_jobs = []
+        self._span_poll_job = None
+        self._span_poll_ms = 10
+        
         # Auto pairs
         self.auto_pairs = {
             '"': '"',
@@ -86,43 +283,19 @@ class BaseHighlighter:
         self._setup_bindings()
     
     def _load_theme_colors(self, theme_name):
-        """Load color configuration from theme file"""
-        try:
-            # Determine theme file path
-            theme_dir = Path(__file__).parent.parent.parent / "asset" / "theme"
-            
-            # Check if theme is in terminalTheme subdirectory
-            terminal_theme_path = theme_dir / "terminalTheme" / f"{theme_name}.json"
-            if terminal_theme_path.exists():
-                theme_file = terminal_theme_path
-            else:
-                theme_file = theme_dir / f"{theme_name}.json"
-            
-            if not theme_file.exists():
-                print(f"Theme file not found: {theme_file}")
-                return {}
-            
-            # Load theme configuration
-            with open(theme_file, 'r', encoding='utf-8') as f:
-                theme_config = json.load(f)
-            
-            # Extract color configuration (excluding base configuration)
-            colors = {}
-            for key, value in theme_config.items():
-                if key != "base" and isinstance(value, str) and value.startswith("#"):
-                    colors[key] = value
-            
-            print(f"Loaded {len(colors)} colors from theme: {theme_name}")
-            return colors
-            
-        except Exception as e:
-            print(f"Error loading theme {theme_name}: {e}")
+        """Load color configuration from the shared theme registry"""
+        theme = get_theme_registry().get(theme_name)
+        if theme is None:
             return {}
+        # Subclasses add their own colors, so hand out a copy
+        return dict(theme.colors)
     
     def setup_tags(self):
         """Configure all syntax highlighting tags"""
         for tag, color in self.syntax_colors.items():
             self.text_widget.tag_configure(tag, foreground=color)
+        # Colors the widget has now, set_theme only reconfigures changes
+        self._tag_colors = dict(self.syntax_colors)
             
     def _setup_bindings(self):
         """Set up event bindings"""
@@ -163,6 +336,8 @@ class BaseHighlighter:
         """Configure all syntax highlighting tags"""
         for tag, color in self.syntax_colors.items():
             self.text_widget.tag_configure(tag, foreground=color)
+        # Colors the widget has now, set_theme only reconfigures changes
+        self._tag_colors = dict(self.syntax_colors)
             
     def _setup_bindings(self):
         """Set up event bindings"""
@@ -184,27 +359,51 @@ class BaseHighlighter:
             self._queue_highlight()
             
     def _queue_highlight(self):
-        """Queue highlight task"""
+        """Queue highlight task, edits made while one is queued join it"""
+        delay = self.pass_scheduler.request()
         if not self._highlight_pending:
             self._highlight_pending = True
-            self.text_widget.after(self._highlight_delay, self._delayed_highlight)
+            self.text_widget.after(delay or self._highlight_delay, self._delayed_highlight)
             
     def _delayed_highlight(self):
         """Execute highlighting with delay"""
+        if self._closed:
+            return
+        remaining = self.pass_scheduler.remaining()
+        if remaining is not None:
+            # Still typing, wait for a pause
+            self.text_widget.after(remaining, self._delayed_highlight)
+            return
+        
+        scheduler = self.pass_scheduler
+        scheduler.begin()
+        self._measuring_pass = True
+        started = time.perf_counter()
         try:
             current_content = self.text_widget.get("1.0", "end-1c")
             # Highlight when content changed
             if current_content != self._last_content:
-                self.highlight()
+                self.highlight_incremental()
                 self._last_content = current_content
         except Exception as e:
             print(f"Highlight failed: {str(e)}")
+            self.timings.record_failure(e)
         finally:
             self._highlight_pending = False
+            self._measuring_pass = False
+            scheduler.add_cost(time.perf_counter() - started)
+            # A pass handed to the worker is finished when it is applied
+            if not self._measured_jobs:
+                scheduler.finish()
             
     def _add_tag(self, tag: str, start: str, end: str):
         """Add syntax highlighting tag with performance optimization"""
         try:
+            # Inside compute_spans the tag is only recorded, Tk is not touched
+            if self._span_sink is not None:
+                self._span_sink.append((tag, start, end))
+                return
+            
             # Batch tag operations for better performance
             if not hasattr(self, '_tag_batch'):
                 self._tag_batch = {}
@@ -221,6 +420,13 @@ class BaseHighlighter:
         except Exception as e:
             print(f"Add tag error - tag: {tag}, start: {start}, end: {end}, err: {str(e)}")
     
+    def _add_span(self, tag: str, start: int, end: int):
+        """Add a tag between two offsets into the text being highlighted"""
+        if self._span_sink is not None:
+            self._span_sink.append((tag, start, end))
+        else:
+            self._add_tag(tag, self._index_at(start), self._index_at(end))
+
     def _flush_tag_batch(self, tag: str):
         """Flush batched tag operations"""
         if hasattr(self, '_tag_batch') and tag in self._tag_batch:
@@ -238,47 +444,34 @@ class BaseHighlighter:
                 self._flush_tag_batch(tag)
 
     def highlight(self):
-        """Perform syntax highlighting with performance optimization"""
+        """Perform syntax highlighting over the whole document"""
+        self._cancel_fill()
+        self._edit_generation += 1
+        timer = self._begin_pass("full")
         try:
+            text = self._read_text()
+            if self._update_tier(text) in (TIER_VISIBLE, TIER_OFF):
+                self._apply_limited_tier(text)
+                self._end_pass(timer)
+                return
+            
             # Save current status
-            current_insert = self.text_widget.index("insert")
-            current_view = self.text_widget.yview()
-            current_selection = None
-            try:
-                current_selection = (
-                    self.text_widget.index("sel.first"),
-                    self.text_widget.index("sel.last")
-                )
-            except:
-                pass
+            view_state = self._save_view_state()
                 
             # Highlight
-            self._clear_tags()
-            text = self.text_widget.get("1.0", "end-1c")
-            
-            # Initialize tag batch
-            self._tag_batch = {}
-            
-            # Process comments and strings
-            self._highlight_comments_and_strings(text)
-            
-            try:
-                tree = ast.parse(text)
-                self._process_ast(tree)
-            except SyntaxError:
-                self._basic_highlight(text)
-            
-            # Flush any remaining batched tag operations
-            self._flush_all_tag_batches()
+            self._apply_document(text, self.compute_spans(text, timer=timer))
             
             # Backup
-            self.text_widget.mark_set("insert", current_insert)
-            self.text_widget.yview_moveto(current_view[0])
-            if current_selection:
-                self.text_widget.tag_add("sel", *current_selection)
+            self._restore_view_state(view_state)
+            self._end_pass(timer)
                 
         except Exception as e:
             print(f"Highlight failed: {str(e)}")
+            self._pass_timer = None
+            self.timings.record_failure(e)
+            # The tags no longer match the stored spans
+            self._snapshot_lines = None
+            self._line_spans = None
             # Fallback to basic highlighting
             # Ensure text is defined before using it
             if 'text' in locals() or 'text' in globals():
@@ -288,52 +481,984 @@ class BaseHighlighter:
                 text = self.text_widget.get("1.0", "end-1c")
                 self._basic_highlight(text)
 
-    def _basic_highlight(self, text: str):
-        """Basic highlighting when syntax errors occur"""
+    def _highlight_text(self, text: str):
+        """Emit tags for the given source text
+        
+        Subclasses override this hook instead of ``highlight`` so the same
+        lexing code serves both full and incremental passes. Positions are
+        relative to the first line of ``text``. The hook must not touch the
+        text widget since it may run on the worker thread.
+        """
+        # Process comments and strings
+        self._highlight_comments_and_strings(text)
+        
+        # Large buffers skip the AST
+        if self._lexical_pass:
+            self._basic_highlight(text)
+            return
+        
         try:
-            import re
+            with self._lex_phase(PHASE_PARSE):
+                tree = self._parse(text)
+            with self._lex_phase(PHASE_VISIT):
+                self._process_ast(tree)
+        except (SyntaxError, ValueError, MemoryError, RecursionError):
+            # The parser raises MemoryError for deeply nested brackets
+            self._basic_highlight(text)
+
+    def compute_spans(self, text: str, window: bool = False, timer: Optional[PassTimer] = None):
+        """Lex ``text`` and return its ``(tag, start_offset, end_offset)`` spans
+        
+        Offsets are character offsets into ``text``. Nothing here touches the
+        text widget, so it is safe to call from the worker thread. ``window``
+        marks a slice of the document, which keeps the document-wide symbol
+        tables of the last full pass. Full passes over text whose spans this
+        highlighter already computed are served from the parse cache.
+        ``timer`` receives the tokenize, parse and visit times and the span
+        count; time not spent parsing or visiting the AST counts as tokenize.
+        
+        Lines longer than the policy's line cap are lexed as empty lines and
+        stay plain. A pass that runs over its time budget is aborted and the
+        text stays plain as well.
+        """
+        if timer is None:
+            timer = PassTimer("lex")
+        policy = get_highlight_policy()
+        cache = get_parse_cache()
+        owner = self._span_cache_key()
+        with self._lex_lock:
+            started = time.perf_counter()
+            # Cached spans are only valid while the document tables still
+            # come from the same text, i.e. for a repeat of the last full pass
+            if not window and cache.digest(text) == self._full_pass_digest:
+                cached = cache.get_spans(text, owner)
+                if cached is not None:
+                    timer.spans += len(cached) // SPAN_FIELDS
+                    timer.add(PHASE_TOKENIZE, time.perf_counter() - started)
+                    return unpack_spans(cached)
             
-            # Split words into lines
             lines = text.split('\n')
+            lexed, lines, source_index = _blank_long_lines(text, lines, policy.max_line_length)
+            budget = PassBudget(policy.pass_budget(len(lexed)))
+            self._span_sink = []
+            self._pass_lines = lines
+            self._line_index = LineIndex.from_lines(lines)
+            self._window_pass = window
+            self._lexical_pass = self.tier != TIER_FULL
+            self._lex_timer = timer
+            self._budget = budget
+            ast_before = timer.phases[PHASE_PARSE] + timer.phases[PHASE_VISIT]
+            try:
+                self._highlight_text(lexed)
+                # Catches aborts swallowed by a subclass' own error handling
+                budget.check()
+                raw_spans = self._span_sink
+            except PassBudgetExceeded as e:
+                print(f"Highlight aborted, showing plain text: {str(e)}")
+                self.timings.record_failure(e)
+                raw_spans = []
+            finally:
+                line_index = self._line_index
+                self._span_sink = None
+                self._pass_lines = None
+                self._line_index = None
+                self._window_pass = False
+                self._lexical_pass = False
+                self._lex_timer = None
+                self._budget = None
+            ast_time = timer.phases[PHASE_PARSE] + timer.phases[PHASE_VISIT] - ast_before
+        
+        spans = []
+        index_to_offset = line_index.index_to_offset
+        for tag, start, end in raw_spans:
+            # _add_span records offsets, _add_tag records Tk indices
+            if start.__class__ is int:
+                if start < end:
+                    spans.append((tag, start, end))
+                continue
+            try:
+                start_offset = index_to_offset(start)
+                end_offset = index_to_offset(end)
+            except ValueError:
+                print(f"Invalid span index - tag: {tag}, start: {start}, end: {end}")
+                continue
+            if start_offset < end_offset:
+                spans.append((tag, start_offset, end_offset))
+        
+        if source_index is not None:
+            spans = _map_offsets(spans, line_index, source_index)
+        
+        if not window:
+            self._full_pass_digest = cache.digest(text)
+            cache.store_spans(text, owner, pack_spans(spans))
+        timer.spans += len(spans)
+        timer.add(PHASE_TOKENIZE, time.perf_counter() - started - ast_time)
+        return spans
+
+    def _apply_document(self, text: str, spans):
+        """Bring the tags of the whole document in line with ``spans``
+        
+        The first pass clears every tag, later passes only apply the
+        difference to the spans of the previous pass.
+        """
+        lines = text.split('\n')
+        if self._line_spans is None:
+            self._clear_tags()
+            self._line_spans = [NO_SPANS] * len(lines)
+            region = None
+            old_count = len(lines)
+        else:
+            region = self._find_dirty_region(self._snapshot_lines, lines)
+            old_count = len(self._snapshot_lines)
+        with self._phase(PHASE_FLUSH):
+            self._apply_span_delta(0, old_count, _spans_by_line(spans, lines), region)
+        self._remember_snapshot(text)
+
+    def _apply_span_delta(self, start: int, old_count: int, new_line_spans, region=None):
+        """Replace the spans of ``old_count`` lines from ``start`` on
+        
+        Only spans that disappeared are removed and only spans that are new
+        are added, with a single multi-range ``tag_add`` per tag. ``region``
+        is the ``(start, old_end, new_end)`` line range edited since the
+        stored spans were applied; Tk may have dropped or inherited tags
+        there, so spans touching it are always repainted.
+        """
+        old_line_spans = self._line_spans[start:start + old_count]
+        if region is None:
+            edit_start = old_end = new_end = delta = 0
+        else:
+            edit_start, old_end, new_end = region
+            delta = new_end - old_end
+        
+        def shift(line, col):
+            if region is not None and line >= old_end:
+                return line + delta, col
+            return line, col
+        
+        removals = {}
+        repaint = set()
+        old_spans = set()
+        for offset, spans in enumerate(old_line_spans):
+            line = start + offset
+            for tag, col, line_count, end_col in unpack_line(spans):
+                span_start, span_end = (line, col), (line + line_count, end_col)
+                if region is not None and span_start <= (old_end, 0) and span_end >= (edit_start, 0):
+                    # Remove the whole footprint, including inherited text
+                    removal_start = span_start if span_start < (edit_start, 0) else (edit_start, 0)
+                    removal_end = shift(*span_end) if span_end[0] >= old_end else (new_end, 0)
+                    removals.setdefault(tag, []).append((removal_start, removal_end))
+                    repaint.add(tag)
+                else:
+                    old_spans.add((tag, shift(*span_start), shift(*span_end)))
+        
+        new_spans = set()
+        for offset, spans in enumerate(new_line_spans):
+            line = start + offset
+            for tag, col, line_count, end_col in unpack_line(spans):
+                new_spans.add((tag, (line, col), (line + line_count, end_col)))
+        
+        for tag, span_start, span_end in old_spans - new_spans:
+            removals.setdefault(tag, []).append((span_start, span_end))
+            repaint.add(tag)
+        
+        additions = {}
+        for span in new_spans:
+            if span[0] in repaint or span not in old_spans:
+                additions.setdefault(span[0], []).append(span)
+        
+        for tag, ranges in removals.items():
+            for span_start, span_end in ranges:
+                self.text_widget.tag_remove(tag, _tk_index(span_start), _tk_index(span_end))
+        
+        for tag, spans in additions.items():
+            indices = []
+            for _, span_start, span_end in sorted(spans):
+                indices.append(_tk_index(span_start))
+                indices.append(_tk_index(span_end))
+            for chunk in range(0, len(indices), _TAG_ADD_CHUNK):
+                try:
+                    self.text_widget.tag_add(tag, *indices[chunk:chunk + _TAG_ADD_CHUNK])
+                except Exception as e:
+                    print(f"Apply tag error: {str(e)}")
+        
+        self._line_spans[start:start + old_count] = new_line_spans
+
+    def _save_view_state(self):
+        """Save insert mark, scroll position and selection"""
+        current_insert = self.text_widget.index("insert")
+        current_view = self.text_widget.yview()
+        current_selection = None
+        try:
+            current_selection = (
+                self.text_widget.index("sel.first"),
+                self.text_widget.index("sel.last")
+            )
+        except:
+            pass
+        return current_insert, current_view, current_selection
+
+    def _restore_view_state(self, view_state):
+        """Restore state saved by ``_save_view_state``"""
+        current_insert, current_view, current_selection = view_state
+        self.text_widget.mark_set("insert", current_insert)
+        self.text_widget.yview_moveto(current_view[0])
+        if current_selection:
+            self.text_widget.tag_add("sel", *current_selection)
+
+    def _submit_spans(self, text: str, on_done, window: bool = False, timer: Optional[PassTimer] = None):
+        """Lex ``text`` on the worker thread
+        
+        ``on_done(spans)`` runs later on the Tk thread, unless another pass
+        was started in the meantime, in which case the result is dropped.
+        The lexing phases are added to ``timer``, which is the current pass
+        timer while ``on_done`` runs.
+        """
+        self._edit_generation += 1
+        measured = self._measuring_pass
+        if measured:
+            self._measured_jobs += 1
+        future = get_span_executor().submit(self._timed_compute_spans, text, window)
+        self._span_jobs.append((self._edit_generation, future, on_done, measured, timer))
+        if self._span_poll_job is None:
+            self._span_poll_job = self.text_widget.after(self._span_poll_ms, self._poll_span_jobs)
+
+    def _poll_span_jobs(self):
+        """Apply finished worker results on the Tk thread"""
+        self._span_poll_job = None
+        if self._closed:
+            return
+        # A queued highlight means the text changed after the job was
+        # submitted, so wait for it to decide whether the result is stale
+        while self._span_jobs and not self._highlight_pending and self._span_jobs[0][1].done():
+            generation, future, on_done, measured, timer = self._span_jobs.pop(0)
+            started = time.perf_counter()
+            cost = 0.0
+            try:
+                spans, cost, lex_timer = future.result()
+                if generation != self._edit_generation:
+                    # A newer pass supersedes this one
+                    if measured:
+                        self.pass_scheduler.drop()
+                    continue
+                if timer is not None:
+                    timer.merge(lex_timer)
+                    self._pass_timer = timer
+                on_done(spans)
+            except Exception as e:
+                print(f"Background highlight failed: {str(e)}")
+                self.timings.record_failure(e)
+            finally:
+                self._pass_timer = None
+                if measured:
+                    self._measured_jobs -= 1
+                    self.pass_scheduler.add_cost(cost + time.perf_counter() - started)
+                    if not self._measured_jobs:
+                        self.pass_scheduler.finish()
+        if self._span_jobs:
+            self._span_poll_job = self.text_widget.after(self._span_poll_ms, self._poll_span_jobs)
+
+    def _timed_compute_spans(self, text: str, window: bool = False):
+        """Return the spans of ``text``, the seconds it took to lex it and its phase timer"""
+        timer = PassTimer("lex")
+        started = time.perf_counter()
+        spans = self.compute_spans(text, window, timer)
+        return spans, time.perf_counter() - started, timer
+    
+    def _begin_pass(self, kind: str) -> PassTimer:
+        """Start timing a pass, Tk-thread phases are added to it until it ends"""
+        self._pass_timer = PassTimer(kind)
+        return self._pass_timer
+    
+    def _end_pass(self, timer: PassTimer):
+        """Record a finished pass and report it to ``pass_listener``"""
+        if self._pass_timer is timer:
+            self._pass_timer = None
+        record = self.timings.record(timer)
+        if self.pass_listener is not None:
+            try:
+                self.pass_listener(self, record)
+            except Exception as e:
+                print(f"Pass listener failed: {str(e)}")
+    
+    def _phase(self, name: str):
+        """Time phase ``name`` of the pass running on the Tk thread, if any"""
+        timer = self._pass_timer
+        return timer.phase(name) if timer is not None else nullcontext()
+    
+    def _lex_phase(self, name: str):
+        """Time phase ``name`` of the lexing running under _lex_lock"""
+        timer = self._lex_timer
+        return timer.phase(name) if timer is not None else nullcontext()
+    
+    def _read_text(self) -> str:
+        """Read the whole buffer, timed as the snapshot phase"""
+        with self._phase(PHASE_SNAPSHOT):
+            return self.text_widget.get("1.0", "end-1c")
+
+    def highlight_incremental(self):
+        """Re-highlight only the lines changed since the last pass
+        
+        The changed line range is found by diffing against the previous
+        snapshot, widened back to the nearest line where lexing can restart
+        and forward until the line state converges with the old one. The
+        range is lexed on the worker thread. Falls back to a full
+        ``highlight`` when no snapshot exists.
+        """
+        old_lines = self._snapshot_lines
+        if old_lines is None or self._line_spans is None:
+            self.highlight()
+            return
+        
+        # Pending fill chunks refer to the old line numbers
+        if self._fill_active:
+            self.highlight_progressive()
+            return
+        
+        timer = self._begin_pass("incremental")
+        
+        def apply_document(spans):
+            self._apply_document(text, spans)
+            self._end_pass(timer)
+        
+        try:
+            text = self._read_text()
+            new_lines = text.split('\n')
+            
+            # Re-evaluate the tier as the buffer grows or shrinks, the
+            # tags of the previous tier are replaced as a whole
+            old_tier = self.tier
+            tier = self._update_tier(text, new_lines)
+            if tier != old_tier:
+                if tier in (TIER_VISIBLE, TIER_OFF):
+                    self._apply_limited_tier(text)
+                    self._end_pass(timer)
+                else:
+                    self._submit_spans(text, apply_document, timer=timer)
+                return
+            
+            region = self._find_dirty_region(old_lines, new_lines)
+            if region is None:
+                return
+            
+            start, old_end, new_end = region
+            if self._touches_document_symbols(old_lines[start:old_end]) \
+                    or self._touches_document_symbols(new_lines[start:new_end]):
+                self._submit_spans(text, apply_document, timer=timer)
+                return
+            
+            old_states = self._line_states
+            delta = new_end - old_end
+            
+            # Deleting trailing lines leaves ``start`` past the last line;
+            # re-lex the new last line, which the following spans replace
+            start = min(start, len(new_lines) - 1)
+
+            # Walk back to a line where lexing can restart cleanly
+            while start > 0 and not self._is_restart_line(old_states[start], new_lines[start]):
+                start -= 1
+            
+            # Re-lex forward until the state converges with the old one
+            new_states = old_states[:start + 1]
+            state = old_states[start]
+            end = len(new_lines)
+            line = start
+            while line < len(new_lines):
+                if line >= new_end and state == old_states[line - delta] \
+                        and self._is_restart_line(state, new_lines[line]):
+                    end = line
+                    break
+                state = self._advance_line_state(state, new_lines[line])
+                new_states.append(state)
+                line += 1
+            if end < len(new_lines):
+                new_states.extend(old_states[end - delta + 1:])
+            
+            def apply(spans):
+                self._apply_window(new_lines, start, end, spans, region)
+                self._snapshot_lines = new_lines
+                self._line_states = new_states
+                self._end_pass(timer)
+            
+            self._submit_spans('\n'.join(new_lines[start:end]), apply, window=True, timer=timer)
             
-            for line_num, line in enumerate(lines, 1):
-                # Highlight keywords
-                for keyword in self.keywords:
-                    pattern = r'\b' + re.escape(keyword) + r'\b'
-                    for match in re.finditer(pattern, line):
-                        start = f"{line_num}.{match.start()}"
-                        end = f"{line_num}.{match.end()}"
-                        self._add_tag("keyword", start, end)
-                        
-                # Highlight strings
-                string_pattern = r'("(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\')'
-                for match in re.finditer(string_pattern, line):
-                    start = f"{line_num}.{match.start()}"
-                    end = f"{line_num}.{match.end()}"
-                    self._add_tag("string", start, end)
-                    
-                # Highlight numbers
-                number_pattern = r'\b\d+(\.\d+)?\b'
-                for match in re.finditer(number_pattern, line):
-                    start = f"{line_num}.{match.start()}"
-                    end = f"{line_num}.{match.end()}"
-                    self._add_tag("number", start, end)
-                    
-                # Highlight comments
-                comment_pattern = r'#.*$'
-                for match in re.finditer(comment_pattern, line):
-                    start = f"{line_num}.{match.start()}"
-                    end = f"{line_num}.{match.end()}"
-                    self._add_tag("comment", start, end)
-                    
+        except Exception as e:
+            print(f"Incremental highlight failed: {str(e)}")
+            self.timings.record_failure(e)
+            self._pass_timer = None
+            self.highlight()
+        finally:
+            # The rest of the pass is timed when the worker result is applied
+            if self._pass_timer is timer:
+                self._pass_timer = None
+
+    def highlight_appended(self, first_line: int):
+        """Highlight text appended to the end of the buffer
+        
+        ``first_line`` is the 0-based last line before the append, which the
+        appended text may have continued. Only the lines from there on are
+        read and lexed instead of diffing the whole buffer, which keeps
+        following a growing log cheap. Falls back to ``highlight_incremental``
+        unless lexing can restart at ``first_line`` and no other pass is
+        pending.
+        """
+        old_lines = self._snapshot_lines
+        if old_lines is None or self._line_spans is None or self.pass_pending() \
+                or not 0 <= first_line < len(old_lines) \
+                or not self._is_restart_line(self._line_states[first_line], old_lines[first_line]):
+            self.highlight_incremental()
+            return
+        
+        timer = self._begin_pass("append")
+        try:
+            with self._phase(PHASE_SNAPSHOT):
+                tail = self.text_widget.get(f"{first_line + 1}.0", "end-1c")
+            new_lines = old_lines[:first_line] + tail.split('\n')
+            
+            # The tier is re-evaluated without joining the buffer back into
+            # one string; the counts of the previous append are reused while
+            # they still describe the snapshot
+            metrics = self._appended_metrics(old_lines, first_line, new_lines)
+            if get_highlight_policy().choose_for(metrics, self.tier) != self.tier:
+                self._pass_timer = None
+                self.highlight_incremental()
+                return
+            
+            state = self._line_states[first_line]
+            new_states = self._line_states[:first_line + 1]
+            for line in new_lines[first_line:]:
+                state = self._advance_line_state(state, line)
+                new_states.append(state)
+            region = (first_line, len(old_lines), len(new_lines))
+            
+            def apply(spans):
+                self._apply_window(new_lines, first_line, len(new_lines), spans, region)
+                self._snapshot_lines = new_lines
+                self._line_states = new_states
+                self._tail_metrics = (new_lines, metrics)
+                self._end_pass(timer)
+            
+            self._submit_spans(tail, apply, window=True, timer=timer)
+        
+        except Exception as e:
+            print(f"Append highlight failed: {str(e)}")
+            self.timings.record_failure(e)
+            self._pass_timer = None
+            self.highlight()
+        finally:
+            if self._pass_timer is timer:
+                self._pass_timer = None
+
+    def _appended_metrics(self, old_lines: list, first_line: int, new_lines: list) -> Tuple[int, int, int]:
+        """Size metrics of ``new_lines``, which replaced ``old_lines`` from ``first_line`` on"""
+        kept = self._tail_metrics
+        tail = new_lines[first_line:]
+        if kept is None or kept[0] is not old_lines:
+            return (sum(map(len, new_lines)) + len(new_lines) - 1, len(new_lines), max(map(len, new_lines)))
+        chars, _, longest = kept[1]
+        replaced = old_lines[first_line:]
+        chars += sum(map(len, tail)) + len(tail) - sum(map(len, replaced)) - len(replaced)
+        return chars, len(new_lines), max(longest, max(map(len, tail)))
+
+    def pass_pending(self) -> bool:
+        """Whether a pass is still lexing or filling in the background"""
+        return bool(self._span_jobs) or self._fill_active
+
+    def drop_leading_lines(self, count: int):
+        """Forget the first ``count`` lines after they were deleted from the buffer
+        
+        Tk deletes their tags along with the text, the stored spans and
+        states of the remaining lines only move up. When lexing cannot
+        restart where the buffer now begins, the document is highlighted
+        again instead.
+        """
+        lines = self._snapshot_lines
+        if count <= 0 or lines is None or self._line_spans is None:
+            return
+        if self.pass_pending() or count >= len(lines) \
+                or self._line_states[count] != self._initial_line_state():
+            self.highlight_incremental()
+            return
+        self._snapshot_lines = lines[count:]
+        self._line_states = self._line_states[count:]
+        self._line_spans = self._line_spans[count:]
+        self._full_pass_digest = None
+        kept = self._tail_metrics
+        if kept is not None and kept[0] is lines:
+            # The longest line is kept as an upper bound, finding the new
+            # one would mean scanning every remaining line
+            chars, _, longest = kept[1]
+            dropped = lines[:count]
+            chars -= sum(map(len, dropped)) + len(dropped)
+            self._tail_metrics = (self._snapshot_lines, (chars, len(self._snapshot_lines), longest))
+
+    def highlight_progressive(self):
+        """Highlight the visible lines first and the rest in the background
+        
+        The lines shown by ``yview`` are highlighted immediately, the rest of
+        the document is lexed chunk by chunk on the worker thread and each
+        chunk is applied from an ``after_idle`` callback.
+        """
+        self._cancel_fill()
+        self._edit_generation += 1
+        timer = self._begin_pass("progressive")
+        try:
+            text = self._read_text()
+            if self._update_tier(text) in (TIER_VISIBLE, TIER_OFF):
+                self._apply_limited_tier(text)
+                self._end_pass(timer)
+                return
+            
+            self._clear_tags()
+            self._remember_snapshot(text)
+            lines = self._snapshot_lines
+            self._line_spans = [NO_SPANS] * len(lines)
+            
+            # Fresh document, drop the tables from the previous one
+            self.class_names = set()
+            self.class_instance_attrs = {}
+            self._full_pass_digest = None
+            
+            first, last = self._visible_line_range(len(lines))
+            start = self._restart_line_before(first)
+            end = self._restart_line_after(last)
+            
+            self._highlight_window(lines, start, end)
+            
+            # Above the viewport first so imports at the top are known
+            # before the rest of the document, then below it
+            self._fill_ranges = [(0, start), (end, len(lines))]
+            
+            # Symbols defined outside the viewport were not known yet, so
+            # highlight the viewport once more at the end
+            if self._touches_document_symbols(lines[:start]) \
+                    or self._touches_document_symbols(lines[end:]):
+                self._fill_ranges.append((start, end))
+            self._fill_active = True
+            # The pass ends when the last fill chunk is applied
+            self._fill_timer = timer
+            self._pass_timer = None
+            self._schedule_fill()
+            
+        except Exception as e:
+            print(f"Progressive highlight failed: {str(e)}")
+            self.timings.record_failure(e)
+            self._pass_timer = None
+            self.highlight()
+
+    def _fill_step(self):
+        """Send the next chunk of the document to the worker thread"""
+        self._fill_job = None
+        if self._closed:
+            return
+        lines = self._snapshot_lines
+        while self._fill_ranges:
+            start, end = self._fill_ranges[0]
+            if start >= end:
+                self._fill_ranges.pop(0)
+                continue
+            stop = min(self._restart_line_after(start + self._fill_chunk_lines), end)
+            self._fill_ranges[0] = (stop, end)
+            
+            def apply(spans):
+                self._apply_window(lines, start, stop, spans)
+                self._schedule_fill()
+            
+            self._submit_spans('\n'.join(lines[start:stop]), apply, window=True, timer=self._fill_timer)
+            return
+        self._fill_active = False
+        timer, self._fill_timer = self._fill_timer, None
+        if timer is not None:
+            self._end_pass(timer)
+
+    def _schedule_fill(self):
+        """Schedule the next fill chunk"""
+        self._fill_job = self.text_widget.after_idle(self._fill_step)
+
+    def _cancel_fill(self):
+        """Cancel any pending background fill"""
+        if self._fill_job is not None:
+            try:
+                self.text_widget.after_cancel(self._fill_job)
+            except Exception:
+                pass
+        self._fill_job = None
+        self._fill_ranges = ()
+        self._fill_active = False
+        self._fill_timer = None
+
+    def _update_tier(self, text: str, lines=None) -> str:
+        """Re-evaluate the size tier of the buffer and return it"""
+        tier = get_highlight_policy().choose(text, lines, self.tier)
+        if tier != self.tier:
+            self.tier = tier
+            # Cached spans were computed for the previous tier
+            self._full_pass_digest = None
+            if tier != TIER_VISIBLE:
+                self._visible_lines = None
+                self._cancel_viewport_poll()
+            if self.tier_listener is not None:
+                try:
+                    self.tier_listener(self, tier)
+                except Exception as e:
+                    print(f"Tier listener failed: {str(e)}")
+        return tier
+
+    def _apply_limited_tier(self, text: str):
+        """Highlight ``text`` in the visible-region-only or off tier
+        
+        Neither tier keeps a snapshot, so every edit comes back through
+        ``highlight``. The visible tier then follows scrolling by polling
+        ``yview``.
+        """
+        self._cancel_fill()
+        self._edit_generation += 1
+        self._clear_tags()
+        self._snapshot_lines = None
+        self._line_states = None
+        self._line_spans = None
+        self._viewport = None
+        if self.tier == TIER_VISIBLE:
+            self._visible_lines = text.split('\n')
+            self._highlight_viewport()
+            self._schedule_viewport_poll()
+        else:
+            self._visible_lines = None
+
+    def _highlight_viewport(self) -> bool:
+        """Highlight the lines shown by ``yview`` unless they already are
+        
+        Lines longer than the policy's line cap are left plain so a
+        minified line cannot stall the regexes. Returns whether anything
+        was highlighted.
+        """
+        lines = self._visible_lines
+        if lines is None:
+            return False
+        first, last = self._visible_line_range(len(lines))
+        if (first, last) == self._viewport:
+            return False
+        if self._viewport is not None:
+            old_start = f"{self._viewport[0] + 1}.0"
+            old_end = f"{self._viewport[1] + 1}.0"
+            with self._phase(PHASE_CLEAR):
+                for tag in self.syntax_colors:
+                    self.text_widget.tag_remove(tag, old_start, old_end)
+        self._viewport = (first, last)
+        
+        window = lines[first:last]
+        spans = self.compute_spans('\n'.join(window), window=True, timer=self._pass_timer)
+        with self._phase(PHASE_FLUSH):
+            additions = {}
+            for line, line_spans in enumerate(_spans_by_line(spans, window), first):
+                for tag, col, line_count, end_col in unpack_line(line_spans):
+                    additions.setdefault(tag, []).extend(
+                        (_tk_index((line, col)), _tk_index((line + line_count, end_col)))
+                    )
+            for tag, indices in additions.items():
+                for chunk in range(0, len(indices), _TAG_ADD_CHUNK):
+                    try:
+                        self.text_widget.tag_add(tag, *indices[chunk:chunk + _TAG_ADD_CHUNK])
+                    except Exception as e:
+                        print(f"Apply tag error: {str(e)}")
+        return True
+
+    def _schedule_viewport_poll(self):
+        """Check the viewport for scrolling after a short delay"""
+        if self._viewport_job is None:
+            self._viewport_job = self.text_widget.after(self._viewport_poll_ms, self._poll_viewport)
+
+    def _poll_viewport(self):
+        """Highlight newly scrolled-in lines in the visible-region-only tier"""
+        self._viewport_job = None
+        if self._closed or self.tier != TIER_VISIBLE or self._visible_lines is None:
+            return
+        timer = self._begin_pass("viewport")
+        try:
+            if self._highlight_viewport():
+                self._end_pass(timer)
+        except Exception as e:
+            print(f"Viewport highlight failed: {str(e)}")
+            self.timings.record_failure(e)
+        finally:
+            self._pass_timer = None
+        self._schedule_viewport_poll()
+
+    def _cancel_viewport_poll(self):
+        """Stop following the viewport"""
+        if self._viewport_job is not None:
+            try:
+                self.text_widget.after_cancel(self._viewport_job)
+            except Exception:
+                pass
+        self._viewport_job = None
+
+    def shutdown(self):
+        """Stop all timers of this highlighter before its widget is destroyed
+        
+        Cancels the viewport poll, the background fill and the span poll,
+        and drops the results of worker jobs still running. Callbacks that
+        already fired return immediately once the highlighter is closed.
+        """
+        self._closed = True
+        self._highlight_pending = False
+        self._edit_generation += 1
+        self._cancel_fill()
+        self._cancel_viewport_poll()
+        if self._span_poll_job is not None:
+            try:
+                self.text_widget.after_cancel(self._span_poll_job)
+            except Exception:
+                pass
+        self._span_poll_job = None
+        self._span_jobs = []
+
+    def _visible_line_range(self, line_count: int):
+        """Return the 0-based ``[first, last)`` lines shown by ``yview``"""
+        try:
+            first, last = self.text_widget.yview()
+        except Exception:
+            first, last = 0.0, 1.0
+        first = int(first * line_count)
+        # An unmapped widget reports the whole document as visible
+        last = min(line_count, int(last * line_count) + 1, first + self._fill_chunk_lines)
+        return first, last
+
+    def _restart_line_before(self, line: int) -> int:
+        """Nearest restart line at or before ``line`` in the snapshot"""
+        lines, states = self._snapshot_lines, self._line_states
+        while line > 0 and not self._is_restart_line(states[line], lines[line]):
+            line -= 1
+        return line
+
+    def _restart_line_after(self, line: int) -> int:
+        """Nearest restart line at or after ``line`` in the snapshot"""
+        lines, states = self._snapshot_lines, self._line_states
+        while line < len(lines) and not self._is_restart_line(states[line], lines[line]):
+            line += 1
+        return min(line, len(lines))
+
+    def _highlight_window(self, lines, start: int, end: int):
+        """Re-highlight lines ``[start, end)`` (0-based) of ``lines`` right away"""
+        if end <= start:
+            return
+        spans = self.compute_spans('\n'.join(lines[start:end]), window=True, timer=self._pass_timer)
+        self._apply_window(lines, start, end, spans)
+
+    def _apply_window(self, lines, start: int, end: int, spans, region=None):
+        """Replace the spans of lines ``[start, end)`` with ``spans``
+        
+        ``region`` is the edit that turned the stored lines into ``lines``.
+        """
+        old_count = end - start
+        if region is not None:
+            old_count -= region[2] - region[1]
+        with self._phase(PHASE_FLUSH):
+            self._apply_span_delta(start, old_count, _spans_by_line(spans, lines[start:end]), region)
+
+    def _find_dirty_region(self, old_lines, new_lines):
+        """Return ``(start, old_end, new_end)`` of the changed line range
+        
+        Lines ``old_lines[start:old_end]`` were replaced by
+        ``new_lines[start:new_end]``. Returns None when nothing changed.
+        """
+        if old_lines == new_lines:
+            return None
+        
+        limit = min(len(old_lines), len(new_lines))
+        prefix = 0
+        while prefix < limit and old_lines[prefix] == new_lines[prefix]:
+            prefix += 1
+        
+        suffix = 0
+        limit -= prefix
+        while suffix < limit and old_lines[-1 - suffix] == new_lines[-1 - suffix]:
+            suffix += 1
+        
+        return prefix, len(old_lines) - suffix, len(new_lines) - suffix
+
+    def _touches_document_symbols(self, lines) -> bool:
+        """Whether any of ``lines`` may change document-wide symbol tables"""
+        pattern = self.DOCUMENT_SYMBOL_PATTERN
+        return pattern is not None and any(pattern.match(line) for line in lines)
+
+    def _remember_snapshot(self, text: str):
+        """Store the lines and per-line lexer states of a full pass"""
+        lines = text.split('\n')
+        state = self._initial_line_state()
+        states = [state]
+        for line in lines:
+            state = self._advance_line_state(state, line)
+            states.append(state)
+        self._snapshot_lines = lines
+        self._line_states = states
+
+    def _initial_line_state(self):
+        """Lexer state at the start of a document"""
+        if self.BLOCK_DELIMITERS is not None:
+            return 0
+        return _PY_CLEAN_STATE
+
+    def _advance_line_state(self, state, line: str):
+        """Return the lexer state at the end of ``line``
+        
+        For Python the state is ``(open_quote, bracket_depth, continued,
+        after_decorator)``; languages declaring ``BLOCK_DELIMITERS`` use the
+        index + 1 of the open block delimiter, or 0.
+        """
+        if self.BLOCK_DELIMITERS is not None:
+            return self._advance_delimited_state(state, line)
+        
+        quote, depth, _, _ = state
+        pos = 0
+        while True:
+            if quote:
+                match = _PY_QUOTE_END_PATTERNS[quote].match(line, pos)
+                if not match:
+                    # Single quoted strings never span lines
+                    if len(quote) == 1:
+                        quote = None
+                    break
+                pos = match.end()
+                quote = None
+                continue
+            
+            match = _PY_STATE_TOKEN_PATTERN.search(line, pos)
+            if not match:
+                break
+            token = match.group()
+            pos = match.end()
+            if token == '#':
+                break
+            if token[0] in '"\'':
+                quote = token
+            elif token in '([{':
+                depth += 1
+            elif depth:
+                depth -= 1
+        
+        continued = quote is None and line.endswith('\\')
+        decorator = quote is None and depth == 0 and not continued and line.startswith('@')
+        return quote, depth, continued, decorator
+
+    def _advance_delimited_state(self, state: int, line: str) -> int:
+        """Advance a block delimiter state across ``line``"""
+        pos = 0
+        while True:
+            if state:
+                close = self.BLOCK_DELIMITERS[state - 1][1]
+                index = line.find(close, pos)
+                if index == -1:
+                    return state
+                pos = index + len(close)
+                state = 0
+                continue
+            
+            best = -1
+            for number, (opening, _) in enumerate(self.BLOCK_DELIMITERS, 1):
+                index = line.find(opening, pos)
+                if index != -1 and (best == -1 or index < best):
+                    best, state = index, number
+            if self.LINE_COMMENT:
+                index = line.find(self.LINE_COMMENT, pos)
+                if index != -1 and (best == -1 or index < best):
+                    return 0
+            if best == -1:
+                return 0
+            pos = best + len(self.BLOCK_DELIMITERS[state - 1][0])
+
+    def _is_restart_line(self, state, line: str) -> bool:
+        """Whether highlighting can restart at ``line`` given its start state"""
+        if self.BLOCK_DELIMITERS is not None:
+            return state == 0
+        
+        # Python: only top-level statements that open a new block of code
+        if state != _PY_CLEAN_STATE or not line or line[0] in ' \t#)]}':
+            return False
+        return not _PY_CONTINUATION_PATTERN.match(line)
+
+    def _get_line(self, lineno: int) -> str:
+        """Return line ``lineno`` (1-based) of the text being highlighted"""
+        lines = self._pass_lines
+        if lines is None:
+            return self.text_widget.get(f"{lineno}.0", f"{lineno}.end")
+        if 1 <= lineno <= len(lines):
+            return lines[lineno - 1]
+        return ""
+
+    def _index_at(self, offset: int) -> str:
+        """Return the ``line.col`` index of an offset into the text being highlighted"""
+        line_index = self._line_index
+        if line_index is None:
+            return f"1.0+{offset}c"
+        return line_index.offset_to_index(offset)
+
+    def _scan_tokens(self, text: str, pattern=None):
+        """Tag every token of ``text`` in one left-to-right scan of ``pattern``
+        
+        ``pattern`` defaults to the class TOKEN_PATTERN. The name of the
+        matched group is the tag, except for ``word`` tokens which are
+        looked up by _word_tag and COMPOSITE_TOKENS which _emit_token handles.
+        """
+        if pattern is None:
+            pattern = self.TOKEN_PATTERN
+        add_span = self._add_span
+        word_tag = self._word_tag
+        composite = self.COMPOSITE_TOKENS
+        for match in self._finditer(pattern, text):
+            kind = match.lastgroup
+            if kind == 'word':
+                tag = word_tag(match.group())
+                if tag is not None:
+                    add_span(tag, match.start(), match.end())
+            elif kind in composite:
+                self._emit_token(kind, match)
+            else:
+                add_span(kind, match.start(), match.end())
+
+    def _finditer(self, pattern, text: str):
+        """``pattern.finditer(text)`` that keeps to the time budget of the pass"""
+        return finditer_guarded(pattern, text, self._budget)
+
+    def _word_tag(self, word: str) -> Optional[str]:
+        """Return the tag of an identifier or keyword token, None for no tag"""
+        if word in self.keywords:
+            return "keyword"
+        return None
+
+    def _emit_token(self, kind: str, match: re.Match):
+        """Tag a token of one of the COMPOSITE_TOKENS groups"""
+        self._add_span(kind, match.start(), match.end())
+
+    def _span_cache_key(self):
+        """Key of this highlighter's spans in the parse cache"""
+        return type(self)
+
+    def _parse(self, text: str) -> ast.AST:
+        """Parse ``text``, sharing full-document trees through the parse cache"""
+        if self._window_pass:
+            # Window slices would only evict the document from the cache
+            return ast.parse(text)
+        return get_parse_cache().parse(text)
+
+    def _tokens(self, text: str):
+        """Tokenize ``text``, sharing full-document tokens through the parse cache"""
+        if self._window_pass:
+            return list(tokenize.generate_tokens(io.StringIO(text).readline))
+        return get_parse_cache().tokens(text)
+
+    def _basic_highlight(self, text: str):
+        """Basic highlighting when syntax errors occur"""
+        try:
+            self._scan_tokens(text, _BASIC_TOKEN_PATTERN)
         except Exception as e:
             print(f"Basic highlight failed: {str(e)}")
             
     def _clear_tags(self):
         """Remove all syntax highlighting tags"""
         try:
-            for tag in self.syntax_colors.keys():
-                self.text_widget.tag_remove(tag, "1.0", "end")
+            with self._phase(PHASE_CLEAR):
+                for tag in self.syntax_colors.keys():
+                    self.text_widget.tag_remove(tag, "1.0", "end")
         except Exception as e:
             print(f"Clear tag error: {str(e)}")
             
@@ -345,24 +1470,14 @@ class BaseHighlighter:
             
             # Process multi-line strings first
             for match in triple_quote_pattern.finditer(text):
-                start_pos = match.start()
-                end_pos = match.end()
-                
-                # Calculate line and column positions efficiently
-                start_line = text.count('\n', 0, start_pos) + 1
-                start_col = start_pos - text.rfind('\n', 0, start_pos) - 1
-                
-                end_line = text.count('\n', 0, end_pos) + 1
-                end_col = end_pos - text.rfind('\n', 0, end_pos) - 1
-                
-                start = f"{start_line}.{start_col}"
-                end = f"{end_line}.{end_col}"
+                start = self._index_at(match.start())
+                end = self._index_at(match.end())
                 self._add_tag("docstring", start, end)
             
             # Process single-line tokens using tokenize module
             # Use a single tokenize call for the entire text for better performance
             try:
-                tokens = list(tokenize.generate_tokens(io.StringIO(text).readline))
+                tokens = self._tokens(text)
                 for token in tokens:
                     token_type = token.type
                     token_string = token.string
@@ -393,128 +1508,179 @@ class BaseHighlighter:
             print(f"Comment and strings highlight error: {str(e)}")
 
     def _process_ast(self, tree: ast.AST):
-        """Process AST tree with performance optimization"""
-        # Class names collection for class reference highlighting
-        self.class_names = set()
+        """Collect the document tables and highlight ``tree`` in one pass
+        
+        Nodes are visited depth first in source order and dispatched by type
+        through the table of ``_visit_<NodeType>`` handlers. The enclosing
+        class and function definitions are kept on a scope stack, so the
+        tree is walked once and no parent map is built.
+        """
+        # Window passes only see part of the document, so keep the
+        # document-wide tables collected by the last full pass
+        if not self._window_pass:
+            # Class names collection for class reference highlighting
+            self.class_names = set()
+            
+            # Reset instance attributes tracking
+            self.class_instance_attrs = {}
         
-        # Reset instance attributes tracking
-        self.class_instance_attrs = {}
-        
-        # Build parent map and collect class names in a single pass
-        self._parent_map = {}
-        
-        # Use a more efficient AST traversal
-        for node in ast.walk(tree):
-            # Collect class names
-            if isinstance(node, ast.ClassDef):
-                self.class_names.add(node.name)
-                self.class_instance_attrs[node.name] = set()
-            
-            # Track instance attributes (self.*) assignments
-            if isinstance(node, ast.Assign):
-                # Check if this is an instance attribute assignment
-                for target in node.targets:
-                    if isinstance(target, ast.Attribute) and isinstance(target.value, ast.Name) and target.value.id == 'self':
-                        # Get the class name this assignment belongs to
-                        class_node = self._find_enclosing_class(node)
-                        if class_node:
-                            self.class_instance_attrs[class_node.name].add(target.attr)
-            
-            # Build parent map
-            for child in ast.iter_child_nodes(node):
-                self._parent_map[child] = node
-                
         # Initialize import tracking for better symbol recognition
         if not hasattr(self, 'imported_modules'):
             self.imported_modules = set()
         if not hasattr(self, 'imported_symbols'):
             self.imported_symbols = {}
-                
-        # Highlight nodes with batched operations
-        self._highlight_nodes_batch(tree)
+        
+        handlers = self._node_handlers()
+        AST = ast.AST
+        self._scopes = []
+        self._enclosing_class = None
+        self._unresolved_names = []
+        
+        # (node, parent) pairs, a None node closes the scope on top of _scopes
+        stack = [(tree, None)]
+        pop = stack.pop
+        push = stack.append
+        while stack:
+            node, parent = pop()
+            if node is None:
+                self._enclosing_class = self._scopes.pop()[1]
+                continue
+            
+            node_type = node.__class__
+            handler = handlers.get(node_type)
+            if handler is not None:
+                self._current_node = node
+                self._current_parent = parent
+                handler(self, node)
+            
+            if node_type in _SCOPE_NODE_TYPES:
+                self._scopes.append((node, self._enclosing_class))
+                if node_type is ast.ClassDef:
+                    self._enclosing_class = node
+                push((None, None))
+            
+            # Children in reverse so they are popped in source order. Nodes
+            # without fields (Load, Add, ...) have no handler and are skipped
+            children = []
+            for name in node._fields:
+                value = getattr(node, name, None)
+                if isinstance(value, AST):
+                    if value._fields:
+                        children.append((value, node))
+                elif value.__class__ is list:
+                    for item in value:
+                        if isinstance(item, AST):
+                            children.append((item, node))
+            children.reverse()
+            stack.extend(children)
+        
+        self._current_node = None
+        self._current_parent = None
+        
+        # The class names are complete now, settle names seen before their class
+        unresolved = self._unresolved_names
+        self._unresolved_names = None
+        class_names = self.class_names
+        for name, tag, start, end in unresolved:
+            self._add_tag("class" if name in class_names else tag, start, end)
     
-    def _highlight_nodes_batch(self, tree: ast.AST):
-        """Highlight AST nodes in batches for better performance"""
-        # Group nodes by type for batch processing
-        nodes_by_type = {}
-        
-        for node in ast.walk(tree):
-            node_type = type(node)
-            if node_type not in nodes_by_type:
-                nodes_by_type[node_type] = []
-            nodes_by_type[node_type].append(node)
-        
-        # Process nodes in batches for better cache locality
-        for node_type, nodes in nodes_by_type.items():
-            for node in nodes:
-                self._highlight_node(node)
+    @classmethod
+    def _node_handlers(cls):
+        """Map AST node types to this class's ``_visit_<NodeType>`` handlers"""
+        handlers = cls.__dict__.get('_node_handler_table')
+        if handlers is None:
+            handlers = {}
+            for name in dir(cls):
+                if not name.startswith('_visit_'):
+                    continue
+                node_type = getattr(ast, name[len('_visit_'):], None)
+                if isinstance(node_type, type) and issubclass(node_type, ast.AST):
+                    handlers[node_type] = getattr(cls, name)
+            cls._node_handler_table = handlers
+        return handlers
 
     def _get_parent_node(self, node: ast.AST) -> Optional[ast.AST]:
-        """Get parent node of the given node"""
-        return self._parent_map.get(node)
-    
-    def _find_enclosing_class(self, node: ast.AST) -> Optional[ast.ClassDef]:
-        """Find the enclosing class definition for a given node"""
-        current_node = node
-        while current_node:
-            parent = self._get_parent_node(current_node)
-            if not parent:
-                return None
-            if isinstance(parent, ast.ClassDef):
-                return parent
-            current_node = parent
+        """Get the parent of the node being visited, None for other nodes"""
+        if node is self._current_node:
+            return self._current_parent
         return None
-            
-    def _highlight_node(self, node: ast.AST):
-        """Highlight specific AST node"""
-        # 使用getattr安全地检查lineno属性
-        lineno = getattr(node, 'lineno', None)
-        if lineno is None:
-            return
+    
+    def _add_class_or_tag(self, name: str, tag: str, start: str, end: str):
+        """Tag a class reference as ``class`` and anything else as ``tag``
         
-        start, end = self.get_position(node)
-        
-        # Process different nodes
-        if isinstance(node, ast.ClassDef):
-            self._highlight_class_def(node, start, end)
-        elif isinstance(node, ast.FunctionDef):
-            self._highlight_function_def(node, start, end)
-        elif isinstance(node, ast.Name):
-            self._highlight_name(node, start, end)
-        elif isinstance(node, ast.Call):
-            self._highlight_call(node)
-        elif isinstance(node, ast.Constant):
-            self._highlight_constant(node, start, end)
-        elif isinstance(node, ast.arg):
-            self._highlight_arg(node, start, end)
-        elif isinstance(node, ast.AnnAssign):
-            self._highlight_annotation(node)
-        elif isinstance(node, ast.Import):
-            self._highlight_import(node)
-        elif isinstance(node, ast.ImportFrom):
-            self._highlight_import_from(node)
-        elif isinstance(node, ast.Attribute):
-            self._highlight_attribute(node)
-        elif isinstance(node, ast.Assign):
-            self._highlight_assignment(node)
-        elif isinstance(node, ast.BinOp):
-            self._highlight_operator(node, start, end)
-        elif isinstance(node, ast.Compare):
-            self._highlight_operator(node, start, end)
-        elif isinstance(node, ast.BoolOp):
-            self._highlight_bool_op(node)
-        elif isinstance(node, ast.UnaryOp):
-            self._highlight_operator(node, start, end)
-        elif isinstance(node, ast.If):
-            self._highlight_if_statement(node)
-        elif isinstance(node, ast.For):
-            self._highlight_for_statement(node)
-        elif isinstance(node, ast.While):
-            self._highlight_while_statement(node)
-        elif isinstance(node, ast.Try):
-            self._highlight_try_statement(node)
-        elif isinstance(node, ast.With):
-            self._highlight_with_statement(node)
+        A class may be defined below its first use, so names that are not
+        known classes yet are settled once the pass has seen every class.
+        """
+        if name in self.class_names or self._is_likely_class_name(name):
+            self._add_tag("class", start, end)
+        elif self._unresolved_names is not None:
+            self._unresolved_names.append((name, tag, start, end))
+        else:
+            self._add_tag(tag, start, end)
+    
+    def _visit_ClassDef(self, node: ast.ClassDef):
+        self.class_names.add(node.name)
+        self.class_instance_attrs.setdefault(node.name, set())
+        self._highlight_class_def(node, *self.get_position(node))
+    
+    def _visit_FunctionDef(self, node: ast.FunctionDef):
+        self._highlight_function_def(node, *self.get_position(node))
+    
+    def _visit_Name(self, node: ast.Name):
+        self._highlight_name(node, *self.get_position(node))
+    
+    def _visit_Call(self, node: ast.Call):
+        self._highlight_call(node)
+    
+    def _visit_Constant(self, node: ast.Constant):
+        self._highlight_constant(node, *self.get_position(node))
+    
+    def _visit_arg(self, node: ast.arg):
+        self._highlight_arg(node, *self.get_position(node))
+    
+    def _visit_AnnAssign(self, node: ast.AnnAssign):
+        self._highlight_annotation(node)
+    
+    def _visit_Import(self, node: ast.Import):
+        self._highlight_import(node)
+    
+    def _visit_ImportFrom(self, node: ast.ImportFrom):
+        self._highlight_import_from(node)
+    
+    def _visit_Attribute(self, node: ast.Attribute):
+        self._highlight_attribute(node)
+    
+    def _visit_Assign(self, node: ast.Assign):
+        # Track instance attributes (self.*) of the enclosing class
+        if self._enclosing_class is not None:
+            for target in node.targets:
+                if isinstance(target, ast.Attribute) and isinstance(target.value, ast.Name) and target.value.id == 'self':
+                    self.class_instance_attrs[self._enclosing_class.name].add(target.attr)
+        self._highlight_assignment(node)
+    
+    def _visit_BinOp(self, node: ast.BinOp):
+        self._highlight_operator(node, *self.get_position(node))
+    
+    _visit_Compare = _visit_BinOp
+    _visit_UnaryOp = _visit_BinOp
+    
+    def _visit_BoolOp(self, node: ast.BoolOp):
+        self._highlight_bool_op(node)
+    
+    def _visit_If(self, node: ast.If):
+        self._highlight_if_statement(node)
+    
+    def _visit_For(self, node: ast.For):
+        self._highlight_for_statement(node)
+    
+    def _visit_While(self, node: ast.While):
+        self._highlight_while_statement(node)
+    
+    def _visit_Try(self, node: ast.Try):
+        self._highlight_try_statement(node)
+    
+    def _visit_With(self, node: ast.With):
+        self._highlight_with_statement(node)
 
     def _highlight_class_def(self, node: ast.ClassDef, start: str, end: str):
         """Highlight class definition"""
@@ -646,9 +1812,7 @@ class BaseHighlighter:
             col_offset = getattr(node, 'col_offset', 0)
             
             # Get the line content
-            line_start = f"{lineno}.0"
-            line_end = f"{lineno}.end"
-            line_content = self.text_widget.get(line_start, line_end)
+            line_content = self._get_line(lineno)
             
             # Find 'import' keyword position
             import_pos = line_content.find("import", col_offset)
@@ -749,9 +1913,9 @@ class BaseHighlighter:
     def _highlight_name(self, node: ast.Name, start: str, end: str):
         """Highlight name with context awareness"""
         # 简化的变量名高亮逻辑
-        if node.id in keyword.kwlist:
+        if node.id in _PY_KEYWORDS:
             self._add_tag("keyword", start, end)
-        elif node.id in dir(builtins):
+        elif node.id in _PY_BUILTINS:
             self._add_tag("builtin", start, end)
         elif node.id.isupper():
             self._add_tag("constant", start, end)
@@ -773,12 +1937,8 @@ class BaseHighlighter:
                 self._add_tag("parameter", start, end)
             # 检查是否是函数调用
             elif parent and isinstance(parent, ast.Call) and parent.func == node:
-                if node.id in self.class_names or self._is_likely_class_name(node.id):
-                    # 类实例化
-                    self._add_tag("class", start, end)
-                else:
-                    # 函数调用
-                    self._add_tag("function", start, end)
+                # 类实例化或函数调用
+                self._add_class_or_tag(node.id, "function", start, end)
             # 检查是否是赋值语句的目标（包括元组解包）
             elif parent and isinstance(parent, ast.Assign):
                 for target in parent.targets:
@@ -793,15 +1953,11 @@ class BaseHighlighter:
             # 检查是否是属性访问的基础对象
             elif parent and isinstance(parent, ast.Attribute) and parent.value == node:
                 self._add_tag("variable", start, end)
-            # 检查是否是类引用
-            elif node.id in self.class_names or self._is_likely_class_name(node.id):
-                self._add_tag("class", start, end)
-            # 检查是否是导入的符号
+            # 类引用、导入的符号，默认情况下高亮为variable
             elif hasattr(self, 'imported_symbols') and node.id in self.imported_symbols:
-                self._add_tag("imported_variable", start, end)
-            # 默认情况下，高亮为variable
+                self._add_class_or_tag(node.id, "imported_variable", start, end)
             else:
-                self._add_tag("variable", start, end)
+                self._add_class_or_tag(node.id, "variable", start, end)
                 
     def _is_likely_class_name(self, name: str) -> bool:
         """判断一个名称是否可能是类名（基于命名约定）"""
@@ -821,14 +1977,11 @@ class BaseHighlighter:
         """Highlight function call"""
         if isinstance(node.func, ast.Name):
             start, end = self.get_position(node.func)
-            if node.func.id in dir(builtins):
+            if node.func.id in _PY_BUILTINS:
                 self._add_tag("builtin", start, end)
-            elif node.func.id in self.class_names or self._is_likely_class_name(node.func.id):
-                # 类实例化应该高亮为class
-                self._add_tag("class", start, end)
             else:
-                # 函数调用应该高亮为function
-                self._add_tag("function", start, end)
+                # 类实例化高亮为class，函数调用高亮为function
+                self._add_class_or_tag(node.func.id, "function", start, end)
         elif isinstance(node.func, ast.Attribute):
             # 处理属性调用，如 obj.method() 或 module.function()
             self._highlight_attribute_call(node.func)
@@ -882,9 +2035,7 @@ class BaseHighlighter:
         # 由于AST不直接提供运算符的位置，我们需要从源代码中查找
         try:
             # 获取包含布尔运算符的整行代码
-            line_start = f"{node.lineno}.0"
-            line_end = f"{node.lineno}.end"
-            line_content = self.text_widget.get(line_start, line_end)
+            line_content = self._get_line(node.lineno)
             
             # 查找布尔运算符的位置
             bool_operators = [' and ', ' or ', ' not ']
@@ -904,9 +2055,7 @@ class BaseHighlighter:
         """Highlight if statement keywords"""
         try:
             # 获取包含if语句的整行代码
-            line_start = f"{node.lineno}.0"
-            line_end = f"{node.lineno}.end"
-            line_content = self.text_widget.get(line_start, line_end)
+            line_content = self._get_line(node.lineno)
             
             # 查找if关键字的位置
             if_pos = line_content.find("if ")
@@ -920,9 +2069,7 @@ class BaseHighlighter:
                 for orelse_node in node.orelse:
                     if isinstance(orelse_node, ast.If):
                         # 这是elif分支
-                        elif_line_start = f"{orelse_node.lineno}.0"
-                        elif_line_end = f"{orelse_node.lineno}.end"
-                        elif_line_content = self.text_widget.get(elif_line_start, elif_line_end)
+                        elif_line_content = self._get_line(orelse_node.lineno)
                         
                         elif_pos = elif_line_content.find("elif ")
                         if elif_pos != -1:
@@ -935,9 +2082,7 @@ class BaseHighlighter:
                 for orelse_node in node.orelse:
                     if not isinstance(orelse_node, ast.If):
                         # 这是else分支
-                        else_line_start = f"{orelse_node.lineno}.0"
-                        else_line_end = f"{orelse_node.lineno}.end"
-                        else_line_content = self.text_widget.get(else_line_start, else_line_end)
+                        else_line_content = self._get_line(orelse_node.lineno)
                         
                         else_pos = else_line_content.find("else:")
                         if else_pos != -1:
@@ -951,9 +2096,7 @@ class BaseHighlighter:
         """Highlight for statement keywords"""
         try:
             # 获取包含for语句的整行代码
-            line_start = f"{node.lineno}.0"
-            line_end = f"{node.lineno}.end"
-            line_content = self.text_widget.get(line_start, line_end)
+            line_content = self._get_line(node.lineno)
             
             # 查找for关键字的位置
             for_pos = line_content.find("for ")
@@ -975,9 +2118,7 @@ class BaseHighlighter:
         """Highlight while statement keywords"""
         try:
             # 获取包含while语句的整行代码
-            line_start = f"{node.lineno}.0"
-            line_end = f"{node.lineno}.end"
-            line_content = self.text_widget.get(line_start, line_end)
+            line_content = self._get_line(node.lineno)
             
             # 查找while关键字的位置
             while_pos = line_content.find("while ")
@@ -992,9 +2133,7 @@ class BaseHighlighter:
         """Highlight try statement keywords"""
         try:
             # 获取包含try语句的整行代码
-            line_start = f"{node.lineno}.0"
-            line_end = f"{node.lineno}.end"
-            line_content = self.text_widget.get(line_start, line_end)
+            line_content = self._get_line(node.lineno)
             
             # 查找try关键字的位置
             try_pos = line_content.find("try:")
@@ -1005,9 +2144,7 @@ class BaseHighlighter:
             
             # 查找except关键字的位置
             for handler in node.handlers:
-                handler_line_start = f"{handler.lineno}.0"
-                handler_line_end = f"{handler.lineno}.end"
-                handler_line_content = self.text_widget.get(handler_line_start, handler_line_end)
+                handler_line_content = self._get_line(handler.lineno)
                 
                 except_pos = handler_line_content.find("except ")
                 if except_pos != -1:
@@ -1019,9 +2156,7 @@ class BaseHighlighter:
             if node.finalbody:
                 for final_node in node.finalbody:
                     if hasattr(final_node, 'lineno'):
-                        final_line_start = f"{final_node.lineno}.0"
-                        final_line_end = f"{final_node.lineno}.end"
-                        final_line_content = self.text_widget.get(final_line_start, final_line_end)
+                        final_line_content = self._get_line(final_node.lineno)
                         
                         finally_pos = final_line_content.find("finally:")
                         if finally_pos != -1:
@@ -1035,9 +2170,7 @@ class BaseHighlighter:
         """Highlight with statement keywords"""
         try:
             # 获取包含with语句的整行代码
-            line_start = f"{node.lineno}.0"
-            line_end = f"{node.lineno}.end"
-            line_content = self.text_widget.get(line_start, line_end)
+            line_content = self._get_line(node.lineno)
             
             # 查找with关键字的位置
             with_pos = line_content.find("with ")
@@ -1079,21 +2212,29 @@ class BaseHighlighter:
     def set_theme(self, theme_data):
         """Set theme
         
+        Only tags whose color differs from the widget's are reconfigured, so
+        applying the theme a tab already has costs one ``configure`` call.
+        
         Args:
-            theme_data: Can be theme config dict
+            theme_data: Can be theme config dict or a Theme from the registry
         """
         try:
+            theme = theme_data if isinstance(theme_data, Theme) else Theme(None, theme_data)
+            
             # Basic properties
-            if "base" in theme_data:
-                self.text_widget.configure(**theme_data["base"])
+            if "base" in theme.data:
+                self.text_widget.configure(**theme.base)
                 
             # Update colors
-            for tag, color in theme_data.items():
-                if tag != "base" and isinstance(color, str):
-                    self.syntax_colors[tag] = color
-                    
-            # Setup tags
-            self.setup_tags()
+            if self._tag_colors is None:
+                self._tag_colors = {}
+            tag_colors = self._tag_colors
+            tag_options = theme.tag_options
+            for tag, color in theme.colors.items():
+                self.syntax_colors[tag] = color
+                if tag_colors.get(tag) != color:
+                    self.text_widget.tag_configure(tag, **tag_options[tag])
+                    tag_colors[tag] = color
             
         except Exception as e:
             print(f"Theme error: {str(e)}")
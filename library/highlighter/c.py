@@ -1,7 +1,27 @@
-from .base import BaseHighlighter
+from .base import BaseHighlighter, C_STYLE_COMMENT_RULE, C_STYLE_STRING_RULE, WORD_RULE
 import re
 
 class CodeHighlighter(BaseHighlighter):
+    BLOCK_DELIMITERS = (('/*', '*/'),)
+    LINE_COMMENT = '//'
+    DOCUMENT_SYMBOL_PATTERN = re.compile(r'\s*#\s*(?:include|define)\b')
+    
+    TOKEN_PATTERN = re.compile('|'.join((
+        C_STYLE_COMMENT_RULE,
+        C_STYLE_STRING_RULE,
+        r'(?P<preprocessor>#\s*(?:include|define|undef|if|ifdef|ifndef|else|elif|endif|error|pragma))',
+        WORD_RULE,
+    )))
+    
+    # Tag per imported symbol type, anything else is a function
+    IMPORTED_SYMBOL_TAGS = {
+        'macro': "imported_macro",
+        'constant': "imported_constant",
+        'struct': "imported_struct",
+        'enum': "imported_enum",
+        'type': "imported_type",
+    }
+    
     def __init__(self, text_widget):
         super().__init__(text_widget)
         # C keywords
@@ -16,6 +36,7 @@ class CodeHighlighter(BaseHighlighter):
         # Import information storage
         self.included_headers = set()
         self.imported_symbols = {}  # symbol_name -> symbol_type
+        self.defined_macros = set()
         
         # C syntax colors - use theme colors
         # Import-related colors are now loaded from theme file
@@ -28,40 +49,19 @@ class CodeHighlighter(BaseHighlighter):
         
         self.setup_tags()
     
-    def highlight(self, event=None):
+    def _highlight_text(self, text: str):
         """Main highlighting method for C"""
-        if not self.text_widget:
-            return
-            
-        # Initialize tag batch
-        self._tag_batch = []
-        
-        # Process comments and strings first
-        self._highlight_comments_and_strings()
-        
-        # Process C-specific syntax
-        self._highlight_c_syntax()
-        
-        # Refresh batch tags
-        self._refresh_batch_tags()
-    
-    def _highlight_c_syntax(self):
-        """Process C-specific syntax highlighting"""
-        code = self.text_widget.get("1.0", "end")
-        
-        # Process include directives
-        self._process_c_includes(code)
-        
-        # Highlight C keywords and types
-        self._highlight_c_keywords_and_types(code)
-        
-        # Highlight imported symbols
-        self._highlight_imported_symbols()
+        # Collect headers and macros, then tag every token in one scan
+        self._process_c_includes(text)
+        self._scan_tokens(text)
     
     def _process_c_includes(self, code):
         """Process C include directives to extract included headers"""
-        self.included_headers.clear()
-        self.imported_symbols.clear()
+        # Keep the document-wide tables when only a window is re-highlighted
+        if not self._window_pass:
+            self.included_headers.clear()
+            self.imported_symbols.clear()
+            self.defined_macros.clear()
         
         # Match include directives
         include_pattern = r'#include\s+[<"]([^>"]+)[>"]'
@@ -72,6 +72,10 @@ class CodeHighlighter(BaseHighlighter):
             
             # Extract common symbols from standard headers
             self._extract_c_symbols(header_name)
+        
+        # Macros defined with #define
+        for match in re.finditer(r'#define\s+(\w+)', code):
+            self.defined_macros.add(match.group(1))
     
     def _extract_c_symbols(self, header_name):
         """Extract common symbols from C standard headers"""
@@ -107,66 +111,13 @@ class CodeHighlighter(BaseHighlighter):
             for symbol in standard_symbols[header_name]:
                 self.imported_symbols[symbol] = 'function'
     
-    def _highlight_c_keywords_and_types(self, code):
-        """Highlight C keywords and built-in types"""
-        # Highlight keywords
-        for keyword in self.keywords:
-            pattern = r'\b' + re.escape(keyword) + r'\b'
-            for match in re.finditer(pattern, code):
-                start = f"1.0+{match.start()}c"
-                end = f"1.0+{match.end()}c"
-                self._add_tag("keyword", start, end)
-        
-        # Highlight preprocessor directives
-        preprocessor_pattern = r'#\s*(include|define|undef|if|ifdef|ifndef|else|elif|endif|error|pragma)'
-        for match in re.finditer(preprocessor_pattern, code):
-            start = f"1.0+{match.start()}c"
-            end = f"1.0+{match.end()}c"
-            self._add_tag("preprocessor", start, end)
-        
-        # Highlight macros (defined with #define)
-        macro_pattern = r'#define\s+(\w+)'
-        for match in re.finditer(macro_pattern, code):
-            macro_name = match.group(1)
-            # Highlight macro usage
-            usage_pattern = r'\b' + re.escape(macro_name) + r'\b'
-            for usage_match in re.finditer(usage_pattern, code):
-                start = f"1.0+{usage_match.start()}c"
-                end = f"1.0+{usage_match.end()}c"
-                self._add_tag("macro", start, end)
-    
-    def _highlight_imported_symbols(self):
-        """Highlight imported symbols in the code"""
-        if not self.imported_symbols:
-            return
-            
-        code = self.text_widget.get("1.0", "end")
-        
-        for symbol_name, symbol_type in self.imported_symbols.items():
-            # Create pattern to match the symbol (avoid matching in strings/comments)
-            pattern = r'\b' + re.escape(symbol_name) + r'\b'
-            
-            for match in re.finditer(pattern, code):
-                start_pos = match.start()
-                end_pos = match.end()
-                
-                # Check if this is inside a string or comment
-                if self._is_in_string_or_comment(start_pos):
-                    continue
-                
-                start = f"1.0+{start_pos}c"
-                end = f"1.0+{end_pos}c"
-                
-                # Determine tag based on symbol type
-                if symbol_type == 'macro':
-                    self._add_tag("imported_macro", start, end)
-                elif symbol_type == 'constant':
-                    self._add_tag("imported_constant", start, end)
-                elif symbol_type == 'struct':
-                    self._add_tag("imported_struct", start, end)
-                elif symbol_type == 'enum':
-                    self._add_tag("imported_enum", start, end)
-                elif symbol_type == 'type':
-                    self._add_tag("imported_type", start, end)
-                else:  # function
-                    self._add_tag("imported_function", start, end) 
\ No newline at end of file
+    def _word_tag(self, word):
+        """Classify C keywords, macros and imported symbols"""
+        if word in self.keywords:
+            return "keyword"
+        if word in self.defined_macros:
+            return "macro"
+        symbol_type = self.imported_symbols.get(word)
+        if symbol_type is not None:
+            return self.IMPORTED_SYMBOL_TAGS.get(symbol_type, "imported_function")
+        return None
@@ -1,6 +1,8 @@
-from .base import BaseHighlighter
+from .grammar import GrammarHighlighter
+
+class CodeHighlighter(GrammarHighlighter):
+    GRAMMAR = "css"
 
-class CodeHighlighter(BaseHighlighter):
     def __init__(self, text_widget):
         super().__init__(text_widget)
         # CSS syntax colors - use theme colors
@@ -14,16 +16,4 @@ class CodeHighlighter(BaseHighlighter):
         self.syntax_colors.setdefault("important", self.syntax_colors.get("keyword", "#569CD6"))
         self.syntax_colors.setdefault("media", self.syntax_colors.get("decorator", "#C586C0"))
         
-        # CSS property and value keywords
-        self.properties = {
-            "color", "background", "margin", "padding", "border", "font",
-            "width", "height", "display", "position", "top", "left", "right",
-            "bottom", "float", "clear", "text-align", "vertical-align"
-        }
-        
-        self.values = {
-            "none", "block", "inline", "flex", "grid", "absolute", "relative",
-            "fixed", "static", "inherit", "initial", "auto", "hidden", "visible"
-        }
-        
-        self.setup_tags() 
+        self.setup_tags()
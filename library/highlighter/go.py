@@ -1,7 +1,24 @@
-from .base import BaseHighlighter
+from .base import BaseHighlighter, C_STYLE_COMMENT_RULE, WORD_RULE
 import re
 
+# 解释型字符串、rune 字面量和可以跨行的反引号原始字符串
+_GO_STRING_RULE = r'(?P<string>"(?:[^"\\\n]|\\.)*"|\'(?:[^\'\\\n]|\\.)*\'|`[^`]*(?:`|\Z))'
+
 class CodeHighlighter(BaseHighlighter):
+    BLOCK_DELIMITERS = (('/*', '*/'), ('`', '`'))
+    LINE_COMMENT = '//'
+    DOCUMENT_SYMBOL_PATTERN = re.compile(r'\s*import\b')
+    
+    TOKEN_PATTERN = re.compile('|'.join((
+        C_STYLE_COMMENT_RULE,
+        _GO_STRING_RULE,
+        r'(?P<go_import>^[ \t]*import\s[^\n]*)',
+        r'(?P<qualified>\b\w+\.\w+)',
+        WORD_RULE,
+    )), re.MULTILINE)
+    
+    COMPOSITE_TOKENS = frozenset({'go_import', 'qualified'})
+    
     def __init__(self, text_widget):
         super().__init__(text_widget)
         # Go语言关键字
@@ -50,186 +67,93 @@ class CodeHighlighter(BaseHighlighter):
         
         self.setup_tags()
     
-    def highlight(self):
-        """重写高亮方法，专门处理Go语言语法"""
-        try:
-            # 保存当前状态
-            current_insert = self.text_widget.index("insert")
-            current_view = self.text_widget.yview()
-            current_selection = None
-            try:
-                current_selection = (
-                    self.text_widget.index("sel.first"),
-                    self.text_widget.index("sel.last")
-                )
-            except:
-                pass
-                
-            # 清除标签
-            self._clear_tags()
-            text = self.text_widget.get("1.0", "end-1c")
-            
-            # 初始化标签批处理
-            self._tag_batch = {}
-            
-            # 处理注释和字符串
-            self._highlight_comments_and_strings(text)
-            
-            # 处理Go语言特定的语法
-            self._highlight_go_syntax(text)
-            
-            # 刷新剩余的批处理标签操作
-            self._flush_all_tag_batches()
-            
-            # 恢复状态
-            self.text_widget.mark_set("insert", current_insert)
-            self.text_widget.yview_moveto(current_view[0])
-            if current_selection:
-                self.text_widget.tag_add("sel", *current_selection)
-                
-        except Exception as e:
-            print(f"Go高亮失败: {str(e)}")
-            # 回退到基础高亮
-            self._basic_highlight(text)
+    def _highlight_text(self, text: str):
+        """处理Go语言的注释、字符串和特定语法"""
+        self._highlight_go_syntax(text)
     
     def _highlight_go_syntax(self, text: str):
         """处理Go语言特定的语法高亮"""
-        # 重置导入信息
-        self.imported_packages = set()
-        self.imported_symbols = {}
-        
-        # 按行处理
-        lines = text.split('\n')
+        # 重置导入信息（局部重新高亮时保留全文的导入信息）
+        if not self._window_pass:
+            self.imported_packages = set()
+            self.imported_symbols = {}
         
-        for line_num, line in enumerate(lines, 1):
-            # 处理导入语句
-            self._process_go_imports(line, line_num)
-            
-            # 高亮关键字
-            self._highlight_go_keywords(line, line_num)
-            
-            # 高亮内置类型和函数
-            self._highlight_go_builtins(line, line_num)
-            
-            # 高亮导入的符号
-            self._highlight_imported_symbols(line, line_num)
+        # 注释、字符串、导入语句、关键字、内置类型和导入的符号在一次扫描中完成
+        self._scan_tokens(text)
     
-    def _process_go_imports(self, line: str, line_num: int):
-        """处理Go导入语句"""
-        # 匹配导入语句
-        import_pattern = r'^\s*import\s+(?:\((?:[^)]*)\)|(?:[^\n;]*))'
-        import_match = re.search(import_pattern, line)
-        
-        if import_match:
-            # 高亮import关键字
-            import_start = line.find('import')
-            if import_start != -1:
-                start = f"{line_num}.{import_start}"
-                end = f"{line_num}.{import_start + 6}"
-                self._add_tag("keyword", start, end)
-            
-            # 提取导入的包名
-            self._extract_go_packages(line, line_num)
+    def _word_tag(self, word):
+        """Go关键字、内置类型和函数、导入的包名"""
+        if word in self.keywords:
+            return "keyword"
+        if word in self.builtins:
+            return "builtin"
+        if word in self._package_names():
+            return "imported_package"
+        return None
     
-    def _extract_go_packages(self, line: str, line_num: int):
-        """提取Go导入的包名"""
-        # 匹配单行导入
-        single_import_pattern = r'import\s+"([^"]+)"'
-        single_matches = re.findall(single_import_pattern, line)
+    def _package_names(self):
+        """导入的包名（路径的最后一部分）"""
+        packages = self.imported_packages
+        # 导入表在一次扫描中只增不减，重置时会换成新的集合
+        if getattr(self, '_package_names_source', None) is not packages or \
+           self._package_names_size != len(packages):
+            self._package_names_source = packages
+            self._package_names_size = len(packages)
+            self._package_names_cache = {package.split('/')[-1] for package in packages}
+        return self._package_names_cache
+    
+    def _emit_token(self, kind, match):
+        """处理导入语句和包名.符号访问"""
+        if kind == 'go_import':
+            self._process_go_import(match.group(), match.start())
+            return
         
-        for package in single_matches:
-            self.imported_packages.add(package)
-            # 高亮包名
-            package_start = line.find(f'"{package}"')
-            if package_start != -1:
-                start = f"{line_num}.{package_start + 1}"
-                end = f"{line_num}.{package_start + 1 + len(package)}"
-                self._add_tag("imported_package", start, end)
+        start = match.start()
+        package_name, _, symbol = match.group().partition('.')
+        symbol_start = start + len(package_name) + 1
         
-        # 匹配多行导入（括号内的导入）
-        if '(' in line and ')' in line:
-            # 提取括号内的内容
-            start_idx = line.find('(')
-            end_idx = line.find(')')
-            if start_idx != -1 and end_idx != -1:
-                import_block = line[start_idx + 1:end_idx]
-                # 匹配每个导入项
-                block_matches = re.findall(r'"([^"]+)"', import_block)
-                for package in block_matches:
-                    self.imported_packages.add(package)
-                    # 高亮包名
-                    package_start = import_block.find(f'"{package}"')
-                    if package_start != -1:
-                        actual_start = start_idx + 1 + package_start + 1
-                        start = f"{line_num}.{actual_start}"
-                        end = f"{line_num}.{actual_start + len(package)}"
-                        self._add_tag("imported_package", start, end)
-    
-    def _highlight_go_keywords(self, line: str, line_num: int):
-        """高亮Go关键字"""
-        for keyword in self.keywords:
-            pattern = r'\b' + re.escape(keyword) + r'\b'
-            for match in re.finditer(pattern, line):
-                start = f"{line_num}.{match.start()}"
-                end = f"{line_num}.{match.end()}"
-                self._add_tag("keyword", start, end)
-    
-    def _highlight_go_builtins(self, line: str, line_num: int):
-        """高亮Go内置类型和函数"""
-        for builtin in self.builtins:
-            pattern = r'\b' + re.escape(builtin) + r'\b'
-            for match in re.finditer(pattern, line):
-                start = f"{line_num}.{match.start()}"
-                end = f"{line_num}.{match.end()}"
-                self._add_tag("builtin", start, end)
+        if package_name not in self._package_names():
+            # 不是包名访问，两部分按普通标识符处理
+            for word, word_start in ((package_name, start), (symbol, symbol_start)):
+                tag = self._word_tag(word)
+                if tag is not None:
+                    self._add_span(tag, word_start, word_start + len(word))
+            return
+        
+        # 高亮包名部分
+        self._add_span("imported_package", start, symbol_start - 1)
+        
+        # 根据符号命名约定判断类型
+        if symbol[0].isupper():
+            # 大写开头：可能是类型、接口、结构体
+            if symbol.endswith('er') or symbol.startswith('I'):
+                tag = "imported_interface"
+            else:
+                tag = "imported_type"
+        else:
+            # 小写开头：可能是函数、方法、变量
+            if symbol.startswith('get') or symbol.startswith('set') or symbol.endswith('Func'):
+                tag = "imported_function"
+            else:
+                tag = "imported_variable"
+        self._add_span(tag, symbol_start, match.end())
     
-    def _highlight_imported_symbols(self, line: str, line_num: int):
-        """高亮导入的符号"""
-        # 高亮包名访问（如 fmt.Println）
-        for package in self.imported_packages:
-            # 提取包名（最后一个部分）
-            package_name = package.split('/')[-1]
-            
-            # 匹配包名.符号的模式
-            pattern = r'\b' + re.escape(package_name) + r'\.(\w+)'
-            for match in re.finditer(pattern, line):
-                # 高亮包名部分
-                package_start = f"{line_num}.{match.start()}"
-                package_end = f"{line_num}.{match.start() + len(package_name)}"
-                self._add_tag("imported_package", package_start, package_end)
-                
-                # 高亮符号部分
-                symbol = match.group(1)
-                symbol_start = f"{line_num}.{match.start() + len(package_name) + 1}"
-                symbol_end = f"{line_num}.{match.end()}"
-                
-                # 根据符号命名约定判断类型
-                if symbol[0].isupper():
-                    # 大写开头：可能是类型、接口、结构体
-                    if symbol.endswith('er') or symbol.startswith('I'):
-                        self._add_tag("imported_interface", symbol_start, symbol_end)
-                    else:
-                        self._add_tag("imported_type", symbol_start, symbol_end)
-                else:
-                    # 小写开头：可能是函数、方法、变量
-                    if symbol.startswith('get') or symbol.startswith('set') or symbol.endswith('Func'):
-                        self._add_tag("imported_function", symbol_start, symbol_end)
-                    else:
-                        self._add_tag("imported_variable", symbol_start, symbol_end)
+    def _process_go_import(self, line: str, line_start: int):
+        """处理Go导入语句，line_start 是该行的偏移"""
+        # 高亮import关键字
+        import_start = line.find('import')
+        self._add_span("keyword", line_start + import_start, line_start + import_start + 6)
+        
+        # 匹配单行导入
+        for match in re.finditer(r'import\s+"([^"]+)"', line):
+            self.imported_packages.add(match.group(1))
+            self._add_span("imported_package", line_start + match.start(1), line_start + match.end(1))
         
-        # 高亮直接使用的导入符号（如 math.Pi）
-        for package in self.imported_packages:
-            package_name = package.split('/')[-1]
-            # 匹配包名后跟符号的模式
-            pattern = r'\b' + re.escape(package_name) + r'\b'
-            for match in re.finditer(pattern, line):
-                # 检查是否在包名访问的上下文中
-                context_start = max(0, match.start() - 1)
-                context_end = min(len(line), match.end() + 1)
-                context = line[context_start:context_end]
-                
-                # 如果不是包名访问的一部分（后面没有点），则高亮为包名
-                if not (context_end < len(line) and line[context_end] == '.'):
-                    start = f"{line_num}.{match.start()}"
-                    end = f"{line_num}.{match.end()}"
-                    self._add_tag("imported_package", start, end)
\ No newline at end of file
+        # 匹配多行导入（括号内的导入）
+        start_idx = line.find('(')
+        end_idx = line.find(')')
+        if start_idx != -1 and end_idx != -1:
+            for match in re.finditer(r'"([^"]+)"', line[start_idx + 1:end_idx]):
+                self.imported_packages.add(match.group(1))
+                package_start = line_start + start_idx + 1 + match.start(1)
+                self._add_span("imported_package", package_start, package_start + len(match.group(1)))
@@ -0,0 +1,294 @@
+"""Declarative grammars and the lexer state machine that runs them
+
+A grammar is a JSON file under ``asset/packages/grammars``::
+
+    {
+        "name": "lua",
+        "extensions": [".lua"],
+        "ignore_case": false,
+        "words": {"keyword": ["if", "then"], "builtin": ["print"]},
+        "states": {
+            "root": {"rules": [
+                {"match": "--\\\\[(=*)\\\\[", "tag": "comment", "push": "long_comment", "capture": 1},
+                {"match": "--.*", "tag": "comment"},
+                {"match": "[A-Za-z_]\\\\w*", "tag": "@words"}
+            ]},
+            "long_comment": {"tag": "comment", "rules": [
+                {"match": "\\\\]{end}\\\\]", "tag": "comment", "pop": true}
+            ]}
+        }
+    }
+
+Each state is a list of rules tried left to right in one alternation. A rule
+tags its whole match with ``tag``, or its capture groups with ``groups``.
+The tag ``@words`` looks the matched word up in the ``words`` tables. Text no
+rule matches gets the state's own ``tag``, e.g. the body of a block comment.
+
+``push`` enters a state, ``pop`` leaves one (``true`` or a count), both
+together replace the current state. With ``capture`` the text of that group
+is kept on the stack and substituted for ``{end}`` in the pushed state's
+rules, which closes heredocs and Lua long brackets on the matching delimiter.
+
+Lexing runs line by line. The state stack at the end of a line is a tuple
+and fully describes where lexing resumes, so the incremental highlighter
+stores it per line as a checkpoint. Rule patterns must not use
+backreferences since they are combined into one regex per state.
+"""
+
+import json
+import re
+from pathlib import Path
+
+from .base import BaseHighlighter
+
+GRAMMAR_DIR = Path(__file__).parent.parent.parent / "asset" / "packages" / "grammars"
+
+# Deeper stacks are treated as a grammar bug and stop growing
+_MAX_STACK_DEPTH = 32
+
+# Lines lexed between checks of the pass time budget
+_BUDGET_CHECK_LINES = 64
+
+_global_grammars = {}
+
+
+def _append_span(spans, tag, start, end):
+    """Append a span, extending the previous one when they touch with the same tag"""
+    if spans:
+        last_tag, last_start, last_end = spans[-1]
+        if last_tag == tag and last_end == start:
+            spans[-1] = (tag, last_start, end)
+            return
+    spans.append((tag, start, end))
+
+
+class GrammarError(Exception):
+    """Raised when a grammar file is malformed"""
+
+
+class Grammar:
+    """A compiled grammar, shared by every highlighter of the language"""
+
+    def __init__(self, data: dict):
+        self.name = data.get("name", "")
+        self.extensions = [ext.lower() for ext in data.get("extensions", [])]
+        self.ignore_case = bool(data.get("ignore_case", False))
+        self._flags = re.IGNORECASE if self.ignore_case else 0
+
+        self.word_tags = {}
+        for tag, words in data.get("words", {}).items():
+            for word in words:
+                self.word_tags.setdefault(word.lower() if self.ignore_case else word, tag)
+
+        states = data.get("states", {})
+        if "root" not in states:
+            raise GrammarError(f"grammar {self.name!r} has no root state")
+        self._states = {}
+        for name, state in states.items():
+            rules = state.get("rules", [])
+            for rule in rules:
+                target = rule.get("push")
+                if target is not None and target not in states:
+                    raise GrammarError(f"grammar {self.name!r}: unknown state {target!r}")
+            self._states[name] = (state.get("tag"), rules)
+        self._compiled = {}
+
+    def words(self, tag: str) -> set:
+        """Return the words tagged ``tag`` by the ``words`` tables"""
+        return {word for word, word_tag in self.word_tags.items() if word_tag == tag}
+
+    def _compile(self, name: str, end):
+        """Return ``(default_tag, pattern, rules)`` of state ``name``
+
+        Rules are turned into ``(group, first_capture, rule)`` so captures
+        can be found in the combined pattern.
+        """
+        key = (name, end)
+        compiled = self._compiled.get(key)
+        if compiled is not None:
+            return compiled
+
+        default_tag, rules = self._states[name]
+        parts = []
+        table = []
+        group = 1
+        for number, rule in enumerate(rules):
+            source = rule["match"]
+            if "{end}" in source:
+                source = source.replace("{end}", re.escape(end or ""))
+            try:
+                captures = re.compile(source, self._flags).groups
+            except re.error as e:
+                raise GrammarError(f"grammar {self.name!r}, state {name!r}: {e}")
+            parts.append(f"(?P<_{number}>{source})")
+            table.append((group, group + 1, rule))
+            group += captures + 1
+
+        pattern = re.compile('|'.join(parts), self._flags) if parts else None
+        compiled = (default_tag, pattern, table)
+        self._compiled[key] = compiled
+        return compiled
+
+    def lex_line(self, line: str, stack: tuple, spans=None):
+        """Lex one line and return the state stack at its end
+
+        ``stack`` holds ``(state, end)`` pairs with the root state implied
+        at the bottom. Spans are appended to ``spans`` as ``(tag, start_col,
+        end_col)`` when a list is given.
+        """
+        pos = 0
+        length = len(line)
+        stalls = 0
+        while pos <= length:
+            name, end = stack[-1] if stack else ("root", None)
+            default_tag, pattern, table = self._compile(name, end)
+            match = pattern.search(line, pos) if pattern is not None else None
+            if match is None:
+                if default_tag and spans is not None and pos < length:
+                    _append_span(spans, default_tag, pos, length)
+                break
+
+            start = match.start()
+            if default_tag and spans is not None and start > pos:
+                _append_span(spans, default_tag, pos, start)
+
+            group, first_capture, rule = table[int(match.lastgroup[1:])]
+            if spans is not None:
+                self._emit(rule, match, group, first_capture, default_tag, spans)
+
+            new_stack = self._transition(rule, match, first_capture, stack)
+            if match.end() == start and new_stack == stack:
+                # Empty match without a state change, step over one character
+                if default_tag and spans is not None and start < length:
+                    _append_span(spans, default_tag, start, start + 1)
+                pos = start + 1
+                continue
+            if match.end() == start:
+                # Empty match changing state, guard against cycles
+                stalls += 1
+                if stalls > _MAX_STACK_DEPTH:
+                    pos = start + 1
+                    stalls = 0
+            else:
+                stalls = 0
+            stack = new_stack
+            pos = max(pos, match.end())
+        return stack
+
+    def _emit(self, rule, match, group, first_capture, default_tag, spans):
+        """Append the spans of one rule match"""
+        groups = rule.get("groups")
+        if groups is None:
+            tag = rule.get("tag", default_tag)
+            if tag == "@words":
+                word = match.group(group)
+                tag = self.word_tags.get(word.lower() if self.ignore_case else word)
+            if tag and match.end() > match.start():
+                _append_span(spans, tag, match.start(), match.end())
+            return
+
+        for offset, tag in enumerate(groups):
+            index = first_capture + offset
+            if not tag or match.start(index) == -1 or match.end(index) == match.start(index):
+                continue
+            if tag == "@words":
+                word = match.group(index)
+                tag = self.word_tags.get(word.lower() if self.ignore_case else word)
+                if not tag:
+                    continue
+            _append_span(spans, tag, match.start(index), match.end(index))
+
+    def _transition(self, rule, match, first_capture, stack):
+        """Return the state stack after a rule matched"""
+        pop = rule.get("pop")
+        push = rule.get("push")
+        if pop:
+            stack = stack[:-(1 if pop is True else int(pop))] if stack else stack
+        if push is not None and len(stack) < _MAX_STACK_DEPTH:
+            end = None
+            capture = rule.get("capture")
+            if capture is not None:
+                end = match.group(first_capture + int(capture) - 1) or ""
+            stack = stack + ((push, end),)
+        return stack
+
+
+def load_grammar(name: str) -> Grammar:
+    """Return the grammar ``name``, loading and compiling it on first use"""
+    grammar = _global_grammars.get(name)
+    if grammar is None:
+        with open(GRAMMAR_DIR / f"{name}.json", "r", encoding="utf-8") as f:
+            grammar = Grammar(json.load(f))
+        _global_grammars[name] = grammar
+    return grammar
+
+
+def grammar_for_extension(ext: str):
+    """Return the name of the grammar claiming file extension ``ext``, or None"""
+    ext = ext.lower()
+    try:
+        paths = sorted(GRAMMAR_DIR.glob("*.json"))
+    except OSError:
+        return None
+    for path in paths:
+        try:
+            grammar = load_grammar(path.stem)
+        except (OSError, ValueError, GrammarError) as e:
+            print(f"Grammar load failed: {path.name}: {str(e)}")
+            continue
+        if ext in grammar.extensions:
+            return path.stem
+    return None
+
+
+class GrammarHighlighter(BaseHighlighter):
+    """Highlighter driven by a declarative grammar
+
+    Subclasses only name their grammar and add language specific colors.
+    The per-line state stack doubles as the incremental line state, so
+    every line whose start stack is empty is a restart line.
+    """
+    GRAMMAR = None
+    DOCUMENT_SYMBOL_PATTERN = None
+
+    def __init__(self, text_widget, grammar=None):
+        self.grammar = load_grammar(grammar or self.GRAMMAR)
+        super().__init__(text_widget)
+        # Keep the word sets other code reads in line with the grammar
+        self.keywords = self.grammar.words("keyword")
+        self.builtins = self.grammar.words("builtin")
+        for tag in self.grammar.word_tags.values():
+            self.syntax_colors.setdefault(tag, self.syntax_colors.get("keyword", "#569CD6"))
+
+    def _highlight_text(self, text: str):
+        """Lex ``text`` line by line with the grammar"""
+        grammar = self.grammar
+        add_span = self._add_span
+        budget = self._budget
+        stack = ()
+        offset = 0
+        spans = []
+        for number, line in enumerate(text.split('\n')):
+            stack = grammar.lex_line(line, stack, spans)
+            for tag, start, end in spans:
+                add_span(tag, offset + start, offset + end)
+            spans.clear()
+            offset += len(line) + 1
+            if budget is not None and not number % _BUDGET_CHECK_LINES:
+                budget.check()
+
+    def _span_cache_key(self):
+        """Highlighters of one class may run different grammars"""
+        return (type(self), self.grammar.name)
+
+    def _initial_line_state(self):
+        """Lexing starts in the root state"""
+        return ()
+
+    def _advance_line_state(self, state, line: str):
+        """Run the grammar over ``line`` without collecting spans"""
+        return self.grammar.lex_line(line, state)
+
+    def _is_restart_line(self, state, line: str) -> bool:
+        """Any line starting in the root state"""
+        return state == ()
@@ -1,6 +1,8 @@
-from .base import BaseHighlighter
+from .grammar import GrammarHighlighter
+
+class CodeHighlighter(GrammarHighlighter):
+    GRAMMAR = "html"
 
-class CodeHighlighter(BaseHighlighter):
     def __init__(self, text_widget):
         super().__init__(text_widget)
         # HTML syntax colors - use theme colors
@@ -12,16 +14,4 @@ class CodeHighlighter(BaseHighlighter):
         self.syntax_colors.setdefault("doctype", self.syntax_colors.get("keyword", "#569CD6"))
         self.syntax_colors.setdefault("entity", self.syntax_colors.get("operator", "#D4D4D4"))
         
-        # HTML tags and attribute keywords
-        self.tags = {
-            "html", "head", "body", "div", "span", "p", "a", "img", "script",
-            "style", "link", "meta", "title", "h1", "h2", "h3", "h4", "h5", "h6",
-            "ul", "ol", "li", "table", "tr", "td", "th", "form", "input", "button"
-        }
-        
-        self.attributes = {
-            "class", "id", "style", "href", "src", "alt", "title", "width",
-            "height", "type", "name", "value", "placeholder", "required"
-        }
-        
-        self.setup_tags() 
+        self.setup_tags()
@@ -1,7 +1,26 @@
-from .base import BaseHighlighter
-import ast
+from .base import BaseHighlighter, C_STYLE_COMMENT_RULE, C_STYLE_STRING_RULE, WORD_RULE
+import re
+
+# 文本块（Java 15）可以跨行，未闭合时延伸到文本末尾
+_JAVA_TEXT_BLOCK_RULE = r'(?P<text_block>"""[\s\S]*?(?:"""|\Z))'
 
 class CodeHighlighter(BaseHighlighter):
+    BLOCK_DELIMITERS = (('/*', '*/'), ('"""', '"""'))
+    LINE_COMMENT = '//'
+    DOCUMENT_SYMBOL_PATTERN = re.compile(r'\s*import\b')
+    
+    TOKEN_PATTERN = re.compile('|'.join((
+        C_STYLE_COMMENT_RULE,
+        _JAVA_TEXT_BLOCK_RULE,
+        C_STYLE_STRING_RULE,
+        r'(?P<annotation>@[A-Za-z_]\w*)',
+        r'(?P<java_import>^[ \t]*import\s+(?:static\s+)?\w+(?:\.\w+)*(?:\.\*)?)',
+        r'(?P<call>\b[A-Za-z_]\w*(?=\s*\())',
+        WORD_RULE,
+    )), re.MULTILINE)
+    
+    COMPOSITE_TOKENS = frozenset({'text_block', 'java_import', 'call'})
+    
     def __init__(self, text_widget):
         super().__init__(text_widget)
         # Java keywords
@@ -29,129 +48,87 @@ class CodeHighlighter(BaseHighlighter):
         self.syntax_colors.setdefault("enum", self.syntax_colors.get("type", "#4EC9B0"))
         self.syntax_colors.setdefault("package", self.syntax_colors.get("namespace", "#4EC9B0"))
         self.setup_tags()
+    
+    def _highlight_text(self, text: str):
+        """处理Java的注释、字符串、注解、导入语句和关键字"""
+        # 重置导入信息（局部重新高亮时保留全文的导入信息）
+        if not self._window_pass:
+            self.imported_packages = set()
+            self.imported_classes = {}
         
-    def _highlight_node(self, node: ast.AST):
-        """Extend base highlighter's node processing"""
-        super()._highlight_node(node)
-        
-        if not hasattr(node, 'lineno'):
-            return
-            
-        start, end = self.get_position(node)
+        # 导入语句位于文件开头，在同一次扫描中先于使用处被记录
+        self._scan_tokens(text)
+    
+    def _word_tag(self, word):
+        """Java关键字和导入的符号"""
+        if word in self.keywords:
+            return "keyword"
+        if word in self.imported_classes:
+            return self._imported_symbol_tag(word, called=False)
+        return None
+    
+    def _emit_token(self, kind, match):
+        """处理文本块、导入语句和方法调用"""
+        if kind == 'text_block':
+            self._add_span("string", match.start(), match.end())
+        elif kind == 'java_import':
+            self._process_java_import(match.group(), match.start())
+        else:
+            word = match.group()
+            if word in self.imported_classes:
+                tag = self._imported_symbol_tag(word, called=True)
+            else:
+                tag = self._word_tag(word)
+            if tag is not None:
+                self._add_span(tag, match.start(), match.end())
+    
+    def _imported_symbol_tag(self, symbol_name: str, called: bool) -> str:
+        """根据命名约定判断导入符号的类型，called 表示符号后面紧跟调用括号"""
+        if symbol_name.endswith('Exception') or symbol_name.endswith('Error'):
+            return "imported_class"
+        if symbol_name.endswith('Interface'):
+            return "imported_interface"
+        if symbol_name.endswith('Enum'):
+            return "imported_enum"
+        if symbol_name.endswith('Annotation'):
+            return "imported_annotation"
+        if symbol_name.isupper() or symbol_name.endswith('_CONSTANT'):
+            # 常量（通常全大写）
+            return "imported_variable"
+        if symbol_name[0].isupper():
+            # 类名（首字母大写）
+            return "imported_class"
+        # 静态导入的方法或变量
+        return "imported_function" if called else "imported_variable"
+    
+    def _process_java_import(self, statement: str, statement_start: int):
+        """处理Java的import语句，statement_start 是语句的偏移"""
+        parts = statement.split()
+        static = len(parts) > 2 and parts[1] == 'static'
+        import_path = parts[-1]
         
-        # 处理Java导入语句
-        if isinstance(node, ast.Import):
-            self._process_java_import(node)
-        elif isinstance(node, ast.ImportFrom):
-            self._process_java_import_from(node)
+        # 高亮 import 和 static 关键字
+        keyword_start = statement_start + statement.find('import')
+        self._add_span("keyword", keyword_start, keyword_start + 6)
+        if static:
+            static_start = statement_start + statement.find('static', keyword_start - statement_start + 6)
+            self._add_span("keyword", static_start, static_start + 6)
+        path_start = statement_start + len(statement) - len(import_path)
         
-        # 处理符号引用
-        elif isinstance(node, ast.Name):
-            self._highlight_java_imported_symbol(node, start, end)
-            self._highlight_java_name(node, start, end)
-        elif isinstance(node, ast.Attribute):
-            self._highlight_java_imported_attribute(node)
-        elif isinstance(node, ast.ClassDef):
-            self._highlight_java_class(node, start, end)
-            
-    def _highlight_java_name(self, node: ast.Name, start: str, end: str):
-        """Highlight Java-specific names"""
-        name = node.id
-        if name in self.keywords:
-            self._add_tag("keyword", start, end)
-        elif name.startswith("@"):  # Comment
-            self._add_tag("annotation", start, end)
-            
-    def _highlight_java_class(self, node: ast.ClassDef, start: str, end: str):
-        """Highlight Java class definitions"""
-        # Process generic
-        for base in node.bases:
-            if isinstance(base, ast.Subscript):
-                base_start, base_end = self.get_position(base)
-                self._add_tag("generic", base_start, base_end)
-                
-    def _process_java_import(self, node: ast.Import):
-        """处理Java的import语句"""
-        for alias in node.names:
-            import_path = alias.name
-            
-            # 记录导入的包
-            if import_path.endswith('.*'):
-                # 通配符导入：import java.util.*;
-                package_name = import_path[:-2]
-                self.imported_packages.add(package_name)
-            else:
-                # 具体类导入：import java.util.ArrayList;
-                package_parts = import_path.split('.')
-                if len(package_parts) > 1:
-                    package_name = '.'.join(package_parts[:-1])
-                    class_name = package_parts[-1]
-                    self.imported_packages.add(package_name)
-                    self.imported_classes[class_name] = package_name
-                
-    def _process_java_import_from(self, node: ast.ImportFrom):
-        """处理Java的静态导入（import static）"""
-        package_name = node.module or ""
-        for alias in node.names:
-            symbol_name = alias.name
-            
-            if symbol_name == '*':
-                # 静态通配符导入：import static java.lang.Math.*;
-                self.imported_packages.add(package_name)
-            else:
-                # 具体静态导入：import static java.lang.Math.PI;
-                full_symbol_name = f"{package_name}.{symbol_name}"
-                self.imported_classes[symbol_name] = package_name
-                
-    def _highlight_java_imported_symbol(self, node: ast.Name, start: str, end: str):
-        """高亮Java导入的符号"""
-        symbol_name = node.id
+        if import_path.endswith('.*'):
+            # 通配符导入：import java.util.*; 或 import static java.lang.Math.*;
+            package_name = import_path[:-2]
+            self.imported_packages.add(package_name)
+            self._add_span("imported_package", path_start, path_start + len(package_name))
+            return
         
-        if symbol_name in self.imported_classes:
-            package_name = self.imported_classes[symbol_name]
-            
-            # 根据命名约定判断符号类型
-            if symbol_name.endswith('Exception') or symbol_name.endswith('Error'):
-                self._add_tag("imported_class", start, end)
-            elif symbol_name.endswith('Interface'):
-                self._add_tag("imported_interface", start, end)
-            elif symbol_name.endswith('Enum'):
-                self._add_tag("imported_enum", start, end)
-            elif symbol_name.endswith('Annotation'):
-                self._add_tag("imported_annotation", start, end)
-            elif symbol_name.isupper() or symbol_name.endswith('_CONSTANT'):
-                # 常量（通常全大写）
-                self._add_tag("imported_variable", start, end)
-            elif symbol_name[0].isupper():
-                # 类名（首字母大写）
-                self._add_tag("imported_class", start, end)
-            else:
-                # 方法或变量
-                parent = self._get_parent_node(node)
-                if parent and isinstance(parent, ast.Call) and parent.func == node:
-                    self._add_tag("imported_function", start, end)
-                else:
-                    self._add_tag("imported_variable", start, end)
-                    
-    def _highlight_java_imported_attribute(self, node: ast.Attribute):
-        """高亮Java导入包的属性访问"""
-        try:
-            if isinstance(node.value, ast.Name):
-                package_name = node.value.id
-                if package_name in self.imported_packages:
-                    # 高亮包名
-                    package_start, package_end = self.get_position(node.value)
-                    self._add_tag("imported_package", package_start, package_end)
-                    
-                    # 高亮类名或静态成员
-                    attr_start = f"{node.lineno}.{node.col_offset + len(package_name) + 1}"
-                    attr_end = f"{node.lineno}.{node.col_offset + len(package_name) + 1 + len(node.attr)}"
-                    
-                    if node.attr[0].isupper():
-                        self._add_tag("imported_class", attr_start, attr_end)
-                    elif node.attr.isupper():
-                        self._add_tag("imported_variable", attr_start, attr_end)
-                    else:
-                        self._add_tag("imported_function", attr_start, attr_end)
-        except Exception as e:
-            print(f"Error highlighting Java imported attribute: {e}")
+        # 具体类导入：import java.util.ArrayList; 静态导入：import static java.lang.Math.PI;
+        package_name, _, symbol_name = import_path.rpartition('.')
+        if not package_name:
+            return
+        self.imported_packages.add(package_name)
+        self.imported_classes[symbol_name] = package_name
+        symbol_start = path_start + len(package_name) + 1
+        self._add_span("imported_package", path_start, symbol_start - 1)
+        self._add_span(self._imported_symbol_tag(symbol_name, called=static),
+                       symbol_start, symbol_start + len(symbol_name))
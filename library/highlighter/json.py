@@ -1,6 +1,8 @@
-from .base import BaseHighlighter
+from .grammar import GrammarHighlighter
+
+class CodeHighlighter(GrammarHighlighter):
+    GRAMMAR = "json"
 
-class CodeHighlighter(BaseHighlighter):
     def __init__(self, text_widget):
         super().__init__(text_widget)
         # JSON syntax colors - use theme colors
@@ -12,4 +14,4 @@ class CodeHighlighter(BaseHighlighter):
         self.syntax_colors.setdefault("null", self.syntax_colors.get("keyword", "#569CD6"))
         self.syntax_colors.setdefault("punctuation", self.syntax_colors.get("operator", "#D4D4D4"))
         
-        self.setup_tags() 
\ No newline at end of file
+        self.setup_tags()
@@ -1,7 +1,23 @@
-from .base import BaseHighlighter
+from .base import BaseHighlighter, C_STYLE_COMMENT_RULE, C_STYLE_STRING_RULE, WORD_RULE
 import re
 
 class CodeHighlighter(BaseHighlighter):
+    BLOCK_DELIMITERS = (('/*', '*/'), ('"""', '"""'))
+    LINE_COMMENT = '//'
+    DOCUMENT_SYMBOL_PATTERN = re.compile(r'\s*import\b')
+    
+    TOKEN_PATTERN = re.compile('|'.join((C_STYLE_COMMENT_RULE, C_STYLE_STRING_RULE, WORD_RULE)))
+    
+    # Tag per imported symbol type
+    IMPORTED_SYMBOL_TAGS = {
+        'class': "imported_class",
+        'interface': "imported_interface",
+        'object': "imported_object",
+        'function': "imported_function",
+        'property': "imported_property",
+        'typealias': "imported_typealias",
+    }
+    
     def __init__(self, text_widget):
         super().__init__(text_widget)
         # Kotlin keywords
@@ -56,40 +72,18 @@ class CodeHighlighter(BaseHighlighter):
         
         self.setup_tags()
     
-    def highlight(self, event=None):
+    def _highlight_text(self, text: str):
         """Main highlighting method for Kotlin"""
-        if not self.text_widget:
-            return
-            
-        # Initialize tag batch
-        self._tag_batch = []
-        
-        # Process comments and strings first
-        self._highlight_comments_and_strings()
-        
-        # Process Kotlin-specific syntax
-        self._highlight_kotlin_syntax()
-        
-        # Refresh batch tags
-        self._refresh_batch_tags()
-    
-    def _highlight_kotlin_syntax(self):
-        """Process Kotlin-specific syntax highlighting"""
-        code = self.text_widget.get("1.0", "end")
-        
-        # Process import statements
-        self._process_kotlin_imports(code)
-        
-        # Highlight Kotlin keywords and types
-        self._highlight_kotlin_keywords_and_types(code)
-        
-        # Highlight imported symbols
-        self._highlight_imported_symbols()
+        # Collect imports, then tag every token in one scan
+        self._process_kotlin_imports(text)
+        self._scan_tokens(text)
     
     def _process_kotlin_imports(self, code):
         """Process Kotlin import statements to extract imported symbols"""
-        self.imported_packages.clear()
-        self.imported_symbols.clear()
+        # Keep the document-wide tables when only a window is re-highlighted
+        if not self._window_pass:
+            self.imported_packages.clear()
+            self.imported_symbols.clear()
         
         # Match import statements
         import_pattern = r'import\s+([^;\n]+)'
@@ -170,56 +164,13 @@ class CodeHighlighter(BaseHighlighter):
             # camelCase - likely a function or property
             self.imported_symbols[symbol_name] = 'function'
     
-    def _highlight_kotlin_keywords_and_types(self, code):
-        """Highlight Kotlin keywords and built-in types"""
-        # Highlight keywords
-        for keyword in self.keywords:
-            pattern = r'\b' + re.escape(keyword) + r'\b'
-            for match in re.finditer(pattern, code):
-                start = f"1.0+{match.start()}c"
-                end = f"1.0+{match.end()}c"
-                self._add_tag("keyword", start, end)
-        
-        # Highlight built-in types and functions
-        for builtin in self.builtins:
-            pattern = r'\b' + re.escape(builtin) + r'\b'
-            for match in re.finditer(pattern, code):
-                start = f"1.0+{match.start()}c"
-                end = f"1.0+{match.end()}c"
-                self._add_tag("type", start, end)
-    
-    def _highlight_imported_symbols(self):
-        """Highlight imported symbols in the code"""
-        if not self.imported_symbols:
-            return
-            
-        code = self.text_widget.get("1.0", "end")
-        
-        for symbol_name, symbol_type in self.imported_symbols.items():
-            # Create pattern to match the symbol (avoid matching in strings/comments)
-            pattern = r'\b' + re.escape(symbol_name) + r'\b'
-            
-            for match in re.finditer(pattern, code):
-                start_pos = match.start()
-                end_pos = match.end()
-                
-                # Check if this is inside a string or comment
-                if self._is_in_string_or_comment(start_pos):
-                    continue
-                
-                start = f"1.0+{start_pos}c"
-                end = f"1.0+{end_pos}c"
-                
-                # Determine tag based on symbol type
-                if symbol_type == 'class':
-                    self._add_tag("imported_class", start, end)
-                elif symbol_type == 'interface':
-                    self._add_tag("imported_interface", start, end)
-                elif symbol_type == 'object':
-                    self._add_tag("imported_object", start, end)
-                elif symbol_type == 'function':
-                    self._add_tag("imported_function", start, end)
-                elif symbol_type == 'property':
-                    self._add_tag("imported_property", start, end)
-                elif symbol_type == 'typealias':
-                    self._add_tag("imported_typealias", start, end)
\ No newline at end of file
+    def _word_tag(self, word):
+        """Classify Kotlin keywords, imported symbols and built-in types"""
+        if word in self.keywords:
+            return "keyword"
+        tag = self.IMPORTED_SYMBOL_TAGS.get(self.imported_symbols.get(word))
+        if tag is not None:
+            return tag
+        if word in self.builtins:
+            return "type"
+        return None
@@ -5,6 +5,10 @@ from .base import BaseHighlighter
 class CodeHighlighter(BaseHighlighter):
     """Log file syntax highlighter"""
     
+    # Log entries are line oriented, every line is a restart point
+    BLOCK_DELIMITERS = ()
+    DOCUMENT_SYMBOL_PATTERN = None
+    
     def __init__(self, text_widget):
         super().__init__(text_widget)
         
@@ -51,60 +55,27 @@ class CodeHighlighter(BaseHighlighter):
         self.ip_address_pattern = re.compile(r'\b(?:\d{1,3}\.){3}\d{1,3}\b')
         self.url_pattern = re.compile(r'https?://[^\s]+|www\.[^\s]+')
         self.exception_pattern = re.compile(r'\b(?:Exception|Error|Warning|Traceback|Stacktrace)\b', re.IGNORECASE)
-        self.stack_trace_pattern = re.compile(r'^\s+File\s+".*?",\s+line\s+\d+', re.MULTILINE)
+        self.stack_trace_pattern = re.compile(r'^[ \t]+File[ \t]+".*?",[ \t]+line[ \t]+\d+', re.MULTILINE)
         self.numeric_pattern = re.compile(r'\b\d+(?:\.\d+)?(?:[eE][+-]?\d+)?\b')
-        self.json_pattern = re.compile(r'\{[^{}]*\}|\[[^\[\]]*\]')
-        self.sql_pattern = re.compile(r'\b(?:SELECT|INSERT|UPDATE|DELETE|CREATE|ALTER|DROP)\b.*?;', re.IGNORECASE | re.DOTALL)
+        # Log entries are single lines: matching across newlines made every
+        # unterminated statement rescan the rest of the log
+        self.json_pattern = re.compile(r'\{[^{}\n]*\}|\[[^\[\]\n]*\]')
+        self.sql_pattern = re.compile(r'\b(?:SELECT|INSERT|UPDATE|DELETE|CREATE|ALTER|DROP)\b[^;\n]*;', re.IGNORECASE)
         
-    def highlight(self):
+    def _highlight_text(self, text: str):
         """Perform log file syntax highlighting"""
-        try:
-            # Save current status
-            current_insert = self.text_widget.index("insert")
-            current_view = self.text_widget.yview()
-            current_selection = None
-            try:
-                current_selection = (
-                    self.text_widget.index("sel.first"),
-                    self.text_widget.index("sel.last")
-                )
-            except:
-                pass
-                
-            # Clear existing tags
-            self._clear_tags()
-            text = self.text_widget.get("1.0", "end-1c")
-            
-            # Initialize tag batch
-            self._tag_batch = {}
-            
-            # Process log elements
-            self._highlight_timestamps(text)
-            self._highlight_log_levels(text)
-            self._highlight_logger_names(text)
-            self._highlight_file_paths(text)
-            self._highlight_line_numbers(text)
-            self._highlight_ip_addresses(text)
-            self._highlight_urls(text)
-            self._highlight_exceptions(text)
-            self._highlight_stack_traces(text)
-            self._highlight_numeric_values(text)
-            self._highlight_json_data(text)
-            self._highlight_sql_queries(text)
-            
-            # Flush any remaining batched tag operations
-            self._flush_all_tag_batches()
-            
-            # Restore cursor position and selection
-            self.text_widget.mark_set("insert", current_insert)
-            self.text_widget.yview_moveto(current_view[0])
-            if current_selection:
-                self.text_widget.tag_add("sel", *current_selection)
-                
-        except Exception as e:
-            print(f"Log highlight failed: {str(e)}")
-            # Fallback to basic highlighting
-            self._basic_highlight(text)
+        self._highlight_timestamps(text)
+        self._highlight_log_levels(text)
+        self._highlight_logger_names(text)
+        self._highlight_file_paths(text)
+        self._highlight_line_numbers(text)
+        self._highlight_ip_addresses(text)
+        self._highlight_urls(text)
+        self._highlight_exceptions(text)
+        self._highlight_stack_traces(text)
+        self._highlight_numeric_values(text)
+        self._highlight_json_data(text)
+        self._highlight_sql_queries(text)
     
     def _basic_highlight(self, text: str):
         """Basic highlighting for log files when detailed highlighting fails"""
@@ -151,53 +122,35 @@ class CodeHighlighter(BaseHighlighter):
     def _highlight_timestamps(self, text: str):
         """Highlight timestamps in log files"""
         for pattern in self.timestamp_patterns:
-            for match in pattern.finditer(text):
+            for match in self._finditer(pattern, text):
                 start_pos = match.start()
                 end_pos = match.end()
                 
-                start_line = text.count('\n', 0, start_pos) + 1
-                start_col = start_pos - text.rfind('\n', 0, start_pos) - 1
-                
-                end_line = text.count('\n', 0, end_pos) + 1
-                end_col = end_pos - text.rfind('\n', 0, end_pos) - 1
-                
-                start = f"{start_line}.{start_col}"
-                end = f"{end_line}.{end_col}"
+                start = self._index_at(start_pos)
+                end = self._index_at(end_pos)
                 
                 self._add_tag("timestamp", start, end)
     
     def _highlight_log_levels(self, text: str):
         """Highlight log levels"""
         for level, pattern in self.log_level_patterns.items():
-            for match in pattern.finditer(text):
+            for match in self._finditer(pattern, text):
                 start_pos = match.start()
                 end_pos = match.end()
                 
-                start_line = text.count('\n', 0, start_pos) + 1
-                start_col = start_pos - text.rfind('\n', 0, start_pos) - 1
-                
-                end_line = text.count('\n', 0, end_pos) + 1
-                end_col = end_pos - text.rfind('\n', 0, end_pos) - 1
-                
-                start = f"{start_line}.{start_col}"
-                end = f"{end_line}.{end_col}"
+                start = self._index_at(start_pos)
+                end = self._index_at(end_pos)
                 
                 self._add_tag(f"log_level_{level}", start, end)
     
     def _highlight_logger_names(self, text: str):
         """Highlight logger names"""
-        for match in self.logger_name_pattern.finditer(text):
+        for match in self._finditer(self.logger_name_pattern, text):
             start_pos = match.start()
             end_pos = match.end()
             
-            start_line = text.count('\n', 0, start_pos) + 1
-            start_col = start_pos - text.rfind('\n', 0, start_pos) - 1
-            
-            end_line = text.count('\n', 0, end_pos) + 1
-            end_col = end_pos - text.rfind('\n', 0, end_pos) - 1
-            
-            start = f"{start_line}.{start_col}"
-            end = f"{end_line}.{end_col}"
+            start = self._index_at(start_pos)
+            end = self._index_at(end_pos)
             
             # Check if this looks like a logger name (contains dots)
             if '.' in match.group():
@@ -205,153 +158,99 @@ class CodeHighlighter(BaseHighlighter):
     
     def _highlight_file_paths(self, text: str):
         """Highlight file paths"""
-        for match in self.file_path_pattern.finditer(text):
+        for match in self._finditer(self.file_path_pattern, text):
             start_pos = match.start()
             end_pos = match.end()
             
-            start_line = text.count('\n', 0, start_pos) + 1
-            start_col = start_pos - text.rfind('\n', 0, start_pos) - 1
-            
-            end_line = text.count('\n', 0, end_pos) + 1
-            end_col = end_pos - text.rfind('\n', 0, end_pos) - 1
-            
-            start = f"{start_line}.{start_col}"
-            end = f"{end_line}.{end_col}"
+            start = self._index_at(start_pos)
+            end = self._index_at(end_pos)
             
             self._add_tag("file_path", start, end)
     
     def _highlight_line_numbers(self, text: str):
         """Highlight line numbers"""
-        for match in self.line_number_pattern.finditer(text):
+        for match in self._finditer(self.line_number_pattern, text):
             start_pos = match.start()
             end_pos = match.end()
             
-            start_line = text.count('\n', 0, start_pos) + 1
-            start_col = start_pos - text.rfind('\n', 0, start_pos) - 1
-            
-            end_line = text.count('\n', 0, end_pos) + 1
-            end_col = end_pos - text.rfind('\n', 0, end_pos) - 1
-            
-            start = f"{start_line}.{start_col}"
-            end = f"{end_line}.{end_col}"
+            start = self._index_at(start_pos)
+            end = self._index_at(end_pos)
             
             self._add_tag("line_number", start, end)
     
     def _highlight_ip_addresses(self, text: str):
         """Highlight IP addresses"""
-        for match in self.ip_address_pattern.finditer(text):
+        for match in self._finditer(self.ip_address_pattern, text):
             start_pos = match.start()
             end_pos = match.end()
             
-            start_line = text.count('\n', 0, start_pos) + 1
-            start_col = start_pos - text.rfind('\n', 0, start_pos) - 1
-            
-            end_line = text.count('\n', 0, end_pos) + 1
-            end_col = end_pos - text.rfind('\n', 0, end_pos) - 1
-            
-            start = f"{start_line}.{start_col}"
-            end = f"{end_line}.{end_col}"
+            start = self._index_at(start_pos)
+            end = self._index_at(end_pos)
             
             self._add_tag("ip_address", start, end)
     
     def _highlight_urls(self, text: str):
         """Highlight URLs"""
-        for match in self.url_pattern.finditer(text):
+        for match in self._finditer(self.url_pattern, text):
             start_pos = match.start()
             end_pos = match.end()
             
-            start_line = text.count('\n', 0, start_pos) + 1
-            start_col = start_pos - text.rfind('\n', 0, start_pos) - 1
-            
-            end_line = text.count('\n', 0, end_pos) + 1
-            end_col = end_pos - text.rfind('\n', 0, end_pos) - 1
-            
-            start = f"{start_line}.{start_col}"
-            end = f"{end_line}.{end_col}"
+            start = self._index_at(start_pos)
+            end = self._index_at(end_pos)
             
             self._add_tag("url", start, end)
     
     def _highlight_exceptions(self, text: str):
         """Highlight exceptions"""
-        for match in self.exception_pattern.finditer(text):
+        for match in self._finditer(self.exception_pattern, text):
             start_pos = match.start()
             end_pos = match.end()
             
-            start_line = text.count('\n', 0, start_pos) + 1
-            start_col = start_pos - text.rfind('\n', 0, start_pos) - 1
-            
-            end_line = text.count('\n', 0, end_pos) + 1
-            end_col = end_pos - text.rfind('\n', 0, end_pos) - 1
-            
-            start = f"{start_line}.{start_col}"
-            end = f"{end_line}.{end_col}"
+            start = self._index_at(start_pos)
+            end = self._index_at(end_pos)
             
             self._add_tag("exception", start, end)
     
     def _highlight_stack_traces(self, text: str):
         """Highlight stack traces"""
-        for match in self.stack_trace_pattern.finditer(text):
+        for match in self._finditer(self.stack_trace_pattern, text):
             start_pos = match.start()
             end_pos = match.end()
             
-            start_line = text.count('\n', 0, start_pos) + 1
-            start_col = start_pos - text.rfind('\n', 0, start_pos) - 1
-            
-            end_line = text.count('\n', 0, end_pos) + 1
-            end_col = end_pos - text.rfind('\n', 0, end_pos) - 1
-            
-            start = f"{start_line}.{start_col}"
-            end = f"{end_line}.{end_col}"
+            start = self._index_at(start_pos)
+            end = self._index_at(end_pos)
             
             self._add_tag("stack_trace", start, end)
     
     def _highlight_numeric_values(self, text: str):
         """Highlight numeric values"""
-        for match in self.numeric_pattern.finditer(text):
+        for match in self._finditer(self.numeric_pattern, text):
             start_pos = match.start()
             end_pos = match.end()
             
-            start_line = text.count('\n', 0, start_pos) + 1
-            start_col = start_pos - text.rfind('\n', 0, start_pos) - 1
-            
-            end_line = text.count('\n', 0, end_pos) + 1
-            end_col = end_pos - text.rfind('\n', 0, end_pos) - 1
-            
-            start = f"{start_line}.{start_col}"
-            end = f"{end_line}.{end_col}"
+            start = self._index_at(start_pos)
+            end = self._index_at(end_pos)
             
             self._add_tag("numeric_value", start, end)
     
     def _highlight_json_data(self, text: str):
         """Highlight JSON data"""
-        for match in self.json_pattern.finditer(text):
+        for match in self._finditer(self.json_pattern, text):
             start_pos = match.start()
             end_pos = match.end()
             
-            start_line = text.count('\n', 0, start_pos) + 1
-            start_col = start_pos - text.rfind('\n', 0, start_pos) - 1
-            
-            end_line = text.count('\n', 0, end_pos) + 1
-            end_col = end_pos - text.rfind('\n', 0, end_pos) - 1
-            
-            start = f"{start_line}.{start_col}"
-            end = f"{end_line}.{end_col}"
+            start = self._index_at(start_pos)
+            end = self._index_at(end_pos)
             
             self._add_tag("json_data", start, end)
     
     def _highlight_sql_queries(self, text: str):
         """Highlight SQL queries"""
-        for match in self.sql_pattern.finditer(text):
+        for match in self._finditer(self.sql_pattern, text):
             start_pos = match.start()
             end_pos = match.end()
             
-            start_line = text.count('\n', 0, start_pos) + 1
-            start_col = start_pos - text.rfind('\n', 0, start_pos) - 1
-            
-            end_line = text.count('\n', 0, end_pos) + 1
-            end_col = end_pos - text.rfind('\n', 0, end_pos) - 1
-            
-            start = f"{start_line}.{start_col}"
-            end = f"{end_line}.{end_col}"
+            start = self._index_at(start_pos)
+            end = self._index_at(end_pos)
             
             self._add_tag("sql_query", start, end)
\ No newline at end of file
@@ -23,35 +23,38 @@ class CodeHighlighter(BaseHighlighter):
         self.syntax_colors.setdefault("magic_method", self.syntax_colors["function"]) # magic method
         self.setup_tags()
         
-    def _highlight_node(self, node: ast.AST):
-        """Extend base highlighter's node processing"""
-        super()._highlight_node(node)
-        
-        if not hasattr(node, 'lineno'):
-            return
-            
-        start, end = self.get_position(node)
-        
-        # 处理导入语句，收集导入的符号信息
-        if isinstance(node, ast.Import):
-            self._process_import_statement(node)
-        elif isinstance(node, ast.ImportFrom):
-            self._process_import_from_statement(node)
-        
-        # 处理符号引用，根据导入信息进行高亮
-        elif isinstance(node, ast.Name):
-            self._highlight_imported_symbol(node, start, end)
-        elif isinstance(node, ast.Attribute):
-            self._highlight_imported_attribute(node)
-
-        if isinstance(node, ast.JoinedStr):  # f-string
-            self._highlight_f_string(node, start, end)
-        elif isinstance(node, ast.Constant):     # byte string
-            self._add_tag("bytes", start, end)
-        elif isinstance(node, ast.Try):       # try-except block
-            self._highlight_try_except(node)
-        elif isinstance(node, ast.AsyncFunctionDef):  # async function def
-            self._highlight_async_function(node)
+    def _visit_Import(self, node: ast.Import):
+        super()._visit_Import(node)
+        # 收集导入的模块信息
+        self._process_import_statement(node)
+    
+    def _visit_ImportFrom(self, node: ast.ImportFrom):
+        super()._visit_ImportFrom(node)
+        # 收集导入的符号信息
+        self._process_import_from_statement(node)
+    
+    def _visit_Name(self, node: ast.Name):
+        super()._visit_Name(node)
+        # 根据导入信息高亮符号引用
+        self._highlight_imported_symbol(node, *self.get_position(node))
+    
+    def _visit_Attribute(self, node: ast.Attribute):
+        super()._visit_Attribute(node)
+        self._highlight_imported_attribute(node)
+    
+    def _visit_JoinedStr(self, node: ast.JoinedStr):  # f-string
+        self._highlight_f_string(node, *self.get_position(node))
+    
+    def _visit_Constant(self, node: ast.Constant):  # byte string
+        super()._visit_Constant(node)
+        self._add_tag("bytes", *self.get_position(node))
+    
+    def _visit_Try(self, node: ast.Try):  # try-except block
+        super()._visit_Try(node)
+        self._highlight_try_except(node)
+    
+    def _visit_AsyncFunctionDef(self, node: ast.AsyncFunctionDef):  # async function def
+        self._highlight_async_function(node)
             
     def _highlight_f_string(self, node: ast.JoinedStr, start: str, end: str):
         """Highlight f-strings"""
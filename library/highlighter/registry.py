@@ -0,0 +1,168 @@
+"""Lazy registry of the highlighter modules
+
+Nothing here imports a language module. A file is mapped to a language id
+by its modeline, file extension or shebang line, and ``highlighter_class``
+imports the module of that language the first time it is asked for, after
+which importlib serves it from ``sys.modules``. Language ids are the module
+names under ``library.highlighter``.
+"""
+
+import importlib
+import os
+import re
+
+LANGUAGES = (
+    "bash", "c", "cpp", "css", "dart", "go", "html", "java", "javascript",
+    "json", "kotlin", "log", "lua", "markdown", "objc", "php", "python",
+    "ruby", "rust", "scala", "sql", "swift", "typescript", "xml", "yaml",
+)
+
+EXTENSIONS = {
+    # Programming languages
+    '.py': 'python', '.pyw': 'python', '.pyi': 'python',
+    '.c': 'c', '.h': 'c',
+    '.cpp': 'cpp', '.cxx': 'cpp', '.cc': 'cpp', '.hpp': 'cpp', '.hxx': 'cpp', '.hh': 'cpp',
+    '.java': 'java',
+    '.rs': 'rust',
+    '.go': 'go',
+    '.kt': 'kotlin', '.kts': 'kotlin',
+    '.swift': 'swift',
+    '.m': 'objc', '.mm': 'objc',
+    '.dart': 'dart',
+    '.scala': 'scala', '.sc': 'scala',
+    '.js': 'javascript', '.mjs': 'javascript', '.cjs': 'javascript', '.jsx': 'javascript',
+    '.ts': 'typescript', '.tsx': 'typescript', '.mts': 'typescript', '.cts': 'typescript',
+    '.rb': 'ruby', '.rake': 'ruby', '.gemspec': 'ruby', '.ru': 'ruby',
+    '.php': 'php', '.phtml': 'php', '.php3': 'php', '.php4': 'php', '.php5': 'php', '.phps': 'php',
+    '.lua': 'lua',
+    '.sh': 'bash', '.bash': 'bash', '.zsh': 'bash',
+    '.sql': 'sql',
+    # Markup and data
+    '.html': 'html', '.htm': 'html', '.xhtml': 'html',
+    '.css': 'css',
+    '.json': 'json', '.jsonc': 'json', '.geojson': 'json',
+    '.xml': 'xml', '.xsd': 'xml', '.xsl': 'xml', '.xslt': 'xml', '.svg': 'xml', '.plist': 'xml',
+    '.yml': 'yaml', '.yaml': 'yaml',
+    '.md': 'markdown', '.markdown': 'markdown',
+    '.log': 'log',
+    '.txt': 'log',  # Plain text uses the log highlighter too
+}
+
+# Shebang interpreters, version suffixes such as python3.11 are dropped
+INTERPRETERS = {
+    'python': 'python', 'pypy': 'python',
+    'sh': 'bash', 'bash': 'bash', 'zsh': 'bash', 'ksh': 'bash', 'dash': 'bash',
+    'node': 'javascript', 'nodejs': 'javascript',
+    'deno': 'typescript', 'ts-node': 'typescript', 'tsx': 'typescript',
+    'ruby': 'ruby', 'php': 'php', 'lua': 'lua', 'luajit': 'lua',
+    'kotlin': 'kotlin', 'swift': 'swift', 'scala': 'scala', 'dart': 'dart',
+}
+
+# Modeline names besides the language ids themselves
+ALIASES = {
+    'py': 'python', 'python3': 'python',
+    'c++': 'cpp', 'cxx': 'cpp',
+    'sh': 'bash', 'zsh': 'bash', 'shell': 'bash', 'shell-script': 'bash',
+    'js': 'javascript', 'ts': 'typescript',
+    'objective-c': 'objc', 'objcpp': 'objc',
+    'md': 'markdown', 'gfm': 'markdown',
+    'rs': 'rust', 'golang': 'go', 'kt': 'kotlin', 'rb': 'ruby',
+    'yml': 'yaml', 'xhtml': 'html', 'mysql': 'sql',
+}
+
+# Emacs: "-*- mode: python -*-" or "-*- python -*-" on the first two lines
+_EMACS_MODELINE = re.compile(r'-\*-(.*?)-\*-')
+_EMACS_MODE = re.compile(r'(?:^|;)\s*mode:\s*([^\s;]+)', re.IGNORECASE)
+# Vim: "vim: set ft=python :" or "vim: filetype=python" on the first or last lines
+_VIM_MODELINE = re.compile(r'(?:^|\s)(?:vim?|ex):.*?\b(?:filetype|ft|syntax|syn)=([\w+#.-]+)')
+_VIM_MODELINE_LINES = 5
+
+
+def _language_from_name(name: str):
+    """Map a modeline mode name to a language id"""
+    name = name.lower()
+    if name.endswith('-mode'):
+        name = name[:-len('-mode')]
+    if name in LANGUAGES:
+        return name
+    return ALIASES.get(name)
+
+
+def language_for_extension(ext: str):
+    """Return the language id of file extension ``ext``, or None"""
+    ext = ext.lower()
+    language = EXTENSIONS.get(ext)
+    if language is None and ext:
+        # Grammar files dropped into asset/packages/grammars may claim more
+        from .grammar import grammar_for_extension
+        language = grammar_for_extension(ext)
+    return language
+
+
+def language_from_modeline(head: str, tail: str = ""):
+    """Return the language named by an Emacs or Vim modeline, or None
+
+    ``head`` and ``tail`` are the first and last lines of the text.
+    """
+    head_lines = head.split('\n')[:_VIM_MODELINE_LINES]
+    for line in head_lines[:2]:
+        match = _EMACS_MODELINE.search(line)
+        if match:
+            variables = match.group(1).strip()
+            mode = _EMACS_MODE.search(variables)
+            if mode:
+                language = _language_from_name(mode.group(1))
+            elif ':' not in variables:
+                language = _language_from_name(variables)
+            else:
+                language = None
+            if language:
+                return language
+    for line in head_lines + tail.split('\n')[-_VIM_MODELINE_LINES:]:
+        match = _VIM_MODELINE.search(line)
+        if match:
+            language = _language_from_name(match.group(1))
+            if language:
+                return language
+    return None
+
+
+def language_from_shebang(first_line: str):
+    """Return the language of a ``#!`` interpreter line, or None"""
+    if not first_line.startswith('#!'):
+        return None
+    words = first_line[2:].split()
+    if not words:
+        return None
+    interpreter = os.path.basename(words[0])
+    if interpreter == 'env':
+        # Skip env options such as -S
+        words = [word for word in words[1:] if not word.startswith('-') and '=' not in word]
+        if not words:
+            return None
+        interpreter = os.path.basename(words[0])
+    interpreter = re.sub(r'[\d.]+$', '', interpreter.lower())
+    return INTERPRETERS.get(interpreter)
+
+
+def detect_language(file_path=None, head: str = "", tail: str = ""):
+    """Return the language id of a file, or None when nothing matches
+
+    A modeline wins over the file extension, which wins over the shebang.
+    ``head`` and ``tail`` are the first and last lines of the file content.
+    """
+    language = language_from_modeline(head, tail)
+    if language:
+        return language
+    if file_path:
+        _, ext = os.path.splitext(file_path)
+        language = language_for_extension(ext)
+        if language:
+            return language
+    return language_from_shebang(head.split('\n', 1)[0])
+
+
+def highlighter_class(language: str):
+    """Import the module of ``language`` and return its CodeHighlighter class"""
+    module = importlib.import_module(f"{__package__}.{language}")
+    return getattr(module, 'CodeHighlighter')
@@ -1,17 +1,10 @@
-from .base import BaseHighlighter
+from .grammar import GrammarHighlighter
+
+class CodeHighlighter(GrammarHighlighter):
+    GRAMMAR = "ruby"
 
-class CodeHighlighter(BaseHighlighter):
     def __init__(self, text_widget):
         super().__init__(text_widget)
-        # Ruby keywords
-        self.keywords = {
-            'def', 'class', 'module', 'if', 'else', 'elsif', 'unless',
-            'case', 'when', 'while', 'until', 'for', 'break', 'next',
-            'redo', 'retry', 'in', 'do', 'end', 'begin', 'rescue', 'ensure',
-            'raise', 'yield', 'return', 'super', 'self', 'nil', 'true',
-            'false', 'and', 'or', 'not', 'alias'
-        }
-        
         # Ruby syntax colors - use theme colors
         # Set default values for language-specific colors if not present in theme
         self.syntax_colors.setdefault("symbol", self.syntax_colors.get("constant", "#4EC9B0"))
@@ -21,4 +14,4 @@ class CodeHighlighter(BaseHighlighter):
         self.syntax_colors.setdefault("constant", self.syntax_colors.get("constant", "#4FC1FF"))
         self.syntax_colors.setdefault("interpolation", self.syntax_colors.get("operator", "#D7BA7D"))
         
-        self.setup_tags() 
\ No newline at end of file
+        self.setup_tags()
@@ -1,8 +1,29 @@
-from .base import BaseHighlighter
+from .base import BaseHighlighter, C_STYLE_COMMENT_RULE, C_STYLE_STRING_RULE, WORD_RULE
 import ast
 import re
 
 class CodeHighlighter(BaseHighlighter):
+    BLOCK_DELIMITERS = (('/*', '*/'),)
+    LINE_COMMENT = '//'
+    DOCUMENT_SYMBOL_PATTERN = re.compile(r'\s*(?:pub\s+)?use\b')
+    
+    TOKEN_PATTERN = re.compile('|'.join((C_STYLE_COMMENT_RULE, C_STYLE_STRING_RULE, WORD_RULE)))
+    
+    BUILTIN_TYPES = frozenset({
+        'bool', 'char', 'i8', 'i16', 'i32', 'i64', 'i128', 'isize',
+        'u8', 'u16', 'u32', 'u64', 'u128', 'usize', 'f32', 'f64',
+        'str', 'String', 'Vec', 'Option', 'Result', 'Box', 'Rc', 'Arc'
+    })
+    
+    # Tag per imported symbol type, anything else is a function/module
+    IMPORTED_SYMBOL_TAGS = {
+        'macro': "imported_macro",
+        'constant': "imported_constant",
+        'trait': "imported_trait",
+        'enum': "imported_enum",
+        'type': "imported_type",
+    }
+    
     def __init__(self, text_widget):
         super().__init__(text_widget)
         # Rust keyword
@@ -29,19 +50,13 @@ class CodeHighlighter(BaseHighlighter):
         self.syntax_colors.setdefault("struct", self.syntax_colors.get("type", "#4EC9B0"))
         self.setup_tags()
         
-    def _highlight_node(self, node: ast.AST):
-        """Extend base highlighter's node processing"""
-        super()._highlight_node(node)
-        
-        if not hasattr(node, 'lineno'):
-            return
-            
-        start, end = self.get_position(node)
-        
-        if isinstance(node, ast.Name):
-            self._highlight_rust_name(node, start, end)
-        elif isinstance(node, ast.Call):
-            self._highlight_rust_macro(node, start, end)
+    def _visit_Name(self, node: ast.Name):
+        super()._visit_Name(node)
+        self._highlight_rust_name(node, *self.get_position(node))
+    
+    def _visit_Call(self, node: ast.Call):
+        super()._visit_Call(node)
+        self._highlight_rust_macro(node, *self.get_position(node))
             
     def _highlight_rust_name(self, node: ast.Name, start: str, end: str):
         """Highlight Rust-specific names"""
@@ -58,40 +73,18 @@ class CodeHighlighter(BaseHighlighter):
         if isinstance(node.func, ast.Name) and node.func.id.endswith("!"):
             self._add_tag("macro", start, end)
     
-    def highlight(self, event=None):
+    def _highlight_text(self, text: str):
         """Main highlighting method for Rust"""
-        if not self.text_widget:
-            return
-            
-        # Initialize tag batch
-        self._tag_batch = []
-        
-        # Process comments and strings first
-        self._highlight_comments_and_strings()
-        
-        # Process Rust-specific syntax
-        self._highlight_rust_syntax()
-        
-        # Refresh batch tags
-        self._refresh_batch_tags()
-    
-    def _highlight_rust_syntax(self):
-        """Process Rust-specific syntax highlighting"""
-        code = self.text_widget.get("1.0", "end")
-        
-        # Process use statements (imports)
-        self._process_rust_imports(code)
-        
-        # Highlight Rust keywords and types
-        self._highlight_rust_keywords_and_types(code)
-        
-        # Highlight imported symbols
-        self._highlight_imported_symbols()
+        # Collect use statements, then tag every token in one scan
+        self._process_rust_imports(text)
+        self._scan_tokens(text)
     
     def _process_rust_imports(self, code):
         """Process Rust use statements to extract imported symbols"""
-        self.imported_crates.clear()
-        self.imported_symbols.clear()
+        # Keep the document-wide tables when only a window is re-highlighted
+        if not self._window_pass:
+            self.imported_crates.clear()
+            self.imported_symbols.clear()
         
         # Match use statements
         use_pattern = r'use\s+([^;]+);'
@@ -161,62 +154,13 @@ class CodeHighlighter(BaseHighlighter):
             # snake_case - likely a function or module
             self.imported_symbols[display_name] = 'function'
     
-    def _highlight_rust_keywords_and_types(self, code):
-        """Highlight Rust keywords and built-in types"""
-        # Highlight keywords
-        for keyword in self.keywords:
-            pattern = r'\b' + re.escape(keyword) + r'\b'
-            for match in re.finditer(pattern, code):
-                start = f"1.0+{match.start()}c"
-                end = f"1.0+{match.end()}c"
-                self._add_tag("keyword", start, end)
-        
-        # Highlight built-in types
-        builtin_types = {
-            'bool', 'char', 'i8', 'i16', 'i32', 'i64', 'i128', 'isize',
-            'u8', 'u16', 'u32', 'u64', 'u128', 'usize', 'f32', 'f64',
-            'str', 'String', 'Vec', 'Option', 'Result', 'Box', 'Rc', 'Arc'
-        }
-        
-        for builtin in builtin_types:
-            pattern = r'\b' + re.escape(builtin) + r'\b'
-            for match in re.finditer(pattern, code):
-                start = f"1.0+{match.start()}c"
-                end = f"1.0+{match.end()}c"
-                self._add_tag("type", start, end)
-    
-    def _highlight_imported_symbols(self):
-        """Highlight imported symbols in the code"""
-        if not self.imported_symbols:
-            return
-            
-        code = self.text_widget.get("1.0", "end")
-        
-        for symbol_name, symbol_type in self.imported_symbols.items():
-            # Create pattern to match the symbol (avoid matching in strings/comments)
-            pattern = r'\b' + re.escape(symbol_name) + r'\b'
-            
-            for match in re.finditer(pattern, code):
-                start_pos = match.start()
-                end_pos = match.end()
-                
-                # Check if this is inside a string or comment
-                if self._is_in_string_or_comment(start_pos):
-                    continue
-                
-                start = f"1.0+{start_pos}c"
-                end = f"1.0+{end_pos}c"
-                
-                # Determine tag based on symbol type
-                if symbol_type == 'macro':
-                    self._add_tag("imported_macro", start, end)
-                elif symbol_type == 'constant':
-                    self._add_tag("imported_constant", start, end)
-                elif symbol_type == 'trait':
-                    self._add_tag("imported_trait", start, end)
-                elif symbol_type == 'enum':
-                    self._add_tag("imported_enum", start, end)
-                elif symbol_type == 'type':
-                    self._add_tag("imported_type", start, end)
-                else:  # function/module
-                    self._add_tag("imported_function", start, end)
+    def _word_tag(self, word):
+        """Classify Rust keywords, imported symbols and built-in types"""
+        if word in self.keywords:
+            return "keyword"
+        symbol_type = self.imported_symbols.get(word)
+        if symbol_type is not None:
+            return self.IMPORTED_SYMBOL_TAGS.get(symbol_type, "imported_function")
+        if word in self.BUILTIN_TYPES:
+            return "type"
+        return None
@@ -1,7 +1,34 @@
-from .base import BaseHighlighter
-import ast
+from .base import BaseHighlighter, C_STYLE_COMMENT_RULE, C_STYLE_STRING_RULE
+import re
+
+# 模板字符串可以跨行，未闭合时延伸到文本末尾
+_TS_TEMPLATE_RULE = r'(?P<template>`(?:[^`\\]|\\[\s\S])*(?:`|\Z))'
+
+# 标识符可以包含 $
+_TS_NAME = r'[A-Za-z_$][\w$]*'
 
 class CodeHighlighter(BaseHighlighter):
+    BLOCK_DELIMITERS = (('/*', '*/'), ('`', '`'))
+    LINE_COMMENT = '//'
+    DOCUMENT_SYMBOL_PATTERN = re.compile(r'\s*import\b')
+    
+    TOKEN_PATTERN = re.compile('|'.join((
+        C_STYLE_COMMENT_RULE,
+        _TS_TEMPLATE_RULE,
+        C_STYLE_STRING_RULE,
+        rf'(?P<decorator>@{_TS_NAME})',
+        # 导入子句只包含名称、空白、花括号、逗号和 *，多行的导入也能一次匹配
+        r'(?P<ts_import>^[ \t]*import\b[\w$\s{},*]*?\bfrom\s*(?:"[^"\n]*"|\'[^\'\n]*\'))',
+        rf'(?P<qualified>(?<![\w$.]){_TS_NAME}\.{_TS_NAME})',
+        rf'(?P<call>(?<![\w$]){_TS_NAME}(?=\s*\())',
+        rf'(?P<word>(?<![\w$]){_TS_NAME})',
+    )), re.MULTILINE)
+    
+    COMPOSITE_TOKENS = frozenset({'ts_import', 'qualified', 'call'})
+    
+    # 导入子句中的一个名称：* as ns、name 或 name as alias
+    _IMPORT_NAME_PATTERN = re.compile(rf'(?:(\*)\s*(as)\s+)?({_TS_NAME})(?:\s+(as)\s+({_TS_NAME}))?')
+    
     def __init__(self, text_widget):
         super().__init__(text_widget)
         # TypeScript keywords (JavaScript keywords + TypeScript specific)
@@ -45,101 +72,108 @@ class CodeHighlighter(BaseHighlighter):
         self.syntax_colors.setdefault("array", self.syntax_colors.get("class", "#4EC9B0"))
         
         self.setup_tags()
+    
+    def _highlight_text(self, text: str):
+        """处理TypeScript的注释、字符串、装饰器、导入语句和关键字"""
+        # 重置导入信息（局部重新高亮时保留全文的导入信息）
+        if not self._window_pass:
+            self.imported_modules = set()
+            self.imported_symbols = {}
         
-    def _highlight_node(self, node: ast.AST):
-        """Extend base highlighter's node processing for TypeScript/JavaScript"""
-        super()._highlight_node(node)
-        
-        if not hasattr(node, 'lineno'):
-            return
-            
-        start, end = self.get_position(node)
+        # 导入语句位于文件开头，在同一次扫描中先于使用处被记录
+        self._scan_tokens(text)
+    
+    def _word_tag(self, word):
+        """TypeScript关键字和导入的符号"""
+        if word in self.keywords:
+            return "keyword"
+        if word in self.imported_symbols:
+            return self._imported_symbol_tag(word, called=False)
+        return None
+    
+    def _emit_token(self, kind, match):
+        """处理导入语句、模块.属性访问和函数调用"""
+        if kind == 'ts_import':
+            self._process_typescript_import(match.group(), match.start())
+        elif kind == 'qualified':
+            self._highlight_typescript_attribute(match.group(), match.start())
+        else:
+            word = match.group()
+            if word in self.imported_symbols:
+                tag = self._imported_symbol_tag(word, called=True)
+            else:
+                tag = self._word_tag(word)
+            if tag is not None:
+                self._add_span(tag, match.start(), match.end())
+    
+    def _imported_symbol_tag(self, symbol_name: str, called: bool) -> str:
+        """根据命名约定判断导入符号的类型，called 表示符号后面紧跟调用括号"""
+        if symbol_name.startswith('I') and len(symbol_name) > 1 and symbol_name[1].isupper():
+            return "imported_interface"
+        if symbol_name.endswith('Type') or symbol_name.endswith('Props'):
+            return "imported_type"
+        if self._is_typescript_class_name(symbol_name):
+            return "imported_class"
+        return "imported_function" if called else "imported_variable"
+    
+    def _process_typescript_import(self, statement: str, statement_start: int):
+        """处理TypeScript/JavaScript的import语句，statement_start 是语句的偏移"""
+        # 语句以模块路径字符串结尾
+        quote = statement[-1]
+        module_open = statement.rindex(quote, 0, len(statement) - 1)
+        module_name = statement[module_open + 1:-1]
+        from_index = statement.rindex('from', 0, module_open)
+        import_index = statement.index('import')
+        self.imported_modules.add(module_name)
         
-        # 处理导入语句
-        if isinstance(node, ast.Import):
-            self._process_typescript_import(node)
-        elif isinstance(node, ast.ImportFrom):
-            self._process_typescript_import_from(node)
+        add_span = self._add_span
+        add_span("keyword", statement_start + import_index, statement_start + import_index + 6)
+        add_span("keyword", statement_start + from_index, statement_start + from_index + 4)
+        add_span("string", statement_start + module_open, statement_start + len(statement))
         
-        # 处理符号引用
-        elif isinstance(node, ast.Name):
-            self._highlight_typescript_imported_symbol(node, start, end)
-        elif isinstance(node, ast.Attribute):
-            self._highlight_typescript_imported_attribute(node)
-            
-    def _process_typescript_import(self, node: ast.Import):
-        """处理TypeScript/JavaScript的import语句"""
-        for alias in node.names:
-            module_name = alias.name
-            self.imported_modules.add(module_name)
-            
-            # TypeScript/JavaScript的import语句通常使用默认导入
-            if not alias.asname:
-                # 使用模块的最后一部分作为符号名
-                module_parts = module_name.split('/')
-                symbol_name = module_parts[-1].replace('.js', '').replace('.ts', '')
-                self.imported_symbols[symbol_name] = module_name
-            else:
-                self.imported_symbols[alias.asname] = module_name
-                
-    def _process_typescript_import_from(self, node: ast.ImportFrom):
-        """处理TypeScript/JavaScript的from-import语句"""
-        module_name = node.module or ""
-        for alias in node.names:
-            symbol_name = alias.name
-            
-            # 记录导入的符号
-            if alias.asname:
-                self.imported_symbols[alias.asname] = f"{module_name}.{symbol_name}"
-            else:
-                self.imported_symbols[symbol_name] = f"{module_name}.{symbol_name}"
-                
-    def _highlight_typescript_imported_symbol(self, node: ast.Name, start: str, end: str):
-        """高亮TypeScript/JavaScript导入的符号"""
-        symbol_name = node.id
+        for match in self._IMPORT_NAME_PATTERN.finditer(statement, import_index + 6, from_index):
+            namespace, _, name, _, alias = match.groups()
+            for group in (2, 4):
+                if match.group(group):
+                    add_span("keyword", statement_start + match.start(group), statement_start + match.end(group))
+            if name == 'type' and not alias:
+                # import type { A } from "x"
+                add_span("keyword", statement_start + match.start(3), statement_start + match.end(3))
+                continue
+            local_group = 5 if alias else 3
+            local_name = match.group(local_group)
+            local_start = statement_start + match.start(local_group)
+            local_end = statement_start + match.end(local_group)
+            if namespace:
+                # import * as ns from "x"：ns 是模块的命名空间
+                self.imported_modules.add(local_name)
+                add_span("imported_module", local_start, local_end)
+                continue
+            self.imported_symbols[local_name] = module_name if name == 'default' else f"{module_name}.{name}"
+            add_span(self._imported_symbol_tag(local_name, called=False), local_start, local_end)
+    
+    def _highlight_typescript_attribute(self, text: str, start: int):
+        """高亮导入模块的属性访问，其他的两部分按普通标识符处理"""
+        module_name, _, attr = text.partition('.')
+        attr_start = start + len(module_name) + 1
+        if module_name not in self.imported_modules:
+            for word, word_start in ((module_name, start), (attr, attr_start)):
+                tag = self._word_tag(word)
+                if tag is not None:
+                    self._add_span(tag, word_start, word_start + len(word))
+            return
         
-        if symbol_name in self.imported_symbols:
-            # 根据命名约定判断符号类型
-            if symbol_name[0].isupper() or self._is_typescript_class_name(symbol_name):
-                self._add_tag("imported_class", start, end)
-            elif symbol_name.startswith('I') and symbol_name[1].isupper():
-                self._add_tag("imported_interface", start, end)
-            elif symbol_name.endswith('Type') or symbol_name.endswith('Props'):
-                self._add_tag("imported_type", start, end)
-            else:
-                # 检查是否是函数调用
-                parent = self._get_parent_node(node)
-                if parent and isinstance(parent, ast.Call) and parent.func == node:
-                    self._add_tag("imported_function", start, end)
-                else:
-                    self._add_tag("imported_variable", start, end)
-                    
-    def _highlight_typescript_imported_attribute(self, node: ast.Attribute):
-        """高亮TypeScript/JavaScript导入模块的属性访问"""
-        try:
-            if isinstance(node.value, ast.Name):
-                module_name = node.value.id
-                if module_name in self.imported_modules:
-                    # 高亮模块名
-                    module_start, module_end = self.get_position(node.value)
-                    self._add_tag("imported_module", module_start, module_end)
-                    
-                    # 高亮属性名
-                    attr_start = f"{node.lineno}.{node.col_offset + len(module_name) + 1}"
-                    attr_end = f"{node.lineno}.{node.col_offset + len(module_name) + 1 + len(node.attr)}"
-                    
-                    # 根据属性名判断类型
-                    if node.attr[0].isupper() or self._is_typescript_class_name(node.attr):
-                        self._add_tag("imported_class", attr_start, attr_end)
-                    elif node.attr.startswith('I') and node.attr[1].isupper():
-                        self._add_tag("imported_interface", attr_start, attr_end)
-                    elif node.attr.endswith('Type') or node.attr.endswith('Props'):
-                        self._add_tag("imported_type", attr_start, attr_end)
-                    else:
-                        self._add_tag("imported_function", attr_start, attr_end)
-        except Exception as e:
-            print(f"Error highlighting TypeScript imported attribute: {e}")
-            
+        self._add_span("imported_module", start, attr_start - 1)
+        if self._is_typescript_class_name(attr):
+            tag = "imported_class"
+        elif attr.startswith('I') and len(attr) > 1 and attr[1].isupper():
+            tag = "imported_interface"
+        elif attr.endswith('Type') or attr.endswith('Props'):
+            tag = "imported_type"
+        else:
+            tag = "imported_function"
+        self._add_span(tag, attr_start, attr_start + len(attr))
+    
     def _is_typescript_class_name(self, name: str) -> bool:
         """判断TypeScript/JavaScript类名"""
         # TypeScript类名通常以大写字母开头
@@ -152,4 +186,4 @@ class CodeHighlighter(BaseHighlighter):
         }
         if name in common_class_patterns:
             return True
-        return False
\ No newline at end of file
+        return False
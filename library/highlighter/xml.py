@@ -1,15 +1,10 @@
-from .base import BaseHighlighter
+from .grammar import GrammarHighlighter
+
+class CodeHighlighter(GrammarHighlighter):
+    GRAMMAR = "xml"
 
-class CodeHighlighter(BaseHighlighter):
     def __init__(self, text_widget):
         super().__init__(text_widget)
-        # XML keywords and constructs
-        self.keywords = {
-            'xml', 'version', 'encoding', 'standalone',
-            'DOCTYPE', 'ELEMENT', 'ATTLIST', 'ENTITY',
-            'NOTATION', 'CDATA', 'PCDATA', 'ANY', 'EMPTY'
-        }
-        
         # XML syntax colors - use theme colors
         # Set default values for language-specific colors if not present in theme
         self.syntax_colors.setdefault("tag", self.syntax_colors.get("keyword", "#569CD6"))
@@ -21,4 +16,4 @@ class CodeHighlighter(BaseHighlighter):
         self.syntax_colors.setdefault("entity", self.syntax_colors.get("class", "#4EC9B0"))
         self.syntax_colors.setdefault("processing_instruction", self.syntax_colors.get("function", "#4FC1FF"))
         
-        self.setup_tags()
\ No newline at end of file
+        self.setup_tags()
@@ -1,21 +1,10 @@
-from .base import BaseHighlighter
+from .grammar import GrammarHighlighter
+
+class CodeHighlighter(GrammarHighlighter):
+    GRAMMAR = "yaml"
 
-class CodeHighlighter(BaseHighlighter):
     def __init__(self, text_widget):
         super().__init__(text_widget)
-        # YAML keywords and special constructs
-        self.keywords = {
-            # YAML directives
-            '%YAML', '%TAG',
-            # Document markers
-            '---', '...',
-            # Special values
-            'true', 'false', 'null', 'True', 'False', 'Null',
-            'YES', 'NO', 'ON', 'OFF',
-            # Anchors and aliases
-            '&', '*', '<<'
-        }
-        
         # YAML syntax colors - use theme colors
         # Set default values for language-specific colors if not present in theme
         self.syntax_colors.setdefault("key", self.syntax_colors.get("variable", "#9CDCFE"))
@@ -29,4 +18,4 @@ class CodeHighlighter(BaseHighlighter):
         self.syntax_colors.setdefault("string", self.syntax_colors.get("string", "#CE9178"))
         self.syntax_colors.setdefault("comment", self.syntax_colors.get("comment", "#6A9955"))
         
-        self.setup_tags()
\ No newline at end of file
+        self.setup_tags()
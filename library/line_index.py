@@ -0,0 +1,148 @@
+"""
+行偏移索引
+在绝对字符偏移与 Tk 的 ``行.列`` 索引之间相互转换
+"""
+
+import bisect
+from typing import List, Tuple
+
+
+class LineIndex:
+    """
+    行首偏移表
+    每个文本快照只构建一次，之后的换算都通过二分查找完成
+    """
+
+    def __init__(self, text: str):
+        """
+        根据文本构建行首偏移表
+
+        Args:
+            text: 文本内容
+        """
+        self.text_length = len(text)
+        self.line_starts: List[int] = [0]
+        find = text.find
+        position = find('\n')
+        while position != -1:
+            self.line_starts.append(position + 1)
+            position = find('\n', position + 1)
+
+    @classmethod
+    def from_lines(cls, lines: List[str]) -> "LineIndex":
+        """
+        根据按 ``\\n`` 切分好的行列表构建索引
+
+        Args:
+            lines: 行列表，即 ``text.split('\\n')`` 的结果
+
+        Returns:
+            行偏移索引
+        """
+        index = cls.__new__(cls)
+        starts = [0]
+        for line in lines[:-1]:
+            starts.append(starts[-1] + len(line) + 1)
+        index.line_starts = starts
+        index.text_length = starts[-1] + len(lines[-1]) if lines else 0
+        return index
+
+    @property
+    def line_count(self) -> int:
+        """
+        获取行数
+        """
+        return len(self.line_starts)
+
+    def line_start(self, line: int) -> int:
+        """
+        获取行首偏移
+
+        Args:
+            line: 行号（从1开始）
+
+        Returns:
+            该行第一个字符的偏移
+        """
+        return self.line_starts[line - 1]
+
+    def line_end(self, line: int) -> int:
+        """
+        获取行尾偏移（不含换行符）
+
+        Args:
+            line: 行号（从1开始）
+
+        Returns:
+            该行最后一个字符之后的偏移
+        """
+        if line < len(self.line_starts):
+            return self.line_starts[line] - 1
+        return self.text_length
+
+    def line_length(self, line: int) -> int:
+        """
+        获取行长度（不含换行符），超出范围的行返回0
+
+        Args:
+            line: 行号（从1开始）
+
+        Returns:
+            行长度
+        """
+        if not 1 <= line <= len(self.line_starts):
+            return 0
+        return self.line_end(line) - self.line_starts[line - 1]
+
+    def position(self, offset: int) -> Tuple[int, int]:
+        """
+        将偏移转换为行列位置
+
+        Args:
+            offset: 绝对字符偏移
+
+        Returns:
+            (行号, 列号)，行号从1开始，列号从0开始
+        """
+        line = bisect.bisect_right(self.line_starts, offset)
+        return line, offset - self.line_starts[line - 1]
+
+    def offset_to_index(self, offset: int) -> str:
+        """
+        将偏移转换为 Tk 索引
+
+        Args:
+            offset: 绝对字符偏移
+
+        Returns:
+            ``行.列`` 格式的索引
+        """
+        line = bisect.bisect_right(self.line_starts, offset)
+        return f"{line}.{offset - self.line_starts[line - 1]}"
+
+    def index_to_offset(self, index: str) -> int:
+        """
+        将 Tk 索引转换为偏移，支持 ``行.列`` 与 ``行.列+Nc``
+
+        列号会被限制在行内，结果会被限制在文本长度内。
+
+        Args:
+            index: Tk 索引
+
+        Returns:
+            绝对字符偏移
+
+        Raises:
+            ValueError: 索引格式错误或行号小于1
+        """
+        position, _, chars = index.partition('+')
+        line, _, col = position.partition('.')
+        line = int(line)
+        if line < 1:
+            raise ValueError(index)
+        if line > len(self.line_starts):
+            return self.text_length
+        offset = min(self.line_starts[line - 1] + int(col), self.line_end(line))
+        if chars:
+            offset += int(chars.rstrip('c'))
+        return min(offset, self.text_length)
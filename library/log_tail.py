@@ -0,0 +1,90 @@
+"""
+日志跟踪
+像 tail -f 一样只读取文件末尾新追加的字节，用增量解码器解码，
+多字节字符或 \r\n 被拆在两次读取之间时也能正确拼接
+"""
+
+import codecs
+import io
+import os
+from typing import Optional, Tuple
+
+# 跟踪时检查文件大小的间隔，单位为毫秒
+TAIL_POLL_MS = 500
+
+# 每次最多读取的字节数，其余部分下次再读，避免一次插入太多文本卡住界面
+TAIL_READ_LIMIT = 1024 * 1024
+
+
+class LogTail:
+    """
+    跟踪一个不断追加的文件
+    文件被截断或被轮转（换成新文件）时从头重新读取
+    """
+
+    def __init__(self, file_path: str, encoding: str = "utf-8", position: Optional[int] = None,
+                 read_limit: int = TAIL_READ_LIMIT):
+        """
+        初始化跟踪
+
+        Args:
+            file_path: 文件路径
+            encoding: 文件编码
+            position: 开始跟踪的字节位置，默认为当前文件末尾（已有内容已经显示）
+            read_limit: 每次最多读取的字节数
+        """
+        self.file_path = file_path
+        self.encoding = encoding
+        self.read_limit = read_limit
+        # 与文本模式打开文件一样把 \r\n 和 \r 换成 \n
+        self._decoder = io.IncrementalNewlineDecoder(
+            codecs.getincrementaldecoder(encoding)(errors="replace"), translate=True)
+        stat = os.stat(file_path)
+        self._inode = (stat.st_dev, stat.st_ino)
+        self.position = stat.st_size if position is None else position
+
+    def _reset(self):
+        """从文件开头重新读取"""
+        self.position = 0
+        self._decoder.reset()
+
+    def poll(self, read_all: bool = False) -> Tuple[str, bool]:
+        """
+        读取上次之后追加的内容
+
+        Args:
+            read_all: 一直读到文件末尾，不受 read_limit 限制
+
+        Returns:
+            (新内容, 是否从头重新读取)，从头读取时调用方应先清空已显示的内容。
+            文件不存在（例如轮转的间隙）时返回 ("", False)
+        """
+        try:
+            stat = os.stat(self.file_path)
+        except OSError:
+            return "", False
+        reset = False
+        inode = (stat.st_dev, stat.st_ino)
+        if inode != self._inode or stat.st_size < self.position:
+            self._inode = inode
+            self._reset()
+            reset = True
+        if stat.st_size == self.position:
+            return "", reset
+        with open(self.file_path, "rb") as fp:
+            fp.seek(self.position)
+            data = fp.read(-1 if read_all else self.read_limit)
+        self.position += len(data)
+        return self._decoder.decode(data), reset
+
+    def has_more(self) -> bool:
+        """
+        上次读取后文件中是否还有没读完的内容
+
+        Returns:
+            还有内容时为 True
+        """
+        try:
+            return os.path.getsize(self.file_path) > self.position
+        except OSError:
+            return False
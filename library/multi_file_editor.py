@@ -3,15 +3,18 @@
 支持选项卡式多文件编辑功能
 """
 
-import json
 import os
-from pathlib import Path
+import time
 from tkinter import Text, messagebox, BOTH, Frame, Label, Button, Event
 from tkinter.font import Font
 from tkinter.ttk import Notebook
+from library.highlight_policy import TIER_FULL
 from library.highlighter_factory import HighlighterFactory
+from library.log_tail import LogTail, TAIL_POLL_MS
 from library.logger import get_logger
+from library.pass_scheduler import PassScheduler
 from library.api import Settings
+from library.theme_registry import Theme, get_theme_registry
 from library.static_checker.symbol_checker import StaticCheckManager
 from ui.tabs import SettingsTab, HelpTab
 from library.ui_styles import get_style
@@ -57,6 +60,11 @@ class MultiFileEditor:
         self.tab_highlighters = {}  # {tab_id: highlighter}
         self.current_tab = None
         
+        # 显示当前选项卡高亮级别和最近一次高亮耗时的状态栏标签
+        self.status_label = None
+        self._status_text = None
+        self._pass_cost_format = None
+        
         # 高亮器工厂
         self.highlighter_factory = HighlighterFactory()
         
@@ -69,7 +77,13 @@ class MultiFileEditor:
         
         # 防抖机制相关变量
         self._debounce_timers = {}  # {editor_id: timer_id}
-        self._debounce_delay = 500  # 防抖延迟时间，单位为毫秒
+        self._debounce_delay = 500  # 尚未测量检查耗时时的防抖延迟，单位为毫秒
+        self._check_schedulers = {}  # {editor_id: PassScheduler}，按检查耗时调整延迟
+        
+        # 跟踪中的日志文件
+        self._tails = {}  # {tab_id: LogTail}
+        self._tail_jobs = {}  # {tab_id: timer_id}
+        self._tail_retained_lines = {}  # {tab_id: 最多保留的行数，0 表示不限制}
         
         # 绑定选项卡切换事件
         self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
@@ -108,15 +122,18 @@ class MultiFileEditor:
         
         # 创建语法高亮器
         highlighter = self.highlighter_factory.create_highlighter(editor, file_path)
+        # 文件大小变化导致高亮降级或恢复时更新状态栏
+        highlighter.tier_listener = self._on_highlight_tier_changed
+        # 每次高亮完成后在状态栏显示耗时
+        highlighter.pass_listener = self._on_highlight_pass
         
-        # 应用主题
+        # 应用主题，使用同一主题的选项卡共享注册表中解析好的主题
         try:
-            theme_file = f"{Path.cwd() / 'asset' / 'theme' / Settings.Highlighter.syntax_highlighting()['theme']}.json"
-            if os.path.exists(theme_file):
-                with open(theme_file, "r", encoding="utf-8") as f:
-                    theme_data = json.load(f)
-                highlighter.set_theme(theme_data)
-                highlighter.highlight()
+            theme = get_theme_registry().get(Settings.Highlighter.syntax_highlighting()['theme'])
+            if theme is not None:
+                highlighter.set_theme(theme)
+                # 先高亮可见区域，其余部分在空闲时分块补全，避免打开大文件时卡住界面
+                highlighter.highlight_progressive()
         except Exception as e:
             logger.warning(f"Failed to apply theme to new tab: {str(e)}")
         
@@ -128,12 +145,14 @@ class MultiFileEditor:
         # 切换到新选项卡
         self.notebook.select(tab_id)
         self.current_tab = tab_id
+        self._update_highlight_status()
         
         # 注册编辑器到静态检查管理器
         self.static_check_manager.register_editor(editor, file_path)
         
-        # 绑定文本修改事件，实现实时静态检查
-        editor.bind('<<Modified>>', lambda e: self._on_text_modified(e, editor, file_path))
+        # 绑定文本修改事件，实现实时静态检查和增量高亮
+        # （该绑定会覆盖高亮器自身的<<Modified>>绑定，因此由这里转发）
+        editor.bind('<<Modified>>', lambda e: self._on_text_modified(e, editor, file_path, highlighter))
         
         # 初始静态检查
         self._perform_static_check(editor, file_path)
@@ -151,8 +170,11 @@ class MultiFileEditor:
         if tab_id not in self.notebook.tabs():
             return
         
+        # 跟踪中的日志只是文件末尾的视图，不提示保存
+        following = self.stop_following(tab_id)
+        
         # 检查是否有未保存的更改
-        if tab_id in self.tab_editors:
+        if tab_id in self.tab_editors and not following:
             editor = self.tab_editors[tab_id]
             # 检查是否为编辑类Tab
             if editor is not None:
@@ -196,6 +218,16 @@ class MultiFileEditor:
         if tab_id in self.tab_editors:
             editor = self.tab_editors[tab_id]
             if editor is not None:
+                # 取消等待中的静态检查
+                timer_id = self._debounce_timers.pop(id(editor), None)
+                if timer_id is not None:
+                    self.parent.after_cancel(timer_id)
+                self._check_schedulers.pop(id(editor), None)
+                self.static_check_manager.unregister_editor(editor)
+                # 停止高亮器的定时器，否则它们会在已销毁的组件上一直运行
+                highlighter = self.tab_highlighters.get(tab_id)
+                if highlighter is not None:
+                    highlighter.shutdown()
                 editor.destroy()
             del self.tab_editors[tab_id]
         
@@ -340,6 +372,66 @@ class MultiFileEditor:
         selected_tab = self.notebook.select()
         if selected_tab:
             self.current_tab = selected_tab
+            self._update_highlight_status()
+    
+    def set_status_label(self, label):
+        """
+        设置显示高亮级别的状态栏标签
+        
+        Args:
+            label: 状态栏标签组件
+        """
+        self.status_label = label
+        self._update_highlight_status()
+    
+    def _on_highlight_tier_changed(self, highlighter, tier):
+        """
+        高亮级别变化回调，只有当前选项卡的变化才更新状态栏
+        
+        Args:
+            highlighter: 级别发生变化的高亮器
+            tier: 新的高亮级别
+        """
+        if self.tab_highlighters.get(self.current_tab) is highlighter:
+            self._update_highlight_status()
+    
+    def _on_highlight_pass(self, highlighter, record):
+        """
+        高亮完成回调，只有当前选项卡的高亮才更新状态栏
+        
+        Args:
+            highlighter: 完成高亮的高亮器
+            record: 该次高亮的分阶段耗时记录
+        """
+        if self.tab_highlighters.get(self.current_tab) is highlighter:
+            self._update_highlight_status()
+    
+    def _update_highlight_status(self):
+        """
+        在状态栏显示当前选项卡的高亮级别和最近一次高亮的耗时，完整高亮时不显示级别
+        """
+        if self.status_label is None:
+            return
+        highlighter = self.tab_highlighters.get(self.current_tab)
+        tier = getattr(highlighter, "tier", TIER_FULL)
+        parts = [] if tier == TIER_FULL else [t(f"highlight_tier_{tier}")]
+        if self.current_tab in self._tails:
+            parts.insert(0, t("log_following"))
+        timings = getattr(highlighter, "timings", None)
+        last = timings.last() if timings is not None else None
+        if last is not None:
+            if self._pass_cost_format is None:
+                # 每次高亮都会更新，只读取一次翻译
+                self._pass_cost_format = t("highlight_last_pass")
+            parts.append(self._pass_cost_format.format(ms=f"{last['total_ms']:.0f}"))
+        text = "    ".join(parts)
+        if text == self._status_text:
+            return
+        try:
+            self.status_label.config(text=text)
+            self._status_text = text
+        except Exception as e:
+            logger.warning(f"Failed to update highlight status: {str(e)}")
     
     def close_current_tab(self):
         """
@@ -605,15 +697,28 @@ class MultiFileEditor:
         return all_content
     
     def apply_theme_to_all(self, theme_data):
-        """对所有选项卡应用主题"""
+        """
+        对所有选项卡应用主题
+
+        只更新颜色有变化的标签，高亮区间不受主题影响，无需重新高亮
+
+        Args:
+            theme_data: 主题名称、注册表中的主题或主题配置字典
+        """
+        if isinstance(theme_data, str):
+            theme_data = get_theme_registry().get(theme_data)
+            if theme_data is None:
+                return
+        elif not isinstance(theme_data, Theme):
+            # 所有选项卡共享同一份解析结果
+            theme_data = Theme(None, theme_data)
         for highlighter in self.tab_highlighters.values():
             try:
                 highlighter.set_theme(theme_data)
-                highlighter.highlight()
             except Exception as e:
                 logger.warning(f"Failed to apply theme: {str(e)}")
     
-    def _on_text_modified(self, event, editor, file_path):
+    def _on_text_modified(self, event, editor, file_path, highlighter=None):
         """
         文本修改事件处理函数
         
@@ -621,32 +726,50 @@ class MultiFileEditor:
             event: 事件对象
             editor: 编辑器组件
             file_path: 文件路径
+            highlighter: 该编辑器的语法高亮器（可选）
         """
         if editor.edit_modified():
             editor.edit_modified(False)
+            # 只重新高亮修改过的区域
+            if highlighter is not None:
+                highlighter._queue_highlight()
             # 执行防抖静态检查
             self._debounce_static_check(editor, file_path)
     
+    def _check_scheduler(self, editor):
+        """
+        获取编辑器的静态检查调度器，不存在时创建
+        
+        Args:
+            editor: 编辑器组件
+            
+        Returns:
+            调度器
+        """
+        editor_id = id(editor)
+        scheduler = self._check_schedulers.get(editor_id)
+        if scheduler is None:
+            scheduler = PassScheduler("static_check", self._debounce_delay, min_delay=200, max_delay=3000)
+            self._check_schedulers[editor_id] = scheduler
+        return scheduler
+    
     def _debounce_static_check(self, editor, file_path):
         """
         防抖静态代码检查
         
+        定时器到期前的修改合并到同一次检查中，延迟随检查耗时调整
+        
         Args:
             editor: 编辑器组件
             file_path: 文件路径
         """
-        # 获取编辑器的唯一标识符
-        editor_id = id(editor)
-        
-        # 清除之前的定时器
-        if editor_id in self._debounce_timers:
-            self.parent.after_cancel(self._debounce_timers[editor_id])
-            del self._debounce_timers[editor_id]
+        delay = self._check_scheduler(editor).request()
+        if delay is None:
+            # 已有等待中的检查，届时会检查最新的代码
+            return
         
-        # 设置新的定时器
-        timer_id = self.parent.after(self._debounce_delay, 
-                                  lambda: self._perform_static_check(editor, file_path))
-        self._debounce_timers[editor_id] = timer_id
+        timer_id = self.parent.after(delay, lambda: self._perform_static_check(editor, file_path))
+        self._debounce_timers[id(editor)] = timer_id
     
     def _perform_static_check(self, editor, file_path):
         """
@@ -656,20 +779,230 @@ class MultiFileEditor:
             editor: 编辑器组件
             file_path: 文件路径
         """
+        editor_id = id(editor)
+        scheduler = self._check_scheduler(editor)
+        remaining = scheduler.remaining()
+        if remaining is not None:
+            # 仍在输入，等到停顿后再检查
+            self._debounce_timers[editor_id] = self.parent.after(
+                remaining, lambda: self._perform_static_check(editor, file_path))
+            return
+        
+        scheduler.begin()
+        started = time.perf_counter()
+        
+        def finished(seconds):
+            scheduler.add_cost(seconds)
+            scheduler.finish()
+        
         try:
             # 获取当前代码内容
             code = editor.get("1.0", "end-1c")
             
-            # 执行静态代码检查
-            self.static_check_manager.check_code(code, file_path, editor)
+            # 在工作线程中检查，不阻塞界面；之前未完成的检查被取消，只有最新的结果更新标记
+            self.static_check_manager.submit_check(
+                code, file_path, editor, on_finished=finished, on_dropped=scheduler.drop)
+            scheduler.add_cost(time.perf_counter() - started)
         except Exception as e:
             logger.warning(f"静态代码检查失败: {str(e)}")
+            scheduler.add_cost(time.perf_counter() - started)
+            scheduler.finish()
         finally:
             # 清除当前编辑器的定时器记录
-            editor_id = id(editor)
             if editor_id in self._debounce_timers:
                 del self._debounce_timers[editor_id]
     
+    def check_workspace(self, root="."):
+        """
+        在后台检查工作区中所有支持的文件，结果显示在结果表格中
+        
+        Args:
+            root: 工作区目录
+        """
+        self.static_check_manager.check_workspace(root)
+    
+    def clear_workspace_check(self):
+        """
+        清除工作区检查结果，结果表格恢复显示当前选项卡的检查结果
+        """
+        self.static_check_manager.clear_workspace_results()
+        editor = self.tab_editors.get(self.current_tab)
+        if editor is not None:
+            self._perform_static_check(editor, self.tab_files.get(self.current_tab))
+    
+    def is_following(self, tab_id=None):
+        """
+        选项卡是否正在跟踪文件
+        
+        Args:
+            tab_id: 选项卡ID，默认为当前选项卡
+            
+        Returns:
+            正在跟踪时为 True
+        """
+        return (tab_id or self.current_tab) in self._tails
+    
+    def toggle_follow(self, tab_id=None):
+        """
+        开始或停止跟踪选项卡对应的文件
+        
+        Args:
+            tab_id: 选项卡ID，默认为当前选项卡
+        """
+        tab_id = tab_id or self.current_tab
+        if not self.stop_following(tab_id):
+            self.follow_file(tab_id)
+    
+    def follow_file(self, tab_id=None, retained_lines=None):
+        """
+        像 tail -f 一样跟踪选项卡对应的文件
+        
+        先重新读取整个文件，之后定时检查文件大小，只读取新追加的内容插入到末尾，
+        并且只高亮新增的行。文件被截断或轮转时重新读取
+        
+        Args:
+            tab_id: 选项卡ID，默认为当前选项卡
+            retained_lines: 最多保留的行数，超出时删除开头的行，默认读取设置，0 表示不限制
+            
+        Returns:
+            是否开始跟踪
+        """
+        tab_id = tab_id or self.current_tab
+        file_path = self.tab_files.get(tab_id)
+        editor = self.tab_editors.get(tab_id)
+        if editor is None or not file_path or not os.path.isfile(file_path):
+            return False
+        if tab_id in self._tails:
+            return True
+        try:
+            # 从头读取，打开选项卡之后追加的内容也会显示
+            self._tails[tab_id] = LogTail(file_path, Settings.Editor.file_encoding(), position=0)
+        except OSError as e:
+            logger.warning(f"Failed to follow {file_path}: {str(e)}")
+            return False
+        if retained_lines is None:
+            retained_lines = Settings.Editor.tail_retained_lines()
+        self._tail_retained_lines[tab_id] = retained_lines or 0
+        self._poll_tail(tab_id, reload=True)
+        self._update_highlight_status()
+        return True
+    
+    def stop_following(self, tab_id=None):
+        """
+        停止跟踪文件
+        
+        Args:
+            tab_id: 选项卡ID，默认为当前选项卡
+            
+        Returns:
+            之前是否正在跟踪
+        """
+        tab_id = tab_id or self.current_tab
+        if self._tails.pop(tab_id, None) is None:
+            return False
+        self._tail_retained_lines.pop(tab_id, None)
+        timer_id = self._tail_jobs.pop(tab_id, None)
+        if timer_id is not None:
+            try:
+                self.parent.after_cancel(timer_id)
+            except Exception:
+                pass
+        self._update_highlight_status()
+        return True
+    
+    def _poll_tail(self, tab_id, reload=False):
+        """
+        读取跟踪文件新追加的内容并插入到末尾
+        
+        Args:
+            tab_id: 选项卡ID
+            reload: 丢弃已显示的内容，从头读取整个文件
+        """
+        self._tail_jobs.pop(tab_id, None)
+        tail = self._tails.get(tab_id)
+        editor = self.tab_editors.get(tab_id)
+        highlighter = self.tab_highlighters.get(tab_id)
+        if tail is None or editor is None:
+            return
+        delay = TAIL_POLL_MS
+        try:
+            # 上一次的高亮还没完成时先不读取，追加的行只能接在已高亮的快照后面
+            if reload or highlighter is None or not highlighter.pass_pending():
+                text, reset = tail.poll(read_all=reload)
+                if text or reset:
+                    self._append_tail_text(editor, highlighter, text, reload or reset,
+                                           self._tail_retained_lines.get(tab_id, 0))
+                if tail.has_more():
+                    # 追加得太快，没读完的部分尽快再读
+                    delay = 1
+        except Exception as e:
+            logger.warning(f"Failed to read followed file: {str(e)}")
+        self._tail_jobs[tab_id] = self.parent.after(delay, lambda: self._poll_tail(tab_id))
+    
+    def _append_tail_text(self, editor, highlighter, text, reset, retained_lines):
+        """
+        把跟踪读到的内容插入到编辑器末尾，只高亮新增的行
+        
+        Args:
+            editor: 编辑器组件
+            highlighter: 语法高亮器（可选）
+            text: 新内容
+            reset: 是否先清空已显示的内容
+            retained_lines: 最多保留的行数，0 表示不限制
+        """
+        # 停在末尾时跟随新内容滚动
+        at_bottom = editor.yview()[1] >= 1.0
+        if reset:
+            if retained_lines:
+                text = "\n".join(text.split("\n")[-retained_lines:])
+            editor.delete("1.0", "end")
+            editor.insert("1.0", text)
+            editor.edit_modified(False)
+            if highlighter is not None:
+                highlighter.highlight_progressive()
+        else:
+            # 插入前的最后一行（0起始），新内容可能接在它后面
+            last_line = int(editor.index("end-1c").split(".")[0]) - 1
+            editor.insert("end-1c", text)
+            dropped = 0
+            if retained_lines:
+                line_count = int(editor.index("end-1c").split(".")[0])
+                dropped = max(0, line_count - retained_lines)
+                if dropped:
+                    editor.delete("1.0", f"{dropped + 1}.0")
+            editor.edit_modified(False)
+            if highlighter is not None:
+                if dropped > last_line:
+                    # 原有的行全部被删除
+                    highlighter.highlight_progressive()
+                else:
+                    highlighter.drop_leading_lines(dropped)
+                    highlighter.highlight_appended(last_line - dropped)
+        if at_bottom:
+            editor.see("end")
+    
+    def scheduler_stats(self):
+        """
+        调试接口：各选项卡高亮和静态检查的调度决策
+        
+        Returns:
+            {选项卡ID: {"file": 文件路径, "highlight": 统计, "static_check": 统计, "timing": 高亮分阶段耗时}}
+        """
+        stats = {}
+        for tab_id, editor in self.tab_editors.items():
+            if editor is None:
+                continue
+            highlighter = self.tab_highlighters.get(tab_id)
+            scheduler = highlighter and getattr(highlighter, "pass_scheduler", None)
+            check_scheduler = self._check_schedulers.get(id(editor))
+            stats[tab_id] = {
+                "file": self.tab_files.get(tab_id),
+                "highlight": scheduler.stats() if scheduler else None,
+                "static_check": check_scheduler.stats() if check_scheduler else None,
+                "timing": highlighter.timings.summary() if hasattr(highlighter, "timings") else None,
+            }
+        return stats
+    
     def update_font_for_all(self, font_family, font_size):
         """更新所有编辑器的字体"""
         for editor in self.tab_editors.values():
@@ -0,0 +1,404 @@
+"""
+解析结果缓存
+按文本内容哈希缓存语法树、词法单元和高亮区间，供高亮器与静态检查器共享
+"""
+
+import ast
+import bisect
+import hashlib
+import io
+import threading
+import tokenize
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional
+
+# 默认缓存的文本版本数量
+DEFAULT_MAX_ENTRIES = 8
+
+# 需要重新解析的行数超过这个比例时直接完整解析
+REPARSE_MAX_FRACTION = 0.5
+
+_global_parse_cache = None
+
+
+class ParseEntry:
+    """
+    一个文本版本的解析结果
+    解析失败时保存异常，再次访问时重新抛出而不是重新解析
+    """
+
+    __slots__ = ("digest", "text", "tree", "tree_error", "tokens", "token_error", "spans")
+
+    def __init__(self, digest: bytes, text: str):
+        self.digest = digest
+        self.text = text
+        self.tree = None
+        self.tree_error = None
+        self.tokens = None
+        self.token_error = None
+        self.spans: Dict[Hashable, list] = {}
+
+
+class ParseCache:
+    """
+    以内容哈希为键的 LRU 缓存
+    同一版本的文本无论被高亮器还是检查器请求，都只解析一次
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        初始化缓存
+
+        Args:
+            max_entries: 最多保留的文本版本数量
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[bytes, ParseEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        # 同一时间只允许一个解析，同一版本的文本不会被解析两次
+        self._parse_lock = threading.Lock()
+        # 同一个字符串对象通常会被连续请求多次，记住它的哈希避免重复计算
+        self._last_text = None
+        self._last_digest = None
+        self.hits = 0
+        self.misses = 0
+        self.reparses = 0
+
+    def digest(self, text: str) -> bytes:
+        """
+        计算文本的内容哈希
+
+        Args:
+            text: 文本内容
+
+        Returns:
+            16字节的哈希值
+        """
+        with self._lock:
+            if text is self._last_text:
+                return self._last_digest
+        digest = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+        with self._lock:
+            self._last_text = text
+            self._last_digest = digest
+        return digest
+
+    def entry(self, text: str) -> ParseEntry:
+        """
+        获取文本对应的缓存项，不存在时创建
+
+        Args:
+            text: 文本内容
+
+        Returns:
+            缓存项
+        """
+        digest = self.digest(text)
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                self._entries.move_to_end(digest)
+                return entry
+            entry = ParseEntry(digest, text)
+            self._entries[digest] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return entry
+
+    def parse(self, text: str) -> ast.AST:
+        """
+        获取文本的语法树
+
+        未缓存时先尝试在最近一次解析出的语法树上只重新解析改动的顶层语句。
+        已经返回的语法树不会再被修改，可以在其他线程中继续使用；
+        不同版本的语法树可能共享没有改动的语句节点，调用方不能修改它们。
+
+        Args:
+            text: Python 源代码
+
+        Returns:
+            语法树
+
+        Raises:
+            SyntaxError: 代码有语法错误
+            ValueError: 代码包含空字符
+            MemoryError: 括号嵌套过深
+        """
+        entry = self.entry(text)
+        with self._parse_lock:
+            if entry.tree is None and entry.tree_error is None:
+                self.misses += 1
+                base = self._latest_tree_entry(entry)
+                tree = None
+                if base is not None:
+                    tree = reparse_changed_blocks(base.text, base.tree, text)
+                if tree is not None:
+                    entry.tree = tree
+                    self.reparses += 1
+                else:
+                    try:
+                        entry.tree = ast.parse(text)
+                    except (SyntaxError, ValueError, MemoryError, RecursionError) as e:
+                        # 括号嵌套过深时解析器抛出 MemoryError，同样记住，不再重复解析
+                        entry.tree_error = e
+            else:
+                self.hits += 1
+        if entry.tree_error is not None:
+            raise entry.tree_error
+        return entry.tree
+
+    def _latest_tree_entry(self, exclude: ParseEntry) -> Optional[ParseEntry]:
+        """
+        获取最近使用且带有语法树的缓存项
+
+        Args:
+            exclude: 要跳过的缓存项
+
+        Returns:
+            缓存项，没有时返回 None
+        """
+        with self._lock:
+            for entry in reversed(self._entries.values()):
+                if entry is not exclude and entry.tree is not None:
+                    return entry
+        return None
+
+    def tokens(self, text: str) -> List[tokenize.TokenInfo]:
+        """
+        获取文本的词法单元列表
+
+        Args:
+            text: Python 源代码
+
+        Returns:
+            词法单元列表
+
+        Raises:
+            tokenize.TokenError: 代码在词法层面不完整
+        """
+        entry = self.entry(text)
+        if entry.tokens is None and entry.token_error is None:
+            self.misses += 1
+            try:
+                entry.tokens = list(tokenize.generate_tokens(io.StringIO(text).readline))
+            except (tokenize.TokenError, SyntaxError) as e:
+                entry.token_error = e
+        else:
+            self.hits += 1
+        if entry.token_error is not None:
+            raise entry.token_error
+        return entry.tokens
+
+    def get_spans(self, text: str, owner: Hashable) -> Optional[list]:
+        """
+        获取缓存的高亮区间
+
+        Args:
+            text: 文本内容
+            owner: 高亮器的缓存键，区分不同语言的高亮器
+
+        Returns:
+            区间，未缓存时返回 None
+        """
+        spans = self.entry(text).spans.get(owner)
+        if spans is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return spans
+
+    def store_spans(self, text: str, owner: Hashable, spans: list):
+        """
+        缓存高亮区间
+
+        Args:
+            text: 文本内容
+            owner: 高亮器的缓存键，区分不同语言的高亮器
+            spans: 区间，格式由高亮器决定（高亮器保存压缩后的数组）
+        """
+        self.entry(text).spans[owner] = spans
+
+    def clear(self):
+        """
+        清空缓存
+        """
+        with self._lock:
+            self._entries.clear()
+            self._last_text = None
+            self._last_digest = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _statement_start(node: ast.stmt) -> int:
+    """
+    获取顶层语句的起始行，装饰器属于它所修饰的语句
+
+    Args:
+        node: 顶层语句节点
+
+    Returns:
+        起始行号（从1开始）
+    """
+    decorators = getattr(node, "decorator_list", None)
+    if decorators:
+        return min(node.lineno, min(decorator.lineno for decorator in decorators))
+    return node.lineno
+
+
+def _shifted_copy(node: ast.AST, delta: int) -> ast.AST:
+    """
+    复制节点及其所有子节点并平移副本的行号，原节点不变
+
+    字段和位置信息保存在节点的 __dict__ 中，直接填写副本的字典比 copy.deepcopy 加
+    ast.increment_lineno 快得多。Load、Add 等没有字段和位置的节点是解析器共用的单例，不复制
+
+    Args:
+        node: 节点
+        delta: 平移的行数
+
+    Returns:
+        节点的副本
+    """
+    cls = node.__class__
+    attributes = cls._attributes
+    if not attributes and not cls._fields:
+        return node
+    AST = ast.AST
+    items = node.__dict__
+    copy = cls.__new__(cls)
+    copied = copy.__dict__
+    # 只复制语法字段，其他工具记录在节点上的属性（例如父节点）不复制
+    for name in cls._fields:
+        value = items.get(name)
+        if isinstance(value, AST):
+            value = _shifted_copy(value, delta)
+        elif value.__class__ is list:
+            value = [_shifted_copy(item, delta) if isinstance(item, AST) else item for item in value]
+        copied[name] = value
+    for name in attributes:
+        copied[name] = items.get(name)
+    lineno = copied.get("lineno")
+    if lineno is not None:
+        copied["lineno"] = lineno + delta
+        end_lineno = copied.get("end_lineno")
+        if end_lineno is not None:
+            copied["end_lineno"] = end_lineno + delta
+    return copy
+
+
+def _shift_lines(nodes: List[ast.AST], delta: int):
+    """
+    原地平移节点及其所有子节点的行号，比逐个调用 ast.increment_lineno 快一倍，只用于刚解析出的节点
+
+    Args:
+        nodes: 节点列表
+        delta: 平移的行数
+    """
+    AST = ast.AST
+    stack = list(nodes)
+    pop = stack.pop
+    push = stack.append
+    while stack:
+        node = pop()
+        try:
+            node.lineno += delta
+            end_lineno = node.end_lineno
+            if end_lineno is not None:
+                node.end_lineno = end_lineno + delta
+        except AttributeError:
+            # 没有位置信息的节点，例如 Load 和 arguments
+            pass
+        for name in node._fields:
+            value = getattr(node, name, None)
+            if isinstance(value, AST):
+                push(value)
+            elif value.__class__ is list:
+                for item in value:
+                    if isinstance(item, AST):
+                        push(item)
+
+
+def reparse_changed_blocks(old_text: str, old_tree: ast.Module, new_text: str) -> Optional[ast.Module]:
+    """
+    只重新解析改动所在的顶层语句，得到新文本的语法树
+
+    每条顶层语句连同其后的空行和注释构成一个块。改动所在的块向前后各扩展
+    一个块后单独解析，例如新增的 ``else:`` 属于前一个块。之前的块原样复用，
+    之后的块在行数不变时原样复用，行数变化时复制并平移行号。片段解析失败或
+    边界无法确定时返回 None，由调用方完整解析。``old_tree`` 不会被修改，
+    复用的语句节点由两棵树共享。
+
+    Args:
+        old_text: 上一版本的文本
+        old_tree: 上一版本的语法树
+        new_text: 新版本的文本
+
+    Returns:
+        新版本的语法树，无法增量解析时返回 None
+    """
+    body = old_tree.body
+    if not body:
+        return None
+
+    old_lines = old_text.split('\n')
+    new_lines = new_text.split('\n')
+    limit = min(len(old_lines), len(new_lines))
+    prefix = 0
+    while prefix < limit and old_lines[prefix] == new_lines[prefix]:
+        prefix += 1
+    if prefix == len(old_lines) == len(new_lines):
+        return None
+    suffix = 0
+    limit -= prefix
+    while suffix < limit and old_lines[-1 - suffix] == new_lines[-1 - suffix]:
+        suffix += 1
+    old_end = len(old_lines) - suffix
+    delta = len(new_lines) - len(old_lines)
+
+    # 块的起始行（从1开始），最后一项是文本末尾之后的一行
+    starts = [_statement_start(node) for node in body]
+    starts.append(len(old_lines) + 1)
+
+    # 改动的第一行和最后一行所在块的序号，-1 表示第一条语句之前的注释，
+    # 再各扩展一个块。纯插入时取插入点之后的一行
+    first = max(bisect.bisect_right(starts, prefix + 1) - 2, -1)
+    last = min(bisect.bisect_right(starts, max(old_end, prefix + 1)), len(body) - 1)
+
+    # 片段在新文本中的行范围 [slice_start, slice_end)，从0开始
+    slice_start = starts[first] - 1 if first >= 0 else 0
+    slice_end = starts[last + 1] - 1 + delta
+    if slice_end - slice_start > len(new_lines) * REPARSE_MAX_FRACTION:
+        return None
+
+    source = '\n'.join(new_lines[slice_start:slice_end])
+    if slice_start > 0 and "__future__" in source:
+        # from __future__ 只能出现在模块开头，片段单独解析时无法检查
+        return None
+    try:
+        block_tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return None
+
+    if slice_start:
+        _shift_lines(block_tree.body, slice_start)
+    following = body[last + 1:]
+    if delta:
+        # 上一版本的语法树可能仍在使用中，平移副本的行号而不是原地修改
+        following = [_shifted_copy(node, delta) for node in following]
+    before = body[:first] if first >= 0 else []
+    return ast.Module(body=before + block_tree.body + following, type_ignores=[])
+
+
+def get_parse_cache() -> ParseCache:
+    """
+    获取全局解析缓存实例
+
+    Returns:
+        解析缓存
+    """
+    global _global_parse_cache
+    if _global_parse_cache is None:
+        _global_parse_cache = ParseCache()
+    return _global_parse_cache
@@ -0,0 +1,176 @@
+"""
+自适应调度器
+测量每次高亮和静态检查的耗时，据此调整每个选项卡的防抖延迟，合并连续输入
+"""
+
+import time
+from collections import deque
+from typing import Optional
+
+# 耗时指数移动平均中最新一次的权重
+COST_SMOOTHING = 0.3
+
+# 连续输入时最多推迟到第一次修改后延迟的这个倍数，避免一直不高亮
+MAX_WAIT_FACTOR = 4
+
+# 调试接口保留的最近决策数量
+HISTORY_SIZE = 32
+
+
+class PassScheduler:
+    """
+    一个选项卡上一种处理（高亮或静态检查）的调度器
+
+    第一次修改时按最近的耗时选择延迟并安排定时器，定时器到期前的修改合并到
+    同一次处理中。到期时如果仍在输入，则等到停顿后再处理，但不会超过
+    MAX_WAIT_FACTOR 倍的延迟。调度器本身不接触 Tk，定时器由调用方安排。
+    """
+
+    def __init__(self, name: str, base_delay: int, min_delay: int, max_delay: int,
+                 cost_factor: float = 2.0, clock=time.perf_counter):
+        """
+        初始化调度器
+
+        Args:
+            name: 处理名称，用于调试输出
+            base_delay: 尚未测量耗时时的延迟（毫秒）
+            min_delay: 最小延迟（毫秒）
+            max_delay: 最大延迟（毫秒）
+            cost_factor: 延迟与平均耗时的比例
+            clock: 返回秒数的时钟，测试时可替换
+        """
+        self.name = name
+        self.base_delay = base_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.cost_factor = cost_factor
+        self._clock = clock
+
+        self.cost: Optional[float] = None  # 平均耗时（秒）
+        self.delay = base_delay            # 最近一次选择的延迟（毫秒）
+        self.pending = False
+        self.generation = 0                # 收到的修改次数
+        self._burst_start = None
+        self._burst_requests = 0
+        self._last_request = None
+        self._pass_cost = None
+
+        self.passes = 0     # 完成的处理次数
+        self.skipped = 0    # 被合并而没有单独处理的修改次数
+        self.dropped = 0    # 过期而被丢弃的处理结果数
+        self.rearmed = 0    # 因仍在输入而推迟的次数
+        self.history = deque(maxlen=HISTORY_SIZE)
+
+    def delay_for_cost(self) -> int:
+        """
+        按平均耗时计算延迟
+
+        Returns:
+            延迟（毫秒）
+        """
+        if self.cost is None:
+            return self.base_delay
+        delay = int(self.cost * 1000 * self.cost_factor)
+        return max(self.min_delay, min(self.max_delay, delay))
+
+    def request(self) -> Optional[int]:
+        """
+        登记一次修改
+
+        Returns:
+            需要安排定时器时返回延迟（毫秒），已合并到等待中的处理时返回 None
+        """
+        now = self._clock()
+        self.generation += 1
+        self._last_request = now
+        self._burst_requests += 1
+        if self.pending:
+            self.skipped += 1
+            return None
+        self.pending = True
+        self._burst_start = now
+        self.delay = self.delay_for_cost()
+        return self.delay
+
+    def remaining(self) -> Optional[int]:
+        """
+        定时器到期时检查是否仍在输入
+
+        Returns:
+            还需等待的毫秒数，应当立即处理时返回 None
+        """
+        if not self.pending or self._last_request is None:
+            return None
+        now = self._clock()
+        quiet = (now - self._last_request) * 1000
+        waited = (now - self._burst_start) * 1000
+        if quiet >= self.delay or waited >= self.delay * MAX_WAIT_FACTOR:
+            return None
+        self.rearmed += 1
+        return max(1, round(self.delay - quiet))
+
+    def begin(self):
+        """
+        开始一次处理，此后的修改会安排新的定时器
+        """
+        self.pending = False
+        self._pass_cost = 0.0
+
+    def add_cost(self, seconds: float):
+        """
+        累加当前处理的耗时，异步处理可以分多次累加
+
+        Args:
+            seconds: 耗时（秒）
+        """
+        if self._pass_cost is None:
+            self._pass_cost = 0.0
+        self._pass_cost += seconds
+
+    def finish(self):
+        """
+        结束当前处理，把耗时计入平均值并记录本次决策
+        """
+        cost = self._pass_cost
+        if cost is None:
+            return
+        self._pass_cost = None
+        if self.cost is None:
+            self.cost = cost
+        else:
+            self.cost += (cost - self.cost) * COST_SMOOTHING
+        self.passes += 1
+        self.history.append({
+            "generation": self.generation,
+            "delay_ms": self.delay,
+            "cost_ms": round(cost * 1000, 3),
+            "coalesced": max(0, self._burst_requests - 1),
+        })
+        self._burst_requests = 0
+
+    def drop(self):
+        """
+        记录一个因文本已再次修改而被丢弃的处理结果
+        """
+        self.dropped += 1
+
+    def stats(self) -> dict:
+        """
+        调试接口：当前的调度决策和计数
+
+        Returns:
+            统计字典
+        """
+        return {
+            "name": self.name,
+            "delay_ms": self.delay,
+            "next_delay_ms": self.delay_for_cost(),
+            "cost_ms": None if self.cost is None else round(self.cost * 1000, 3),
+            "pending": self.pending,
+            "requests": self.generation,
+            "passes": self.passes,
+            "skipped": self.skipped,
+            "dropped": self.dropped,
+            "rearmed": self.rearmed,
+            "history": list(self.history),
+        }
@@ -0,0 +1,74 @@
+"""
+高亮正则保护
+Python 的正则匹配无法中途打断，这里在匹配之间检查每次高亮的时间预算，
+超出时中止高亮，由调用方退回纯文本显示
+"""
+
+import time
+from typing import Iterator, Optional, Pattern
+
+# 两次检查预算之间最多处理的匹配数
+CHECK_EVERY = 256
+
+
+class PassBudgetExceeded(Exception):
+    """高亮超出时间预算"""
+
+
+class PassBudget:
+    """
+    一次高亮的时间预算
+    """
+
+    def __init__(self, seconds: float, clock=time.perf_counter):
+        """
+        初始化预算
+
+        Args:
+            seconds: 允许的秒数
+            clock: 返回秒数的时钟，测试时可替换
+        """
+        self.seconds = seconds
+        self._clock = clock
+        self._deadline = clock() + seconds
+
+    def expired(self) -> bool:
+        """
+        是否已经超时
+
+        Returns:
+            超时时为 True
+        """
+        return self._clock() > self._deadline
+
+    def check(self):
+        """
+        超时时抛出 PassBudgetExceeded
+        """
+        if self._clock() > self._deadline:
+            raise PassBudgetExceeded(f"highlight pass exceeded its {self.seconds:.1f}s budget")
+
+
+def finditer_guarded(pattern: Pattern, text: str, budget: Optional[PassBudget] = None) -> Iterator:
+    """
+    与 pattern.finditer 相同，每 CHECK_EVERY 个匹配检查一次预算
+
+    Args:
+        pattern: 编译好的正则
+        text: 文本
+        budget: 时间预算，None 表示不限制
+
+    Returns:
+        匹配迭代器
+    """
+    if budget is None:
+        yield from pattern.finditer(text)
+        return
+    count = 0
+    for match in pattern.finditer(text):
+        yield match
+        count += 1
+        if count == CHECK_EVERY:
+            count = 0
+            budget.check()
+    budget.check()
@@ -0,0 +1,169 @@
+"""
+紧凑的高亮区间存储
+高亮器保留的区间以 array('I') 保存，标签名换成编号，
+只在写入 Tk 时才还原成标签名并格式化成 ``行.列`` 索引
+"""
+
+import sys
+import threading
+from array import array
+from typing import List, Sequence, Tuple
+
+# 整个文档的区间：每个区间依次存放 (起点偏移, 终点偏移, 标签编号)
+SPAN_FIELDS = 3
+
+# 每行的区间：每个区间依次存放 (起始列, 跨越行数, 结束列, 标签编号)
+LINE_SPAN_FIELDS = 4
+
+# 没有区间的行共用的空值，不为每行单独分配数组
+NO_SPANS = ()
+
+
+class TagTable:
+    """
+    标签名与编号的对照表
+    编号只在本进程内有效，标签名只有几十个，因此从不清理
+    """
+
+    def __init__(self):
+        """
+        初始化对照表
+        """
+        self.names: List[str] = []
+        self._ids = {}
+        self._lock = threading.Lock()
+
+    def intern(self, tag: str) -> int:
+        """
+        获取标签的编号，第一次出现时分配
+
+        Args:
+            tag: 标签名
+
+        Returns:
+            编号
+        """
+        tag_id = self._ids.get(tag)
+        if tag_id is None:
+            # 高亮在工作线程上进行，分配编号需要加锁
+            with self._lock:
+                tag_id = self._ids.get(tag)
+                if tag_id is None:
+                    tag_id = len(self.names)
+                    self.names.append(tag)
+                    self._ids[tag] = tag_id
+        return tag_id
+
+    def name(self, tag_id: int) -> str:
+        """
+        获取编号对应的标签名
+
+        Args:
+            tag_id: 编号
+
+        Returns:
+            标签名
+        """
+        return self.names[tag_id]
+
+
+# 全局标签对照表
+_global_tag_table = None
+
+
+def get_tag_table() -> TagTable:
+    """
+    获取全局标签对照表
+
+    Returns:
+        TagTable 实例
+    """
+    global _global_tag_table
+    if _global_tag_table is None:
+        _global_tag_table = TagTable()
+    return _global_tag_table
+
+
+def pack_spans(spans: Sequence[Tuple[str, int, int]]) -> array:
+    """
+    把 (标签, 起点偏移, 终点偏移) 区间列表压缩成数组
+
+    Args:
+        spans: 区间列表
+
+    Returns:
+        array('I')
+    """
+    intern = get_tag_table().intern
+    packed = array('I')
+    for tag, start, end in spans:
+        packed.extend((start, end, intern(tag)))
+    return packed
+
+
+def unpack_spans(packed: array) -> List[Tuple[str, int, int]]:
+    """
+    还原 pack_spans 压缩的区间
+
+    Args:
+        packed: array('I')
+
+    Returns:
+        (标签, 起点偏移, 终点偏移) 区间列表
+    """
+    names = get_tag_table().names
+    return [
+        (names[tag_id], start, end)
+        for start, end, tag_id in zip(packed[0::3], packed[1::3], packed[2::3])
+    ]
+
+
+def pack_line(spans: Sequence[Tuple[str, int, int, int]]):
+    """
+    把一行的 (标签, 起始列, 跨越行数, 结束列) 区间压缩成数组
+
+    Args:
+        spans: 一行的区间
+
+    Returns:
+        array('I')，没有区间时为 NO_SPANS
+    """
+    if not spans:
+        return NO_SPANS
+    intern = get_tag_table().intern
+    packed = array('I')
+    for tag, col, line_count, end_col in spans:
+        packed.extend((col, line_count, end_col, intern(tag)))
+    return packed
+
+
+def unpack_line(packed) -> List[Tuple[str, int, int, int]]:
+    """
+    还原 pack_line 压缩的一行区间
+
+    Args:
+        packed: array('I') 或 NO_SPANS
+
+    Returns:
+        (标签, 起始列, 跨越行数, 结束列) 区间列表
+    """
+    if not packed:
+        return []
+    names = get_tag_table().names
+    return [
+        (names[tag_id], col, line_count, end_col)
+        for col, line_count, end_col, tag_id in zip(packed[0::4], packed[1::4], packed[2::4], packed[3::4])
+    ]
+
+
+def line_spans_size(line_spans) -> int:
+    """
+    估算每行区间占用的字节数，包括行列表本身
+
+    Args:
+        line_spans: pack_line 结果的列表
+
+    Returns:
+        字节数
+    """
+    return sys.getsizeof(line_spans) + sum(sys.getsizeof(packed) for packed in line_spans if packed)
@@ -1,2 +1,24 @@
 from library.static_checker.symbol_checker import SymbolChecker, StaticCheckerFactory, StaticCheckManager
 from library.static_checker.base import BaseStaticChecker, StaticCheckError
+from library.static_checker.lint_engine import LintEngine, get_lint_engine
+from library.static_checker.lint_cache import LintCache, get_lint_cache
+from library.static_checker.workspace_lint import WorkspaceLint, iter_workspace_files
+
+__all__ = [
+    # 检查器和管理器
+    "SymbolChecker",
+    "StaticCheckerFactory",
+    "StaticCheckManager",
+    "BaseStaticChecker",
+    "StaticCheckError",
+    
+    # 进程内检查引擎与结果缓存
+    "LintEngine",
+    "get_lint_engine",
+    "LintCache",
+    "get_lint_cache",
+    
+    # 工作区检查
+    "WorkspaceLint",
+    "iter_workspace_files"
+]
@@ -3,6 +3,7 @@
 定义所有检查器的通用接口
 """
 
+import threading
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from typing import List, Optional, Dict, Any
@@ -38,6 +39,8 @@ class BaseStaticChecker(ABC):
         self.language = language
         self.editor_widget = editor_widget
         self.errors: List[StaticCheckError] = []
+        # 在后台检查时由管理器设置，检查被取代后置位，检查器应尽快中止
+        self.cancel: Optional[threading.Event] = None
         
     @abstractmethod
     def check(self, code: str, file_path: Optional[str] = None) -> List[StaticCheckError]:
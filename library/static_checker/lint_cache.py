@@ -0,0 +1,230 @@
+"""
+代码检查结果缓存
+以内容和检查器配置的哈希为键的 LRU 缓存，切换选项卡或撤销修改后检查相同的代码时不再重新检查。
+可选地把结果写入缓存目录，重启后打开没有修改的文件时立即显示检查结果
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional
+
+from library.static_checker.lint_engine import LintResult
+
+# 缓存格式版本，修改保存的内容时递增，旧的缓存项自然失效
+LINT_CACHE_VERSION = 1
+
+# 内存中最多保留的检查结果数量
+DEFAULT_MAX_ENTRIES = 256
+
+# 缓存目录中最多保留的文件数量，足够保存一个大型工作区的结果
+DEFAULT_MAX_DISK_ENTRIES = 20000
+
+# 每写入这么多个文件清理一次缓存目录
+PRUNE_EVERY = 64
+
+
+class LintCache:
+    """
+    检查结果的 LRU 缓存
+    键由代码内容和检查器签名（检查器版本与选项）共同决定，没有过期时间，
+    检查器升级或选项改变后旧结果不会再被命中
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, cache_dir: Optional[str] = None,
+                 max_disk_entries: int = DEFAULT_MAX_DISK_ENTRIES):
+        """
+        初始化缓存
+
+        Args:
+            max_entries: 内存中最多保留的结果数量
+            cache_dir: 缓存目录（可选），为 None 时只缓存在内存中
+            max_disk_entries: 缓存目录中最多保留的文件数量
+        """
+        self.max_entries = max_entries
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_disk_entries = max_disk_entries
+        self._entries: "OrderedDict[str, List[LintResult]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(code: str, signature: str) -> str:
+        """
+        计算缓存键
+
+        Args:
+            code: 代码内容
+            signature: 检查器签名
+
+        Returns:
+            32 个字符的十六进制哈希，与进程无关，可以用作文件名
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{LINT_CACHE_VERSION}\0{signature}\0".encode("utf-8"))
+        digest.update(code.encode("utf-8", "surrogatepass"))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[List[LintResult]]:
+        """
+        获取缓存的检查结果，内存中没有时尝试读取缓存目录
+
+        Args:
+            key: key 返回的缓存键
+
+        Returns:
+            检查结果，未命中时为 None
+        """
+        with self._lock:
+            results = self._entries.get(key)
+            if results is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return list(results)
+
+        results = self._read(key)
+        with self._lock:
+            if results is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._store(key, results)
+        return list(results)
+
+    def put(self, key: str, results: List[LintResult]):
+        """
+        保存检查结果，设置了缓存目录时同时写入文件
+
+        Args:
+            key: key 返回的缓存键
+            results: 检查结果
+        """
+        results = [tuple(result) for result in results]
+        with self._lock:
+            self._store(key, results)
+            self._writes += 1
+            prune = self._writes % PRUNE_EVERY == 0
+        self._write(key, results)
+        if prune:
+            self.prune()
+
+    def clear(self):
+        """
+        清空内存中的缓存，缓存目录中的文件保留
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _store(self, key: str, results: List[LintResult]):
+        """保存到内存并淘汰最久没有使用的结果，调用方持有锁"""
+        self._entries[key] = results
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _path(self, key: str) -> Path:
+        """缓存键对应的文件"""
+        return self.cache_dir / f"{key}.json"
+
+    def _read(self, key: str) -> Optional[List[LintResult]]:
+        """
+        从缓存目录读取检查结果
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            检查结果，没有缓存目录、文件不存在或已损坏时为 None
+        """
+        if self.cache_dir is None:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as fp:
+                data = json.load(fp)
+            if data.get("version") != LINT_CACHE_VERSION:
+                return None
+            results = [tuple(result) for result in data["results"]]
+            # 更新修改时间，清理时按最近使用的顺序保留
+            os.utime(path)
+            return results
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"读取检查结果缓存失败: {str(e)}")
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            return None
+
+    def _write(self, key: str, results: List[LintResult]):
+        """
+        把检查结果写入缓存目录，先写临时文件再替换，避免读到写了一半的文件
+
+        Args:
+            key: 缓存键
+            results: 检查结果
+        """
+        if self.cache_dir is None:
+            return
+        path = self._path(key)
+        temp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            with open(temp_path, "w", encoding="utf-8") as fp:
+                json.dump({"version": LINT_CACHE_VERSION, "results": results}, fp, ensure_ascii=False)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"写入检查结果缓存失败: {str(e)}")
+            try:
+                temp_path.unlink()
+            except OSError:
+                pass
+
+    def prune(self):
+        """
+        缓存目录中的文件超过上限时删除最久没有使用的文件
+        """
+        if self.cache_dir is None:
+            return
+        try:
+            files = [(entry.stat().st_mtime, entry.path) for entry in os.scandir(self.cache_dir)
+                     if entry.name.endswith(".json")]
+        except OSError:
+            return
+        if len(files) <= self.max_disk_entries:
+            return
+        files.sort()
+        for _, path in files[:len(files) - self.max_disk_entries]:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+
+# 全局检查结果缓存实例
+_global_lint_cache = None
+
+
+def get_lint_cache() -> LintCache:
+    """
+    获取全局检查结果缓存，缓存目录来自设置 advanced.lint-cache-dir
+
+    Returns:
+        LintCache 实例
+    """
+    global _global_lint_cache
+    if _global_lint_cache is None:
+        from library.api import Settings
+        _global_lint_cache = LintCache(cache_dir=Settings.Advanced.lint_cache_dir())
+    return _global_lint_cache
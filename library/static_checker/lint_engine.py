@@ -0,0 +1,327 @@
+"""
+进程内 Python 代码检查引擎
+pyflakes 和 pycodestyle 只在第一次检查时加载一次，代码直接在内存中检查，
+不再为每次检查启动 flake8 进程、写临时文件。
+输出与 flake8 默认配置相同的 (行, 列, 代码, 消息)，两者都没有安装时退回调用 flake8 命令
+"""
+
+import ast
+import os
+import re
+import subprocess
+import tempfile
+import threading
+import time
+from typing import List, Optional, Tuple
+
+# flake8 命令的超时时间，单位为秒
+FLAKE8_TIMEOUT = 3
+
+# 等待 flake8 命令时检查是否取消的间隔，单位为秒
+CANCEL_POLL_INTERVAL = 0.05
+
+# 与 flake8 相同的行内 noqa 注释，可以只忽略列出的代码
+NOQA_INLINE = re.compile(r"#\s*noqa(?::[\s]?(?P<codes>([A-Z][0-9]+(?:[,\s]+)?)+))?", re.IGNORECASE)
+
+# 与 flake8 相同的整个文件的 noqa 注释
+NOQA_FILE = re.compile(r"#\s*flake8[:=]\s*noqa(?P<codes>:\s?(.*))?", re.IGNORECASE)
+
+# 检查结果: (行号, 从 1 开始的列号, 错误代码, 消息)
+LintResult = Tuple[int, int, str, str]
+
+
+class LintCancelled(Exception):
+    """检查被更新的检查取代，已经中止"""
+
+
+def raise_if_cancelled(cancel: Optional[threading.Event]):
+    """
+    检查已被取消时抛出 LintCancelled
+
+    Args:
+        cancel: 取消事件（可选）
+    """
+    if cancel is not None and cancel.is_set():
+        raise LintCancelled()
+
+
+class LintEngine:
+    """
+    常驻的代码检查引擎
+    检查器模块和 pycodestyle 的选项只加载一次，之后每次检查只做检查本身。
+    check 可以在多个线程中同时调用
+    """
+
+    def __init__(self):
+        """
+        初始化引擎，模块在第一次检查时才加载
+        """
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._pyflakes = None
+        self._pyflakes_codes = {}
+        self._pycodestyle = None
+        self._style_options = None
+        self._report_class = None
+        self._checker_class = None
+        # flake8 命令的版本和配置文件无法事先得知，只能区分是否使用了它
+        self._signature = "flake8"
+
+    def _load(self):
+        """
+        加载 pyflakes 和 pycodestyle，任一没有安装时引擎不可用
+        """
+        with self._lock:
+            if self._loaded:
+                return
+            try:
+                import pycodestyle
+                import pyflakes
+                from pyflakes import checker as pyflakes_checker
+            except ImportError as e:
+                print(f"进程内检查不可用，使用 flake8 命令: {str(e)}")
+                self._loaded = True
+                return
+
+            try:
+                import flake8
+                from flake8.plugins.pyflakes import FLAKE8_PYFLAKES_CODES
+                self._pyflakes_codes = dict(FLAKE8_PYFLAKES_CODES)
+                codes_version = flake8.__version__
+            except ImportError:
+                # 没有 flake8 时无法得到 F 代码表，未知的消息按 flake8 的做法记为 F999
+                self._pyflakes_codes = {}
+                codes_version = None
+
+            class CollectingReport(pycodestyle.BaseReport):
+                """收集 pycodestyle 的结果而不打印"""
+
+                def __init__(self, options):
+                    super().__init__(options)
+                    self.results: List[LintResult] = []
+
+                def error(self, line_number, offset, text, check):
+                    code = super().error(line_number, offset, text, check)
+                    if code:
+                        self.results.append((line_number, offset + 1, code, text[5:]))
+                    return code
+
+            class CancellableChecker(pycodestyle.Checker):
+                """每个逻辑行检查前确认检查没有被取消"""
+
+                cancel = None
+
+                def check_logical(self):
+                    raise_if_cancelled(self.cancel)
+                    return super().check_logical()
+
+            # 不读取命令行和配置文件，使用与 flake8 相同的默认选项
+            style = pycodestyle.StyleGuide(parse_argv=False, config_file=False)
+            self._pyflakes = pyflakes_checker
+            self._pycodestyle = pycodestyle
+            self._style_options = style.options
+            self._report_class = CollectingReport
+            self._checker_class = CancellableChecker
+            options = style.options
+            self._signature = (
+                f"pyflakes {pyflakes.__version__}; pycodestyle {pycodestyle.__version__}; "
+                f"max-line-length {options.max_line_length}; "
+                f"select {','.join(sorted(options.select))}; ignore {','.join(sorted(options.ignore))}; "
+                f"codes from flake8 {codes_version}"
+            )
+            self._loaded = True
+
+    @property
+    def available(self) -> bool:
+        """
+        pyflakes 和 pycodestyle 是否都已安装
+
+        Returns:
+            可以在进程内检查时为 True
+        """
+        self._load()
+        return self._pyflakes is not None
+
+    @property
+    def signature(self) -> str:
+        """
+        检查器版本和选项的描述，任何一项改变都可能改变检查结果
+
+        Returns:
+            签名字符串，用作检查结果缓存键的一部分
+        """
+        self._load()
+        return self._signature
+
+    def check(self, code: str, tree: Optional[ast.AST] = None,
+              cancel: Optional[threading.Event] = None) -> List[LintResult]:
+        """
+        在内存中检查代码，代码应当没有语法错误
+
+        Args:
+            code: 代码内容
+            tree: 已经解析好的语法树（可选），省去再次解析。pyflakes 会修改节点，
+                不要传入与其他组件共享的语法树
+            cancel: 取消事件（可选），设置后检查在下一个逻辑行前中止
+
+        Returns:
+            按位置排序的检查结果
+
+        Raises:
+            LintCancelled: 检查被取消
+        """
+        if not self.available:
+            return run_flake8(code, cancel=cancel)
+        file_noqa = NOQA_FILE.search(code)
+        if file_noqa and not file_noqa.group("codes"):
+            # 与 flake8 相同，带代码的整个文件 noqa 不生效
+            return []
+
+        lines = code.splitlines(True)
+        if tree is None:
+            tree = ast.parse(code)
+        results = self._check_pyflakes(tree)
+        raise_if_cancelled(cancel)
+        results.extend(self._check_pycodestyle(lines, cancel))
+        results = [result for result in results if not self._is_suppressed(result, lines)]
+        results.sort(key=lambda result: (result[0], result[1]))
+        return results
+
+    def _check_pyflakes(self, tree: ast.AST) -> List[LintResult]:
+        """
+        用 pyflakes 检查未定义、未使用的名称等问题
+
+        Args:
+            tree: 语法树
+
+        Returns:
+            检查结果
+        """
+        checker = self._pyflakes.Checker(tree, filename="<editor>")
+        results = []
+        for message in checker.messages:
+            code = self._pyflakes_codes.get(type(message).__name__, "F999")
+            text = message.message % message.message_args
+            results.append((message.lineno, getattr(message, "col", 0) + 1, code, text))
+        return results
+
+    def _check_pycodestyle(self, lines: List[str], cancel: Optional[threading.Event] = None) -> List[LintResult]:
+        """
+        用 pycodestyle 检查代码风格
+
+        Args:
+            lines: 保留换行符的代码行
+            cancel: 取消事件（可选）
+
+        Returns:
+            检查结果
+        """
+        report = self._report_class(self._style_options)
+        checker = self._checker_class(lines=lines, options=self._style_options, report=report)
+        checker.cancel = cancel
+        checker.check_all()
+        return report.results
+
+    @staticmethod
+    def _is_suppressed(result: LintResult, lines: List[str]) -> bool:
+        """
+        结果所在的行是否有忽略它的 noqa 注释
+
+        Args:
+            result: 检查结果
+            lines: 代码行
+
+        Returns:
+            被忽略时为 True
+        """
+        line = result[0]
+        if not 1 <= line <= len(lines):
+            return False
+        match = NOQA_INLINE.search(lines[line - 1])
+        if match is None:
+            return False
+        codes = match.group("codes")
+        if not codes:
+            return True
+        return any(result[2].startswith(code) for code in re.split(r"[,\s]+", codes.strip()) if code)
+
+
+def run_flake8(code: str, timeout: float = FLAKE8_TIMEOUT,
+               cancel: Optional[threading.Event] = None) -> List[LintResult]:
+    """
+    写入临时文件后调用 flake8 命令检查，进程内检查不可用时使用
+
+    Args:
+        code: 代码内容
+        timeout: 超时时间（秒）
+        cancel: 取消事件（可选），设置后结束正在运行的 flake8 进程
+
+    Returns:
+        检查结果，flake8 没有安装或超时时为空列表
+
+    Raises:
+        LintCancelled: 检查被取消
+    """
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False, encoding='utf-8') as f:
+        f.write(code)
+        temp_file_path = f.name
+
+    try:
+        try:
+            process = subprocess.Popen(
+                ["flake8",
+                 "--format", "%(row)d,%(col)d,%(code)s,%(text)s",
+                 temp_file_path],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True
+            )
+        except OSError as e:
+            print(f"无法运行flake8: {str(e)}")
+            return []
+
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                stdout, _ = process.communicate(timeout=CANCEL_POLL_INTERVAL)
+                break
+            except subprocess.TimeoutExpired:
+                cancelled = cancel is not None and cancel.is_set()
+                if not cancelled and time.monotonic() < deadline:
+                    continue
+                process.kill()
+                process.communicate()
+                if cancelled:
+                    raise LintCancelled()
+                print("flake8检查超时")
+                return []
+    finally:
+        os.unlink(temp_file_path)
+
+    results = []
+    for line in stdout.splitlines():
+        parts = line.split(',', 3)
+        if len(parts) < 4:
+            continue
+        try:
+            results.append((int(parts[0]), int(parts[1]), parts[2], parts[3]))
+        except ValueError:
+            continue
+    return results
+
+
+# 全局检查引擎实例
+_global_lint_engine = None
+
+
+def get_lint_engine() -> LintEngine:
+    """
+    获取全局检查引擎实例
+
+    Returns:
+        LintEngine 实例
+    """
+    global _global_lint_engine
+    if _global_lint_engine is None:
+        _global_lint_engine = LintEngine()
+    return _global_lint_engine
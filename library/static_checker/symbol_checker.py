@@ -4,15 +4,48 @@
 包含工厂模式和管理器功能
 """
 
-from typing import List, Optional, Dict, Set, Type
+from typing import Callable, List, Optional, Dict, Set, Type
+from concurrent.futures import ThreadPoolExecutor
 from tkinter import Toplevel, Label, Button, Frame
 from library.static_checker.base import BaseStaticChecker, StaticCheckError
+from library.line_index import LineIndex
+from library.static_checker.lint_cache import get_lint_cache
+from library.static_checker.lint_engine import LintCancelled, get_lint_engine
+from library.static_checker.workspace_lint import WorkspaceLint
 import ast
+import difflib
 import re
 import os
 import json
+import queue
+import threading
 import time
 
+# 后台检查完成后多久在 Tk 线程上取回结果，单位为毫秒
+CHECK_POLL_MS = 20
+
+# 工作区检查期间多久在 Tk 线程上取回一次结果，单位为毫秒
+WORKSPACE_POLL_MS = 50
+
+# 错误标记使用的固定标签，按严重程度区分
+MARKER_TAGS = {"error": "error_marker", "warning": "warning_marker"}
+
+# 全局静态检查线程池
+_global_check_executor = None
+
+
+def get_check_executor() -> ThreadPoolExecutor:
+    """
+    获取在后台运行静态检查的线程池
+
+    Returns:
+        ThreadPoolExecutor 实例
+    """
+    global _global_check_executor
+    if _global_check_executor is None:
+        _global_check_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="static_check")
+    return _global_check_executor
+
 
 class SymbolChecker(BaseStaticChecker):
     """
@@ -52,10 +85,6 @@ class SymbolChecker(BaseStaticChecker):
 
         self.supported_languages = self.SUPPORTED_LANGUAGES
 
-        self._flake8_cache = {}
-        self._flake8_cache_timeout = 5
-        self._last_flake8_call = 0
-
     def check(self, code: str, file_path: Optional[str] = None) -> List[StaticCheckError]:
         self.clear_errors()
 
@@ -85,61 +114,36 @@ class SymbolChecker(BaseStaticChecker):
         try:
             print(f"使用flake8检查Python代码，代码长度: {len(code)}")
 
-            import subprocess
-            import tempfile
+            line_index = LineIndex(code)
+            engine = get_lint_engine()
+            cache = get_lint_cache()
+            cache_key = cache.key(code, engine.signature)
 
-            code_hash = hash(code)
-            current_time = time.time()
-
-            if code_hash in self._flake8_cache and \
-               (current_time - self._flake8_cache[code_hash]['timestamp'] < self._flake8_cache_timeout):
+            # 只缓存没有语法错误的代码的结果，命中时无需再解析
+            results = cache.get(cache_key)
+            if results is not None:
                 print(f"使用缓存的flake8结果")
-                self.errors = self._flake8_cache[code_hash]['errors'].copy()
-                return self.get_errors()
-
-            code_lines = code.split('\n')
+            else:
+                # 语法错误时 flake8 也只会报告 E999。pyflakes 会在节点上记录父节点，
+                # 不能使用与高亮器共享的解析缓存中的语法树，否则缓存的结果可能带有错误的行号
+                try:
+                    tree = ast.parse(code)
+                except (SyntaxError, ValueError, MemoryError, RecursionError) as e:
+                    # 括号或语句嵌套过深时解析器抛出 MemoryError 或 RecursionError
+                    self._add_syntax_error(e, line_index)
+                    return self.get_errors()
 
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False, encoding='utf-8') as f:
-                f.write(code)
-                temp_file_path = f.name
+                # 常驻的检查引擎在内存中检查，不再为每次检查启动 flake8 进程
+                results = engine.check(code, tree, self.cancel)
+                cache.put(cache_key, results)
 
-            try:
-                result = subprocess.run(
-                    ["flake8",
-                     "--format", "%(row)d,%(col)d,%(code)s,%(text)s",
-                     temp_file_path],
-                    capture_output=True,
-                    text=True,
-                    timeout=3
-                )
-
-                print(f"flake8返回码: {result.returncode}")
-                print(f"flake8输出: {result.stdout}")
-                print(f"flake8错误: {result.stderr}")
-
-                if result.stdout:
-                    for line in result.stdout.strip().split('\n'):
-                        if line.strip():
-                            self._parse_flake8_output(line, code_lines)
-
-            finally:
-                os.unlink(temp_file_path)
+            for row, col, error_code, text in results:
+                self._add_flake8_error(row, col, error_code, text, code, line_index)
 
             print(f"flake8检查完成，错误数量: {len(self.errors)}")
 
-            self._flake8_cache[code_hash] = {
-                'timestamp': current_time,
-                'errors': self.errors.copy()
-            }
-
-            if len(self._flake8_cache) > 10:
-                oldest_key = min(self._flake8_cache.keys(),
-                               key=lambda k: self._flake8_cache[k]['timestamp'])
-                del self._flake8_cache[oldest_key]
-                print(f"移除最旧的flake8缓存项，当前缓存大小: {len(self._flake8_cache)}")
-
-        except subprocess.TimeoutExpired:
-            print("flake8检查超时")
+        except LintCancelled:
+            raise
         except Exception as e:
             print(f"flake8检查错误: {str(e)}")
             import traceback
@@ -147,76 +151,94 @@ class SymbolChecker(BaseStaticChecker):
 
         return self.get_errors()
 
-    def _parse_flake8_output(self, output_line: str, code_lines: list):
-        try:
-            parts = output_line.split(',')
-            if len(parts) < 4:
-                return
-
-            line = int(parts[0])
-            column = int(parts[1])
-            error_code = parts[2]
-            error_message = ','.join(parts[3:])
-
-            if error_code.startswith('E'):
-                error_type = "error"
-                severity = "error"
-            elif error_code.startswith('W'):
-                error_type = "warning"
-                severity = "warning"
+    def _add_flake8_error(self, line: int, column: int, error_code: str, error_message: str,
+                          code: str, line_index: LineIndex):
+        """
+        按 flake8 的结果记录错误，并根据错误代码估计标记的结束列
+
+        Args:
+            line: 行号
+            column: flake8 输出的列号
+            error_code: 错误代码
+            error_message: 错误消息
+            code: 代码内容
+            line_index: 代码的行偏移索引
+        """
+        if error_code.startswith('E'):
+            error_type = "error"
+            severity = "error"
+        elif error_code.startswith('W'):
+            error_type = "warning"
+            severity = "warning"
+        elif error_code.startswith('F'):
+            error_type = "warning"
+            severity = "warning"
+        elif error_code.startswith('C'):
+            error_type = "warning"
+            severity = "warning"
+        elif error_code.startswith('N'):
+            error_type = "warning"
+            severity = "warning"
+        else:
+            error_type = "lint-error"
+            severity = "warning"
+
+        end_line = line
+        end_column = column
+
+        line_exists = 1 <= line <= line_index.line_count
+        if line_exists:
+            line_content = code[line_index.line_start(line):line_index.line_end(line)]
+
+            if error_code.startswith('E2') or error_code.startswith('E7'):
+                end_column = column + 1
+            elif error_code.startswith('E5'):
+                end_column = len(line_content)
             elif error_code.startswith('F'):
-                error_type = "warning"
-                severity = "warning"
-            elif error_code.startswith('C'):
-                error_type = "warning"
-                severity = "warning"
-            elif error_code.startswith('N'):
-                error_type = "warning"
-                severity = "warning"
+                if column < len(line_content):
+                    for i in range(column, len(line_content)):
+                        if not (line_content[i].isalnum() or line_content[i] == '_'):
+                            end_column = i
+                            break
+                    else:
+                        end_column = len(line_content)
             else:
-                error_type = "lint-error"
-                severity = "warning"
-
-            end_line = line
-            end_column = column
-
-            if 1 <= line <= len(code_lines):
-                line_content = code_lines[line - 1]
-
-                if error_code.startswith('E2') or error_code.startswith('E7'):
-                    end_column = column + 1
-                elif error_code.startswith('E5'):
-                    end_column = len(line_content)
-                elif error_code.startswith('F'):
-                    if column < len(line_content):
-                        for i in range(column, len(line_content)):
-                            if not (line_content[i].isalnum() or line_content[i] == '_'):
-                                end_column = i
-                                break
-                        else:
-                            end_column = len(line_content)
-                else:
-                    end_column = column + 1
-
-            end_column = min(end_column, len(code_lines[line - 1])) if 1 <= line <= len(code_lines) else column + 1
-
-            self._add_error(
-                line=line,
-                column=column + 1,
-                end_line=end_line,
-                end_column=end_column + 1,
-                error_type=error_type,
-                error_message=f"{error_code}: {error_message}",
-                severity=severity
-            )
-
-            print(f"错误位置: {line}:{column+1} 到 {end_line}:{end_column+1}")
-            print(f"解析flake8错误: 行{line}, 列{column} - {error_code}: {error_message}")
-
-        except Exception as e:
-            print(f"解析flake8输出错误: {str(e)}")
-            import traceback
-            traceback.print_exc()
+                end_column = column + 1
+
+        end_column = min(end_column, line_index.line_length(line)) if line_exists else column + 1
+
+        self._add_error(
+            line=line,
+            column=column + 1,
+            end_line=end_line,
+            end_column=end_column + 1,
+            error_type=error_type,
+            error_message=f"{error_code}: {error_message}",
+            severity=severity
+        )
+
+    def _add_syntax_error(self, error: Exception, line_index: LineIndex):
+        """
+        将语法错误按 flake8 E999 的格式记录
+
+        Args:
+            error: ast.parse 抛出的异常
+            line_index: 代码的行偏移索引
+        """
+        line = getattr(error, "lineno", None) or 1
+        column = max((getattr(error, "offset", None) or 1) - 1, 0)
+        message = getattr(error, "msg", None) or str(error)
+        end_column = min(column + 1, line_index.line_length(line))
+
+        self._add_error(
+            line=line,
+            column=column + 1,
+            end_line=line,
+            end_column=max(end_column, column) + 1,
+            error_type="error",
+            error_message=f"E999: {type(error).__name__}: {message}",
+            severity="error"
+        )
 
     def _build_python_symbol_table(self, tree: ast.AST):
         self.symbol_table = {
@@ -509,6 +531,24 @@ class StaticCheckManager:
 
         self._editor_tooltips = {}
 
+        # 结果表格中每行的值和对应的条目，下次更新时只修改不同的行
+        self._tree_rows = []
+        self._tree_items = []
+        # {编辑器: {行号: [错误]}}，点击标记时按行号查找
+        self._editor_diagnostics = {}
+
+        # 后台检查: {编辑器: 最新一代}、{编辑器: [未取回的检查]}、{编辑器: 取回结果的定时器}
+        self._check_generations = {}
+        self._check_jobs = {}
+        self._check_poll_timers = {}
+
+        # 工作区检查: 显示在结果表格中的检查、{文件路径: 表格中文件所在的行}、{文件路径: 问题数}、
+        # 取回结果的定时器
+        self.workspace_lint = None
+        self._workspace_items = {}
+        self._workspace_problems = {}
+        self._workspace_poll_timer = None
+
     def set_flake8_tree(self, tree_widget):
         """设置flake8结果表格组件"""
         self.flake8_tree = tree_widget
@@ -525,7 +565,7 @@ class StaticCheckManager:
 
             if hasattr(editor_widget, "tag_names"):
                 for tag in editor_widget.tag_names():
-                    if tag == "error" or tag == "warning" or tag.startswith("error_"):
+                    if tag == "error" or tag == "warning" or tag.startswith("error_") or tag in MARKER_TAGS.values():
                         editor_widget.tag_remove(tag, "1.0", "end")
         except Exception as e:
             print(f"清理编辑器资源失败: {str(e)}")
@@ -567,6 +607,8 @@ class StaticCheckManager:
         self._editor_mappings[editor_widget] = file_path
 
     def unregister_editor(self, editor_widget):
+        self.cancel_checks(editor_widget)
+        self._editor_diagnostics.pop(editor_widget, None)
         if editor_widget in self._editor_mappings:
             del self._editor_mappings[editor_widget]
 
@@ -575,6 +617,27 @@ class StaticCheckManager:
             self._editor_mappings[editor_widget] = file_path
 
     def check_code(self, code: str, file_path: Optional[str] = None, editor_widget=None) -> List[StaticCheckError]:
+        all_errors = self.run_checks(code, file_path, editor_widget)
+        self.apply_results(all_errors, code, file_path, editor_widget)
+        return all_errors
+
+    def run_checks(self, code: str, file_path: Optional[str] = None, editor_widget=None,
+                   cancel: Optional[threading.Event] = None) -> List[StaticCheckError]:
+        """
+        运行所有适用的检查器，不更新界面，可以在工作线程中调用
+
+        Args:
+            code: 代码内容
+            file_path: 文件路径（可选），用于确定语言
+            editor_widget: 编辑器组件（可选），传给检查器
+            cancel: 取消事件（可选），设置后检查尽快中止
+
+        Returns:
+            所有检查器的错误列表
+
+        Raises:
+            LintCancelled: 检查被取消
+        """
         print(f"静态检查开始，文件路径: {file_path}, 代码长度: {len(code)}")
         language = self.checker_factory.get_language_from_file(file_path) if file_path else None
 
@@ -590,120 +653,452 @@ class StaticCheckManager:
         all_errors = []
 
         for checker in checkers:
+            if cancel is not None and cancel.is_set():
+                raise LintCancelled()
             print(f"执行检查器: {type(checker).__name__}")
+            checker.cancel = cancel
             errors = checker.check(code, file_path)
             print(f"检查器返回的错误数量: {len(errors)}")
             all_errors.extend(errors)
 
         print(f"所有检查器完成，总错误数量: {len(all_errors)}")
+        return all_errors
 
+    def apply_results(self, all_errors: List[StaticCheckError], code: str,
+                      file_path: Optional[str] = None, editor_widget=None):
+        """
+        记录检查结果并更新编辑器标记和结果表格，只能在 Tk 线程中调用
+
+        Args:
+            all_errors: 错误列表
+            code: 被检查的代码内容
+            file_path: 文件路径（可选）
+            editor_widget: 编辑器组件（可选）
+        """
         if file_path:
             self._current_errors[file_path] = all_errors
 
         if editor_widget:
             print(f"更新编辑器错误显示，错误数量: {len(all_errors)}")
-            self._update_editor_errors(editor_widget, all_errors)
+            self._update_editor_errors(editor_widget, all_errors, LineIndex(code))
 
         if self.flake8_tree:
-            self._update_flake8_tree(all_errors)
+            if self.workspace_lint is not None:
+                # 表格显示工作区的结果时只更新工作区中这个文件的结果
+                path = os.path.abspath(file_path) if file_path else None
+                if path and path.startswith(os.path.join(self.workspace_lint.root, "")):
+                    self._show_workspace_file(path, all_errors)
+            else:
+                self._update_flake8_tree(all_errors)
+
+    def submit_check(self, code: str, file_path: Optional[str], editor_widget,
+                     on_finished: Optional[Callable[[float], None]] = None,
+                     on_dropped: Optional[Callable[[], None]] = None) -> int:
+        """
+        在工作线程中检查编辑器的代码，完成后在 Tk 线程中更新界面
+
+        每次提交都是该编辑器新的一代，之前未完成的检查被取消：
+        还没开始的直接丢弃，正在运行的在下一个逻辑行前中止（flake8 进程被结束），
+        只有最新一代的结果会更新界面
+
+        Args:
+            code: 代码内容
+            file_path: 文件路径
+            editor_widget: 编辑器组件，在它上面安排取回结果的定时器
+            on_finished: 最新一代的检查完成并更新界面后调用，参数为检查耗时（秒）
+            on_dropped: 检查被取代或失败、结果被丢弃时调用
+
+        Returns:
+            这次检查的代数
+        """
+        generation = self._check_generations.get(editor_widget, 0) + 1
+        self._check_generations[editor_widget] = generation
+
+        jobs = self._check_jobs.setdefault(editor_widget, [])
+        for job in list(jobs):
+            job["cancel"].set()
+            if job["future"].cancel():
+                # 还没开始运行，不会再有结果
+                jobs.remove(job)
+                self._drop_check(job)
+
+        cancel = threading.Event()
+        future = get_check_executor().submit(self._timed_run_checks, code, file_path, editor_widget, cancel)
+        jobs.append({
+            "generation": generation,
+            "future": future,
+            "cancel": cancel,
+            "code": code,
+            "file_path": file_path,
+            "on_finished": on_finished,
+            "on_dropped": on_dropped,
+        })
+        if editor_widget not in self._check_poll_timers:
+            self._check_poll_timers[editor_widget] = editor_widget.after(
+                CHECK_POLL_MS, lambda: self._poll_checks(editor_widget))
+        return generation
+
+    def cancel_checks(self, editor_widget):
+        """
+        取消编辑器所有未完成的后台检查，它们的结果不再更新界面
+
+        Args:
+            editor_widget: 编辑器组件
+        """
+        for job in self._check_jobs.pop(editor_widget, []):
+            job["cancel"].set()
+            job["future"].cancel()
+        self._check_generations.pop(editor_widget, None)
+        timer_id = self._check_poll_timers.pop(editor_widget, None)
+        if timer_id is not None:
+            try:
+                editor_widget.after_cancel(timer_id)
+            except Exception:
+                pass
 
-        return all_errors
+    def has_pending_checks(self, editor_widget) -> bool:
+        """
+        编辑器是否还有没取回结果的后台检查
+
+        Args:
+            editor_widget: 编辑器组件
+
+        Returns:
+            有未完成的检查时为 True
+        """
+        return bool(self._check_jobs.get(editor_widget))
+
+    def _timed_run_checks(self, code: str, file_path: Optional[str], editor_widget,
+                          cancel: threading.Event):
+        """在工作线程中运行检查，返回 (错误列表, 耗时)"""
+        started = time.perf_counter()
+        errors = self.run_checks(code, file_path, editor_widget, cancel)
+        return errors, time.perf_counter() - started
+
+    def _drop_check(self, job: dict):
+        """通知调用方检查结果被丢弃"""
+        if job["on_dropped"] is not None:
+            try:
+                job["on_dropped"]()
+            except Exception as e:
+                print(f"丢弃检查回调失败: {str(e)}")
+
+    def _poll_checks(self, editor_widget):
+        """
+        在 Tk 线程中取回已完成的后台检查，只应用最新一代的结果
+
+        Args:
+            editor_widget: 编辑器组件
+        """
+        self._check_poll_timers.pop(editor_widget, None)
+        jobs = self._check_jobs.get(editor_widget)
+        if jobs is None:
+            return
+        latest = self._check_generations.get(editor_widget)
+
+        while jobs and jobs[0]["future"].done():
+            job = jobs.pop(0)
+            future = job["future"]
+            if future.cancelled() or job["generation"] != latest:
+                self._drop_check(job)
+                continue
+            try:
+                errors, seconds = future.result()
+            except LintCancelled:
+                self._drop_check(job)
+                continue
+            except Exception as e:
+                print(f"后台静态检查失败: {str(e)}")
+                self._drop_check(job)
+                continue
+
+            self.apply_results(errors, job["code"], job["file_path"], editor_widget)
+            if job["on_finished"] is not None:
+                try:
+                    job["on_finished"](seconds)
+                except Exception as e:
+                    print(f"检查完成回调失败: {str(e)}")
+
+        if jobs:
+            self._check_poll_timers[editor_widget] = editor_widget.after(
+                CHECK_POLL_MS, lambda: self._poll_checks(editor_widget))
+        else:
+            self._check_jobs.pop(editor_widget, None)
 
     def _update_flake8_tree(self, errors: List[StaticCheckError]):
-        """更新flake8结果表格"""
+        """
+        更新flake8结果表格，只修改与上次不同的行
+
+        Args:
+            errors: 错误列表
+        """
         print(f"更新flake8结果表格，错误数量: {len(errors)}")
         
         try:
-            for item in self.flake8_tree.get_children():
-                self.flake8_tree.delete(item)
+            tree = self.flake8_tree
+            rows = [self._tree_row(error) for error in errors]
+            if tuple(tree.get_children()) != tuple(self._tree_items):
+                # 表格被其他代码修改过（或第一次更新），从头填充
+                children = tree.get_children()
+                if children:
+                    tree.delete(*children)
+                self._tree_rows = []
+                self._tree_items = []
             
-            for error in errors:
-                icon = "❌" if error.severity == "error" else "⚠️"
-                self.flake8_tree.insert("", "end", values=(
-                    icon,
-                    error.line,
-                    error.column,
-                    error.error_type,
-                    error.error_message
-                ))
+            items = self._tree_items
+            matcher = difflib.SequenceMatcher(None, self._tree_rows, rows, autojunk=False)
+            # 从后往前修改，前面的行号不受影响
+            for opcode, i1, i2, j1, j2 in reversed(matcher.get_opcodes()):
+                if opcode == "equal":
+                    continue
+                common = min(i2 - i1, j2 - j1)
+                for k in range(common):
+                    tree.item(items[i1 + k], values=rows[j1 + k])
+                if i2 - i1 > common:
+                    tree.delete(*items[i1 + common:i2])
+                for k in range(common, j2 - j1):
+                    tree.insert("", i1 + k, values=rows[j1 + k])
             
-            error_count = len(errors)
-            error_text = f"{error_count} 个问题"
+            self._tree_rows = rows
+            self._tree_items = list(tree.get_children())
             
-            if hasattr(self.flake8_tree, 'master') and hasattr(self.flake8_tree.master.master, 'error_count_label'):
-                try:
-                    self.flake8_tree.master.master.error_count_label.config(text=error_text)
-                except Exception:
-                    pass
+            self._set_error_count_text(f"{len(errors)} 个问题")
             
             print(f"flake8表格更新完成")
         except Exception as e:
             print(f"更新flake8表格失败: {str(e)}")
             import traceback
             traceback.print_exc()
+            self._tree_rows = []
+            self._tree_items = []
+
+    @staticmethod
+    def _tree_row(error: StaticCheckError) -> tuple:
+        """错误在结果表格中的一行"""
+        icon = "❌" if error.severity == "error" else "⚠️"
+        return (icon, error.line, error.column, error.error_type, error.error_message)
+
+    def _set_error_count_text(self, text: str):
+        """更新结果表格上方的问题数量"""
+        tree = self.flake8_tree
+        if hasattr(tree, 'master') and hasattr(tree.master.master, 'error_count_label'):
+            try:
+                tree.master.master.error_count_label.config(text=text)
+            except Exception:
+                pass
 
-    def _update_editor_errors(self, editor_widget, errors: List[StaticCheckError]):
+    def check_workspace(self, root: str) -> Optional[WorkspaceLint]:
+        """
+        在后台检查工作区中所有支持的文件，结果在到达时逐个显示在结果表格中
+
+        表格按文件分组，只列出有问题的文件。之后编辑器的检查结果只更新对应文件的分组，
+        直到调用 clear_workspace_results
+
+        Args:
+            root: 工作区目录
+
+        Returns:
+            WorkspaceLint 实例，没有结果表格时为 None
+        """
+        if not self.flake8_tree:
+            return None
+        self.clear_workspace_results()
+        children = self.flake8_tree.get_children()
+        if children:
+            self.flake8_tree.delete(*children)
+        self._tree_rows = []
+        self._tree_items = []
+
+        self.workspace_lint = WorkspaceLint(root, self.checker_factory)
+        self.workspace_lint.start()
+        self._set_error_count_text("正在检查工作区...")
+        self._workspace_poll_timer = self.flake8_tree.after(WORKSPACE_POLL_MS, self._poll_workspace)
+        return self.workspace_lint
+
+    def clear_workspace_results(self):
+        """
+        取消正在运行的工作区检查并清除表格中的工作区结果，表格恢复显示当前编辑器的结果
+        """
+        if self._workspace_poll_timer is not None:
+            try:
+                self.flake8_tree.after_cancel(self._workspace_poll_timer)
+            except Exception:
+                pass
+            self._workspace_poll_timer = None
+        if self.workspace_lint is not None:
+            self.workspace_lint.cancel()
+            self.workspace_lint = None
+        items = [item for item in self._workspace_items.values() if self.flake8_tree.exists(item)]
+        if items:
+            self.flake8_tree.delete(*items)
+        self._workspace_items = {}
+        self._workspace_problems = {}
+
+    def _poll_workspace(self):
+        """在 Tk 线程上显示工作区检查已经得出的结果，检查完成后显示速度"""
+        self._workspace_poll_timer = None
+        lint = self.workspace_lint
+        if lint is None:
+            return
+        # 先读取完成状态，完成前放入队列的结果都会在下面取出
+        finished = lint.done.is_set()
+        try:
+            while True:
+                path, errors = lint.results.get_nowait()
+                self._show_workspace_file(path, errors)
+        except queue.Empty:
+            pass
+
+        problems = sum(self._workspace_problems.values())
+        if finished:
+            self._set_error_count_text(
+                f"{problems} 个问题，{lint.files} 个文件，{lint.files_per_second:.0f} 文件/秒")
+        else:
+            self._set_error_count_text(f"{problems} 个问题，已检查 {lint.reported}/{lint.files} 个文件")
+            self._workspace_poll_timer = self.flake8_tree.after(WORKSPACE_POLL_MS, self._poll_workspace)
+
+    def _show_workspace_file(self, path: str, errors: List[StaticCheckError]):
+        """
+        在工作区结果中显示一个文件的问题，没有问题的文件不显示
+
+        文件占一行，问题是它的子行；每行最后一个值是文件路径，点击时打开文件
+
+        Args:
+            path: 文件的绝对路径
+            errors: 错误列表
+        """
+        tree = self.flake8_tree
+        item = self._workspace_items.get(path)
+        if item is not None and not tree.exists(item):
+            item = None
+        if not errors:
+            if item is not None:
+                tree.delete(item)
+            self._workspace_items.pop(path, None)
+            self._workspace_problems.pop(path, None)
+            return
+
+        name = os.path.relpath(path, self.workspace_lint.root)
+        values = ("📄", "", "", "", f"{name} ({len(errors)})", path)
+        if item is None:
+            item = tree.insert("", "end", values=values, open=True)
+            self._workspace_items[path] = item
+        else:
+            tree.item(item, values=values)
+            children = tree.get_children(item)
+            if children:
+                tree.delete(*children)
+        self._workspace_problems[path] = len(errors)
+        for error in errors:
+            tree.insert(item, "end", values=self._tree_row(error) + (path,))
+
+    def _update_editor_errors(self, editor_widget, errors: List[StaticCheckError],
+                              line_index: Optional[LineIndex] = None):
+        """
+        更新编辑器中的错误标记，只添加和移除与上次不同的标记
+
+        标记使用固定的 error_marker 和 warning_marker 两个标签，标在出错行末尾的换行符上。
+        标签会随文本移动，因此先读取标签当前的区间再与新的区间比较
+
+        Args:
+            editor_widget: 编辑器组件
+            errors: 错误列表
+            line_index: 被检查代码的行偏移索引（可选），没有时从编辑器读取
+        """
         print(f"更新编辑器错误显示，错误数量: {len(errors)}")
 
         try:
-            for tag in editor_widget.tag_names():
-                if tag.startswith("error_marker_") or tag == "error_line" or tag == "warning_line":
-                    editor_widget.tag_remove(tag, "1.0", "end")
-
-            editor_widget.tag_remove("error", "1.0", "end")
-            editor_widget.tag_remove("warning", "1.0", "end")
-
-            self._hide_error_popup()
-
-            if not errors:
-                print("没有错误需要标记")
-                return
+            self._ensure_marker_tags(editor_widget)
 
             line_errors = {}
             for error in errors:
                 if error.line not in line_errors:
                     line_errors[error.line] = []
                 line_errors[error.line].append(error)
+            self._editor_diagnostics[editor_widget] = line_errors
+            self._hide_error_popup()
 
-            for line_num, line_errors_list in line_errors.items():
-                self._add_error_marker(editor_widget, line_num, line_errors_list)
+            if line_index is None:
+                line_index = LineIndex(editor_widget.get("1.0", "end-1c"))
+            marked = {MARKER_TAGS["error"]: [], MARKER_TAGS["warning"]: []}
+            for line_num in sorted(line_errors):
+                if not 1 <= line_num <= line_index.line_count:
+                    continue
+                is_error = any(e.severity == "error" for e in line_errors[line_num])
+                marked[MARKER_TAGS["error" if is_error else "warning"]].append(line_num)
+
+            for tag, lines in marked.items():
+                ranges = self._marker_ranges(lines, line_index)
+                current = editor_widget.tag_ranges(tag)
+                current = set(zip(map(str, current[0::2]), map(str, current[1::2])))
+                removed = [index for pair in sorted(current - ranges) for index in pair]
+                added = [index for pair in sorted(ranges - current) for index in pair]
+                if removed:
+                    editor_widget.tag_remove(tag, *removed)
+                if added:
+                    editor_widget.tag_add(tag, *added)
 
         except Exception as e:
             print(f"更新编辑器错误显示失败: {str(e)}")
             import traceback
             traceback.print_exc()
 
-    def _add_error_marker(self, editor_widget, line_num: int, errors: List[StaticCheckError]):
-        """在行末添加错误标记"""
+    @staticmethod
+    def _marker_ranges(lines: List[int], line_index: LineIndex) -> Set[tuple]:
+        """
+        计算一组行的标记区间，与 Tk 一样合并相邻的区间
+
+        Args:
+            lines: 升序的行号
+            line_index: 行偏移索引
+
+        Returns:
+            {(起始索引, 结束索引)}
+        """
+        ranges = []
+        for line_num in lines:
+            start = f"{line_num}.{line_index.line_length(line_num)}"
+            end = f"{line_num + 1}.0"
+            if ranges and ranges[-1][1] == start:
+                # 空行的换行符紧接在上一行的换行符之后
+                ranges[-1][1] = end
+            else:
+                ranges.append([start, end])
+        return {tuple(pair) for pair in ranges}
+
+    def _ensure_marker_tags(self, editor_widget):
+        """
+        为编辑器配置标记标签并绑定点击事件，每个编辑器只做一次
+
+        Args:
+            editor_widget: 编辑器组件
+        """
+        if editor_widget in self._editor_diagnostics:
+            return
+        self._editor_diagnostics[editor_widget] = {}
+        for severity, tag in MARKER_TAGS.items():
+            color = self._error_theme['error_color'] if severity == "error" else self._error_theme['warning_color']
+            editor_widget.tag_configure(tag, background=color, foreground="white")
+            editor_widget.tag_raise(tag)
+            editor_widget.tag_bind(tag, "<Button-1>",
+                lambda e: self._on_marker_click(e, editor_widget))
+
+    def _on_marker_click(self, event, editor_widget):
+        """
+        点击标记时按点击位置的行号查找错误并显示详情
+
+        Args:
+            event: 点击事件
+            editor_widget: 编辑器组件
+        """
         try:
-            line_content = editor_widget.get(f"{line_num}.0", f"{line_num}.end")
-            line_len = len(line_content)
-
-            marker_pos = f"{line_num}.{line_len}"
-
-            error_count = len(errors)
-            error_count_text = str(error_count)
-
-            is_error = any(e.severity == "error" for e in errors)
-            tag = "error" if is_error else "warning"
-            bg_color = self._error_theme['error_color'] if is_error else self._error_theme['warning_color']
-
-            editor_widget.tag_configure(tag,
-                                        underline=True,
-                                        foreground=bg_color)
-
-            marker_tag = f"error_marker_{line_num}"
-            editor_widget.tag_configure(marker_tag,
-                                        background=bg_color,
-                                        foreground="white")
-
-            editor_widget.tag_add(marker_tag, marker_pos, marker_pos + " lineend")
-
-            editor_widget.tag_bind(marker_tag, "<Button-1>", 
-                lambda e, ln=line_num, errs=errors: self._show_error_popup(e, editor_widget, ln, errs))
-
+            line_num = int(str(editor_widget.index(f"@{event.x},{event.y}")).split(".")[0])
         except Exception as e:
-            print(f"添加错误标记失败: {str(e)}")
+            print(f"获取标记位置失败: {str(e)}")
+            return
+        errors = self._editor_diagnostics.get(editor_widget, {}).get(line_num)
+        if errors:
+            self._show_error_popup(event, editor_widget, line_num, errors)
 
     def _show_error_popup(self, event, editor_widget, line_num: int, errors: List[StaticCheckError]):
         """显示错误详情弹出窗口"""
@@ -815,8 +1210,10 @@ class StaticCheckManager:
             editor_widget.tag_remove("static_check_error", "1.0", "end")
 
             for tag in editor_widget.tag_names():
-                if tag.startswith("error_"):
+                if tag.startswith("error_") or tag in MARKER_TAGS.values():
                     editor_widget.tag_remove(tag, "1.0", "end")
+            if editor_widget in self._editor_diagnostics:
+                self._editor_diagnostics[editor_widget] = {}
 
             if hasattr(editor_widget, "_tooltip") and editor_widget._tooltip:
                 try:
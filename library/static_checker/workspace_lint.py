@@ -0,0 +1,297 @@
+"""
+工作区代码检查
+在进程池中并行检查文件夹下所有支持的文件，每个文件的结果在检查完成后立即送回 Tk 线程显示。
+与编辑器检查共用检查结果缓存，再次检查工作区时只检查内容修改过的文件
+"""
+
+import ast
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from library.static_checker.lint_cache import get_lint_cache
+from library.static_checker.lint_engine import (
+    CANCEL_POLL_INTERVAL, LintCancelled, LintResult, get_lint_engine, raise_if_cancelled)
+
+# 不进入的目录，以 "." 开头的目录（.git、.venv 等）也不进入
+WORKSPACE_IGNORED_DIRS = frozenset({"__pycache__", "node_modules", "venv", "env", "site-packages"})
+
+# 超过这个大小的文件通常是生成的代码，不检查
+MAX_FILE_SIZE = 1024 * 1024
+
+# 每次交给工作进程的文件数量，减少进程间通信的次数
+BATCH_SIZE = 16
+
+# 最多同时等待的批次，限制读入内存但还没有检查的代码
+MAX_PENDING_BATCHES = 32
+
+
+def iter_workspace_files(root: str, extensions: Iterable[str]) -> Iterator[str]:
+    """
+    按目录顺序列出工作区中扩展名受支持的文件
+
+    Args:
+        root: 工作区目录
+        extensions: 支持的扩展名，例如 [".py", ".js"]
+
+    Yields:
+        文件的绝对路径
+    """
+    extensions = frozenset(extensions)
+    for dir_path, dir_names, file_names in os.walk(os.path.abspath(root)):
+        # 原地修改，os.walk 不再进入被忽略的目录
+        dir_names[:] = sorted(name for name in dir_names
+                              if not name.startswith(".") and name not in WORKSPACE_IGNORED_DIRS)
+        for name in sorted(file_names):
+            if os.path.splitext(name)[1] in extensions:
+                yield os.path.join(dir_path, name)
+
+
+def lint_sources(codes: List[str]) -> List[Optional[List[LintResult]]]:
+    """
+    在工作进程中检查一批 Python 代码
+
+    Args:
+        codes: 代码内容列表
+
+    Returns:
+        与 codes 对应的检查结果，有语法错误或嵌套过深无法解析的代码为 None，
+        由主进程的检查器报告 E999
+    """
+    engine = get_lint_engine()
+    results = []
+    for code in codes:
+        try:
+            tree = ast.parse(code)
+        except (SyntaxError, ValueError, MemoryError, RecursionError):
+            results.append(None)
+            continue
+        results.append(engine.check(code, tree))
+    return results
+
+
+# 全局工作区检查进程池
+_global_workspace_pool = None
+
+
+def get_workspace_pool() -> ProcessPoolExecutor:
+    """
+    获取检查工作区的进程池，进程数来自设置 advanced.workspace-lint-workers
+
+    使用 spawn 启动工作进程，不复制正在运行 Tk 和检查线程的主进程
+
+    Returns:
+        ProcessPoolExecutor 实例
+    """
+    global _global_workspace_pool
+    if _global_workspace_pool is None:
+        from library.api import Settings
+        workers = Settings.Advanced.workspace_lint_workers() or os.cpu_count() or 1
+        _global_workspace_pool = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    return _global_workspace_pool
+
+
+def _discard_workspace_pool(pool: Executor):
+    """进程池损坏时丢弃，下次检查重新创建"""
+    global _global_workspace_pool
+    if _global_workspace_pool is pool:
+        _global_workspace_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+class WorkspaceLint:
+    """
+    一次工作区检查
+
+    检查线程遍历工作区：缓存命中的文件直接得出结果，其余 Python 文件分批交给进程池检查，
+    结果写入缓存后放入 results 队列，由 Tk 线程取出显示。检查完成后设置 done
+    """
+
+    def __init__(self, root: str, checker_factory, pool: Optional[Executor] = None):
+        """
+        初始化工作区检查
+
+        Args:
+            root: 工作区目录
+            checker_factory: StaticCheckerFactory 实例，提供支持的扩展名和检查器
+            pool: 运行检查的进程池，默认使用全局进程池
+        """
+        self.root = os.path.abspath(root)
+        self.checker_factory = checker_factory
+        # 与检查器共用全局缓存，工作进程的结果写入后检查器直接命中
+        self.cache = get_lint_cache()
+        self.pool = pool
+        self.cancel_event = threading.Event()
+        self.done = threading.Event()
+        # (文件路径, 错误列表)
+        self.results: "queue.Queue[Tuple[str, list]]" = queue.Queue()
+        self._pending = {}  # {future: [(文件路径, 代码, 缓存键)]}
+        self._thread = None
+
+        self.files = 0      # 找到的文件数
+        self.cached = 0     # 使用缓存结果的文件数
+        self.checked = 0    # 在进程池中检查的文件数
+        self.reported = 0   # 已经得出结果的文件数
+        self.problems = 0   # 问题总数
+        self.seconds = 0.0
+
+    @property
+    def files_per_second(self) -> float:
+        """检查速度，单位为文件/秒"""
+        return self.files / self.seconds if self.seconds > 0 else 0.0
+
+    def start(self):
+        """在后台线程中开始检查"""
+        self._thread = threading.Thread(target=self.run, name="workspace_lint", daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        """取消检查，已经放入队列的结果保留"""
+        self.cancel_event.set()
+
+    def run(self):
+        """
+        检查整个工作区，完成、取消或出错后设置 done
+        """
+        started = time.perf_counter()
+        try:
+            if self.pool is None:
+                self.pool = get_workspace_pool()
+            self._check_files()
+        except LintCancelled:
+            print(f"工作区检查已取消: {self.root}")
+        except Exception as e:
+            print(f"工作区检查失败: {str(e)}")
+            import traceback
+            traceback.print_exc()
+        finally:
+            for future in self._pending:
+                future.cancel()
+            self._pending.clear()
+            self.seconds = time.perf_counter() - started
+            self.done.set()
+        print(f"工作区检查完成: {self.files} 个文件（缓存 {self.cached}，检查 {self.checked}），"
+              f"{self.problems} 个问题，{self.files_per_second:.0f} 文件/秒")
+
+    def _check_files(self):
+        """遍历工作区，提交检查并收集结果"""
+        signature = get_lint_engine().signature
+        extensions = self.checker_factory.get_supported_extensions()
+        batch = []
+        for path in iter_workspace_files(self.root, extensions):
+            raise_if_cancelled(self.cancel_event)
+            code = self._read(path)
+            if code is None:
+                continue
+            self.files += 1
+            if self.checker_factory.get_language_from_file(path) == "python":
+                key = self.cache.key(code, signature)
+                if self.cache.get(key) is None:
+                    batch.append((path, code, key))
+                    if len(batch) >= BATCH_SIZE:
+                        self._submit(batch)
+                        batch = []
+                    continue
+                self.cached += 1
+            self._report(path, code)
+        if batch:
+            self._submit(batch)
+        while self._pending:
+            self._collect(block=True)
+
+    def _read(self, path: str) -> Optional[str]:
+        """
+        读取文件，过大、无法读取或不是 UTF-8 的文件跳过
+
+        Args:
+            path: 文件路径
+
+        Returns:
+            文件内容，跳过时为 None
+        """
+        try:
+            if os.path.getsize(path) > MAX_FILE_SIZE:
+                return None
+            with open(path, "r", encoding="utf-8") as fp:
+                return fp.read()
+        except (OSError, UnicodeDecodeError):
+            return None
+
+    def _submit(self, batch: List[Tuple[str, str, str]]):
+        """
+        把一批文件交给进程池，等待的批次过多时先收集结果
+
+        Args:
+            batch: [(文件路径, 代码, 缓存键)]
+        """
+        while len(self._pending) >= MAX_PENDING_BATCHES:
+            self._collect(block=True)
+        try:
+            future = self.pool.submit(lint_sources, [code for _, code, _ in batch])
+        except (BrokenProcessPool, RuntimeError, OSError) as e:
+            # 进程池无法使用时在检查线程中检查
+            print(f"无法使用检查进程池，改为在线程中检查: {str(e)}")
+            _discard_workspace_pool(self.pool)
+            self.pool = _InlineExecutor()
+            future = self.pool.submit(lint_sources, [code for _, code, _ in batch])
+        self._pending[future] = batch
+        self._collect(block=False)
+
+    def _collect(self, block: bool):
+        """
+        取回完成的批次，结果写入缓存后报告
+
+        Args:
+            block: 是否等待至少一个批次完成
+        """
+        timeout = CANCEL_POLL_INTERVAL if block else 0
+        done, _ = wait(list(self._pending), timeout=timeout, return_when=FIRST_COMPLETED)
+        raise_if_cancelled(self.cancel_event)
+        for future in done:
+            batch = self._pending.pop(future)
+            try:
+                outcomes = future.result()
+            except Exception as e:
+                # 工作进程出错时由下面的检查器在本线程中重新检查
+                print(f"工作进程检查失败: {str(e)}")
+                outcomes = [None] * len(batch)
+            for (path, code, key), results in zip(batch, outcomes):
+                self.checked += 1
+                if results is not None:
+                    self.cache.put(key, results)
+                self._report(path, code)
+
+    def _report(self, path: str, code: str):
+        """
+        运行文件适用的检查器并把结果放入队列，Python 文件的结果已经在缓存中。
+        有语法错误的文件由检查器自己解析后报告 E999，不会放入编辑器共用的解析缓存
+
+        Args:
+            path: 文件路径
+            code: 代码内容
+        """
+        errors = []
+        for checker in self.checker_factory.create_checkers_for_file(path):
+            checker.cancel = self.cancel_event
+            errors.extend(checker.check(code, path))
+        self.problems += len(errors)
+        self.reported += 1
+        self.results.put((path, errors))
+
+
+class _InlineExecutor(Executor):
+    """在调用线程中直接运行任务，进程池无法使用时代替进程池"""
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
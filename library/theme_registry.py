@@ -0,0 +1,138 @@
+"""
+主题注册表
+每个主题文件只读取和解析一次，按修改时间失效，解析结果由所有高亮器共享
+"""
+
+import json
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+# 主题文件目录
+THEME_DIR = Path(__file__).parent.parent / "asset" / "theme"
+
+_global_theme_registry = None
+
+
+class Theme:
+    """
+    解析后的主题
+    同一主题的所有选项卡共享同一个实例，使用者不能修改其中的字典
+    """
+
+    __slots__ = ("name", "data", "base", "colors", "tag_options")
+
+    def __init__(self, name: Optional[str], data: dict):
+        """
+        从主题配置创建主题
+
+        Args:
+            name: 主题名称，直接由配置字典创建时为 None
+            data: 主题配置，``base`` 为文本组件选项，其余字符串值为标签颜色
+        """
+        self.name = name
+        self.data = data
+        base = data.get("base")
+        self.base: Dict[str, str] = dict(base) if isinstance(base, dict) else {}
+        self.colors: Dict[str, str] = {
+            key: value for key, value in data.items()
+            if key != "base" and isinstance(value, str)
+        }
+        # 预先生成 tag_configure 的参数
+        self.tag_options: Dict[str, dict] = {tag: {"foreground": color} for tag, color in self.colors.items()}
+
+
+class ThemeRegistry:
+    """
+    主题注册表
+    按名称缓存解析后的主题，文件修改后下次获取时重新加载
+    """
+
+    def __init__(self, theme_dir=None):
+        """
+        初始化主题注册表
+
+        Args:
+            theme_dir: 主题文件目录，默认为 asset/theme
+        """
+        self.theme_dir = Path(theme_dir) if theme_dir else THEME_DIR
+        self._themes = {}  # {name: (path, mtime_ns, theme)}
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def path(self, name: str) -> Path:
+        """
+        获取主题文件路径，terminalTheme 子目录中的主题优先
+
+        Args:
+            name: 主题名称
+
+        Returns:
+            主题文件路径
+        """
+        terminal_theme_path = self.theme_dir / "terminalTheme" / f"{name}.json"
+        if terminal_theme_path.exists():
+            return terminal_theme_path
+        return self.theme_dir / f"{name}.json"
+
+    def get(self, name: str) -> Optional[Theme]:
+        """
+        获取主题，首次获取或文件修改后才读取文件
+
+        Args:
+            name: 主题名称
+
+        Returns:
+            主题，文件不存在或格式错误时返回 None
+        """
+        path = self.path(name)
+        if not path.exists():
+            print(f"Theme file not found: {path}")
+            return None
+        try:
+            mtime = path.stat().st_mtime_ns
+        except OSError:
+            # 无法确定修改时间时不使用缓存
+            mtime = None
+
+        with self._lock:
+            cached = self._themes.get(name)
+        if cached is not None and mtime is not None and cached[0] == path and cached[1] == mtime:
+            return cached[2]
+
+        # 格式错误的文件同样缓存，修改之前不再重复读取
+        theme = None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if not isinstance(data, dict):
+                raise ValueError("theme file must contain a JSON object")
+            theme = Theme(name, data)
+            print(f"Loaded {len(theme.colors)} colors from theme: {name}")
+        except Exception as e:
+            print(f"Error loading theme {name}: {e}")
+
+        with self._lock:
+            self._themes[name] = (path, mtime, theme)
+            self.loads += 1
+        return theme
+
+    def clear(self):
+        """
+        清空缓存
+        """
+        with self._lock:
+            self._themes.clear()
+
+
+def get_theme_registry() -> ThemeRegistry:
+    """
+    获取全局主题注册表实例
+
+    Returns:
+        主题注册表
+    """
+    global _global_theme_registry
+    if _global_theme_registry is None:
+        _global_theme_registry = ThemeRegistry()
+    return _global_theme_registry
@@ -14,6 +14,7 @@ from tkinter import (
 from tkinter.ttk import Notebook
 from library.ui_styles import apply_modern_style, get_style
 from library.api import Settings
+from library.theme_registry import get_theme_registry
 
 
 class SettingsManager:
@@ -254,12 +255,13 @@ class SettingsManager:
             """立即应用设置"""
             theme_name = theme_var.get()
             # 加载主题文件
-            theme_file = f"{Path.cwd() / 'asset' / 'theme' / theme_name}.json"
             try:
                 # 应用更改
-                with open(theme_file, "r", encoding="utf-8") as f:
-                    theme_data = json.load(f)
-                codehighlighter.set_theme(theme_data)
+                theme = get_theme_registry().get(theme_name)
+                if theme is None:
+                    raise FileNotFoundError(theme_name)
+                theme_data = theme.data
+                codehighlighter.set_theme(theme)
                 self.codearea.configure(font=(font_var.get(), fontsize_var.get()))
 
                 # 应用界面样式（侧边栏、窗口、文件树）
@@ -278,11 +280,8 @@ class SettingsManager:
                 with open(f"{Path.cwd() / 'asset' / 'packages' / 'themes.dark.json'}", "r", encoding="utf-8") as fp:
                     dark_themes = json.load(fp)
                 
-                with open(f"{Path.cwd() / 'asset' / 'theme' / 'terminalTheme' / 'dark.json'}", "r", encoding="utf-8") as fp:
-                    dark_terminal_theme = json.load(fp)
-                
-                with open(f"{Path.cwd() / 'asset' / 'theme' / 'terminalTheme' / 'light.json'}", "r", encoding="utf-8") as fp:
-                    light_terminal_theme = json.load(fp)
+                dark_terminal_theme = get_theme_registry().get("dark")
+                light_terminal_theme = get_theme_registry().get("light")
 
                 if Settings.Highlighter.syntax_highlighting()["theme"] in dark_themes: 
                     codehighlighter2.set_theme(dark_terminal_theme)
@@ -4,6 +4,7 @@
 
 import sys
 import os
+import pytest
 from pathlib import Path
 
 # 添加项目根目录到Python路径
@@ -11,4 +12,18 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 # 测试数据目录
-TEST_DATA_DIR = Path(__file__).parent / "test_data"
\ No newline at end of file
+TEST_DATA_DIR = Path(__file__).parent / "test_data"
+
+
+@pytest.fixture
+def fake_text():
+    """无需显示器的内存文本组件，记录每次调用"""
+    from library.fake_text import FakeText
+    return FakeText()
+
+
+@pytest.fixture(autouse=True)
+def memory_lint_cache(monkeypatch):
+    """每个测试使用新的只在内存中的检查结果缓存，不写入仓库下的缓存目录"""
+    from library.static_checker import lint_cache
+    monkeypatch.setattr(lint_cache, "_global_lint_cache", lint_cache.LintCache(cache_dir=None))
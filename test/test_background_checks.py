@@ -0,0 +1,98 @@
+"""
+后台静态检查单元测试
+"""
+
+import threading
+import pytest
+from unittest.mock import MagicMock
+
+from library.static_checker.lint_engine import LintCancelled
+from library.static_checker.symbol_checker import StaticCheckError, StaticCheckManager
+from library.fake_text import FakeText
+
+
+class TestBackgroundChecks:
+    """后台检查测试类"""
+
+    def setup_method(self):
+        """测试方法前置设置，用可控制的检查代替真实检查"""
+        self.manager = StaticCheckManager()
+        self.text = FakeText(text="x = 1\n")
+        self.release_all = threading.Event()
+        self.started = {}
+        self.applied = []
+        self.manager.run_checks = self.run_checks
+        self.manager.apply_results = lambda errors, code, file_path, editor: self.applied.append(
+            (code, threading.current_thread() is threading.main_thread()))
+
+    def run_checks(self, code, file_path=None, editor_widget=None, cancel=None):
+        """等到测试放行后返回一个错误，期间被取消时中止"""
+        self.started.setdefault(code, threading.Event()).set()
+        while not self.release_all.wait(0.01):
+            if cancel.is_set():
+                raise LintCancelled()
+        return [StaticCheckError(1, 1, 1, 2, "warning", code, "warning")]
+
+    def submit(self, code):
+        """提交一次检查，记录回调"""
+        callbacks = MagicMock()
+        self.manager.submit_check(code, "a.py", self.text,
+                                  on_finished=callbacks.finished, on_dropped=callbacks.dropped)
+        return callbacks
+
+    def drain(self):
+        """放行所有检查并在“Tk 线程”上取回结果"""
+        self.release_all.set()
+        for job in list(self.manager._check_jobs.get(self.text, [])):
+            try:
+                job["future"].result()
+            except Exception:
+                pass
+        self.text.run_after()
+
+    def test_only_latest_generation_is_applied(self):
+        """测试正在运行的旧检查被取消，只有最新一代的结果在 Tk 线程上应用"""
+        first = self.submit("first")
+        assert self.started.setdefault("first", threading.Event()).wait(5)
+        second = self.submit("second")
+        # 提交不等待检查完成
+        assert self.applied == []
+        self.drain()
+        assert self.applied == [("second", True)]
+        first.dropped.assert_called_once()
+        first.finished.assert_not_called()
+        second.finished.assert_called_once()
+        assert not self.manager.has_pending_checks(self.text)
+        assert self.text.pending_after() == []
+
+    def test_queued_check_is_discarded_at_once(self):
+        """测试还没开始的检查被新的检查取代时立即丢弃"""
+        self.submit("running")
+        assert self.started.setdefault("running", threading.Event()).wait(5)
+        queued = self.submit("queued")
+        # 第三次提交时第二次检查还在排队（第一次检查已被取消但可能仍在运行）
+        self.submit("latest")
+        queued.dropped.assert_called_once()
+        assert "queued" not in self.started
+        self.drain()
+        assert self.applied == [("latest", True)]
+
+    def test_unregister_cancels_checks(self):
+        """测试注销编辑器时取消后台检查，结果不再更新界面"""
+        callbacks = self.submit("closing")
+        self.manager.unregister_editor(self.text)
+        assert self.text.pending_after() == []
+        self.drain()
+        assert self.applied == []
+        callbacks.finished.assert_not_called()
+
+    def test_check_code_stays_synchronous(self):
+        """测试 check_code 仍然直接返回结果并更新界面"""
+        self.release_all.set()
+        errors = self.manager.check_code("direct", "a.py", self.text)
+        assert [error.error_message for error in errors] == ["direct"]
+        assert self.applied == [("direct", True)]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
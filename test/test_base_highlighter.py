@@ -5,6 +5,7 @@
 import pytest
 from unittest.mock import Mock, patch, MagicMock
 from library.highlighter.base import BaseHighlighter
+from library.fake_text import drain_span_jobs
 
 
 class TestBaseHighlighter:
@@ -16,7 +17,8 @@ class TestBaseHighlighter:
         self.text_widget = Mock()
         self.text_widget.configure_mock(**{
             'get.return_value': '',
-            'index.return_value': '1.0'
+            'index.return_value': '1.0',
+            'yview.return_value': (0.0, 1.0)
         })
         self.highlighter = BaseHighlighter(self.text_widget)
     
@@ -368,6 +370,189 @@ class TestBaseHighlighter:
         # 验证至少添加了一些标签
         assert len(added_tags) > 0, "没有标签被添加"
 
+    def test_find_dirty_region(self):
+        """测试变更行范围的计算"""
+        old_lines = ["a", "b", "c", "d"]
+        
+        assert self.highlighter._find_dirty_region(old_lines, list(old_lines)) is None
+        assert self.highlighter._find_dirty_region(old_lines, ["a", "B", "c", "d"]) == (1, 2, 2)
+        assert self.highlighter._find_dirty_region(old_lines, ["a", "b", "x", "y", "c", "d"]) == (2, 2, 4)
+        assert self.highlighter._find_dirty_region(old_lines, ["a", "d"]) == (1, 3, 1)
+    
+    def test_line_state_tracks_multiline_constructs(self):
+        """测试行状态跟踪三引号字符串和括号"""
+        state = self.highlighter._initial_line_state()
+        state = self.highlighter._advance_line_state(state, 'x = """start')
+        assert state[0] == '"""'
+        state = self.highlighter._advance_line_state(state, 'end""" + foo(')
+        assert state[0] is None and state[1] == 1
+        state = self.highlighter._advance_line_state(state, '    1)  # ) in comment')
+        assert state == self.highlighter._initial_line_state()
+    
+    def test_restart_lines(self):
+        """测试可重新开始高亮的行的判断"""
+        clean = self.highlighter._initial_line_state()
+        assert self.highlighter._is_restart_line(clean, "def foo():")
+        assert not self.highlighter._is_restart_line(clean, "    return 1")
+        assert not self.highlighter._is_restart_line(clean, "else:")
+        assert not self.highlighter._is_restart_line(clean, "# comment")
+        decorated = self.highlighter._advance_line_state(clean, "@decorator")
+        assert not self.highlighter._is_restart_line(decorated, "def foo():")
+    
+    def _tagged_lines(self, tag):
+        """返回被添加了指定标签的行号"""
+        lines = set()
+        for call in self.text_widget.tag_add.call_args_list:
+            if call.args[0] == tag:
+                lines.update(int(index.split(".")[0]) for index in call.args[1::2])
+        return lines
+    
+    def test_compute_spans_returns_offsets(self):
+        """测试词法分析结果为字符偏移量"""
+        spans = self.highlighter.compute_spans("x = 1\n# note")
+        
+        assert ("number", 4, 5) in spans
+        assert ("comment", 6, 12) in spans
+        self.text_widget.tag_add.assert_not_called()
+
+    def test_basic_highlight_single_scan(self):
+        """测试基本高亮一次扫描，字符串和注释中的关键字不被高亮"""
+        code = 'if x:\n    s = "for while"  # return 12\n    n = 42\n'
+        self.highlighter._span_sink = []
+        self.highlighter._basic_highlight(code)
+        spans = self.highlighter._span_sink
+        self.highlighter._span_sink = None
+
+        tokens = sorted((code[start:end], tag) for tag, start, end in spans)
+        assert tokens == [
+            ('"for while"', "string"),
+            ("# return 12", "comment"),
+            ("42", "number"),
+            ("if", "keyword"),
+        ]
+
+    def test_scan_tokens_dispatch(self):
+        """测试单次扫描按分组名分派标签"""
+        import re
+        pattern = re.compile(r'(?P<number>\d+)|(?P<pair>\w+=\w+)|(?P<word>\b[A-Za-z_]\w*)')
+        emitted = []
+        self.highlighter.COMPOSITE_TOKENS = frozenset({'pair'})
+        self.highlighter._emit_token = lambda kind, match: emitted.append(match.group())
+        self.highlighter.keywords = {"if"}
+
+        spans = []
+        self.highlighter._add_span = lambda tag, start, end: spans.append((tag, start, end))
+        self.highlighter._scan_tokens("if 12 a=b other", pattern)
+
+        assert spans == [("keyword", 0, 2), ("number", 3, 5)]
+        assert emitted == ["a=b"]
+
+    def test_highlight_incremental_only_touches_dirty_window(self):
+        """测试增量高亮只更新修改过的行"""
+        old_code = "import os\n\ndef a():\n    return 1\n\ndef b():\n    return 2\n"
+        new_code = old_code.replace("return 2", "return 'two'")
+        self.text_widget.get.return_value = old_code
+        self.highlighter.highlight()
+        self.text_widget.get.return_value = new_code
+        self.text_widget.tag_add.reset_mock()
+        self.text_widget.tag_remove.reset_mock()
+        
+        self.highlighter.highlight_incremental()
+        drain_span_jobs(self.highlighter)
+        
+        # 只有第7行的标签被移除或添加
+        for call in self.text_widget.tag_remove.call_args_list:
+            assert call.args[1].startswith("7.")
+            assert call.args[2].startswith("7.") or call.args[2] == "8.0"
+        added = [call.args[1:] for call in self.text_widget.tag_add.call_args_list if call.args[0] != "sel"]
+        assert {index.split(".")[0] for indices in added for index in indices} == {"7"}
+        self.text_widget.tag_add.assert_any_call("string", "7.11", "7.16")
+        assert self.highlighter._snapshot_lines == new_code.split("\n")
+    
+    def test_highlight_applies_only_tag_delta(self):
+        """测试重复高亮时只应用差异，并且每个标签只调用一次tag_add"""
+        self.text_widget.get.return_value = "a = 1\nb = 2\nc = 3"
+        self.highlighter.highlight()
+        number_calls = [call for call in self.text_widget.tag_add.call_args_list if call.args[0] == "number"]
+        assert len(number_calls) == 1
+        assert number_calls[0].args[1:] == ("1.4", "1.5", "2.4", "2.5", "3.4", "3.5")
+        
+        # 内容不变时不产生任何Tcl调用
+        self.text_widget.tag_add.reset_mock()
+        self.text_widget.tag_remove.reset_mock()
+        self.highlighter.highlight()
+        assert [call for call in self.text_widget.tag_add.call_args_list if call.args[0] != "sel"] == []
+        self.text_widget.tag_remove.assert_not_called()
+    
+    def test_highlight_incremental_deleting_trailing_lines(self):
+        """测试删除末尾的行时增量高亮，不回退到完整高亮"""
+        self.text_widget.get.return_value = "a = 1\nb = 2\nc = 3\nd = 4"
+        self.highlighter.highlight()
+        self.highlighter.highlight = Mock()
+        
+        for code, last_line in (("a = 1\nb = 2\nc = 3", 3), ("a = 1", 1)):
+            self.text_widget.get.return_value = code
+            self.text_widget.tag_add.reset_mock()
+            self.highlighter.highlight_incremental()
+            drain_span_jobs(self.highlighter)
+            # 只重新分析新的最后一行
+            assert self._tagged_lines("number") == {last_line}
+            assert self.highlighter._snapshot_lines == code.split("\n")
+            assert len(self.highlighter._line_states) == last_line + 1
+        
+        self.highlighter.highlight.assert_not_called()
+    
+    def test_stale_results_are_dropped(self):
+        """测试过期的后台结果会被丢弃"""
+        self.text_widget.get.return_value = "a = 1"
+        self.highlighter.highlight()
+        self.highlighter._apply_window = Mock()
+        self.text_widget.get.return_value = "a = 2"
+        self.highlighter.highlight_incremental()
+        self.text_widget.get.return_value = "a = 3"
+        self.highlighter.highlight_incremental()
+        drain_span_jobs(self.highlighter)
+        
+        assert self.highlighter._snapshot_lines == ["a = 3"]
+        self.highlighter._apply_window.assert_called_once()
+        assert self.highlighter._apply_window.call_args.args[0] == ["a = 3"]
+    
+    def test_highlight_incremental_without_snapshot(self):
+        """测试没有快照时回退到完整高亮"""
+        self.highlighter.highlight = Mock()
+        self.highlighter.highlight_incremental()
+        self.highlighter.highlight.assert_called_once()
+    
+    def test_highlight_progressive_viewport_first(self):
+        """测试先高亮可见区域，其余部分在后台补全"""
+        code = "\n".join(f"x{i} = {i}" for i in range(40))
+        self.text_widget.get.return_value = code
+        self.text_widget.yview.return_value = (0.5, 0.75)
+        
+        self.highlighter.highlight_progressive()
+        
+        # 第一次只处理可见的第21-31行
+        assert self._tagged_lines("number") == set(range(21, 32))
+        self.text_widget.after_idle.assert_called_once_with(self.highlighter._fill_step)
+        
+        # 空闲回调把剩余部分交给后台线程
+        while self.highlighter._fill_active:
+            self.highlighter._fill_step()
+            drain_span_jobs(self.highlighter)
+        assert self._tagged_lines("number") == set(range(1, 41))
+    
+    def test_incremental_during_fill_restarts_progressive(self):
+        """测试补全过程中编辑会重新开始渐进高亮"""
+        self.text_widget.get.return_value = "a = 1"
+        self.highlighter.highlight()
+        self.highlighter._fill_active = True
+        self.highlighter.highlight_progressive = Mock()
+        self.text_widget.get.return_value = "a = 2"
+        
+        self.highlighter.highlight_incremental()
+        
+        self.highlighter.highlight_progressive.assert_called_once()
+
 
 if __name__ == "__main__":
     pytest.main([__file__])
\ No newline at end of file
@@ -0,0 +1,64 @@
+"""
+高亮器基准套件单元测试
+"""
+
+import importlib.util
+import pytest
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+
+def load_benchmark():
+    """加载 tools/benchmark_highlighters.py"""
+    path = PROJECT_ROOT / "tools" / "benchmark_highlighters.py"
+    spec = importlib.util.spec_from_file_location("benchmark_highlighters", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class TestBenchmarkSuite:
+    """基准套件测试类"""
+
+    def setup_method(self):
+        """测试方法前置设置"""
+        self.benchmark = load_benchmark()
+
+    def test_every_highlighter_has_a_sample(self):
+        """测试每个高亮器都有合成文档的代码片段"""
+        import library.highlighter as highlighters
+        assert set(highlighters.__all__) <= set(self.benchmark.SAMPLES)
+
+    def test_corpus_size(self):
+        """测试合成文档接近目标行数且每份副本不同"""
+        text = self.benchmark.build_corpus("x = 1\ny = 2\n", 100)
+        lines = text.split("\n")
+        assert len(lines) == 101
+        assert lines[0] != lines[2]
+
+    def test_suite_records_passes(self):
+        """测试套件记录耗时、标签操作数和峰值内存"""
+        results = self.benchmark.run_suite([200], only=["PythonHighlighter", "LuaHighlighter"])
+        assert set(results) == {
+            f"{name}/200/{kind}"
+            for name in ("PythonHighlighter", "LuaHighlighter")
+            for kind in ("full", "edit")
+        }
+        full = results["PythonHighlighter/200/full"]
+        assert full["tag_ops"] > 0
+        assert full["tag_ranges"] > full["tag_ops"]
+        assert full["peak_kib"] > 0
+        assert full["tier"] == "full"
+
+    def test_regressions_are_reported(self):
+        """测试标签操作数增加或耗时明显变长时报告退化"""
+        before = {"A/1000/full": {"ms": 10.0, "tag_ops": 50, "peak_kib": 100.0}}
+        same = {"A/1000/full": {"ms": 12.0, "tag_ops": 50, "peak_kib": 110.0}}
+        worse = {"A/1000/full": {"ms": 30.0, "tag_ops": 51, "peak_kib": 200.0}}
+        assert self.benchmark.compare_to_baseline(same, before) == []
+        assert len(self.benchmark.compare_to_baseline(worse, before)) == 3
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
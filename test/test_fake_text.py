@@ -0,0 +1,308 @@
+"""
+内存文本组件单元测试
+"""
+
+import pytest
+from tkinter import TclError
+from unittest.mock import Mock, patch
+
+from library.fake_text import FakeText
+
+
+class TestFakeText:
+    """内存文本组件测试类"""
+
+    def setup_method(self):
+        """测试方法前置设置"""
+        self.text = FakeText(text="first line\nsecond\nthird")
+
+    def test_indices(self):
+        """测试与 Tk 一致的索引解析"""
+        assert self.text.index("end") == "4.0"
+        assert self.text.index("end-1c") == "3.5"
+        assert self.text.index("2.99") == "2.6"
+        assert self.text.index("2.3 lineend") == "2.6"
+        assert self.text.index("2.3 linestart") == "2.0"
+        assert self.text.index("1.0 + 2 lines") == "3.0"
+        assert self.text.index("end-2l") == "2.0"
+        assert self.text.index("1.2 wordstart") == "1.0"
+        with pytest.raises(TclError):
+            self.text.index("sel.first")
+
+    def test_get_insert_delete(self):
+        """测试读取、插入和删除文本"""
+        assert self.text.get("1.0", "end-1c") == "first line\nsecond\nthird"
+        assert self.text.get("1.0", "end").endswith("\n")
+        assert self.text.get("2.0") == "s"
+        self.text.insert("end", "!")
+        assert self.text.get("3.0", "3.end") == "third!"
+        self.text.delete("1.5", "2.0")
+        assert self.text.get("1.0", "end-1c") == "firstsecond\nthird!"
+        assert self.text.edit_modified() is True
+
+    def test_tags_follow_edits(self):
+        """测试标签区间随插入和删除移动"""
+        self.text.tag_add("keyword", "1.0", "1.5", "2.0", "2.6")
+        assert self.text.tag_ranges("keyword") == ("1.0", "1.5", "2.0", "2.6")
+        self.text.insert("1.0", "xx")
+        assert self.text.tag_ranges("keyword")[:2] == ("1.2", "1.7")
+        # 插入在区间内部时区间变长
+        self.text.insert("1.3", "y")
+        assert self.text.tag_ranges("keyword")[:2] == ("1.2", "1.8")
+        self.text.delete("1.0", "1.4")
+        assert self.text.tag_ranges("keyword")[:2] == ("1.0", "1.4")
+        self.text.tag_remove("keyword", "1.1", "1.2")
+        assert self.text.tag_ranges("keyword")[:4] == ("1.0", "1.1", "1.2", "1.4")
+        assert self.text.tag_names("1.0") == ("keyword",)
+        self.text.tag_remove("keyword", "1.0", "end")
+        assert self.text.tag_ranges("keyword") == ()
+
+    def test_after_and_events(self):
+        """测试定时器和事件绑定"""
+        callback = Mock()
+        after_id = self.text.after(50, callback, 1)
+        self.text.after_idle(callback, 2)
+        self.text.after_cancel(after_id)
+        assert self.text.run_after() == 1
+        callback.assert_called_once_with(2)
+
+        handler = Mock()
+        self.text.bind("<<Modified>>", handler)
+        self.text.bind("<<Modified>>", handler, add="+")
+        self.text.event_generate("<<Modified>>")
+        assert handler.call_count == 2
+
+    def test_fixture(self, fake_text):
+        """测试 conftest 提供的空组件"""
+        assert fake_text.get("1.0", "end") == "\n"
+        assert fake_text.round_trips == 1
+
+    def test_calls_are_counted(self):
+        """测试每次调用都被计数"""
+        self.text.reset_calls()
+        self.text.tag_add("a", "1.0", "1.1")
+        self.text.tag_add("a", "1.2", "1.3")
+        self.text.get("1.0", "end")
+        assert self.text.calls["tag_add"] == 2
+        assert self.text.round_trips == 3
+
+    def test_drives_highlighter(self):
+        """测试无需显示器即可驱动高亮器"""
+        from library.highlighter.python import CodeHighlighter
+        text = FakeText(text="import os\n\nclass A:\n    x = 'value'  # note\n")
+        highlighter = CodeHighlighter(text)
+        highlighter.highlight()
+        assert ("4.8", "4.15") == text.tag_ranges("string")
+        assert text.tag_ranges("comment") == ("4.17", "4.23")
+        assert "class" in text.tag_names("3.6")
+
+
+class FakeTree:
+    """记录调用次数的内存结果表格"""
+
+    def __init__(self):
+        self.rows = {}
+        self.order = []
+        self.calls = {"insert": 0, "item": 0, "delete": 0}
+        self._next = 0
+
+    def get_children(self, item=""):
+        return tuple(self.order)
+
+    def insert(self, parent, index, values=()):
+        self.calls["insert"] += 1
+        self._next += 1
+        item_id = f"I{self._next}"
+        self.rows[item_id] = tuple(values)
+        self.order.insert(len(self.order) if index == "end" else index, item_id)
+        return item_id
+
+    def item(self, item_id, values=None):
+        self.calls["item"] += 1
+        self.rows[item_id] = tuple(values)
+
+    def delete(self, *items):
+        self.calls["delete"] += 1
+        for item_id in items:
+            self.order.remove(item_id)
+            del self.rows[item_id]
+
+    def values(self):
+        return [self.rows[item_id] for item_id in self.order]
+
+
+class TestStaticCheckMarkers:
+    """静态检查标记测试类"""
+
+    def setup_method(self):
+        """测试方法前置设置"""
+        from library.static_checker.symbol_checker import StaticCheckManager
+        self.manager = StaticCheckManager()
+
+    def error(self, line, severity="error", message="F821 undefined name"):
+        """构造一个错误"""
+        from library.static_checker.symbol_checker import StaticCheckError
+        return StaticCheckError(line, 1, line, 2, "F821", message, severity)
+
+    def test_update_editor_errors(self):
+        """测试错误标记标在行末的换行符上，使用固定的标签，并在下次更新时清除"""
+        text = FakeText(text="x = 1\ny = undefined\n")
+        text.reset_calls()
+        self.manager._update_editor_errors(text, [self.error(2)])
+        assert text.tag_ranges("error_marker") == ("2.13", "3.0")
+        assert text.tag_cget("error_marker", "foreground") == "white"
+        assert text.calls["tag_add"] == 1
+        self.manager._update_editor_errors(text, [])
+        assert text.tag_ranges("error_marker") == ()
+        assert not any(tag.startswith("error_marker_") for tag in text.tag_names())
+
+    def test_unchanged_markers_are_not_touched(self):
+        """测试结果没有变化或标记已随文本移动到新位置时不修改标签"""
+        text = FakeText(text="a\nb = c\nd\n")
+        self.manager._update_editor_errors(text, [self.error(2), self.error(3, "warning")])
+        text.reset_calls()
+        self.manager._update_editor_errors(text, [self.error(2), self.error(3, "warning")])
+        # 在前面插入一行，标记随文本下移，新的结果也下移一行
+        text.insert("1.0", "\n")
+        self.manager._update_editor_errors(text, [self.error(3), self.error(4, "warning")])
+        assert text.calls.get("tag_add", 0) == 0
+        assert text.calls.get("tag_remove", 0) == 0
+        assert text.calls.get("tag_configure", 0) == 0
+        assert text.calls.get("tag_bind", 0) == 0
+        assert text.tag_ranges("warning_marker") == ("4.1", "5.0")
+
+        # 只有改变严重程度的行被修改
+        self.manager._update_editor_errors(text, [self.error(3), self.error(4)])
+        assert text.calls["tag_add"] == 1
+        assert text.calls["tag_remove"] == 1
+        assert text.tag_ranges("error_marker") == ("3.5", "4.0", "4.1", "5.0")
+
+    def test_empty_lines_merge_like_tk(self):
+        """测试相邻空行的标记区间按 Tk 的方式合并，再次更新时不重复添加"""
+        text = FakeText(text="a\n\n\nb\n")
+        self.manager._update_editor_errors(text, [self.error(2, "warning"), self.error(3, "warning")])
+        assert text.tag_ranges("warning_marker") == ("2.0", "4.0")
+        text.reset_calls()
+        self.manager._update_editor_errors(text, [self.error(2, "warning"), self.error(3, "warning")])
+        assert text.calls.get("tag_add", 0) == 0
+
+    def test_click_looks_up_line(self):
+        """测试点击标记时按行号查找该行的错误"""
+        text = FakeText(text="x\ny\n")
+        errors = [self.error(2), self.error(2, message="E225 missing whitespace")]
+        self.manager._update_editor_errors(text, errors)
+        handler = text._tag_bindings[("error_marker", "<Button-1>")]
+        self.manager._show_error_popup = Mock()
+        with patch.object(text, 'index', return_value="2.1"):
+            handler(Mock(x=5, y=20))
+        assert self.manager._show_error_popup.call_args[0][2:] == (2, errors)
+
+    def test_tree_rows_are_diffed(self):
+        """测试结果表格只修改、插入或删除不同的行"""
+        tree = FakeTree()
+        self.manager.set_flake8_tree(tree)
+        errors = [self.error(line, "warning", f"W{line}") for line in range(1, 301)]
+        self.manager._update_flake8_tree(errors)
+        assert tree.calls == {"insert": 300, "item": 0, "delete": 0}
+
+        tree.calls = dict.fromkeys(tree.calls, 0)
+        changed = list(errors)
+        changed[10] = self.error(11, "error", "E11")
+        changed.insert(100, self.error(100, "warning", "new"))
+        del changed[200]
+        self.manager._update_flake8_tree(changed)
+        assert tree.calls == {"insert": 1, "item": 1, "delete": 1}
+        assert tree.values() == [self.manager._tree_row(error) for error in changed]
+
+        # 表格被其他代码清空后从头填充
+        tree.delete(*tree.get_children())
+        self.manager._update_flake8_tree(errors[:2])
+        assert tree.values() == [self.manager._tree_row(error) for error in errors[:2]]
+
+
+class TestHeadlessMultiFileEditor:
+    """无显示器运行多文件编辑器测试类"""
+
+    def setup_method(self):
+        """测试方法前置设置，用内存组件替换 Tk 组件"""
+        self.patches = [
+            patch('library.multi_file_editor.Text', FakeText),
+            patch('library.multi_file_editor.Frame'),
+            patch('library.multi_file_editor.Font'),
+            patch('library.multi_file_editor.Notebook'),
+            patch('library.ui_styles.apply_modern_style'),
+        ]
+        mocks = [p.start() for p in self.patches]
+        notebook = mocks[3].return_value
+        notebook.add.side_effect = lambda frame, text: f"tab{notebook.add.call_count}"
+        notebook.tabs.side_effect = lambda: list(self.editor.tab_editors)
+        from library.multi_file_editor import MultiFileEditor
+        self.root = FakeText()
+        self.editor = MultiFileEditor(self.root, None, None, None)
+
+    def teardown_method(self):
+        """测试方法后置清理"""
+        for p in self.patches:
+            p.stop()
+
+    def test_edit_queues_highlight_and_check(self):
+        """测试修改后排队增量高亮和防抖检查，定时器到期后完成"""
+        tab_id = self.editor.create_new_tab("a.py", "import os\nx = 1\n")
+        text = self.editor.tab_editors[tab_id]
+        assert text.tag_ranges("keyword") == ("1.0", "1.6")
+        # 等待打开选项卡时的后台静态检查完成
+        for job in self.editor.static_check_manager._check_jobs.get(text, []):
+            job["future"].result()
+        text.run_after()
+        # 手动推进的时钟，避免调度器因“仍在输入”而推迟处理
+        now = [0.0]
+        self.editor.tab_highlighters[tab_id].pass_scheduler._clock = lambda: now[0]
+
+        text.insert("end", "def f():\n    return 2\n")
+        text.event_generate("<<Modified>>")
+        assert len(self.root.pending_after()) == 1
+        assert text.edit_modified() is False
+
+        text.run_idle()
+        now[0] += 1.0
+        text.run_after(max_rounds=1)
+        # 等待工作线程完成后再应用结果
+        highlighter = self.editor.tab_highlighters[tab_id]
+        for job in highlighter._span_jobs:
+            job[1].result()
+        text.run_after()
+        assert "function" in text.tag_names("3.4")
+        stats = self.editor.scheduler_stats()[tab_id]
+        assert stats["highlight"]["passes"] == 1
+        assert stats["static_check"]["pending"] is True
+
+    def test_close_tab_stops_highlighter_timers(self):
+        """测试关闭选项卡后高亮器的定时器不再运行"""
+        from library.highlight_policy import TIER_VISIBLE
+        tab_id = self.editor.create_new_tab("a.py", "import os\nx = 1\n")
+        text = self.editor.tab_editors[tab_id]
+        highlighter = self.editor.tab_highlighters[tab_id]
+        for job in self.editor.static_check_manager._check_jobs.get(text, []):
+            job["future"].result()
+        text.run_after()
+        # 只高亮可见区域时每 150 毫秒检查一次滚动，同时有一个后台词法分析在等待
+        highlighter.tier = TIER_VISIBLE
+        highlighter._apply_limited_tier(text.get("1.0", "end-1c"))
+        highlighter._submit_spans("x = 1", Mock())
+        callbacks = [(func, args) for _, func, args in text._after.values()]
+        assert highlighter._viewport_job is not None and highlighter._span_poll_job is not None
+
+        with patch('library.multi_file_editor.messagebox') as messagebox:
+            # 不保存新文件
+            messagebox.askyesnocancel.return_value = False
+            self.editor.close_tab(tab_id)
+        assert highlighter._viewport_job is None and highlighter._span_poll_job is None
+        assert text.calls["after_cancel"] >= 2
+        # 已经到期的回调不再重新安排
+        for func, args in callbacks:
+            func(*args)
+        assert text.pending_after() == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,153 @@
+"""
+声明式语法与词法状态机单元测试
+"""
+
+import pytest
+from unittest.mock import Mock
+
+from library.highlighter.grammar import (
+    GRAMMAR_DIR, Grammar, GrammarError, GrammarHighlighter, grammar_for_extension, load_grammar
+)
+
+
+SAMPLE_GRAMMAR = {
+    "name": "sample",
+    "extensions": [".smp"],
+    "ignore_case": True,
+    "words": {"keyword": ["if", "end"], "builtin": ["print"]},
+    "states": {
+        "root": {"rules": [
+            {"match": "/\\*", "tag": "comment", "push": "block_comment"},
+            {"match": "<<([A-Z]+)", "tag": "string", "push": "heredoc", "capture": 1},
+            {"match": "^```", "tag": "markup", "push": "fence"},
+            {"match": "(def)(\\s+)(\\w+)", "groups": ["keyword", None, "function"]},
+            {"match": "\\b[A-Za-z_]\\w*", "tag": "@words"}
+        ]},
+        "block_comment": {"tag": "comment", "rules": [
+            {"match": "\\*/", "tag": "comment", "pop": True}
+        ]},
+        "heredoc": {"tag": "string", "rules": [
+            {"match": "^{end}$", "tag": "string", "pop": True}
+        ]},
+        "fence": {"tag": "markup", "rules": [
+            {"match": "^```", "tag": "markup", "pop": True}
+        ]}
+    }
+}
+
+
+def lex(grammar, text):
+    """逐行词法分析，返回 (标签, 文本) 列表和每行结束时的状态栈"""
+    tokens = []
+    stacks = []
+    stack = ()
+    for line in text.split('\n'):
+        spans = []
+        stack = grammar.lex_line(line, stack, spans)
+        tokens.extend((tag, line[start:end]) for tag, start, end in spans)
+        stacks.append(stack)
+    return tokens, stacks
+
+
+class TestGrammar:
+    """声明式语法测试类"""
+
+    def setup_method(self):
+        """测试方法前置设置"""
+        self.grammar = Grammar(SAMPLE_GRAMMAR)
+
+    def test_words_ignore_case(self):
+        """测试关键字表与忽略大小写"""
+        tokens, _ = lex(self.grammar, "IF x Print END")
+        assert tokens == [("keyword", "IF"), ("builtin", "Print"), ("keyword", "END")]
+        assert self.grammar.words("keyword") == {"if", "end"}
+
+    def test_block_comment_spans_lines(self):
+        """测试块注释状态跨行保留"""
+        tokens, stacks = lex(self.grammar, "a /* one\ntwo\nthree */ if")
+        assert tokens == [
+            ("comment", "/* one"), ("comment", "two"), ("comment", "three */"), ("keyword", "if")
+        ]
+        assert stacks == [(("block_comment", None),), (("block_comment", None),), ()]
+
+    def test_heredoc_end_marker(self):
+        """测试 heredoc 使用捕获的结束标记"""
+        tokens, stacks = lex(self.grammar, "x <<EOF\nEND\nEOF\nend")
+        assert stacks[0] == (("heredoc", "EOF"),)
+        assert ("string", "END") in tokens
+        assert stacks[2] == ()
+        assert tokens[-1] == ("keyword", "end")
+
+    def test_fenced_block(self):
+        """测试围栏代码块"""
+        tokens, stacks = lex(self.grammar, "```\nif\n```\nif")
+        assert tokens == [("markup", "```"), ("markup", "if"), ("markup", "```"), ("keyword", "if")]
+        assert stacks[-1] == ()
+
+    def test_groups(self):
+        """测试按捕获组分别标记"""
+        tokens, _ = lex(self.grammar, "def greet")
+        assert tokens == [("keyword", "def"), ("function", "greet")]
+
+    def test_invalid_grammar(self):
+        """测试格式错误的语法文件"""
+        with pytest.raises(GrammarError):
+            Grammar({"name": "bad", "states": {}})
+        with pytest.raises(GrammarError):
+            Grammar({"name": "bad", "states": {"root": {"rules": [{"match": "x", "push": "missing"}]}}})
+        with pytest.raises(GrammarError):
+            Grammar({"name": "bad", "states": {"root": {"rules": [{"match": "("}]}}}).lex_line("x", ())
+
+    def test_shipped_grammars_load(self):
+        """测试随附的语法文件都能加载并编译"""
+        paths = sorted(GRAMMAR_DIR.glob("*.json"))
+        assert paths
+        for path in paths:
+            grammar = load_grammar(path.stem)
+            assert grammar.name == path.stem
+            assert grammar.extensions
+            grammar.lex_line("x = 1 # y", ())
+
+    def test_grammar_for_extension(self):
+        """测试根据扩展名查找语法"""
+        assert grammar_for_extension(".lua") == "lua"
+        assert grammar_for_extension(".YAML") == "yaml"
+        assert grammar_for_extension(".unknown") is None
+
+
+class TestGrammarHighlighter:
+    """语法驱动高亮器测试类"""
+
+    def setup_method(self):
+        """测试方法前置设置"""
+        self.text_widget = Mock()
+        self.text_widget.configure_mock(**{
+            'get.return_value': '',
+            'index.return_value': '1.0'
+        })
+
+    def test_compute_spans(self):
+        """测试高亮器输出的标签区间"""
+        from library.highlighter.lua import CodeHighlighter
+        highlighter = CodeHighlighter(self.text_widget)
+        text = 'local s = [==[\nraw ]] text\n]==]\nprint("hi") -- done'
+        tokens = [(tag, text[start:end]) for tag, start, end in highlighter.compute_spans(text)]
+        assert tokens == [
+            ("keyword", "local"),
+            ("long_string", "[==["),
+            ("long_string", "raw ]] text"),
+            ("long_string", "]==]"),
+            ("builtin", "print"),
+            ("string", '"hi"'),
+            ("comment", "-- done"),
+        ]
+        assert "local" in highlighter.keywords
+
+    def test_line_state_checkpoint(self):
+        """测试每行结束状态作为增量高亮的重启点"""
+        highlighter = GrammarHighlighter(self.text_widget, grammar="sql")
+        state = highlighter._initial_line_state()
+        state = highlighter._advance_line_state(state, "SELECT 'a")
+        assert not highlighter._is_restart_line(state, "b'")
+        state = highlighter._advance_line_state(state, "b' FROM t;")
+        assert highlighter._is_restart_line(state, "SELECT 1;")
@@ -0,0 +1,125 @@
+"""
+大文件高亮策略单元测试
+"""
+
+import pytest
+from unittest.mock import Mock, patch
+
+from library.highlight_policy import (
+    HighlightPolicy, TIER_FULL, TIER_LEXICAL, TIER_VISIBLE, TIER_OFF
+)
+
+# 便于测试的小阈值：(字符数, 行数, 最长行长度)
+LIMITS = {
+    TIER_FULL: (1000, 50, 80),
+    TIER_LEXICAL: (5000, 200, 80),
+    TIER_VISIBLE: (20000, None, 2000),
+}
+
+
+class TestHighlightPolicy:
+    """高亮级别选择测试类"""
+
+    def setup_method(self):
+        """测试方法前置设置"""
+        self.policy = HighlightPolicy(LIMITS, max_line_length=80)
+
+    def test_tiers_by_size(self):
+        """测试按字符数、行数和最长行选择级别"""
+        assert self.policy.choose("x = 1\n" * 10) == TIER_FULL
+        assert self.policy.choose("x = 1\n" * 100) == TIER_LEXICAL
+        assert self.policy.choose("x = 1\n" * 1000) == TIER_VISIBLE
+        assert self.policy.choose("x" * 500) == TIER_VISIBLE
+        assert self.policy.choose("x" * 3000) == TIER_OFF
+        assert self.policy.choose("x = 1\n" * 5000) == TIER_OFF
+
+    def test_upgrade_needs_margin(self):
+        """测试文本刚好回到阈值以内时不升级，明显变小后才升级"""
+        text = "x = 1\n" * 45
+        assert self.policy.choose(text) == TIER_FULL
+        assert self.policy.choose(text, current=TIER_LEXICAL) == TIER_LEXICAL
+        assert self.policy.choose("x = 1\n" * 10, current=TIER_LEXICAL) == TIER_FULL
+        # 降级不受余量影响
+        assert self.policy.choose("x = 1\n" * 100, current=TIER_FULL) == TIER_LEXICAL
+
+
+class TestHighlighterTiers:
+    """高亮器按级别高亮测试类"""
+
+    def setup_method(self):
+        """测试方法前置设置"""
+        from library.highlighter.python import CodeHighlighter
+        self.text_widget = Mock()
+        self.text_widget.configure_mock(**{
+            'get.return_value': '',
+            'index.return_value': '1.0',
+            'yview.return_value': (0.0, 1.0),
+        })
+        self.patcher = patch('library.highlighter.base.get_highlight_policy',
+                             return_value=HighlightPolicy(LIMITS, max_line_length=80))
+        self.patcher.start()
+        self.highlighter = CodeHighlighter(self.text_widget)
+        self.highlighter.tier_listener = Mock()
+
+    def teardown_method(self):
+        """测试方法后置清理"""
+        self.patcher.stop()
+
+    def tagged_lines(self):
+        """被 tag_add 标记过的行号"""
+        lines = set()
+        for call in self.text_widget.tag_add.call_args_list:
+            for index in call.args[1::2]:
+                lines.add(int(index.split('.')[0]))
+        return lines
+
+    def test_lexical_tier_skips_ast(self):
+        """测试仅词法级别不解析语法树"""
+        code = "import os\n" + "value = os.path\n" * 60
+        self.text_widget.get.return_value = code
+        with patch('ast.parse') as mock_parse:
+            self.highlighter.highlight()
+            mock_parse.assert_not_called()
+        assert self.highlighter.tier == TIER_LEXICAL
+        self.highlighter.tier_listener.assert_called_once_with(self.highlighter, TIER_LEXICAL)
+        assert "keyword" in {call.args[0] for call in self.text_widget.tag_add.call_args_list}
+
+    def test_visible_tier_skips_long_lines(self):
+        """测试仅可见区域级别只高亮可见的行，并跳过超长行"""
+        code = "x = 'a'\n" + "y = '" + "b" * 200 + "'\n" + "z = 1\n" * 300
+        self.text_widget.get.return_value = code
+        self.text_widget.yview.return_value = (0.0, 0.01)
+        self.highlighter.highlight()
+        assert self.highlighter.tier == TIER_VISIBLE
+        lines = self.tagged_lines()
+        assert 1 in lines
+        assert 2 not in lines
+        assert max(lines) < 10
+        # 跟随滚动高亮新出现的行
+        self.text_widget.tag_add.reset_mock()
+        self.text_widget.yview.return_value = (0.5, 0.51)
+        self.highlighter._poll_viewport()
+        assert min(self.tagged_lines()) > 100
+
+    def test_off_tier_clears_tags(self):
+        """测试关闭级别清除所有标签且不再高亮"""
+        self.text_widget.get.return_value = "x" * 3000
+        self.highlighter.highlight_progressive()
+        assert self.highlighter.tier == TIER_OFF
+        self.text_widget.tag_add.assert_not_called()
+        self.text_widget.tag_remove.assert_called()
+
+    def test_reevaluate_as_buffer_grows(self):
+        """测试增量高亮时随文本增长重新评估级别"""
+        self.text_widget.get.return_value = "x = 1\n" * 10
+        self.highlighter.highlight()
+        assert self.highlighter.tier == TIER_FULL
+        self.text_widget.get.return_value = "x = 1\n" * 1000
+        self.highlighter.highlight_incremental()
+        assert self.highlighter.tier == TIER_VISIBLE
+        assert self.highlighter._snapshot_lines is None
+        self.highlighter.tier_listener.assert_called_once_with(self.highlighter, TIER_VISIBLE)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,106 @@
+"""
+高亮分阶段计时单元测试
+"""
+
+import pytest
+from unittest.mock import Mock
+
+from library.highlight_timing import HighlightTimings, PassTimer, PHASES, percentile
+from library.fake_text import FakeText, drain_span_jobs
+
+
+class TestHighlightTimings:
+    """计时记录测试类"""
+
+    def test_percentile(self):
+        """测试最近秩百分位数"""
+        values = list(range(1, 101))
+        assert percentile(values, 0.5) == 50
+        assert percentile(values, 0.95) == 95
+        assert percentile([7], 0.95) == 7
+        assert percentile([], 0.5) == 0
+
+    def test_ring_buffer(self):
+        """测试只保留最近的记录，并按阶段统计"""
+        timings = HighlightTimings("Test", size=10)
+        for i in range(1, 21):
+            timer = PassTimer("full")
+            timer.add("parse", i / 1000)
+            timer.spans = i
+            timings.record(timer)
+        assert len(timings.records) == 10
+        assert timings.last()["phases"]["parse"] == 20
+        assert timings.quantiles("parse") == {"p50": 15, "p95": 20, "max": 20}
+        assert timings.quantiles("spans")["p50"] == 15
+        summary = timings.summary()
+        assert set(PHASES) <= set(summary)
+        assert summary["passes"] == 10
+
+    def test_merge(self):
+        """测试合并工作线程的计时"""
+        timer = PassTimer("incremental")
+        timer.add("snapshot", 0.001)
+        lex = PassTimer("lex")
+        lex.add("tokenize", 0.002)
+        lex.spans = 5
+        timer.merge(lex)
+        assert timer.spans == 5
+        assert timer.total() == pytest.approx(0.003)
+
+
+class TestHighlighterTimings:
+    """高亮器计时测试类"""
+
+    def setup_method(self):
+        """测试方法前置设置"""
+        from library.highlighter.python import CodeHighlighter
+        self.text = FakeText(text="import os\n\nclass A:\n    def f(self):\n        return 'x'  # note\n")
+        self.highlighter = CodeHighlighter(self.text)
+        self.listener = Mock()
+        self.highlighter.pass_listener = self.listener
+
+    def test_full_pass_phases(self):
+        """测试完整高亮记录每个阶段和区间数"""
+        self.highlighter.highlight()
+        record = self.highlighter.timings.last()
+        assert record["kind"] == "full"
+        assert record["highlighter"] == "CodeHighlighter"
+        assert record["spans"] > 0
+        for phase in ("clear", "snapshot", "tokenize", "parse", "visit", "flush"):
+            assert record["phases"][phase] > 0, phase
+        self.listener.assert_called_once_with(self.highlighter, record)
+
+    def test_incremental_pass_is_recorded_when_applied(self):
+        """测试增量高亮在工作线程结果应用后才记录"""
+        self.highlighter.highlight()
+        self.text.insert("5.end", " more")
+        self.highlighter.highlight_incremental()
+        assert self.highlighter.timings.last()["kind"] == "full"
+        drain_span_jobs(self.highlighter)
+        record = self.highlighter.timings.last()
+        assert record["kind"] == "incremental"
+        assert record["phases"]["snapshot"] > 0
+        assert record["phases"]["flush"] > 0
+        assert record["spans"] > 0
+
+    def test_progressive_pass_ends_with_fill(self):
+        """测试渐进高亮在最后一块补全后记录一次"""
+        self.highlighter._fill_chunk_lines = 1
+        self.text.height = 1
+        self.highlighter.highlight_progressive()
+        assert self.highlighter.timings.last() is None
+        while self.highlighter._fill_active:
+            self.text.run_idle()
+            drain_span_jobs(self.highlighter)
+        assert [entry["kind"] for entry in self.highlighter.timings.records] == ["progressive"]
+
+    def test_failure_is_counted(self):
+        """测试高亮失败被计数"""
+        self.highlighter.compute_spans = Mock(side_effect=RuntimeError("boom"))
+        self.highlighter.highlight()
+        assert self.highlighter.timings.failures == 1
+        assert "boom" in self.highlighter.timings.last_error
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
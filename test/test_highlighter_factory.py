@@ -4,10 +4,18 @@
 
 import pytest
 import os
+import subprocess
+import sys
 from unittest.mock import Mock, patch, MagicMock
 from library.highlighter_factory import HighlighterFactory
+from library.highlighter.registry import (
+    LANGUAGES, detect_language, language_for_extension, language_from_modeline, language_from_shebang
+)
 from library.highlighter.python import CodeHighlighter
 
+# 项目根目录
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
 
 class TestHighlighterFactory:
     """高亮器工厂测试类"""
@@ -254,5 +262,76 @@ class TestHighlighterFactory:
             assert isinstance(highlighter, CodeHighlighter)
 
 
+class TestLanguageDetection:
+    """语言识别与按需导入测试类"""
+    
+    def test_extensions(self):
+        """测试已实现语言的扩展名都能识别"""
+        expected = {
+            '.ts': 'typescript', '.TSX': 'typescript', '.go': 'go', '.kt': 'kotlin',
+            '.swift': 'swift', '.sql': 'sql', '.lua': 'lua', '.yaml': 'yaml', '.pyi': 'python'
+        }
+        for ext, language in expected.items():
+            assert language_for_extension(ext) == language
+        # 每个扩展名对应的模块都存在
+        for language in set(HighlighterFactory.EXTENSION_MAP.values()):
+            assert language in LANGUAGES
+            assert os.path.exists(os.path.join(PROJECT_ROOT, "library", "highlighter", f"{language}.py"))
+    
+    def test_shebang(self):
+        """测试根据shebang识别语言"""
+        assert language_from_shebang("#!/usr/bin/env python3") == "python"
+        assert language_from_shebang("#!/usr/bin/python3.11 -u") == "python"
+        assert language_from_shebang("#!/bin/bash") == "bash"
+        assert language_from_shebang("#!/usr/bin/env -S node --no-warnings") == "javascript"
+        assert language_from_shebang("#!/usr/bin/env perl") is None
+        assert language_from_shebang("print('#!/bin/sh')") is None
+    
+    def test_modeline(self):
+        """测试根据Emacs和Vim的modeline识别语言"""
+        assert language_from_modeline("# -*- mode: ruby; coding: utf-8 -*-\n") == "ruby"
+        assert language_from_modeline("#!/bin/sh\n# -*- python -*-\n") == "python"
+        assert language_from_modeline("# -*- coding: utf-8 -*-\n") is None
+        assert language_from_modeline("x = 1\n", "\n// vim: set ft=javascript :\n") == "javascript"
+        assert language_from_modeline("x = 1\n", "# vim: ft=unknown\n") is None
+    
+    def test_detection_order(self):
+        """测试modeline优先于扩展名，扩展名优先于shebang"""
+        assert detect_language("build.txt", "# vim: ft=python\n") == "python"
+        assert detect_language("script.rb", "#!/usr/bin/env python\n") == "ruby"
+        assert detect_language("script", "#!/usr/bin/env python\n") == "python"
+        assert detect_language("README", "") is None
+    
+    def test_factory_uses_shebang(self):
+        """测试没有扩展名的文件根据内容选择高亮器"""
+        text_widget = Mock()
+        text_widget.get.return_value = "#!/usr/bin/env python3\nprint(1)\n"
+        with patch('library.highlighter_factory.api') as mock_api, \
+             patch('importlib.import_module') as mock_import:
+            mock_module = Mock()
+            mock_module.CodeHighlighter = CodeHighlighter
+            mock_import.return_value = mock_module
+            
+            HighlighterFactory().create_highlighter(text_widget, 'manage')
+            
+            mock_api.Settings.Highlighter.syntax_highlighting.assert_not_called()
+            mock_import.assert_called_once_with('library.highlighter.python')
+    
+    def test_package_imports_lazily(self):
+        """测试导入高亮器包时不导入各语言模块"""
+        script = (
+            "import sys, library.highlighter as h\n"
+            "print(sorted(m for m in sys.modules if m.startswith('library.highlighter.')))\n"
+            "h.LuaHighlighter\n"
+            "print('library.highlighter.lua' in sys.modules)\n"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", script], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+        ).stdout
+        modules, lua_loaded = output.strip().splitlines()[-2:]
+        assert modules == "['library.highlighter.registry']"
+        assert lua_loaded == "True"
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
\ No newline at end of file
@@ -0,0 +1,49 @@
+"""
+行偏移索引单元测试
+"""
+
+import pytest
+from library.line_index import LineIndex
+
+
+class TestLineIndex:
+    """行偏移索引测试类"""
+
+    def setup_method(self):
+        """测试方法前置设置"""
+        self.text = "import os\n\nx = 1\n# end"
+        self.index = LineIndex(self.text)
+
+    def test_line_starts(self):
+        """测试行首偏移表"""
+        assert self.index.line_starts == [0, 10, 11, 17]
+        assert self.index.line_count == 4
+        assert LineIndex.from_lines(self.text.split('\n')).line_starts == self.index.line_starts
+
+    def test_offset_to_index_matches_count(self):
+        """测试偏移转换与逐字符计数结果一致"""
+        for offset in range(len(self.text) + 1):
+            line = self.text.count('\n', 0, offset) + 1
+            col = offset - self.text.rfind('\n', 0, offset) - 1
+            assert self.index.offset_to_index(offset) == f"{line}.{col}"
+            assert self.index.position(offset) == (line, col)
+
+    def test_index_to_offset_round_trip(self):
+        """测试索引与偏移互相转换"""
+        for offset in range(len(self.text) + 1):
+            assert self.index.index_to_offset(self.index.offset_to_index(offset)) == offset
+
+    def test_index_to_offset_clamps(self):
+        """测试越界索引被限制在行内和文本内"""
+        assert self.index.index_to_offset("1.99") == 9
+        assert self.index.index_to_offset("99.0") == len(self.text)
+        assert self.index.index_to_offset("1.0+12c") == 12
+        with pytest.raises(ValueError):
+            self.index.index_to_offset("0.0")
+
+    def test_line_length(self):
+        """测试行长度"""
+        assert self.index.line_length(1) == 9
+        assert self.index.line_length(2) == 0
+        assert self.index.line_length(4) == 5
+        assert self.index.line_length(5) == 0
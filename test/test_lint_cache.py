@@ -0,0 +1,108 @@
+"""
+检查结果缓存单元测试
+"""
+
+import json
+import os
+import pytest
+from unittest.mock import patch
+
+from library.static_checker.lint_cache import LINT_CACHE_VERSION, LintCache, get_lint_cache
+
+RESULTS = [(1, 1, "F401", "'os' imported but unused")]
+
+
+class TestLintCache:
+    """缓存测试类"""
+
+    def test_key_depends_on_code_and_signature(self):
+        """测试缓存键稳定，并随代码和检查器签名变化"""
+        key = LintCache.key("import os\n", "pyflakes 3")
+        assert key == LintCache.key("import os\n", "pyflakes 3")
+        assert len(key) == 32
+        assert key != LintCache.key("import os\n", "pyflakes 4")
+        assert key != LintCache.key("import sys\n", "pyflakes 3")
+
+    def test_least_recently_used_is_evicted(self):
+        """测试超过上限时淘汰最久没有使用的结果，没有过期时间"""
+        cache = LintCache(max_entries=2)
+        cache.put("a", RESULTS)
+        cache.put("b", [])
+        assert cache.get("a") == RESULTS
+        cache.put("c", [])
+        assert cache.get("b") is None
+        assert cache.get("a") == RESULTS
+        assert (cache.hits, cache.misses, len(cache)) == (2, 1, 2)
+
+    def test_results_persist_across_instances(self, tmp_path):
+        """测试写入缓存目录的结果在新的实例（重启后）中命中"""
+        LintCache(cache_dir=str(tmp_path)).put("k", RESULTS)
+        restarted = LintCache(cache_dir=str(tmp_path))
+        assert restarted.get("k") == RESULTS
+        assert restarted.disk_hits == 1
+        assert restarted.get("k") == RESULTS
+        assert restarted.hits == 1
+
+    def test_bad_files_are_ignored(self, tmp_path):
+        """测试损坏或旧版本的缓存文件不被使用，损坏的文件被删除"""
+        (tmp_path / "broken.json").write_text("{", encoding="utf-8")
+        (tmp_path / "old.json").write_text(
+            json.dumps({"version": LINT_CACHE_VERSION - 1, "results": RESULTS}), encoding="utf-8")
+        cache = LintCache(cache_dir=str(tmp_path))
+        assert cache.get("broken") is None
+        assert cache.get("old") is None
+        assert not (tmp_path / "broken.json").exists()
+
+    def test_prune_keeps_recent_files(self, tmp_path):
+        """测试缓存目录超过上限时删除最久没有使用的文件"""
+        cache = LintCache(cache_dir=str(tmp_path), max_disk_entries=2)
+        for index, key in enumerate("abc"):
+            cache.put(key, [])
+            os.utime(tmp_path / f"{key}.json", (index, index))
+        cache.prune()
+        assert sorted(path.name for path in tmp_path.iterdir()) == ["b.json", "c.json"]
+
+
+class TestCheckerCache:
+    """检查器使用缓存测试类"""
+
+    def setup_method(self):
+        """测试方法前置设置"""
+        pytest.importorskip("pyflakes")
+        pytest.importorskip("pycodestyle")
+
+    def check(self, code):
+        """用新的检查器检查代码，返回错误消息和引擎的调用次数"""
+        from library.static_checker.lint_engine import get_lint_engine
+        from library.static_checker.symbol_checker import SymbolChecker
+        engine = get_lint_engine()
+        with patch.object(engine, 'check', wraps=engine.check) as mock_check:
+            errors = SymbolChecker("python").check(code)
+        return [error.error_message for error in errors], mock_check.call_count
+
+    def test_identical_code_is_checked_once(self):
+        """测试切换选项卡或撤销后检查相同的代码时不再运行检查"""
+        first, calls = self.check("import os\nx=1\n")
+        assert calls == 1
+        assert self.check("import sys\n")[1] == 1
+        again, calls = self.check("import os\nx=1\n")
+        assert (again, calls) == (first, 0)
+
+    def test_restart_uses_disk_cache(self, tmp_path, monkeypatch):
+        """测试重启后打开没有修改的文件直接使用缓存目录中的结果"""
+        from library.static_checker import lint_cache
+        monkeypatch.setattr(lint_cache, "_global_lint_cache", LintCache(cache_dir=str(tmp_path)))
+        first, _ = self.check("import os\n")
+        monkeypatch.setattr(lint_cache, "_global_lint_cache", LintCache(cache_dir=str(tmp_path)))
+        again, calls = self.check("import os\n")
+        assert (again, calls) == (first, 0)
+        assert get_lint_cache().disk_hits == 1
+
+    def test_syntax_errors_are_not_cached(self):
+        """测试语法错误不写入缓存"""
+        assert self.check("def broken(:\n")[0][0].startswith("E999")
+        assert len(get_lint_cache()) == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,150 @@
+"""
+进程内代码检查引擎单元测试
+"""
+
+import importlib.util
+import subprocess
+import threading
+import pytest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from library.static_checker.lint_engine import LintCancelled, LintEngine, run_flake8
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+CODE = "import os\nx=1\n"
+
+
+def load_lint_benchmark():
+    """加载 tools/benchmark_lint.py"""
+    path = PROJECT_ROOT / "tools" / "benchmark_lint.py"
+    spec = importlib.util.spec_from_file_location("benchmark_lint", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class TestLintEngine:
+    """检查引擎测试类"""
+
+    def setup_method(self):
+        """测试方法前置设置"""
+        pytest.importorskip("pyflakes")
+        pytest.importorskip("pycodestyle")
+        self.engine = LintEngine()
+
+    def test_same_results_as_flake8(self):
+        """测试结果与 flake8 默认配置的输出格式相同"""
+        results = self.engine.check(CODE)
+        assert [(row, col, code) for row, col, code, text in results] == [(1, 1, "F401"), (2, 2, "E225")]
+        assert results[0][3] == "'os' imported but unused"
+
+    def test_noqa_comments(self):
+        """测试行内 noqa 只忽略列出的代码，整个文件的 noqa 忽略全部"""
+        assert self.engine.check("import os  # noqa\nx=1\n")[0][2] == "E225"
+        assert [r[2] for r in self.engine.check("import os  # noqa: E501\n")] == ["F401"]
+        assert self.engine.check("# flake8: noqa\nimport os\n") == []
+
+    def test_cancel_stops_before_next_logical_line(self):
+        """测试取消后 pycodestyle 在下一个逻辑行前中止"""
+        cancel = threading.Event()
+        checked = []
+        engine = self.engine
+        engine.available
+        original = engine._checker_class.check_logical
+
+        def check_logical(checker):
+            checked.append(checker.line_number)
+            result = original(checker)
+            if len(checked) == 3:
+                cancel.set()
+            return result
+
+        with patch.object(engine._checker_class, 'check_logical', check_logical):
+            with pytest.raises(LintCancelled):
+                engine.check("x = 1\n" * 100, cancel=cancel)
+        assert len(checked) == 4
+
+    def test_no_process_is_started(self):
+        """测试检查器在内存中检查，不写临时文件也不启动进程"""
+        from library.static_checker.symbol_checker import SymbolChecker
+        with patch('subprocess.run') as mock_run, patch('tempfile.NamedTemporaryFile') as mock_file:
+            errors = SymbolChecker("python").check(CODE)
+            mock_run.assert_not_called()
+            mock_file.assert_not_called()
+        assert [error.error_message for error in errors] == [
+            "F401: 'os' imported but unused",
+            "E225: missing whitespace around operator",
+        ]
+        assert (errors[1].line, errors[1].column) == (2, 3)
+
+    def test_deeply_nested_code_reports_e999(self):
+        """测试嵌套过深导致解析器内存不足时报告 E999"""
+        from library.static_checker.symbol_checker import SymbolChecker
+        errors = SymbolChecker("python").check("x = " + "-" * 200000 + "1\n")
+        assert len(errors) == 1
+        assert errors[0].line == 1
+        assert errors[0].error_message.startswith("E999: MemoryError")
+
+    def test_latency_report(self):
+        """测试延迟报告只测量进程内引擎时不需要 flake8 命令"""
+        benchmark = load_lint_benchmark()
+        path = PROJECT_ROOT / "test" / "test_data" / "sample_python.py"
+        result = benchmark.measure_latency([path], runs=1, subprocess_path=False)["sample_python.py"]
+        assert result["engine_ms"] > 0
+        assert result["subprocess_ms"] is None
+
+
+class TestFlake8Fallback:
+    """flake8 命令测试类"""
+
+    def fake_popen(self, stdout="", finishes=True):
+        """模拟 flake8 进程，finishes 为 False 时一直运行到被结束"""
+        process = MagicMock()
+        if finishes:
+            process.communicate.return_value = (stdout, "")
+        else:
+            def communicate(timeout=None):
+                if process.kill.called:
+                    return "", ""
+                raise subprocess.TimeoutExpired("flake8", timeout)
+            process.communicate.side_effect = communicate
+        return process
+
+    def test_unavailable_engine_runs_flake8(self):
+        """测试没有安装 pyflakes 时退回调用 flake8 命令"""
+        engine = LintEngine()
+        process = self.fake_popen("1,1,F401,'os' imported but unused\n2,2,E225,missing, whitespace\n")
+        with patch.dict('sys.modules', {'pyflakes': None}), \
+                patch('library.static_checker.lint_engine.subprocess.Popen', return_value=process) as mock_popen:
+            assert engine.available is False
+            results = engine.check(CODE)
+        assert mock_popen.call_args[0][0][0] == "flake8"
+        assert results == [(1, 1, "F401", "'os' imported but unused"), (2, 2, "E225", "missing, whitespace")]
+
+    def test_missing_flake8_returns_nothing(self):
+        """测试 flake8 命令不存在时返回空结果"""
+        with patch('library.static_checker.lint_engine.subprocess.Popen', side_effect=FileNotFoundError):
+            assert run_flake8(CODE) == []
+
+    def test_cancel_kills_flake8(self):
+        """测试取消检查时结束正在运行的 flake8 进程"""
+        process = self.fake_popen(finishes=False)
+        cancel = threading.Event()
+        threading.Timer(0.1, cancel.set).start()
+        with patch('library.static_checker.lint_engine.subprocess.Popen', return_value=process):
+            with pytest.raises(LintCancelled):
+                run_flake8(CODE, cancel=cancel)
+        process.kill.assert_called_once()
+
+    def test_timeout_kills_flake8(self):
+        """测试超时时结束 flake8 进程并返回空结果"""
+        process = self.fake_popen(finishes=False)
+        with patch('library.static_checker.lint_engine.subprocess.Popen', return_value=process):
+            assert run_flake8(CODE, timeout=0.1) == []
+        process.kill.assert_called_once()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,209 @@
+"""
+日志跟踪单元测试
+"""
+
+import os
+import pytest
+from unittest.mock import patch
+
+from library.log_tail import LogTail
+from library.fake_text import FakeText, drain_span_jobs
+
+LOG = (
+    "2024-01-15 10:23:45 INFO app.main Starting server on 192.168.1.10:8080\n"
+    "2024-01-15 10:23:46 ERROR app.db Query SELECT id FROM users; failed\n"
+)
+MORE = (
+    "2024-01-15 10:23:47 WARNING app.cache miss ratio 0.75 for {\"user\": 42}\n"
+    "  File \"/srv/app/api.py\", line 42, in handle\n"
+)
+
+
+class TestLogTail:
+    """文件跟踪测试类"""
+
+    def test_reads_only_appended_bytes(self, tmp_path):
+        """测试只读取追加的内容，默认从文件末尾开始"""
+        path = tmp_path / "app.log"
+        path.write_bytes(b"old\n")
+        tail = LogTail(str(path))
+        assert tail.poll() == ("", False)
+        with open(path, "ab") as fp:
+            fp.write(b"new\n")
+        assert tail.poll() == ("new\n", False)
+        assert tail.poll() == ("", False)
+
+    def test_split_characters_and_newlines(self, tmp_path):
+        """测试被拆开的多字节字符和 \\r\\n 在下次读取时拼接"""
+        path = tmp_path / "app.log"
+        path.write_bytes(b"a\r")
+        tail = LogTail(str(path), position=0)
+        assert tail.poll() == ("a", False)
+        with open(path, "ab") as fp:
+            fp.write(b"\n\xe4\xb8")
+        assert tail.poll() == ("\n", False)
+        with open(path, "ab") as fp:
+            fp.write(b"\xad\n")
+        assert tail.poll() == ("中\n", False)
+
+    def test_truncation_and_rotation_reset(self, tmp_path):
+        """测试文件被截断或轮转时从头读取"""
+        path = tmp_path / "app.log"
+        path.write_bytes(b"first line\n")
+        tail = LogTail(str(path))
+        path.write_bytes(b"x\n")
+        assert tail.poll() == ("x\n", True)
+
+        rotated = tmp_path / "app.log.new"
+        rotated.write_bytes(b"rotated\n")
+        os.replace(rotated, path)
+        assert tail.poll() == ("rotated\n", True)
+
+        path.unlink()
+        assert tail.poll() == ("", False)
+
+    def test_read_limit(self, tmp_path):
+        """测试每次读取的字节数有上限，其余部分下次读取"""
+        path = tmp_path / "app.log"
+        path.write_bytes(b"")
+        tail = LogTail(str(path), read_limit=4)
+        path.write_bytes(b"0123456789")
+        assert tail.poll() == ("0123", False)
+        assert tail.has_more() is True
+        assert tail.poll(read_all=True) == ("456789", False)
+        assert tail.has_more() is False
+
+
+class TestAppendedHighlighting:
+    """追加内容高亮测试类"""
+
+    def setup_method(self):
+        """测试方法前置设置"""
+        from library.highlighter import LogHighlighter
+        self.highlighter_class = LogHighlighter
+        self.text = FakeText(text=LOG)
+        self.highlighter = LogHighlighter(self.text)
+        self.highlighter.highlight()
+
+    def assert_same_as_full_pass(self):
+        """标签与对同一文本完整高亮的结果相同"""
+        expected = FakeText(text=self.text.get("1.0", "end-1c"))
+        self.highlighter_class(expected).highlight()
+        for tag in self.highlighter.syntax_colors:
+            assert self.text.tag_ranges(tag) == expected.tag_ranges(tag), tag
+
+    def test_only_appended_lines_are_read(self):
+        """测试只读取并高亮追加的行"""
+        last_line = LOG.count("\n")
+        self.text.insert("end-1c", MORE)
+        self.text.reset_calls()
+        self.highlighter.highlight_appended(last_line)
+        drain_span_jobs(self.highlighter)
+        assert self.text.calls["get"] == 1
+        assert self.highlighter.timings.last()["kind"] == "append"
+        assert self.highlighter._snapshot_lines == self.text.get("1.0", "end-1c").split("\n")
+        self.assert_same_as_full_pass()
+
+    def test_append_continues_partial_line(self):
+        """测试追加的内容接在没有换行的最后一行后面"""
+        last_line = LOG.count("\n")
+        self.text.insert("end-1c", "2024-01-15 10:23:48 DEB")
+        self.highlighter.highlight_appended(last_line)
+        drain_span_jobs(self.highlighter)
+        self.text.insert("end-1c", "UG done\n")
+        self.highlighter.highlight_appended(last_line)
+        drain_span_jobs(self.highlighter)
+        self.assert_same_as_full_pass()
+
+    def test_drop_leading_lines(self):
+        """测试删除开头的行后只移动保存的区间"""
+        self.text.delete("1.0", "2.0")
+        self.highlighter.drop_leading_lines(1)
+        assert len(self.highlighter._snapshot_lines) == LOG.count("\n")
+        self.text.insert("end-1c", MORE)
+        self.highlighter.highlight_appended(LOG.count("\n") - 1)
+        drain_span_jobs(self.highlighter)
+        self.assert_same_as_full_pass()
+        # 追加时累计的大小指标与重新统计的相同
+        from library.highlight_policy import HighlightPolicy
+        lines, metrics = self.highlighter._tail_metrics
+        assert lines is self.highlighter._snapshot_lines
+        assert metrics[:2] == HighlightPolicy().measure(self.text.get("1.0", "end-1c"))[:2]
+
+
+class TestFollowFile:
+    """多文件编辑器跟踪文件测试类"""
+
+    def setup_method(self):
+        """测试方法前置设置，用内存组件替换 Tk 组件"""
+        self.patches = [
+            patch('library.multi_file_editor.Text', FakeText),
+            patch('library.multi_file_editor.Frame'),
+            patch('library.multi_file_editor.Font'),
+            patch('library.multi_file_editor.Notebook'),
+            patch('library.ui_styles.apply_modern_style'),
+        ]
+        mocks = [p.start() for p in self.patches]
+        notebook = mocks[3].return_value
+        notebook.add.side_effect = lambda frame, text: f"tab{notebook.add.call_count}"
+        notebook.tabs.side_effect = lambda: list(self.editor.tab_editors)
+        from library.multi_file_editor import MultiFileEditor
+        self.root = FakeText()
+        self.editor = MultiFileEditor(self.root, None, None, None)
+
+    def teardown_method(self):
+        """测试方法后置清理"""
+        for p in self.patches:
+            p.stop()
+
+    def poll(self, tab_id):
+        """运行一次跟踪定时器并等待高亮完成"""
+        highlighter = self.editor.tab_highlighters[tab_id]
+        self.root.run_after(max_rounds=1)
+        while highlighter.pass_pending():
+            for job in list(highlighter._span_jobs):
+                job[1].result()
+            highlighter._poll_span_jobs()
+            self.editor.tab_editors[tab_id].run_idle()
+
+    def test_follow_appends_and_caps_lines(self, tmp_path):
+        """测试跟踪时追加新内容、只保留最近的行，停止后不再读取"""
+        path = tmp_path / "app.log"
+        path.write_text(LOG, encoding="utf-8")
+        tab_id = self.editor.create_new_tab("app.log", "stale", str(path))
+        text = self.editor.tab_editors[tab_id]
+
+        assert self.editor.follow_file(tab_id, retained_lines=3) is True
+        assert text.get("1.0", "end-1c") == LOG
+        assert self.editor.is_following(tab_id)
+        self.poll(tab_id)
+
+        with open(path, "a", encoding="utf-8") as fp:
+            fp.write(MORE)
+        self.poll(tab_id)
+        assert text.get("1.0", "end-1c") == "\n".join((LOG + MORE).split("\n")[-3:])
+        assert "log_level_warning" in text.tag_names("1.20")
+        assert self.editor.tab_highlighters[tab_id].timings.last()["kind"] == "append"
+        assert text.edit_modified() is False
+
+        assert self.editor.stop_following(tab_id) is True
+        with open(path, "a", encoding="utf-8") as fp:
+            fp.write("more\n")
+        self.root.run_after()
+        assert "more" not in text.get("1.0", "end-1c")
+
+    def test_closing_followed_tab_does_not_prompt(self, tmp_path):
+        """测试关闭跟踪中的选项卡不提示保存"""
+        path = tmp_path / "app.log"
+        path.write_text(LOG, encoding="utf-8")
+        tab_id = self.editor.create_new_tab("app.log", LOG, str(path))
+        self.editor.follow_file(tab_id, retained_lines=1)
+        with patch('library.multi_file_editor.messagebox') as messagebox:
+            self.editor.close_tab(tab_id)
+        messagebox.askyesnocancel.assert_not_called()
+        assert not self.editor.is_following(tab_id)
+        assert self.root.pending_after() == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -188,5 +188,92 @@ class TestOtherHighlighters:
                 assert highlighter is not None
 
 
+
+class TestIncrementalMatchesFull:
+    """增量高亮与完整高亮结果一致测试类"""
+    
+    def tags(self, widget):
+        """文本组件上的所有高亮区间"""
+        return {tag: widget.tag_ranges(tag) for tag in widget.tag_names()
+                if tag != "sel" and widget.tag_ranges(tag)}
+    
+    def compare(self, module_name, text, edit):
+        """
+        高亮文本、执行编辑并增量高亮，返回增量结果和对编辑后文本完整高亮的结果
+        """
+        import importlib
+        from library.fake_text import FakeText, drain_span_jobs
+        highlighter_class = importlib.import_module(module_name).CodeHighlighter
+        widget = FakeText(text=text)
+        highlighter = highlighter_class(widget)
+        highlighter.highlight()
+        drain_span_jobs(highlighter)
+        edit(widget)
+        highlighter.highlight_incremental()
+        drain_span_jobs(highlighter)
+        
+        fresh = FakeText(text=widget.get("1.0", "end-1c"))
+        fresh_highlighter = highlighter_class(fresh)
+        fresh_highlighter.highlight()
+        drain_span_jobs(fresh_highlighter)
+        return self.tags(widget), self.tags(fresh)
+    
+    def test_markdown_broken_backtick_pair(self):
+        """测试删除反引号打破行内代码配对后，增量高亮与完整高亮相同"""
+        text = "# Title\n\n" + "text `code` more\n" * 30 + "end `x\ny` z\n"
+        incremental, full = self.compare(
+            "library.highlighter.markdown", text, lambda widget: widget.delete("20.5", "20.6"))
+        assert incremental == full
+        assert "inline_code" in full
+    
+    def test_go_comments_and_strings(self):
+        """测试 Go 的注释、字符串和跨行原始字符串在同一次扫描中识别，其中的关键字不高亮"""
+        function = 'func f() { // if for\n  s := "func go"\n  r := `raw\nfor`\n}\n'
+        incremental, full = self.compare(
+            "library.highlighter.go", "package main\n\n" + function * 20,
+            lambda widget: widget.insert("10.0", "r := `\n"))
+        assert incremental == full
+        
+        _, tags = self.compare("library.highlighter.go", "package main\n\n" + function, lambda widget: None)
+        assert tags["comment"] == ("3.11", "3.20")
+        assert tags["string"] == ("4.7", "4.16", "5.7", "6.4")
+        assert tags["keyword"] == ("1.0", "1.7", "3.0", "3.4")
+        assert "operator" not in tags
+    
+    def test_java_master_pattern(self):
+        """测试 Java 的注释、文本块、注解和导入在同一次扫描中识别"""
+        header = 'import java.util.List;\nimport static java.lang.Math.max;\n\n'
+        method = '@Override\nint f() { // if for\n  String s = """\nwhile\n""";\n  return max(1, 2);\n}\n'
+        incremental, full = self.compare(
+            "library.highlighter.java", header + method * 20,
+            lambda widget: widget.insert("12.0", 'String t = """\n'))
+        assert incremental == full
+        
+        _, tags = self.compare("library.highlighter.java", header + method, lambda widget: None)
+        assert tags["annotation"] == ("4.0", "4.9")
+        assert tags["comment"] == ("5.10", "5.19")
+        assert tags["string"] == ("6.13", "8.3")
+        assert tags["imported_class"] == ("1.17", "1.21")
+        assert tags["imported_function"] == ("2.29", "2.32", "9.9", "9.12")
+        assert tags["keyword"] == ("1.0", "1.6", "2.0", "2.6", "2.7", "2.13", "5.0", "5.3", "9.2", "9.8")
+    
+    def test_typescript_master_pattern(self):
+        """测试 TypeScript 的注释、模板字符串和导入在同一次扫描中识别"""
+        header = 'import * as fs from "fs"\nimport { useState as useS } from \'react\'\n\n'
+        function = 'function f() { // if for\n  const t = `while\n${x}`\n  return fs.readFileSync(useS(1))\n}\n'
+        incremental, full = self.compare(
+            "library.highlighter.typescript", header + function * 20,
+            lambda widget: widget.insert("10.0", "const u = `\n"))
+        assert incremental == full
+        
+        _, tags = self.compare("library.highlighter.typescript", header + function, lambda widget: None)
+        assert tags["comment"] == ("4.15", "4.24")
+        assert tags["template"] == ("5.12", "6.5")
+        assert tags["imported_module"] == ("1.12", "1.14", "7.9", "7.11")
+        assert tags["imported_function"] == ("7.12", "7.24", "7.25", "7.29")
+        assert tags["keyword"] == ("1.0", "1.6", "1.9", "1.11", "1.15", "1.19", "2.0", "2.6", "2.18", "2.20",
+                                   "2.28", "2.32", "4.0", "4.8", "5.2", "5.7", "7.2", "7.8")
+
+
 if __name__ == "__main__":
-    pytest.main([__file__])
\ No newline at end of file
+    pytest.main([__file__])
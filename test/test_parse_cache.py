@@ -0,0 +1,235 @@
+"""
+解析结果缓存单元测试
+"""
+
+import ast
+import pytest
+import tokenize
+from unittest.mock import Mock, patch
+
+from library.parse_cache import ParseCache, get_parse_cache, reparse_changed_blocks
+
+
+class TestParseCache:
+    """解析缓存测试类"""
+
+    def setup_method(self):
+        """测试方法前置设置"""
+        self.cache = ParseCache(max_entries=2)
+
+    def test_parse_once(self):
+        """测试同一内容只解析一次"""
+        code = "x = 1\n"
+        tree = self.cache.parse(code)
+        # 内容相同但不是同一个字符串对象
+        assert self.cache.parse("".join(["x = 1", "\n"])) is tree
+        assert self.cache.misses == 1
+        assert self.cache.hits == 1
+
+    def test_errors_are_cached(self):
+        """测试解析失败的结果同样被缓存"""
+        with pytest.raises(SyntaxError):
+            self.cache.parse("def (")
+        with pytest.raises(SyntaxError):
+            self.cache.parse("def (")
+        with pytest.raises(tokenize.TokenError):
+            self.cache.tokens("x = (")
+        assert self.cache.misses == 2
+        assert self.cache.hits == 1
+
+    def test_lru_eviction(self):
+        """测试超过容量时淘汰最久未使用的项"""
+        first = self.cache.parse("a = 1")
+        self.cache.parse("b = 2")
+        self.cache.parse("a = 1")
+        self.cache.parse("c = 3")
+        assert len(self.cache) == 2
+        assert self.cache.parse("a = 1") is first
+        misses = self.cache.misses
+        self.cache.parse("b = 2")
+        assert self.cache.misses == misses + 1
+
+    def test_spans_per_owner(self):
+        """测试高亮区间按高亮器区分"""
+        self.cache.store_spans("x", "python", [("keyword", 0, 1)])
+        assert self.cache.get_spans("x", "python") == [("keyword", 0, 1)]
+        assert self.cache.get_spans("x", "lua") is None
+
+
+MODULE = """import os
+
+
+def first():
+    return 1
+
+
+@decorator
+def second(x):
+    if x:
+        return x
+    return 0
+
+
+class Third:
+    value = 3
+""" + "".join(f"v{i} = {i}\n" for i in range(20))
+
+
+def dump(tree):
+    """带位置信息的语法树文本，用于比较"""
+    return ast.dump(tree, include_attributes=True)
+
+
+class TestIncrementalReparse:
+    """顶层语句增量解析测试类"""
+
+    def reparse(self, new_text):
+        """在 MODULE 的语法树上增量解析 new_text，并与完整解析比较"""
+        tree = reparse_changed_blocks(MODULE, ast.parse(MODULE), new_text)
+        if tree is not None:
+            assert dump(tree) == dump(ast.parse(new_text))
+        return tree
+
+    def test_edit_inside_block(self):
+        """测试只重新解析改动所在的块，其余语句原样复用"""
+        old_tree = ast.parse(MODULE)
+        preceding = old_tree.body[0]
+        following = old_tree.body[4]
+        new_text = MODULE.replace("return x", "return x + 1")
+        tree = reparse_changed_blocks(MODULE, old_tree, new_text)
+        assert dump(tree) == dump(ast.parse(new_text))
+        assert tree.body[0] is preceding
+        assert tree.body[4] is following
+
+    def test_inserted_lines_shift_following_blocks(self):
+        """测试插入行后之后的块行号平移，上一版本的语法树不变"""
+        old_tree = ast.parse(MODULE)
+        old_dump = dump(old_tree)
+        new_text = MODULE.replace("v15 = 15\n", "if v15:\n    v15 = 0\nv15 = 15\n")
+        tree = reparse_changed_blocks(MODULE, old_tree, new_text)
+        assert tree is not None
+        assert dump(tree) == dump(ast.parse(new_text))
+        assert tree.body[-1].lineno == old_tree.body[-1].lineno + 2
+        assert tree.body[0] is old_tree.body[0]
+        assert dump(old_tree) == old_dump
+
+    def test_inserted_lines_near_top_reparse_only_edited_block(self):
+        """测试在文件前半部分插入行时只解析改动的块，之后的块复制后平移行号"""
+        cache = ParseCache()
+        old_tree = cache.parse(MODULE)
+        old_dump = dump(old_tree)
+        new_text = MODULE.replace("    return 1\n", "    a = 1\n    b = 2\n    return a\n")
+        with patch('ast.parse', wraps=ast.parse) as mock_parse:
+            tree = cache.parse(new_text)
+        assert cache.reparses == 1
+        # 只解析了改动的块和前后各一个块，没有完整解析
+        assert [call.args[0] for call in mock_parse.call_args_list] == [new_text[:new_text.index("\nclass Third")]]
+        assert dump(tree) == dump(ast.parse(new_text))
+        assert tree.body[-1].lineno == old_tree.body[-1].lineno + 2
+        assert tree.body[-1] is not old_tree.body[-1]
+        assert dump(old_tree) == old_dump
+
+    def test_else_joins_previous_block(self):
+        """测试新增的 else 属于前一个块"""
+        source = "e = 5\n" * 20 + "if x:\n    a = 1\n\nb = 2\n\nc = 3\n\nd = 4\n"
+        new_text = source.replace("\nb = 2", "else:\n    a = 2\nb = 2")
+        tree = reparse_changed_blocks(source, ast.parse(source), new_text)
+        assert tree is not None
+        assert dump(tree) == dump(ast.parse(new_text))
+        assert len(tree.body[20].orelse) == 1
+
+    def test_falls_back_when_ambiguous(self):
+        """测试片段无法单独解析或不允许单独解析时回退到完整解析"""
+        # 未闭合的三引号会吞掉后面的代码
+        assert self.reparse(MODULE.replace("return 1", 'return """1')) is None
+        # from __future__ 必须位于模块开头
+        assert self.reparse(MODULE.replace("class Third:", "from __future__ import annotations\nclass Third:")) is None
+
+    def test_cache_reuses_previous_tree(self):
+        """测试缓存在上一版本的语法树上增量解析"""
+        cache = ParseCache()
+        old_tree = cache.parse(MODULE)
+        new_text = MODULE.replace("value = 3", "value = 4")
+        tree = cache.parse(new_text)
+        assert cache.reparses == 1
+        assert tree.body[0] is old_tree.body[0]
+        assert dump(tree) == dump(ast.parse(new_text))
+        # 上一版本仍在缓存中，语法树没有被修改
+        misses = cache.misses
+        assert cache.parse(MODULE) is old_tree
+        assert cache.misses == misses
+        assert dump(old_tree) == dump(ast.parse(MODULE))
+
+    def test_returned_tree_is_not_modified(self):
+        """测试之后的增量解析不会改变已经返回的语法树的行号"""
+        cache = ParseCache()
+        v1 = cache.parse(MODULE)
+        v1_dump = dump(v1)
+        last_lineno = v1.body[-1].lineno
+        v2_text = MODULE.replace("v12 = 12\n", "v12 = 12\nextra = 0\n\n")
+        v2 = cache.parse(v2_text)
+        assert cache.reparses == 1
+        assert v2.body[-1].lineno == last_lineno + 2
+        assert v1.body[-1].lineno == last_lineno
+        assert dump(v1) == v1_dump
+
+
+class TestParseCacheSharing:
+    """高亮器与检查器共享解析结果测试类"""
+
+    def setup_method(self):
+        """测试方法前置设置"""
+        self.text_widget = Mock()
+        self.text_widget.configure_mock(**{
+            'get.return_value': '',
+            'index.return_value': '1.0'
+        })
+        get_parse_cache().clear()
+
+    def test_repeated_full_pass_uses_cache(self):
+        """测试内容未变化时重复的完整高亮不再解析"""
+        from library.highlighter.python import CodeHighlighter
+        highlighter = CodeHighlighter(self.text_widget)
+        code = "import os\n\nclass A:\n    pass\n"
+        spans = highlighter.compute_spans(code)
+        with patch('ast.parse') as mock_parse, \
+             patch.object(highlighter, '_highlight_text') as mock_highlight:
+            assert highlighter.compute_spans(code) == spans
+            mock_parse.assert_not_called()
+            mock_highlight.assert_not_called()
+
+    def test_window_pass_not_cached(self):
+        """测试窗口高亮不读写缓存"""
+        from library.highlighter.python import CodeHighlighter
+        highlighter = CodeHighlighter(self.text_widget)
+        highlighter.compute_spans("x = 1\n", window=True)
+        assert len(get_parse_cache()) == 0
+
+    def test_checker_does_not_use_shared_tree(self):
+        """测试静态检查器自己解析代码，pyflakes 不会修改高亮器缓存的语法树"""
+        pytest.importorskip("pyflakes")
+        pytest.importorskip("pycodestyle")
+        from library.highlighter.python import CodeHighlighter
+        from library.static_checker.symbol_checker import SymbolChecker
+        code = "import os\n\n\ndef f(x):\n    return x\n"
+        CodeHighlighter(self.text_widget).compute_spans(code)
+        tree = get_parse_cache().parse(code)
+        shared = dump(tree)
+
+        errors = SymbolChecker("python").check(code)
+        assert [error.error_message for error in errors] == ["F401: 'os' imported but unused"]
+        assert get_parse_cache().parse(code) is tree
+        assert dump(tree) == shared
+        # Load 等上下文节点是所有语法树共用的单例，只检查带位置信息的节点
+        assert not any(hasattr(node, "_pyflakes_parent") for node in ast.walk(tree) if hasattr(node, "lineno"))
+
+    def test_checker_syntax_error(self):
+        """测试语法错误时不启动 flake8，只报告 E999"""
+        from library.static_checker.symbol_checker import SymbolChecker
+        code = "def broken(:\n    pass\n"
+        with patch('subprocess.run') as mock_run:
+            errors = SymbolChecker("python").check(code)
+            mock_run.assert_not_called()
+        assert len(errors) == 1
+        assert errors[0].line == 1
+        assert errors[0].error_message.startswith("E999")
@@ -0,0 +1,111 @@
+"""
+自适应调度器单元测试
+"""
+
+import pytest
+from unittest.mock import Mock
+
+from library.pass_scheduler import PassScheduler, MAX_WAIT_FACTOR
+
+
+class FakeClock:
+    """可手动推进的时钟"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, ms):
+        self.now += ms / 1000
+
+
+class TestPassScheduler:
+    """调度器测试类"""
+
+    def setup_method(self):
+        """测试方法前置设置"""
+        self.clock = FakeClock()
+        self.scheduler = PassScheduler("test", 50, min_delay=20, max_delay=500, clock=self.clock)
+
+    def run_pass(self, cost_ms):
+        """执行一次耗时为 cost_ms 的处理"""
+        self.scheduler.begin()
+        self.scheduler.add_cost(cost_ms / 1000)
+        self.scheduler.finish()
+
+    def test_delay_follows_cost(self):
+        """测试延迟随处理耗时调整，并限制在上下限之间"""
+        assert self.scheduler.request() == 50
+        self.run_pass(1)
+        assert self.scheduler.request() == 20
+        self.run_pass(1000)
+        assert self.scheduler.request() == 500
+        self.run_pass(100)
+        # 平均耗时平滑下降
+        assert 20 < self.scheduler.delay_for_cost() < 500
+
+    def test_burst_is_coalesced(self):
+        """测试等待期间的修改合并到同一次处理"""
+        assert self.scheduler.request() == 50
+        assert self.scheduler.request() is None
+        assert self.scheduler.request() is None
+        self.clock.advance(50)
+        assert self.scheduler.remaining() is None
+        self.run_pass(5)
+        stats = self.scheduler.stats()
+        assert stats["requests"] == 3
+        assert stats["skipped"] == 2
+        assert stats["passes"] == 1
+        assert stats["history"][-1]["coalesced"] == 2
+
+    def test_waits_for_pause(self):
+        """测试仍在输入时推迟处理，但不超过最长等待时间"""
+        self.scheduler.request()
+        self.clock.advance(30)
+        self.scheduler.request()
+        self.clock.advance(20)
+        assert self.scheduler.remaining() == 30
+        # 一直输入时最终也会处理
+        for _ in range(MAX_WAIT_FACTOR * 5):
+            self.clock.advance(10)
+            self.scheduler.request()
+        assert self.scheduler.remaining() is None
+        assert self.scheduler.stats()["rearmed"] == 1
+
+
+class TestHighlighterScheduling:
+    """高亮器调度测试类"""
+
+    def setup_method(self):
+        """测试方法前置设置"""
+        from library.highlighter.python import CodeHighlighter
+        self.text_widget = Mock()
+        self.text_widget.configure_mock(**{
+            'get.return_value': 'x = 1\n',
+            'index.return_value': '1.0',
+        })
+        self.highlighter = CodeHighlighter(self.text_widget)
+        self.clock = FakeClock()
+        self.highlighter.pass_scheduler._clock = self.clock
+
+    def test_pass_cost_is_measured(self):
+        """测试高亮耗时被记录，下次修改按耗时选择延迟"""
+        self.highlighter._queue_highlight()
+        self.highlighter._queue_highlight()
+        self.text_widget.after.assert_called_once()
+        self.clock.advance(100)
+        self.highlighter._delayed_highlight()
+        stats = self.highlighter.pass_scheduler.stats()
+        assert stats["passes"] == 1
+        assert stats["skipped"] == 1
+        assert stats["cost_ms"] is not None
+        self.text_widget.after.reset_mock()
+        self.highlighter._queue_highlight()
+        delay = self.text_widget.after.call_args.args[0]
+        assert delay == self.highlighter.pass_scheduler.delay_for_cost()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -531,5 +531,66 @@ with ContextManager() as cm:
         assert len(keyword_tags) > 0
 
 
+class TestAstVisitor:
+    """单次遍历语法树的访问器测试"""
+    
+    def setup_method(self):
+        """测试方法前置设置"""
+        self.text_widget = Mock()
+        self.text_widget.configure_mock(**{
+            'get.return_value': '',
+            'index.return_value': '1.0'
+        })
+        self.highlighter = CodeHighlighter(self.text_widget)
+    
+    def tagged(self, code, tag):
+        """返回被标记为 tag 的文本"""
+        return [code[start:end] for name, start, end in self.highlighter.compute_spans(code) if name == tag]
+    
+    def test_single_walk(self):
+        """测试整个高亮过程只遍历一次语法树"""
+        code = "import os\n\nclass A:\n    def f(self, x):\n        return os.path.join(x)\n"
+        with patch('ast.walk') as mock_walk, patch('ast.iter_child_nodes') as mock_children:
+            self.highlighter.compute_spans(code)
+            mock_walk.assert_not_called()
+            mock_children.assert_not_called()
+        assert not hasattr(self.highlighter, '_parent_map')
+    
+    def test_class_used_before_definition(self):
+        """测试在类定义之前引用的类名仍被标记为类"""
+        code = "item = widget()\n\nclass widget:\n    pass\n"
+        assert "widget" in self.tagged(code, "class")
+        assert "widget" not in self.tagged(code, "function")
+    
+    def test_instance_attrs_use_enclosing_class(self):
+        """测试实例属性归属于最近的外层类"""
+        code = (
+            "class Outer:\n"
+            "    def __init__(self):\n"
+            "        self.a = 1\n"
+            "        class Inner:\n"
+            "            def set(self):\n"
+            "                self.b = 2\n"
+            "        self.c = lambda: 3\n"
+        )
+        self.highlighter.compute_spans(code)
+        assert self.highlighter.class_instance_attrs == {"Outer": {"a", "c"}, "Inner": {"b"}}
+    
+    def test_parent_of_visited_node(self):
+        """测试访问器提供当前节点的父节点"""
+        code = "run()\nvalue = run\n"
+        self.highlighter.imported_symbols['run'] = 'tasks.run'
+        assert self.tagged(code, "imported_function") == ["run"]
+        assert self.tagged(code, "imported_variable") == ["run"]
+        # 遍历结束后不再保留父节点
+        assert self.highlighter._get_parent_node(ast.Name(id='run', ctx=ast.Load())) is None
+    
+    def test_subclass_handlers(self):
+        """测试子类的处理函数与基类的处理函数一起执行"""
+        handlers = CodeHighlighter._node_handlers()
+        assert handlers[ast.Name] is CodeHighlighter._visit_Name
+        assert handlers[ast.If].__qualname__ == "BaseHighlighter._visit_If"
+        assert ast.Load not in handlers
+
 if __name__ == "__main__":
-    pytest.main([__file__])
\ No newline at end of file
+    pytest.main([__file__])
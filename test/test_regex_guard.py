@@ -0,0 +1,111 @@
+"""
+高亮正则保护单元测试
+"""
+
+import re
+import pytest
+from unittest.mock import patch
+
+from library.highlight_policy import HighlightPolicy
+from library.regex_guard import CHECK_EVERY, PassBudget, PassBudgetExceeded, finditer_guarded
+from library.fake_text import FakeText
+
+
+class TestPassBudget:
+    """时间预算测试类"""
+
+    def test_budget_expires(self):
+        """测试时钟超过期限后抛出异常"""
+        now = [0.0]
+        budget = PassBudget(1.0, clock=lambda: now[0])
+        budget.check()
+        assert budget.expired() is False
+        now[0] = 1.5
+        assert budget.expired() is True
+        with pytest.raises(PassBudgetExceeded):
+            budget.check()
+
+    def test_finditer_checks_between_matches(self):
+        """测试每 CHECK_EVERY 个匹配检查一次预算"""
+        now = [0.0]
+        budget = PassBudget(1.0, clock=lambda: now[0])
+        matches = finditer_guarded(re.compile("a"), "a" * (CHECK_EVERY * 2), budget)
+        for _ in range(CHECK_EVERY - 1):
+            next(matches)
+        now[0] = 2.0
+        next(matches)
+        with pytest.raises(PassBudgetExceeded):
+            next(matches)
+
+    def test_finditer_without_budget(self):
+        """测试不限制预算时与 finditer 相同"""
+        assert [m.group() for m in finditer_guarded(re.compile(r"\d+"), "1 22 333")] == ["1", "22", "333"]
+
+
+class TestGuardedHighlighting:
+    """高亮器保护测试类"""
+
+    def compute(self, highlighter_class, text):
+        """计算高亮区间，返回 {(标签, 起点, 终点)}"""
+        highlighter = highlighter_class(FakeText())
+        return highlighter, set(highlighter.compute_spans(text))
+
+    def test_long_lines_stay_plain(self):
+        """测试超长行不高亮，其他行的偏移量不变"""
+        from library.highlighter import CHighlighter
+        text = 'int a;\n' + '"x" ' * 30 + '\nint b;'
+        with patch('library.highlighter.base.get_highlight_policy',
+                   return_value=HighlightPolicy(max_line_length=80)):
+            _, spans = self.compute(CHighlighter, text)
+        second = text.rindex('int')
+        assert {start for tag, start, end in spans} == {0, second}
+        assert all(tag != 'string' for tag, start, end in spans)
+
+    def test_over_budget_pass_stays_plain(self):
+        """测试超出时间预算的高亮被中止并记录失败"""
+        from library.highlighter import LogHighlighter
+        highlighter = LogHighlighter(FakeText())
+        with patch('library.highlight_policy.HighlightPolicy.pass_budget', return_value=-1.0):
+            spans = highlighter.compute_spans('ERROR failed\n' * 10)
+        assert spans == []
+        assert highlighter.timings.failures == 1
+        assert "PassBudgetExceeded" in highlighter.timings.last_error
+
+    def test_unterminated_comment_runs_to_end(self):
+        """测试没有闭合的块注释延续到文本末尾"""
+        from library.highlighter import CppHighlighter
+        text = 'int a; /* open\nint b;'
+        _, spans = self.compute(CppHighlighter, text)
+        assert ('comment', 7, len(text)) in spans
+
+    def test_deep_nesting_falls_back(self):
+        """测试解析器因嵌套过深失败时退回基础高亮"""
+        from library.highlighter.python import CodeHighlighter
+        text = 'import os\nx = ' + '(' * 1000 + ')' * 1000 + '\n'
+        _, spans = self.compute(CodeHighlighter, text)
+        assert ('keyword', 0, 6) in spans
+
+    def test_log_patterns_stay_within_a_line(self):
+        """测试日志中的 SQL 和 JSON 不跨行匹配"""
+        from library.highlighter import LogHighlighter
+        _, spans = self.compute(LogHighlighter, 'SELECT id FROM t\nWHERE x;\n{"a":\n1}\nSELECT 1;')
+        assert [tag for tag, start, end in spans if tag == "sql_query"] == ["sql_query"]
+        assert all(tag != "json_data" for tag, start, end in spans)
+
+
+class TestFuzz:
+    """模糊测试测试类"""
+
+    def test_fuzz_finds_nothing(self):
+        """测试对抗片段不会让高亮器超线性变慢"""
+        from test.test_benchmark_suite import load_benchmark
+        benchmark = load_benchmark()
+        findings = benchmark.run_fuzz(
+            only=["LogHighlighter", "MarkdownHighlighter", "CppHighlighter"],
+            seeds=('"', '/*', '{', 'SELECT ', '[a](', '*'),
+        )
+        assert findings == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,90 @@
+"""
+紧凑区间存储单元测试
+"""
+
+import pytest
+from array import array
+
+from library.span_store import (
+    NO_SPANS, TagTable, line_spans_size, pack_line, pack_spans, unpack_line, unpack_spans
+)
+from library.fake_text import FakeText, drain_span_jobs
+
+
+class TestSpanStore:
+    """区间压缩测试类"""
+
+    def test_tag_ids_are_stable(self):
+        """测试同一标签总是得到同一编号"""
+        table = TagTable()
+        assert table.intern("keyword") == 0
+        assert table.intern("string") == 1
+        assert table.intern("keyword") == 0
+        assert table.name(1) == "string"
+
+    def test_document_spans_round_trip(self):
+        """测试整个文档的区间压缩后可以还原"""
+        spans = [("keyword", 0, 6), ("string", 7, 100000)]
+        packed = pack_spans(spans)
+        assert isinstance(packed, array)
+        assert len(packed) == 6
+        assert unpack_spans(packed) == spans
+
+    def test_line_spans_round_trip(self):
+        """测试每行区间压缩后可以还原，空行共用 NO_SPANS"""
+        spans = [("comment", 4, 2, 3), ("keyword", 0, 0, 6)]
+        assert unpack_line(pack_line(spans)) == spans
+        assert pack_line([]) is NO_SPANS
+        assert unpack_line(NO_SPANS) == []
+
+    def test_size_counts_only_packed_lines(self):
+        """测试空行不占用数组"""
+        empty = [NO_SPANS] * 100
+        packed = [pack_line([("keyword", 0, 0, 3)])] + [NO_SPANS] * 99
+        assert line_spans_size(packed) > line_spans_size(empty)
+
+
+class TestHighlighterSpanStorage:
+    """高亮器区间存储测试类"""
+
+    def test_highlighter_keeps_packed_spans(self):
+        """测试高亮器保留的每行区间是数组，编辑后的增量高亮结果不变"""
+        from library.highlighter.python import CodeHighlighter
+        text = FakeText(text='import os\n\n"""doc\nstring"""\nx = 1\n')
+        highlighter = CodeHighlighter(text)
+        highlighter.highlight()
+        line_spans = highlighter._line_spans
+        assert line_spans[1] is NO_SPANS
+        assert all(isinstance(runs, array) for runs in (line_spans[0], line_spans[2]))
+        # 跨两行的文档字符串记在起始行
+        assert any(line_count == 1 for tag, col, line_count, end_col in unpack_line(line_spans[2]))
+        before = text.tag_ranges("keyword")
+
+        text.insert("5.end", "0")
+        highlighter.highlight_incremental()
+        drain_span_jobs(highlighter)
+        assert text.tag_ranges("keyword") == before
+        assert text.tag_ranges("number") == ("5.4", "5.6")
+
+    def test_cached_spans_are_packed(self):
+        """测试解析缓存中保存压缩后的区间，命中时还原成相同结果"""
+        from library.highlighter.python import CodeHighlighter
+        from library.parse_cache import get_parse_cache
+        source = "import os\nx = 'a'\n"
+        highlighter = CodeHighlighter(FakeText())
+        spans = highlighter.compute_spans(source)
+        cached = get_parse_cache().get_spans(source, highlighter._span_cache_key())
+        assert isinstance(cached, array)
+        assert highlighter.compute_spans(source) == spans
+
+    def test_memory_report(self):
+        """测试内存对比报告紧凑存储更小"""
+        from test.test_benchmark_suite import load_benchmark
+        results = load_benchmark().measure_span_memory(300, only=["LuaHighlighter"])
+        result = results["LuaHighlighter"]
+        assert result["spans"] > 0
+        assert 0 < result["packed_kib"] < result["tuples_kib"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
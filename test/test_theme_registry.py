@@ -0,0 +1,100 @@
+"""
+主题注册表单元测试
+"""
+
+import json
+import os
+from unittest.mock import Mock, patch
+
+from library.theme_registry import Theme, ThemeRegistry
+
+
+def write_theme(path, colors):
+    """写入主题文件"""
+    path.write_text(json.dumps(colors), encoding="utf-8")
+
+
+class TestThemeRegistry:
+    """主题注册表测试类"""
+
+    def setup_method(self):
+        """测试方法前置设置"""
+        self.colors = {"base": {"background": "#000000"}, "keyword": "#FF0000", "string": "#00FF00"}
+
+    def test_load_once(self, tmp_path):
+        """测试同一主题文件只读取一次"""
+        write_theme(tmp_path / "dark.json", self.colors)
+        registry = ThemeRegistry(tmp_path)
+        theme = registry.get("dark")
+        with patch('builtins.open') as mock_open:
+            assert registry.get("dark") is theme
+            mock_open.assert_not_called()
+        assert registry.loads == 1
+        assert theme.colors == {"keyword": "#FF0000", "string": "#00FF00"}
+        assert theme.tag_options["keyword"] == {"foreground": "#FF0000"}
+        assert theme.base == {"background": "#000000"}
+
+    def test_reload_after_modification(self, tmp_path):
+        """测试文件修改后重新加载"""
+        path = tmp_path / "dark.json"
+        write_theme(path, self.colors)
+        registry = ThemeRegistry(tmp_path)
+        first = registry.get("dark")
+        write_theme(path, {"keyword": "#123456"})
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        second = registry.get("dark")
+        assert second is not first
+        assert second.colors == {"keyword": "#123456"}
+
+    def test_terminal_theme_and_errors(self, tmp_path):
+        """测试终端主题优先、缺失文件与格式错误的文件"""
+        (tmp_path / "terminalTheme").mkdir()
+        write_theme(tmp_path / "terminalTheme" / "light.json", {"keyword": "#0000FF"})
+        (tmp_path / "broken.json").write_text("{", encoding="utf-8")
+        registry = ThemeRegistry(tmp_path)
+        assert registry.get("light").colors == {"keyword": "#0000FF"}
+        assert registry.get("missing") is None
+        assert registry.get("broken") is None
+        # 格式错误的文件在修改前不再重复读取
+        assert registry.get("broken") is None
+        assert registry.loads == 2
+
+
+class TestSetTheme:
+    """高亮器应用共享主题测试类"""
+
+    def setup_method(self):
+        """测试方法前置设置"""
+        from library.highlighter.python import CodeHighlighter
+        self.text_widget = Mock()
+        self.text_widget.configure_mock(**{
+            'get.return_value': '',
+            'index.return_value': '1.0'
+        })
+        self.highlighter = CodeHighlighter(self.text_widget)
+
+    def test_only_changed_tags_reconfigured(self):
+        """测试只重新配置颜色变化的标签"""
+        keyword = self.highlighter.syntax_colors["keyword"]
+        theme = Theme("test", {"keyword": keyword, "string": "#010203"})
+        self.text_widget.tag_configure = Mock()
+        self.highlighter.set_theme(theme)
+        self.text_widget.tag_configure.assert_called_once_with("string", foreground="#010203")
+        assert self.highlighter.syntax_colors["string"] == "#010203"
+
+        # 再次应用同一主题不再配置任何标签
+        self.text_widget.tag_configure.reset_mock()
+        self.highlighter.set_theme(theme)
+        self.text_widget.tag_configure.assert_not_called()
+
+    def test_highlighters_share_theme(self):
+        """测试多个高亮器共享同一份主题而不互相影响"""
+        from library.highlighter.python import CodeHighlighter
+        theme = Theme("test", {"string": "#010203"})
+        other = CodeHighlighter(self.text_widget)
+        self.highlighter.set_theme(theme)
+        other.set_theme(theme)
+        self.highlighter.syntax_colors["string"] = "#FFFFFF"
+        assert theme.colors["string"] == "#010203"
+        assert other.syntax_colors["string"] == "#010203"
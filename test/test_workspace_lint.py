@@ -0,0 +1,287 @@
+"""
+工作区代码检查单元测试
+"""
+
+import threading
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from library.static_checker import workspace_lint
+from library.static_checker.symbol_checker import StaticCheckerFactory, StaticCheckManager, SymbolChecker
+from library.static_checker.workspace_lint import WorkspaceLint, iter_workspace_files
+from test.test_lint_engine import load_lint_benchmark
+
+FILES = {
+    "main.py": "import os\nx=1\n",
+    "pkg/util.py": "def f():\n    return undefined\n",
+    "pkg/clean.py": "VALUE = 1\n",
+    "pkg/broken.py": "def broken(:\n",
+    "web/app.js": "var a = 1;\n",
+}
+
+
+def create_workspace(root, files=FILES):
+    """在 root 下写入文件"""
+    for name, code in files.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(code, encoding="utf-8")
+    return root
+
+
+def collect(lint):
+    """取出检查结果，返回 {相对路径: [错误消息]}"""
+    results = {}
+    while not lint.results.empty():
+        path, errors = lint.results.get()
+        name = path[len(lint.root) + 1:].replace("\\", "/")
+        results[name] = [error.error_message for error in errors]
+    return results
+
+
+class FakeTree:
+    """支持分组和定时器的内存结果表格"""
+
+    def __init__(self):
+        self.children = {"": []}
+        self.rows = {}
+        self.timers = {}
+        self._next = 0
+
+    def insert(self, parent, index, values=(), open=False):
+        self._next += 1
+        item_id = f"I{self._next}"
+        self.rows[item_id] = tuple(values)
+        self.children[item_id] = []
+        self.children[parent].insert(len(self.children[parent]) if index == "end" else index, item_id)
+        return item_id
+
+    def item(self, item_id, values=None):
+        self.rows[item_id] = tuple(values)
+
+    def get_children(self, item=""):
+        return tuple(self.children[item])
+
+    def exists(self, item_id):
+        return item_id in self.rows
+
+    def delete(self, *items):
+        for item_id in items:
+            for parent in self.children.values():
+                if item_id in parent:
+                    parent.remove(item_id)
+            for child in self.children.pop(item_id):
+                self.delete(child)
+            del self.rows[item_id]
+
+    def after(self, ms, func):
+        self._next += 1
+        timer_id = f"after#{self._next}"
+        self.timers[timer_id] = func
+        return timer_id
+
+    def after_cancel(self, timer_id):
+        self.timers.pop(timer_id, None)
+
+    def run_after(self):
+        while self.timers:
+            self.timers.pop(next(iter(self.timers)))()
+
+    def files(self):
+        """每个文件分组的标题和子行的错误代码"""
+        return {self.rows[item][4]: [self.rows[child][4].split(":")[0] for child in self.children[item]]
+                for item in self.children[""]}
+
+
+class TestWorkspaceFiles:
+    """工作区文件测试类"""
+
+    def test_ignored_directories_and_extensions(self, tmp_path):
+        """测试跳过隐藏目录、依赖目录和不支持的文件，按目录顺序列出"""
+        create_workspace(tmp_path, {
+            "b.py": "", "a.py": "", "notes.txt": "", "sub/c.js": "",
+            ".git/hooks.py": "", ".venv/lib.py": "", "node_modules/m.js": "", "__pycache__/a.py": "",
+        })
+        paths = list(iter_workspace_files(str(tmp_path), StaticCheckerFactory().get_supported_extensions()))
+        assert [path[len(str(tmp_path)) + 1:].replace("\\", "/") for path in paths] == ["a.py", "b.py", "sub/c.js"]
+
+
+class TestWorkspaceLint:
+    """工作区检查测试类"""
+
+    def setup_method(self):
+        """测试方法前置设置"""
+        pytest.importorskip("pyflakes")
+        pytest.importorskip("pycodestyle")
+        self.factory = StaticCheckerFactory()
+        self.pool = ThreadPoolExecutor(max_workers=2)
+
+    def teardown_method(self):
+        """测试方法后置清理"""
+        self.pool.shutdown()
+
+    def run(self, root, pool=None):
+        """检查工作区并返回检查和结果"""
+        lint = WorkspaceLint(str(root), self.factory, pool=pool or self.pool)
+        lint.run()
+        return lint, collect(lint)
+
+    def test_results_match_editor_check(self, tmp_path):
+        """测试每个文件的结果与在编辑器中检查相同，语法错误报告 E999"""
+        lint, results = self.run(create_workspace(tmp_path))
+        assert sorted(results) == sorted(FILES)
+        for name, code in FILES.items():
+            expected = SymbolChecker(self.factory.get_language_from_file(name)).check(code, name)
+            assert results[name] == [error.error_message for error in expected]
+        assert results["pkg/broken.py"][0].startswith("E999")
+        assert (lint.files, lint.cached, lint.checked, lint.reported) == (5, 0, 4, 5)
+        assert lint.done.is_set()
+        assert lint.files_per_second > 0
+
+    def test_unparsable_files_do_not_use_parse_cache(self, tmp_path):
+        """测试语法错误和嵌套过深的文件报告 E999，不经过编辑器共用的解析缓存"""
+        from library.parse_cache import ParseCache
+        create_workspace(tmp_path, {"broken.py": FILES["pkg/broken.py"], "nested.py": "x = " + "-" * 200000 + "1\n"})
+        with patch.object(ParseCache, "parse") as mock_parse:
+            _, results = self.run(tmp_path)
+            mock_parse.assert_not_called()
+        assert results["broken.py"][0].startswith("E999: SyntaxError")
+        assert results["nested.py"] == ["E999: MemoryError: "]
+
+    def test_repeated_run_checks_only_modified_files(self, tmp_path):
+        """测试再次检查时只有修改过的文件（和语法错误的文件）交给进程池"""
+        create_workspace(tmp_path)
+        _, first = self.run(tmp_path)
+        (tmp_path / "pkg" / "clean.py").write_text("import sys\n", encoding="utf-8")
+        with patch.object(workspace_lint, "lint_sources", wraps=workspace_lint.lint_sources) as mock_lint:
+            lint, second = self.run(tmp_path)
+        assert sorted(code for call in mock_lint.call_args_list for code in call[0][0]) == [
+            "def broken(:\n", "import sys\n"]
+        assert (lint.cached, lint.checked) == (2, 2)
+        assert second["pkg/clean.py"] == ["F401: 'sys' imported but unused"]
+        assert {name: second[name] for name in first if name != "pkg/clean.py"} == \
+            {name: first[name] for name in first if name != "pkg/clean.py"}
+
+    def test_process_pool(self, tmp_path):
+        """测试在工作进程中检查，主进程的检查器直接使用缓存的结果"""
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        from library.static_checker.lint_engine import get_lint_engine
+        create_workspace(tmp_path, {"main.py": FILES["main.py"]})
+        engine = get_lint_engine()
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool, \
+                patch.object(engine, 'check', wraps=engine.check) as mock_check:
+            lint, results = self.run(tmp_path, pool)
+        mock_check.assert_not_called()
+        assert results["main.py"] == [error.error_message for error in SymbolChecker("python").check(FILES["main.py"])]
+
+    def test_worker_import_of_app_has_no_side_effects(self):
+        """测试 spawn 的工作进程以 __mp_main__ 重新导入 app.py 时不执行启动操作"""
+        import runpy
+        import sys
+        from pathlib import Path
+        app_path = Path(__file__).parent.parent / "app.py"
+        excepthook = sys.excepthook
+        with patch("library.startup.first_startup_operations") as mock_startup, \
+                patch("library.logger.get_logger") as mock_logger, \
+                patch("tkinter.messagebox.showwarning") as mock_warning:
+            module = runpy.run_path(str(app_path), run_name="__mp_main__")
+        mock_startup.assert_not_called()
+        mock_logger.assert_not_called()
+        mock_warning.assert_not_called()
+        assert sys.excepthook is excepthook
+        assert module["logger"] is None and module["settings"] is None
+
+    def test_cancel(self, tmp_path):
+        """测试取消后不再报告结果并设置完成"""
+        lint = WorkspaceLint(str(create_workspace(tmp_path)), self.factory, pool=self.pool)
+        lint.cancel()
+        lint.run()
+        assert lint.done.is_set()
+        assert collect(lint) == {}
+
+    def test_throughput_report(self):
+        """测试工作区速度报告，修改的文件在最后一次检查中重新检查"""
+        results = load_lint_benchmark().measure_workspace(20, workers=1)
+        assert [results[name]["checked"] for name in ("cold", "unchanged", "restart", "modified")] == [20, 0, 0, 1]
+        assert all(result["files"] == 20 and result["files_per_second"] > 0 for result in results.values())
+
+
+class TestWorkspaceResults:
+    """工作区结果显示测试类"""
+
+    def setup_method(self):
+        """测试方法前置设置，进程池换成可以控制的线程池"""
+        pytest.importorskip("pyflakes")
+        pytest.importorskip("pycodestyle")
+        self.release = threading.Event()
+        self.lint_sources = workspace_lint.lint_sources
+        self.pool = ThreadPoolExecutor(max_workers=1)
+        self.manager = StaticCheckManager()
+        self.tree = FakeTree()
+        self.manager.set_flake8_tree(self.tree)
+
+    def teardown_method(self):
+        """测试方法后置清理"""
+        self.release.set()
+        self.manager.clear_workspace_results()
+        self.pool.shutdown()
+
+    def gated_lint(self, codes):
+        """等到测试放行后再检查"""
+        self.release.wait(10)
+        return self.lint_sources(codes)
+
+    def check_workspace(self, root, monkeypatch):
+        """在可以控制的线程池中检查工作区"""
+        monkeypatch.setattr(workspace_lint, "_global_workspace_pool", self.pool)
+        monkeypatch.setattr(workspace_lint, "lint_sources", self.gated_lint)
+        return self.manager.check_workspace(str(root))
+
+    def test_results_are_streamed(self, tmp_path, monkeypatch):
+        """测试已经得出的结果在检查完成前显示，没有问题的文件不显示"""
+        create_workspace(tmp_path, {"cached.py": "import os\n", "slow.py": "x=1\n", "clean.py": "X = 1\n"})
+        # 缓存中已有结果的文件不需要交给进程池
+        SymbolChecker("python").check("import os\n")
+        self.tree.rows["old"] = ("❌", 1, 1, "F821", "stale")
+        self.tree.children[""].append("old")
+        self.tree.children["old"] = []
+        lint = self.check_workspace(tmp_path, monkeypatch)
+        while lint.reported < 1:
+            threading.Event().wait(0.01)
+        self.tree.timers.pop(next(iter(self.tree.timers)))()
+        assert self.tree.files() == {"cached.py (1)": ["F401"]}
+        assert len(self.tree.timers) == 1
+
+        self.release.set()
+        assert lint.done.wait(10)
+        self.tree.run_after()
+        assert self.tree.files() == {"cached.py (1)": ["F401"], "slow.py (1)": ["E225"]}
+        child = self.tree.children[self.tree.children[""][1]][0]
+        assert self.tree.rows[child][5] == str(tmp_path / "slow.py")
+
+    def test_editor_results_update_workspace(self, tmp_path, monkeypatch):
+        """测试工作区结果显示期间，编辑器的检查只更新对应文件的分组；清除后恢复显示编辑器的结果"""
+        create_workspace(tmp_path, {"a.py": "import os\n", "b.py": "import sys\n"})
+        self.release.set()
+        lint = self.check_workspace(tmp_path, monkeypatch)
+        assert lint.done.wait(10)
+        self.tree.run_after()
+        assert list(self.tree.files()) == ["a.py (1)", "b.py (1)"]
+
+        self.manager.check_code("import os\nx=1\n", str(tmp_path / "a.py"))
+        assert self.tree.files() == {"a.py (2)": ["F401", "E225"], "b.py (1)": ["F401"]}
+        self.manager.check_code("import os\n", None)
+        self.manager.check_code("import sys\nsys.exit()\n", str(tmp_path / "b.py"))
+        assert self.tree.files() == {"a.py (2)": ["F401", "E225"]}
+
+        self.manager.clear_workspace_results()
+        assert self.tree.get_children() == ()
+        self.manager.check_code("x=1\n", "c.py")
+        assert [self.tree.rows[item][4] for item in self.tree.get_children()] == [
+            "E225: missing whitespace around operator"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
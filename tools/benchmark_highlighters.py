@@ -0,0 +1,952 @@
+#!/usr/bin/env python3
+"""
+高亮器性能测试脚本
+对 library/highlighter 中的每个高亮器测量每秒完成的整文档词法分析次数
+
+用法:
+    python tools/benchmark_highlighters.py                     # 输出每个高亮器的 passes/sec
+    python tools/benchmark_highlighters.py --save before.json  # 保存结果
+    python tools/benchmark_highlighters.py --compare before.json  # 与保存的结果对比
+    python tools/benchmark_highlighters.py --ast               # 测量 Python 语法树遍历速度
+    python tools/benchmark_highlighters.py --import-time       # 测量按需导入高亮器节省的启动时间
+    python tools/benchmark_highlighters.py --span-memory       # 对比 10 万行文档的区间用元组和紧凑数组保存时占用的内存
+
+基准套件（合成 1k/10k/100k 行文档，通过 library/fake_text.py 中记录调用的内存文本组件运行，无需显示器）:
+    python tools/benchmark_highlighters.py --suite                            # 输出每次高亮的耗时、标签操作数和峰值内存
+    python tools/benchmark_highlighters.py --suite --sizes 1000 10000         # 只测试这些行数
+    python tools/benchmark_highlighters.py --suite --baseline FILE            # 与基准对比，退化时返回非零
+    python tools/benchmark_highlighters.py --suite --update-baseline FILE     # 保存为新的基准
+    python tools/benchmark_highlighters.py --suite --write-corpus DIR         # 把合成文档写入目录
+
+模糊测试（用重复的对抗片段检查灾难性回溯，发现问题时返回非零）:
+    python tools/benchmark_highlighters.py --fuzz
+    python tools/benchmark_highlighters.py --fuzz --only LogHighlighter MarkdownHighlighter
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# 项目根目录
+PROJECT_ROOT = Path(__file__).parent.parent
+
+# 基准套件默认的文档行数
+SUITE_SIZES = (1000, 10000, 100000)
+
+# 基准对比的容差：耗时和内存超过基准的这个比例才算退化，标签操作数是确定的
+TIME_TOLERANCE = 0.5
+MEMORY_TOLERANCE = 0.25
+
+# 模糊测试的对抗片段：未闭合的字符串、注释和括号，以及各语言规则的开头
+ADVERSARIAL_SEEDS = (
+    '"', "'", '"\\', '`', '/*', '*/', '<!--', '<', '{', '[', '(', '#', '//', '\\', '*', '_', '**', '__',
+    '~~', '${', '"""', "'''", 'SELECT ', 'a', '1', '1.', '0x', ' ', '\t', 'r"', '@', '$', '<?php',
+    '--[[', '<<', '{"a":', 'a.', 'a::', '<a ', '-- ', '/', '=', 'ERROR ', '/a', '2024-01-01 ',
+    ' 1.2.3.4', 'http://', 'line 1', '!', '[a](', '![', '|', '> ', '- ',
+)
+
+# 模糊测试的文档字符数（小, 大），大文档的耗时超过小文档的 FUZZ_MAX_RATIO 倍视为超线性
+FUZZ_SIZES = (4096, 16384)
+FUZZ_MAX_RATIO = 8
+# 低于这个耗时（毫秒）的结果不参与比较，避免计时噪声
+FUZZ_MIN_MS = 50
+# 疑似超线性时重新测量的次数
+FUZZ_REPEAT = 3
+# 一行达到行长上限时允许的最长耗时（毫秒）
+FUZZ_LINE_MS = 250
+
+# 语法树遍历测试使用的 Python 示例文件
+AST_SAMPLE = PROJECT_ROOT / "test" / "test_data" / "sample_python.py"
+
+# 每种语言的代码片段，重复拼接成测试文档
+SAMPLES = {
+    "PythonHighlighter": '''import os
+from typing import List
+
+
+class Greeter:
+    """Say hello"""
+
+    def __init__(self, name: str):
+        self.name = name  # remember the name
+
+    def greet(self, times: int = 3) -> List[str]:
+        return [f"Hello, {self.name}!" for _ in range(times)]
+''',
+    "CppHighlighter": '''#include <iostream>
+#include <vector>
+
+// Sum the values
+int sum(const std::vector<int>& values) {
+    int total = 0;
+    for (size_t i = 0; i < values.size(); ++i) {
+        total += values[i] * 2;
+    }
+    std::cout << "total: " << total << std::endl;
+    return total;
+}
+''',
+    "JavaHighlighter": '''import java.util.List;
+
+public class Greeter {
+    private final String name; // the name
+
+    public Greeter(String name) {
+        this.name = name;
+    }
+
+    public String greet(int times) {
+        return "Hello, " + name + times;
+    }
+}
+''',
+    "RustHighlighter": '''use std::collections::HashMap;
+
+/// Count the words
+fn count(text: &str) -> HashMap<String, usize> {
+    let mut counts = HashMap::new();
+    for word in text.split_whitespace() {
+        *counts.entry(word.to_string()).or_insert(0) += 1;
+    }
+    println!("{} words", counts.len());
+    counts
+}
+''',
+    "BashHighlighter": '''#!/bin/bash
+# Back up the home directory
+for file in "$HOME"/*.txt; do
+    if [ -f "$file" ]; then
+        cp "$file" /tmp/backup/
+        echo "copied $file"
+    fi
+done
+export COUNT=42
+''',
+    "HtmlHighlighter": '''<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="utf-8">
+    <title>Example</title>
+</head>
+<body>
+    <!-- main content -->
+    <div class="content" id="main">Hello, world!</div>
+</body>
+</html>
+''',
+    "CssHighlighter": '''/* Layout */
+body {
+    margin: 0;
+    font-family: "Segoe UI", sans-serif;
+}
+
+.content > p:first-child {
+    color: #333333;
+    padding: 12px 4px;
+}
+''',
+    "JavaScriptHighlighter": '''import { readFile } from "fs";
+
+// Load the config
+async function loadConfig(path) {
+    const text = await readFile(path, "utf-8");
+    const config = JSON.parse(text);
+    if (config.retries === undefined) {
+        config.retries = 3;
+    }
+    return config;
+}
+''',
+    "RubyHighlighter": '''require "json"
+
+# Say hello
+class Greeter
+  def initialize(name)
+    @name = name
+  end
+
+  def greet(times = 3)
+    times.times { puts "Hello, #{@name}!" }
+  end
+end
+''',
+    "JsonHighlighter": '''{
+    "name": "current-editor",
+    "version": "1.0.0",
+    "enabled": true,
+    "retries": 3,
+    "ratio": 0.75,
+    "tags": ["editor", "python", null]
+}
+''',
+    "CHighlighter": '''#include <stdio.h>
+#include <stdlib.h>
+#define MAX_SIZE 128
+
+/* Sum the values */
+int sum(const int *values, int count) {
+    int total = 0;
+    for (int i = 0; i < count && i < MAX_SIZE; i++) {
+        total += values[i];
+    }
+    printf("total: %d\\n", total);
+    return total;
+}
+''',
+    "ObjCHighlighter": '''#import <Foundation/Foundation.h>
+
+// A greeter
+@interface Greeter : NSObject
+@property (nonatomic, strong) NSString *name;
+- (void)greet;
+@end
+
+@implementation Greeter
+- (void)greet {
+    NSLog(@"Hello, %@!", self.name);
+}
+@end
+''',
+    "MarkdownHighlighter": '''# Current Editor
+
+A **lightweight** editor with *syntax* highlighting and `inline code`.
+
+- Multi-file editing
+- [Themes](https://example.com/themes)
+
+> Quoted text
+
+```python
+print("hello")
+```
+''',
+    "LogHighlighter": '''2024-01-15 10:23:45.123 INFO app.main Starting server on 192.168.1.10:8080
+2024-01-15 10:23:46.001 DEBUG app.db Connected to /var/lib/app/data.db
+2024-01-15 10:23:47.500 WARNING app.cache Cache miss ratio 0.75 for key {"user": 42}
+2024-01-15 10:23:48.250 ERROR app.api Request to https://example.com/api failed
+Traceback (most recent call last):
+  File "/srv/app/api.py", line 42, in handle
+ValueError: invalid literal
+''',
+    "DartHighlighter": '''import 'dart:math';
+
+// A greeter
+class Greeter {
+  final String name;
+
+  Greeter(this.name);
+
+  String greet(int times) {
+    return 'Hello, $name! ' * times;
+  }
+}
+''',
+    "ScalaHighlighter": '''import scala.collection.mutable
+
+// A greeter
+class Greeter(val name: String) {
+  def greet(times: Int = 3): Seq[String] = {
+    val lines = mutable.ListBuffer[String]()
+    for (i <- 1 to times) lines += s"Hello, $name!"
+    lines.toSeq
+  }
+}
+''',
+    "TypeScriptHighlighter": '''import { readFileSync } from "fs";
+
+// Load the config
+interface Config {
+    retries: number;
+    name?: string;
+}
+
+export function loadConfig(path: string): Config {
+    const config = JSON.parse(readFileSync(path, "utf-8")) as Config;
+    return { retries: 3, ...config };
+}
+''',
+    "GoHighlighter": '''package main
+
+import "fmt"
+import "strings"
+
+// Greet says hello
+func Greet(name string, times int) []string {
+    lines := make([]string, 0, times)
+    for i := 0; i < times; i++ {
+        lines = append(lines, fmt.Sprintf("Hello, %s!", strings.TrimSpace(name)))
+    }
+    return lines
+}
+''',
+    "KotlinHighlighter": '''import kotlin.math.max
+
+// A greeter
+data class Greeter(val name: String) {
+    fun greet(times: Int = 3): List<String> {
+        val count = max(times, 1)
+        return List(count) { "Hello, $name!" }
+    }
+}
+''',
+    "PHPHighlighter": '''<?php
+// A greeter
+class Greeter {
+    private $name;
+
+    public function __construct($name) {
+        $this->name = $name;
+    }
+
+    public function greet($times = 3) {
+        return str_repeat("Hello, {$this->name}! ", $times);
+    }
+}
+''',
+    "SqlHighlighter": '''-- Active users
+SELECT u.id, u.name, COUNT(o.id) AS orders
+FROM users u
+LEFT JOIN orders o ON o.user_id = u.id
+WHERE u.active = 1 AND u.created_at > '2024-01-01'
+GROUP BY u.id, u.name
+ORDER BY orders DESC
+LIMIT 10;
+''',
+    "SwiftHighlighter": '''import Foundation
+
+// A greeter
+struct Greeter {
+    let name: String
+
+    func greet(times: Int = 3) -> [String] {
+        let count = max(times, 1)
+        return (0..<count).map { _ in "Hello, \\(name)!" }
+    }
+}
+''',
+    "LuaHighlighter": '''-- A greeter
+local Greeter = {}
+Greeter.__index = Greeter
+
+function Greeter.new(name)
+    return setmetatable({ name = name }, Greeter)
+end
+
+function Greeter:greet(times)
+    for i = 1, times or 3 do
+        print("Hello, " .. self.name .. "!")
+    end
+end
+''',
+}
+
+
+class NullText:
+    """
+    不做任何事情的文本组件，用于在没有 Tk 的环境下创建高亮器
+    """
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+def build_corpus(sample: str, lines: int) -> str:
+    """
+    由代码片段生成指定行数的合成文档，每份副本中的数字不同
+
+    Args:
+        sample: 代码片段
+        lines: 目标行数
+
+    Returns:
+        合成文档
+    """
+    sample_lines = sample.count('\n') or 1
+    copies = max(1, lines // sample_lines)
+    number = re.compile(r'\b\d+\b')
+    return "".join(
+        number.sub(lambda match, i=i: str(int(match.group()) + i), sample)
+        for i in range(copies)
+    )
+
+
+def run_pass(highlighter_class, text: str, edit: bool, trace_memory: bool) -> dict:
+    """
+    在新的组件上运行一次完整高亮，可选地再编辑一行并增量高亮
+
+    Args:
+        highlighter_class: 高亮器类
+        text: 文档
+        edit: 是否测量编辑后的增量高亮
+        trace_memory: 是否统计峰值内存（会明显变慢，耗时不可用）
+
+    Returns:
+        {"ms", "tag_ops", "tag_ranges", "peak_kib", "tier"}，编辑时为增量高亮的数据
+    """
+    from library.parse_cache import get_parse_cache
+    from library.fake_text import FakeText, drain_span_jobs
+
+    get_parse_cache().clear()
+    widget = FakeText(text=text, height=50)
+    with contextlib.redirect_stdout(io.StringIO()):
+        highlighter = highlighter_class(widget)
+    if edit:
+        highlighter.highlight()
+        drain_span_jobs(highlighter)
+        middle = text.count("\n") // 2 + 1
+        widget.insert(f"{middle}.end", " ")
+    widget.reset_calls()
+
+    gc.collect()
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        if edit:
+            highlighter.highlight_incremental()
+        else:
+            highlighter.highlight()
+        drain_span_jobs(highlighter)
+    elapsed = time.perf_counter() - start
+    peak = 0
+    if trace_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return {
+        "ms": round(elapsed * 1000, 2),
+        "tag_ops": widget.tag_operations(),
+        "tag_ranges": widget.tag_ranges_added,
+        "peak_kib": round(peak / 1024, 1),
+        "tier": highlighter.tier,
+    }
+
+
+def run_suite(sizes, only=None, memory: bool = True, progress=None) -> dict:
+    """
+    对每个高亮器和每种文档大小运行完整高亮与编辑后的增量高亮
+
+    Args:
+        sizes: 文档行数列表
+        only: 只测试这些高亮器（可选）
+        memory: 是否统计峰值内存
+        progress: 每得到一个结果就以 (键, 结果) 调用（可选）
+
+    Returns:
+        {"高亮器名/行数/full|edit": run_pass 的结果}
+    """
+    os.chdir(PROJECT_ROOT)
+    sys.path.insert(0, str(PROJECT_ROOT))
+    import library.highlighter as highlighters
+
+    results = {}
+    for name in highlighters.__all__:
+        if only and name not in only:
+            continue
+        highlighter_class = getattr(highlighters, name)
+        for lines in sizes:
+            text = build_corpus(SAMPLES[name], lines)
+            for kind, edit in (("full", False), ("edit", True)):
+                result = run_pass(highlighter_class, text, edit, trace_memory=False)
+                if memory:
+                    result["peak_kib"] = run_pass(highlighter_class, text, edit, trace_memory=True)["peak_kib"]
+                key = f"{name}/{lines}/{kind}"
+                results[key] = result
+                if progress:
+                    progress(key, result)
+    return results
+
+
+def time_lex(highlighter_class, text: str) -> tuple:
+    """
+    测量一次整文档词法分析
+
+    Args:
+        highlighter_class: 高亮器类
+        text: 文档
+
+    Returns:
+        (毫秒, 是否因超出时间预算而中止)
+    """
+    from library.parse_cache import get_parse_cache
+    from library.fake_text import FakeText
+
+    get_parse_cache().clear()
+    with contextlib.redirect_stdout(io.StringIO()):
+        highlighter = highlighter_class(FakeText())
+        start = time.perf_counter()
+        try:
+            highlighter.compute_spans(text)
+        except Exception as e:
+            highlighter.timings.record_failure(e)
+        elapsed = time.perf_counter() - start
+    return elapsed * 1000, highlighter.timings.failures > 0
+
+
+def fuzz_documents(seed: str, size: int) -> dict:
+    """
+    由对抗片段生成模糊测试文档
+
+    Args:
+        seed: 对抗片段
+        size: 文档字符数
+
+    Returns:
+        {"lines": 每行一个片段, "wide": 每行约 80 个字符}
+    """
+    wide = seed * max(1, 80 // len(seed)) + "\n"
+    return {
+        "lines": (seed + "\n") * (size // (len(seed) + 1)),
+        "wide": wide * max(1, size // len(wide)),
+    }
+
+
+def run_fuzz(only=None, seeds=ADVERSARIAL_SEEDS, progress=None) -> list:
+    """
+    对每个高亮器输入对抗文档，找出超线性的耗时、过慢的长行和中止的高亮
+
+    Args:
+        only: 只测试这些高亮器（可选）
+        seeds: 对抗片段
+        progress: 每测完一个高亮器就以 (高亮器名, 问题列表) 调用（可选）
+
+    Returns:
+        问题描述列表，为空表示没有发现问题
+    """
+    os.chdir(PROJECT_ROOT)
+    sys.path.insert(0, str(PROJECT_ROOT))
+    import library.highlighter as highlighters
+    from library.highlight_policy import get_highlight_policy
+
+    cap = get_highlight_policy().max_line_length
+    findings = []
+    for name in highlighters.__all__:
+        if only and name not in only:
+            continue
+        highlighter_class = getattr(highlighters, name)
+        found = []
+        for seed in seeds:
+            # 恰好不超过行长上限的一行，更长的行不送入正则
+            line = seed * (cap // len(seed))
+            ms, aborted = time_lex(highlighter_class, line)
+            if aborted or ms > FUZZ_LINE_MS:
+                found.append(f"{name} {seed!r} line of {len(line)}: {ms:.0f} ms"
+                             + (" (aborted)" if aborted else ""))
+            small, large = (fuzz_documents(seed, size) for size in FUZZ_SIZES)
+            for kind in small:
+                small_ms, _ = time_lex(highlighter_class, small[kind])
+                large_ms, aborted = time_lex(highlighter_class, large[kind])
+                ratio = large_ms / max(small_ms, 0.1)
+                if not aborted and large_ms > FUZZ_MIN_MS and ratio > FUZZ_MAX_RATIO:
+                    # 排除计时噪声：再测几次取最小值
+                    small_ms = min(time_lex(highlighter_class, small[kind])[0] for _ in range(FUZZ_REPEAT))
+                    large_ms = min(time_lex(highlighter_class, large[kind])[0] for _ in range(FUZZ_REPEAT))
+                    ratio = large_ms / max(small_ms, 0.1)
+                if aborted or (large_ms > FUZZ_MIN_MS and ratio > FUZZ_MAX_RATIO):
+                    found.append(f"{name} {seed!r} {kind}: {small_ms:.0f} ms -> {large_ms:.0f} ms ({ratio:.0f}x)"
+                                 + (" (aborted)" if aborted else ""))
+        findings.extend(found)
+        if progress:
+            progress(name, found)
+    return findings
+
+
+def compare_to_baseline(results: dict, baseline: dict) -> list:
+    """
+    找出相对基准退化的结果
+
+    Args:
+        results: run_suite 的结果
+        baseline: 保存的基准
+
+    Returns:
+        退化描述列表，为空表示没有退化
+    """
+    regressions = []
+    for key, result in results.items():
+        before = baseline.get(key)
+        if before is None:
+            continue
+        if result["tag_ops"] > before["tag_ops"]:
+            regressions.append(f"{key}: tag_ops {before['tag_ops']} -> {result['tag_ops']}")
+        if result["ms"] > before["ms"] * (1 + TIME_TOLERANCE):
+            regressions.append(f"{key}: {before['ms']:.1f} ms -> {result['ms']:.1f} ms")
+        if before.get("peak_kib") and result["peak_kib"] > before["peak_kib"] * (1 + MEMORY_TOLERANCE):
+            regressions.append(f"{key}: peak {before['peak_kib']:.0f} KiB -> {result['peak_kib']:.0f} KiB")
+    return regressions
+
+
+def print_suite_header(baseline=None):
+    """
+    输出基准套件结果的表头
+
+    Args:
+        baseline: 保存的基准（可选）
+    """
+    print(f"{'pass':<36}{'tier':>9}{'ms':>11}{'tag ops':>9}{'peak KiB':>11}", end="")
+    print(f"{'before ms':>11}" if baseline else "")
+
+
+def print_suite_row(key: str, result: dict, baseline=None):
+    """
+    输出基准套件的一个结果，大文档耗时较长，因此逐行输出
+
+    Args:
+        key: 结果的键
+        result: run_pass 的结果
+        baseline: 保存的基准（可选）
+    """
+    print(f"{key:<36}{result['tier']:>9}{result['ms']:>11.1f}{result['tag_ops']:>9}"
+          f"{result['peak_kib']:>11.0f}", end="")
+    if baseline and key in baseline:
+        print(f"{baseline[key]['ms']:>11.1f}", flush=True)
+    else:
+        print(flush=True)
+
+
+def write_corpus(directory, sizes, only=None):
+    """
+    把合成文档写入目录，文件名为 高亮器名_行数.txt
+
+    Args:
+        directory: 目标目录
+        sizes: 文档行数列表
+        only: 只生成这些高亮器的文档（可选）
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    for name, sample in SAMPLES.items():
+        if only and name not in only:
+            continue
+        for lines in sizes:
+            (directory / f"{name}_{lines}.txt").write_text(build_corpus(sample, lines), encoding="utf-8")
+
+
+def build_document(sample: str, lines: int) -> str:
+    """
+    将代码片段重复拼接到指定行数
+
+    Args:
+        sample: 代码片段
+        lines: 目标行数
+
+    Returns:
+        测试文档
+    """
+    sample_lines = sample.count('\n') or 1
+    return sample * max(1, lines // sample_lines)
+
+
+def measure(highlighter, text: str, min_time: float) -> float:
+    """
+    测量每秒完成的整文档词法分析次数
+
+    Args:
+        highlighter: 高亮器实例
+        text: 测试文档
+        min_time: 最短测量时间（秒）
+
+    Returns:
+        passes/sec
+    """
+    from library.parse_cache import get_parse_cache
+    cache = get_parse_cache()
+
+    passes = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < min_time or passes < 3:
+        # 每次都从头解析，不计入缓存命中
+        cache.clear()
+        highlighter.compute_spans(text)
+        passes += 1
+        elapsed = time.perf_counter() - start
+    return passes / elapsed
+
+
+def run_benchmark(lines: int, min_time: float, only=None) -> dict:
+    """
+    对每个高亮器运行性能测试
+
+    Args:
+        lines: 测试文档行数
+        min_time: 每个高亮器的最短测量时间（秒）
+        only: 只测试这些高亮器（可选）
+
+    Returns:
+        {高亮器名: passes/sec}
+    """
+    os.chdir(PROJECT_ROOT)
+    sys.path.insert(0, str(PROJECT_ROOT))
+    import library.highlighter as highlighters
+
+    results = {}
+    for name in highlighters.__all__:
+        if only and name not in only:
+            continue
+        text = build_document(SAMPLES[name], lines)
+        # 高亮器会打印调试信息，测量时丢弃
+        with contextlib.redirect_stdout(io.StringIO()):
+            highlighter = getattr(highlighters, name)(NullText())
+            highlighter.compute_spans(text)
+            results[name] = measure(highlighter, text, min_time)
+    return results
+
+
+def measure_ast_visits(copies: int, min_time: float) -> tuple:
+    """
+    测量 Python 高亮器遍历语法树的速度，不含解析和词法分析
+
+    Args:
+        copies: 示例文件重复的份数
+        min_time: 最短测量时间（秒）
+
+    Returns:
+        (节点数, 节点/秒)
+    """
+    import ast
+
+    os.chdir(PROJECT_ROOT)
+    sys.path.insert(0, str(PROJECT_ROOT))
+    from library.highlighter.python import CodeHighlighter
+    from library.line_index import LineIndex
+
+    sample = AST_SAMPLE.read_text(encoding="utf-8")
+    text = "\n\n".join([sample.rstrip("\n")] * copies)
+    tree = ast.parse(text)
+    nodes = sum(1 for _ in ast.walk(tree))
+    lines = text.split("\n")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        highlighter = CodeHighlighter(NullText())
+    passes = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < min_time or passes < 3:
+        # 与 compute_spans 相同的单次高亮状态
+        highlighter._span_sink = []
+        highlighter._pass_lines = lines
+        highlighter._line_index = LineIndex.from_lines(lines)
+        highlighter._process_ast(tree)
+        passes += 1
+        elapsed = time.perf_counter() - start
+    highlighter._span_sink = None
+    highlighter._pass_lines = None
+    highlighter._line_index = None
+    return nodes, nodes * passes / elapsed
+
+
+def traced_size(build) -> int:
+    """
+    测量 build() 返回的对象占用的内存
+
+    Args:
+        build: 构建对象的函数
+
+    Returns:
+        字节数
+    """
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def measure_span_memory(lines: int, only=None) -> dict:
+    """
+    测量高亮器保留的区间（每行区间和解析缓存中的区间）占用的内存，
+    对比用元组列表保存与用 array('I') 紧凑保存
+
+    Args:
+        lines: 文档行数
+        only: 只测试这些高亮器（可选）
+
+    Returns:
+        {高亮器名: {"spans", "tuples_kib", "packed_kib"}}
+    """
+    os.chdir(PROJECT_ROOT)
+    sys.path.insert(0, str(PROJECT_ROOT))
+    import library.highlighter as highlighters
+    from library.highlighter.base import _spans_by_line
+    from library.span_store import pack_spans, unpack_line, unpack_spans
+
+    results = {}
+    for name in highlighters.__all__:
+        if only and name not in only:
+            continue
+        text = build_corpus(SAMPLES[name], lines)
+        text_lines = text.split("\n")
+        with contextlib.redirect_stdout(io.StringIO()):
+            spans = getattr(highlighters, name)(NullText()).compute_spans(text)
+        line_spans = _spans_by_line(spans, text_lines)
+        packed = pack_spans(spans)
+        results[name] = {
+            "spans": len(spans),
+            "tuples_kib": round(traced_size(
+                lambda: ([unpack_line(runs) for runs in line_spans], unpack_spans(packed))) / 1024, 1),
+            "packed_kib": round(traced_size(
+                lambda: (_spans_by_line(spans, text_lines), pack_spans(spans))) / 1024, 1),
+        }
+    return results
+
+
+# 在新的解释器中测量导入耗时（秒），先导入 library 包本身
+IMPORT_TIME_SCRIPT = """
+import time
+import library
+import library.highlighter as highlighters
+start = time.perf_counter()
+for name in {names!r}:
+    getattr(highlighters, name)
+print(time.perf_counter() - start)
+"""
+
+
+def measure_import_time(names, runs: int) -> float:
+    """
+    在新的解释器中测量导入若干高亮器模块的耗时
+
+    Args:
+        names: 高亮器名列表
+        runs: 测量次数，取中位数
+
+    Returns:
+        耗时（毫秒）
+    """
+    script = IMPORT_TIME_SCRIPT.format(names=list(names))
+    timings = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", script], cwd=PROJECT_ROOT,
+            capture_output=True, text=True, check=True
+        ).stdout
+        timings.append(float(output.strip().splitlines()[-1]) * 1000)
+    return statistics.median(timings)
+
+
+def report_import_time(runs: int):
+    """
+    对比启动时导入全部高亮器与只导入第一个选项卡所需高亮器的耗时
+
+    Args:
+        runs: 测量次数
+    """
+    sys.path.insert(0, str(PROJECT_ROOT))
+    import library.highlighter as highlighters
+
+    eager = measure_import_time(highlighters.__all__, runs)
+    lazy = measure_import_time(["PythonHighlighter"], runs)
+    print(f"{'imports':<36}{'ms':>10}")
+    print(f"{'all highlighters (eager)':<36}{eager:>10.1f}")
+    print(f"{'PythonHighlighter only (lazy)':<36}{lazy:>10.1f}")
+    print(f"{'saved at startup':<36}{eager - lazy:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="测量每个高亮器的 passes/sec")
+    parser.add_argument("--lines", type=int, default=1000, help="测试文档行数")
+    parser.add_argument("--min-time", type=float, default=1.0, help="每个高亮器的最短测量时间（秒）")
+    parser.add_argument("--only", nargs="*", help="只测试这些高亮器")
+    parser.add_argument("--save", help="将结果保存为 JSON 文件")
+    parser.add_argument("--compare", help="与之前保存的 JSON 结果对比")
+    parser.add_argument("--ast", type=int, nargs="?", const=1000, metavar="COPIES",
+                        help="测量 Python 语法树遍历速度，示例文件重复 COPIES 份（默认1000）")
+    parser.add_argument("--import-time", type=int, nargs="?", const=9, metavar="RUNS",
+                        help="测量按需导入高亮器节省的启动时间，重复 RUNS 次取中位数（默认9）")
+    parser.add_argument("--span-memory", type=int, nargs="?", const=100000, metavar="LINES",
+                        help="对比区间用元组和紧凑数组保存时占用的内存，文档 LINES 行（默认100000）")
+    parser.add_argument("--suite", action="store_true", help="运行合成文档基准套件")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SUITE_SIZES), help="基准套件的文档行数")
+    parser.add_argument("--no-memory", action="store_true", help="基准套件不统计峰值内存")
+    parser.add_argument("--baseline", help="基准套件与这个 JSON 基准对比，退化时返回非零")
+    parser.add_argument("--update-baseline", metavar="FILE", help="将基准套件的结果保存为新的基准")
+    parser.add_argument("--write-corpus", metavar="DIR", help="把合成文档写入目录后退出")
+    parser.add_argument("--fuzz", action="store_true", help="用对抗片段检查灾难性回溯，发现问题时返回非零")
+    args = parser.parse_args()
+
+    if args.fuzz:
+        def report(name, found):
+            print(f"{name:<24}{'ok' if not found else f'{len(found)} findings'}", flush=True)
+            for finding in found:
+                print(f"    {finding}", flush=True)
+        if run_fuzz(args.only, progress=report):
+            sys.exit(1)
+        return
+
+    if args.write_corpus:
+        write_corpus(args.write_corpus, args.sizes, args.only)
+        return
+
+    if args.suite:
+        baseline = None
+        if args.baseline:
+            with open(args.baseline, "r", encoding="utf-8") as fp:
+                baseline = json.load(fp)
+        print_suite_header(baseline)
+        results = run_suite(args.sizes, args.only, memory=not args.no_memory,
+                            progress=lambda key, result: print_suite_row(key, result, baseline))
+        if args.update_baseline:
+            with open(args.update_baseline, "w", encoding="utf-8") as fp:
+                json.dump(results, fp, indent=2, sort_keys=True)
+            print(f"基准已保存: {args.update_baseline}")
+        if baseline:
+            regressions = compare_to_baseline(results, baseline)
+            for regression in regressions:
+                print(f"退化: {regression}")
+            if regressions:
+                sys.exit(1)
+        return
+
+    if args.import_time:
+        report_import_time(args.import_time)
+        return
+
+    if args.span_memory:
+        print(f"{'highlighter':<24}{'spans':>10}{'tuples KiB':>12}{'packed KiB':>12}{'saved':>8}")
+        for name, result in measure_span_memory(args.span_memory, args.only).items():
+            saved = 1 - result["packed_kib"] / result["tuples_kib"] if result["tuples_kib"] else 0
+            print(f"{name:<24}{result['spans']:>10}{result['tuples_kib']:>12.0f}"
+                  f"{result['packed_kib']:>12.0f}{saved:>8.0%}", flush=True)
+        return
+
+    if args.ast:
+        nodes, rate = measure_ast_visits(args.ast, args.min_time)
+        print(f"{nodes} nodes, {rate / 1000:.0f}k nodes/sec")
+        return
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as fp:
+            baseline = json.load(fp)
+
+    results = run_benchmark(args.lines, args.min_time, args.only)
+
+    print(f"{'highlighter':<24}{'passes/sec':>12}", end="")
+    print(f"{'before':>12}{'speedup':>10}" if baseline else "")
+    for name, rate in results.items():
+        print(f"{name:<24}{rate:>12.2f}", end="")
+        if baseline and name in baseline:
+            print(f"{baseline[name]:>12.2f}{rate / baseline[name]:>9.2f}x")
+        else:
+            print()
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as fp:
+            json.dump(results, fp, indent=2)
+        print(f"结果已保存: {args.save}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+代码检查性能测试脚本
+对比常驻的进程内检查引擎与每次启动 flake8 进程的单次检查延迟，
+或测量工作区检查的速度（文件/秒）
+
+用法:
+    python tools/benchmark_lint.py                        # 检查默认的几个文件
+    python tools/benchmark_lint.py --runs 20 FILE ...     # 指定文件和每个文件的检查次数
+    python tools/benchmark_lint.py --workspace 5000       # 生成 5000 个文件的工作区并检查
+"""
+
+import argparse
+import contextlib
+import io
+import multiprocessing
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# 项目根目录
+PROJECT_ROOT = Path(__file__).parent.parent
+
+# 默认检查的文件，覆盖小、中、大三种规模
+DEFAULT_FILES = (
+    PROJECT_ROOT / "test" / "test_data" / "sample_python.py",
+    PROJECT_ROOT / "library" / "highlight_policy.py",
+    PROJECT_ROOT / "library" / "multi_file_editor.py",
+)
+
+
+def time_check(check, code: str, runs: int) -> float:
+    """
+    测量单次检查的耗时
+
+    Args:
+        check: 接受代码的检查函数
+        code: 代码内容
+        runs: 检查次数，取中位数
+
+    Returns:
+        耗时（毫秒）
+    """
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        check(code)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def measure_latency(paths, runs: int, subprocess_path: bool = True) -> dict:
+    """
+    对每个文件分别测量进程内引擎与 flake8 命令的检查延迟
+
+    Args:
+        paths: 文件路径列表
+        runs: 每个文件的检查次数
+        subprocess_path: 是否同时测量 flake8 命令，没有安装 flake8 时不测量
+
+    Returns:
+        {文件名: {"lines": 行数, "results": 结果数, "engine_ms": 耗时, "subprocess_ms": 耗时或 None}}
+    """
+    paths = [Path(path).resolve() for path in paths]
+    sys.path.insert(0, str(PROJECT_ROOT))
+    os.chdir(PROJECT_ROOT)
+    from library.static_checker.lint_engine import get_lint_engine, run_flake8
+
+    engine = get_lint_engine()
+    if not engine.available:
+        raise RuntimeError("进程内检查需要安装 pyflakes 和 pycodestyle")
+    subprocess_path = subprocess_path and shutil.which("flake8") is not None
+
+    results = {}
+    for path in paths:
+        code = path.read_text(encoding="utf-8")
+        # 第一次检查包含加载模块的时间，只在启动时发生一次
+        found = engine.check(code)
+        results[path.name] = {
+            "lines": code.count("\n") + 1,
+            "results": len(found),
+            "engine_ms": time_check(engine.check, code, runs),
+            "subprocess_ms": time_check(run_flake8, code, runs) if subprocess_path else None,
+        }
+    return results
+
+
+def create_workspace(root: Path, file_count: int, files_per_dir: int = 50) -> list:
+    """
+    用项目自己的 Python 文件生成工作区，每个文件末尾加一行不同的代码，内容各不相同
+
+    Args:
+        root: 工作区目录
+        file_count: 文件数量
+        files_per_dir: 每个子目录中的文件数量
+
+    Returns:
+        生成的文件路径列表
+    """
+    sources = sorted(path for folder in ("library", "ui", "operations")
+                     for path in (PROJECT_ROOT / folder).rglob("*.py"))
+    codes = [path.read_text(encoding="utf-8") for path in sources]
+    paths = []
+    for index in range(file_count):
+        folder = root / f"package_{index // files_per_dir:03d}"
+        folder.mkdir(parents=True, exist_ok=True)
+        path = folder / f"module_{index:05d}.py"
+        code = codes[index % len(codes)]
+        path.write_text(f"{code.rstrip()}\n\nWORKSPACE_INDEX = {index}\n", encoding="utf-8")
+        paths.append(path)
+    return paths
+
+
+def measure_workspace(file_count: int, workers: int = None, modified: float = 0.01) -> dict:
+    """
+    在生成的工作区上测量工作区检查的速度
+
+    依次测量：没有缓存时的检查、不修改文件再次检查、重启后（只有缓存目录）再次检查、
+    修改一部分文件后再次检查
+
+    Args:
+        file_count: 文件数量
+        workers: 进程数，默认与 CPU 核数相同
+        modified: 最后一次检查前修改的文件比例
+
+    Returns:
+        {检查名称: {"files": 文件数, "checked": 检查的文件数, "cached": 使用缓存的文件数,
+                    "seconds": 耗时, "files_per_second": 速度}}
+    """
+    sys.path.insert(0, str(PROJECT_ROOT))
+    os.chdir(PROJECT_ROOT)
+    from library.static_checker import lint_cache
+    from library.static_checker.lint_cache import LintCache
+    from library.static_checker.symbol_checker import StaticCheckerFactory
+    from library.static_checker.workspace_lint import WorkspaceLint, lint_sources
+
+    factory = StaticCheckerFactory()
+    results = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir) / "workspace"
+        cache_dir = str(Path(temp_dir) / "cache")
+        paths = create_workspace(root, file_count)
+        workers = workers or os.cpu_count() or 1
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        try:
+            # 先启动工作进程，只测量检查本身
+            list(pool.map(lint_sources, [["x = 1\n"]] * workers))
+
+            def run(name):
+                lint = WorkspaceLint(str(root), factory, pool=pool)
+                # 检查器每个文件都会打印调试信息，测量时不输出
+                with contextlib.redirect_stdout(io.StringIO()):
+                    lint.run()
+                results[name] = {
+                    "files": lint.files,
+                    "checked": lint.checked,
+                    "cached": lint.cached,
+                    "seconds": lint.seconds,
+                    "files_per_second": lint.files_per_second,
+                }
+
+            lint_cache._global_lint_cache = LintCache(cache_dir=cache_dir)
+            run("cold")
+            run("unchanged")
+            lint_cache._global_lint_cache = LintCache(cache_dir=cache_dir)
+            run("restart")
+            for path in paths[::max(1, round(1 / modified))]:
+                with open(path, "a", encoding="utf-8") as fp:
+                    fp.write("MODIFIED = True\n")
+            run("modified")
+        finally:
+            pool.shutdown()
+            lint_cache._global_lint_cache = None
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="对比进程内检查与 flake8 命令的单次检查延迟")
+    parser.add_argument("files", nargs="*", help="要检查的 Python 文件")
+    parser.add_argument("--runs", type=int, default=10, help="每个文件的检查次数")
+    parser.add_argument("--workspace", type=int, metavar="N", help="生成 N 个文件的工作区，测量工作区检查的速度")
+    parser.add_argument("--workers", type=int, help="工作区检查的进程数，默认与 CPU 核数相同")
+    args = parser.parse_args()
+
+    if args.workspace:
+        results = measure_workspace(args.workspace, args.workers)
+        print(f"{'run':<12}{'files':>8}{'checked':>9}{'cached':>8}{'seconds':>10}{'files/s':>10}")
+        for name, result in results.items():
+            print(f"{name:<12}{result['files']:>8}{result['checked']:>9}{result['cached']:>8}"
+                  f"{result['seconds']:>10.2f}{result['files_per_second']:>10.0f}")
+        return
+
+    results = measure_latency(args.files or DEFAULT_FILES, args.runs)
+    print(f"{'file':<28}{'lines':>8}{'results':>9}{'engine ms':>12}{'flake8 ms':>12}{'speedup':>10}")
+    for name, result in results.items():
+        print(f"{name:<28}{result['lines']:>8}{result['results']:>9}{result['engine_ms']:>12.1f}", end="")
+        if result["subprocess_ms"] is None:
+            print(f"{'-':>12}{'-':>10}")
+        else:
+            speedup = result["subprocess_ms"] / result["engine_ms"]
+            print(f"{result['subprocess_ms']:>12.1f}{speedup:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -75,6 +75,9 @@ PYINSTALLER_CONFIG = {
         "logging",
         "datetime",
         "traceback",
+        # 检查引擎在第一次检查时才导入
+        "pyflakes.checker",
+        "pycodestyle",
     ]
 }
 
@@ -24,6 +24,8 @@ class FileBrowser:
         """
         self.parent_frame = parent_frame
         self.app = app
+        # 当前打开的文件夹，检查工作区时检查这个文件夹
+        self.root_path = os.path.abspath(".")
         self.style = get_style()
         
         # 创建文件树标题栏
@@ -245,6 +247,7 @@ class FileBrowser:
         Args:
             folder_path: 文件夹路径
         """
+        self.root_path = os.path.abspath(folder_path)
         # 清空现有的文件树
         for item in self.tree.get_children():
             self.tree.delete(item)
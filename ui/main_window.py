@@ -29,7 +29,8 @@ class MainWindow(Tk):
         self.style = get_style()
         apply_modern_style(self, "window")
         
-        # 创建UI组件
+        # 创建UI组件，状态栏需要先于主分割窗口放置在底部
+        self._create_status_bar()
         self._create_main_paned()
         self._create_file_tree_frame()
         self._create_code_paned()
@@ -39,6 +40,25 @@ class MainWindow(Tk):
         # 强制更新布局
         self.update_idletasks()
     
+    def _create_status_bar(self):
+        """
+        创建状态栏，用于显示大文件的高亮降级状态
+        """
+        status_frame = Frame(self, bg="#007acc", height=22)
+        status_frame.pack(side="bottom", fill="x")
+        status_frame.pack_propagate(False)
+        
+        self.highlight_status_label = Label(
+            status_frame,
+            text="",
+            font=("Microsoft YaHei UI", 9),
+            bg="#007acc",
+            fg="#ffffff",
+            padx=10,
+            anchor="e"
+        )
+        self.highlight_status_label.pack(side="right")
+    
     def _create_main_paned(self):
         """
         创建主分割窗口
@@ -139,7 +159,9 @@ class MainWindow(Tk):
         
         self.flake8_tree = Treeview(
             tree_frame,
-            columns=("icon", "line", "column", "code", "message"),
+            # file 列不显示，工作区检查的结果在这一列保存文件路径
+            columns=("icon", "line", "column", "code", "message", "file"),
+            displaycolumns=("icon", "line", "column", "code", "message"),
             show="tree headings",
             selectmode="browse",
             style="Flake8.Treeview",
@@ -194,6 +216,9 @@ class MainWindow(Tk):
         
         item = selection[0]
         values = self.flake8_tree.item(item, "values")
+        if len(values) >= 6 and values[5]:
+            # 工作区检查的结果，先打开对应的文件
+            self._open_file(values[5])
         if len(values) >= 2:
             try:
                 line_num = int(values[1])
@@ -201,6 +226,15 @@ class MainWindow(Tk):
             except (ValueError, IndexError):
                 pass
 
+    def _open_file(self, file_path):
+        """在选项卡中打开文件，已经打开时切换到该选项卡"""
+        from library.multi_file_editor import MultiFileEditor
+        for widget in self.winfo_children():
+            for child in widget.winfo_children():
+                if isinstance(child, MultiFileEditor):
+                    child.open_file_in_new_tab(file_path)
+                    return
+    
     def _goto_line(self, line_num):
         """跳转到指定行"""
         from library.multi_file_editor import MultiFileEditor
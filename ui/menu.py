@@ -67,6 +67,7 @@ class MenuBar:
         self.filemenu.add_command(command=self.app.editor_ops.save_as_file, label=t("menus.save-as-file"))
         self.filemenu.add_separator()
         self.filemenu.add_command(command=self.app.editor_ops.show_current_file_dir, label=t("menus.show-file-dir"))
+        self.filemenu.add_command(command=lambda: self.app.multi_editor.toggle_follow(), label=t("menus.follow-log"))
         self.filemenu.add_separator()
         self.filemenu.add_command(command=self.app.editor_ops.exit_editor, label=t("menus.exit"))
     
@@ -91,6 +92,9 @@ class MenuBar:
         self.menu.add_cascade(menu=self.runmenu, label=t("menus.run"))
         self.runmenu.add_command(command=self.app.editor_ops.run, label=t("menus.run"))
         self.runmenu.add_command(command=self.app.editor_ops.clear_printarea, label=t("menus.clear-output"))
+        self.runmenu.add_separator()
+        self.runmenu.add_command(command=self.check_workspace, label=t("menus.check-workspace"))
+        self.runmenu.add_command(command=lambda: self.app.multi_editor.clear_workspace_check(), label=t("menus.clear-workspace-check"))
     
     def _create_popup_menu(self):
         """
@@ -216,6 +220,12 @@ class MenuBar:
             # 更新文件树
             self.app.file_browser.open_folder(folder_path)
     
+    def check_workspace(self):
+        """
+        检查文件浏览器中打开的文件夹
+        """
+        self.app.multi_editor.check_workspace(self.app.file_browser.root_path)
+    
     def open_settings(self):
         """
         打开设置面板
@@ -9,6 +9,7 @@ from tkinter import (Frame, Label, Button, Text, Scrollbar, Entry, StringVar,
 from tkinter.font import Font
 from tkinter.ttk import Notebook
 from library.ui_styles import apply_modern_style, get_style
+from library.theme_registry import get_theme_registry
 from pathlib import Path
 from i18n import t
 
@@ -353,14 +354,12 @@ class SettingsTab(Frame):
                 font = Font(family=font_var.get(), size=fontsize_var.get())
                 current_editor.configure(font=font)
                 
-                # 更新主题
-                if self.codehighlighter:
-                    theme_file = Path(__file__).parent.parent / "asset" / "theme" / f"{theme_var.get()}.json"
-                    if theme_file.exists():
-                        with open(theme_file, "r", encoding="utf-8") as f:
-                            theme_data = json.load(f)
-                        self.codehighlighter.set_theme(theme_data)
-                        self.codehighlighter.highlight()
+                # 更新主题，所有选项卡共享同一份解析好的主题
+                theme = get_theme_registry().get(theme_var.get())
+                if theme is not None:
+                    self.app.multi_editor.apply_theme_to_all(theme)
+                    if self.codehighlighter:
+                        self.codehighlighter.set_theme(theme)
             
             # 显示保存成功消息
             from tkinter import messagebox